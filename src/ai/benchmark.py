@@ -0,0 +1,371 @@
+"""
+Offline benchmark for the resume and interview scoring pipelines.
+
+Runner.run and the OCR chat client are replaced by a deterministic local stub with
+configurable latency and failure injection, so pipeline changes can be measured
+without network access:
+
+    python -m src.ai.benchmark --repeat 3 --parallel 2 --latency-ms 400
+
+PDF extraction backends can be compared on a local corpus of resumes:
+
+    python -m src.ai.benchmark --pipeline pdf --pdf-corpus 'resumes/*.pdf'
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import re
+import time
+import typing
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# The real clients are constructed at import time; make that work offline.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-stub-key")
+os.environ.setdefault("OPENAI_AGENTS_DISABLE_TRACING", "1")
+
+import openai  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from . import llm_scheduler, resume_extractor, resume_scorer  # noqa: E402
+from .interview_scorer import InterviewQAItem, score_interview  # noqa: E402
+from .metrics import WaitTimeStats  # noqa: E402
+from .pdf_extract import PDF_BACKENDS, PDF_MAX_PAGES, extract_pdf_text  # noqa: E402
+from .prompt_budget import count_tokens  # noqa: E402
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "examples")
+
+_RANGE_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(?:-|to|hingga|sampai)\s*(\d+(?:\.\d+)?)"
+)
+
+
+class InjectedFailure(Exception):
+    """Non-retryable failure raised by the stub model."""
+
+
+class StubModel:
+    """
+    Deterministic stand-in for the model. Outputs are built from the agent's
+    output_type schema with a seeded RNG; numeric fields respect ranges like
+    "(0.0 to 4.0)" or "(0.0-10.0)" found in the field description.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 300.0,
+        jitter_ms: float = 100.0,
+        ms_per_1k_tokens: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_kind: str = "retryable",
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.failure_rate = failure_rate
+        self.failure_kind = failure_kind
+        self._rng = random.Random(seed)
+        self._in_flight = 0
+        self.peak_concurrency = 0
+        self._timings: Dict[str, WaitTimeStats] = {}
+        self._calls: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._prompt_tokens: Dict[str, int] = {}
+
+    async def _respond(self, stage: str, prompt: str) -> None:
+        tokens = count_tokens(prompt)
+        self._calls[stage] = self._calls.get(stage, 0) + 1
+        self._prompt_tokens[stage] = self._prompt_tokens.get(stage, 0) + tokens
+        delay_ms = (
+            self.latency_ms
+            + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            + self.ms_per_1k_tokens * tokens / 1000
+        )
+        fail = self._rng.random() < self.failure_rate
+
+        self._in_flight += 1
+        self.peak_concurrency = max(self.peak_concurrency, self._in_flight)
+        started = time.monotonic()
+        try:
+            await asyncio.sleep(max(0.0, delay_ms) / 1000)
+            if fail:
+                self._failures[stage] = self._failures.get(stage, 0) + 1
+                if self.failure_kind == "retryable":
+                    raise openai.APITimeoutError(request=None)
+                raise InjectedFailure(f"Injected failure in {stage}")
+        finally:
+            self._in_flight -= 1
+            self._timings.setdefault(stage, WaitTimeStats()).record(time.monotonic() - started)
+
+    def _value(self, annotation: Any, description: Optional[str]) -> Any:
+        origin = typing.get_origin(annotation)
+        if origin is typing.Union:
+            args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+            return self._value(args[0], description)
+        if origin in (list, List):
+            (item_type,) = typing.get_args(annotation) or (str,)
+            return [self._value(item_type, description) for _ in range(2)]
+        if origin in (dict, Dict):
+            return {}
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self.build(annotation)
+        if annotation is bool:
+            return False
+        if annotation is int:
+            return 1
+        if annotation is float:
+            low, high = 0.0, 10.0
+            match = _RANGE_PATTERN.search(description or "")
+            if match:
+                low, high = float(match.group(1)), float(match.group(2))
+            return round(self._rng.uniform(low + (high - low) * 0.4, high * 0.9), 2)
+        return "stub " * 12
+
+    def build(self, model: type) -> BaseModel:
+        values = {
+            name: self._value(field.annotation, field.description)
+            for name, field in model.model_fields.items()
+        }
+        return model(**values)
+
+    async def run(self, agent: Any, input_data: Any, context: Any = None, **_: Any):
+        await self._respond(agent.name, str(input_data))
+        return SimpleNamespace(final_output=self.build(agent.output_type))
+
+    async def create_chat_completion(self, **kwargs: Any):
+        await self._respond("Resume OCR", json.dumps(kwargs.get("messages", []), default=str))
+        message = SimpleNamespace(content="stub " * 200)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            stage: {
+                "calls": calls,
+                "failures": self._failures.get(stage, 0),
+                "avg_prompt_tokens": self._prompt_tokens.get(stage, 0) // calls,
+                "model_time": self._timings[stage].snapshot(),
+            }
+            for stage, calls in self._calls.items()
+        }
+
+
+@contextlib.contextmanager
+def stub_models(stub: StubModel, scheduler: llm_scheduler.LLMScheduler):
+    """Patch Runner, the OCR client and the shared LLM scheduler for the duration."""
+    original_runner = resume_scorer.Runner
+    original_client = resume_extractor.client
+    original_scheduler = llm_scheduler._scheduler
+    resume_scorer.Runner = SimpleNamespace(run=stub.run)
+    resume_extractor.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=stub.create_chat_completion))
+    )
+    llm_scheduler._scheduler = scheduler
+    try:
+        yield stub
+    finally:
+        resume_scorer.Runner = original_runner
+        resume_extractor.client = original_client
+        llm_scheduler._scheduler = original_scheduler
+
+
+def load_fixtures(pattern: str) -> List[Dict[str, Any]]:
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, pattern)))
+    fixtures = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fixture_file:
+            data = json.load(fixture_file)
+        data["_name"] = os.path.basename(path)
+        fixtures.append(data)
+    return fixtures
+
+
+async def _run_interview(fixture: Dict[str, Any]) -> dict:
+    return await score_interview(
+        qa_pairs=[InterviewQAItem(**qa) for qa in fixture["qa_pairs"]],
+        job_description=fixture["job_description"],
+        job_title=fixture.get("job_title"),
+        resume_text=fixture.get("resume_text"),
+        target_skills=fixture.get("target_skills"),
+    )
+
+
+async def _run_resume(fixture: Dict[str, Any]) -> dict:
+    # The fixtures are interview transcripts; the answers stand in for resume text
+    # when no resume_text is given, which keeps payload sizes realistic.
+    resume_text = fixture.get("resume_text") or "\n".join(
+        qa["answer"] for qa in fixture["qa_pairs"]
+    )
+    return await resume_scorer.score_resume(
+        resume_text, fixture["job_description"], fixture.get("target_skills") or []
+    )
+
+
+PIPELINES = {"interview": _run_interview, "resume": _run_resume}
+
+
+async def run_benchmark(
+    pipeline: str,
+    fixtures: List[Dict[str, Any]],
+    stub: StubModel,
+    repeat: int = 1,
+    parallel: int = 1,
+    scheduler: Optional[llm_scheduler.LLMScheduler] = None,
+) -> Dict[str, Any]:
+    """Replay every fixture `repeat` times with at most `parallel` pipelines running at once."""
+    scheduler = scheduler or llm_scheduler.LLMScheduler()
+    runner = PIPELINES[pipeline]
+    gate = asyncio.Semaphore(max(1, parallel))
+    durations = WaitTimeStats()
+    errors: List[str] = []
+
+    async def one(fixture: Dict[str, Any]) -> None:
+        async with gate:
+            started = time.monotonic()
+            try:
+                await runner(fixture)
+            except Exception as exc:
+                errors.append(f"{fixture['_name']}: {type(exc).__name__}: {exc}")
+            durations.record(time.monotonic() - started)
+
+    jobs = [fixture for _ in range(repeat) for fixture in fixtures]
+    with stub_models(stub, scheduler):
+        started = time.monotonic()
+        # The pipelines print debug output on every call; keep the report readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(one(fixture) for fixture in jobs))
+        wall_time = time.monotonic() - started
+
+    scheduler_metrics = scheduler.metrics()
+    return {
+        "pipeline": pipeline,
+        "runs": len(jobs),
+        "failed_runs": len(errors),
+        "errors": errors[:10],
+        "wall_time_seconds": round(wall_time, 3),
+        "pipeline_time": durations.snapshot(),
+        "peak_model_concurrency": stub.peak_concurrency,
+        "llm_retries": scheduler_metrics["retries"],
+        "stages": {
+            stage: {
+                **stats,
+                "queue_wait": scheduler_metrics["stages"].get(stage, {}).get("queue_wait"),
+                "latency": scheduler_metrics["stages"].get(stage, {}).get("latency"),
+            }
+            for stage, stats in stub.report().items()
+        },
+    }
+
+
+def _page_count(path: str, max_pages: int) -> int:
+    from PyPDF2 import PdfReader
+
+    try:
+        return min(len(PdfReader(path).pages), max_pages)
+    except Exception:
+        return 0
+
+
+def _backend_available(name: str) -> bool:
+    if name != "pypdfium2":
+        return True
+    try:
+        import pypdfium2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+async def run_pdf_benchmark(
+    paths: List[str],
+    backends: List[str],
+    repeat: int = 1,
+    max_pages: int = PDF_MAX_PAGES,
+) -> Dict[str, Any]:
+    """Extract every document `repeat` times per backend through the worker pool."""
+    pages = sum(_page_count(path, max_pages) for path in paths) * repeat
+    report: Dict[str, Any] = {"documents": len(paths) * repeat, "pages": pages, "backends": {}}
+    for backend in backends:
+        if not _backend_available(backend):
+            report["backends"][backend] = {"skipped": "not installed"}
+            continue
+        documents = [path for _ in range(repeat) for path in paths]
+        started = time.monotonic()
+        outcomes = await asyncio.gather(
+            *(extract_pdf_text(path, backend=backend, max_pages=max_pages) for path in documents),
+            return_exceptions=True,
+        )
+        wall_time = time.monotonic() - started
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        report["backends"][backend] = {
+            "wall_time_seconds": round(wall_time, 3),
+            "documents_per_second": round(len(documents) / wall_time, 2) if wall_time else None,
+            "pages_per_second": round(pages / wall_time, 2) if wall_time else None,
+            "characters": sum(len(outcome) for outcome in outcomes if isinstance(outcome, str)),
+            "failures": len(failures),
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pipeline", choices=sorted(PIPELINES) + ["pdf"], default="interview")
+    parser.add_argument("--fixtures", default="score-interview-*.json", help="Glob under examples/")
+    parser.add_argument("--pdf-corpus", help="Glob of PDF files for --pipeline pdf")
+    parser.add_argument("--pdf-backends", default=",".join(PDF_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--parallel", type=int, default=1, help="Pipelines running concurrently")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=0.0, help="Extra latency per prompt size")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-kind", choices=["retryable", "fatal"], default="retryable")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-concurrent", type=int, default=llm_scheduler.LLM_MAX_CONCURRENT)
+    parser.add_argument("--rpm", type=int, default=llm_scheduler.LLM_REQUESTS_PER_MINUTE)
+    parser.add_argument("--tpm", type=int, default=llm_scheduler.LLM_TOKENS_PER_MINUTE)
+    args = parser.parse_args(argv)
+
+    if args.pipeline == "pdf":
+        paths = sorted(glob.glob(args.pdf_corpus or ""))
+        if not paths:
+            parser.error("--pipeline pdf needs --pdf-corpus matching at least one PDF")
+        backends = [name.strip() for name in args.pdf_backends.split(",") if name.strip()]
+        report = asyncio.run(run_pdf_benchmark(paths, backends, args.repeat))
+        print(json.dumps(report, indent=2))
+        return
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"No fixtures match {args.fixtures} in {os.path.abspath(EXAMPLES_DIR)}")
+
+    stub = StubModel(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        ms_per_1k_tokens=args.ms_per_1k_tokens,
+        failure_rate=args.failure_rate,
+        failure_kind=args.failure_kind,
+        seed=args.seed,
+    )
+    scheduler = llm_scheduler.LLMScheduler(
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_concurrent=args.max_concurrent,
+        retry_base_delay=0.05,
+        retry_max_delay=0.5,
+    )
+    report = asyncio.run(
+        run_benchmark(args.pipeline, fixtures, stub, args.repeat, args.parallel, scheduler)
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
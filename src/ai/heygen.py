@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from typing import Any
 
+import httpx
 from dotenv import load_dotenv
 
+from .http_client import request_with_retries
+
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", "..", ".env"))
 
+logger = logging.getLogger(__name__)
+
 BASE_URL = "https://api.heygen.com"
 
 DEFAULT_AVATAR_LOOK_ID = "74dd6e182f0d415ab740c1097d49304b"
@@ -26,6 +31,8 @@ POLL_MAX_INTERVAL = float(os.getenv("HEYGEN_POLL_MAX_INTERVAL", "10"))
 POLL_TIMEOUT = float(os.getenv("HEYGEN_POLL_TIMEOUT", "600"))
 HTTP_MAX_RETRIES = int(os.getenv("HEYGEN_HTTP_MAX_RETRIES", "5"))
 HTTP_TIMEOUT = float(os.getenv("HEYGEN_HTTP_TIMEOUT", "30"))
+# The public voice/avatar catalogs change rarely; resolved defaults are reused this long.
+CATALOG_TTL_SECONDS = float(os.getenv("HEYGEN_CATALOG_TTL_SECONDS", "21600"))
 
 
 class HeyGenAPIError(Exception):
@@ -44,52 +51,48 @@ class HeyGenClient:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
 
-    def _request(
+    async def _request(
         self,
         method: str,
         path: str,
         *,
         body: dict[str, Any] | None = None,
-        retry_count: int = 0,
     ) -> dict[str, Any]:
         url = f"{self.base_url}{path}"
-        data = None
+        content = None
         headers = {
             "X-Api-Key": self.api_key,
             "Accept": "application/json",
         }
 
         if body is not None:
-            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            content = json.dumps(body, ensure_ascii=False).encode("utf-8")
             headers["Content-Type"] = "application/json; charset=utf-8"
 
-        request = urllib.request.Request(url, data=data, headers=headers, method=method)
-
         try:
-            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
-                raw = response.read().decode("utf-8")
-                return json.loads(raw) if raw else {}
-        except urllib.error.HTTPError as exc:
-            payload = self._read_error_payload(exc)
-            if self._should_retry_http(exc.code, retry_count):
-                wait = self._retry_wait_seconds(exc, retry_count)
-                time.sleep(wait)
-                return self._request(method, path, body=body, retry_count=retry_count + 1)
-
-            message = self._format_api_error(exc.code, payload)
-            raise HeyGenAPIError(message, status_code=exc.code, payload=payload) from exc
-        except (urllib.error.URLError, TimeoutError) as exc:
-            if retry_count < HTTP_MAX_RETRIES:
-                wait = min(POLL_MAX_INTERVAL, POLL_INITIAL_INTERVAL * (2**retry_count))
-                time.sleep(wait)
-                return self._request(method, path, body=body, retry_count=retry_count + 1)
+            response = await request_with_retries(
+                method,
+                url,
+                content=content,
+                headers=headers,
+                timeout=HTTP_TIMEOUT,
+                max_retries=HTTP_MAX_RETRIES,
+                base_delay=POLL_INITIAL_INTERVAL,
+                max_delay=POLL_MAX_INTERVAL,
+            )
+        except httpx.TransportError as exc:
             raise HeyGenAPIError(f"Network failure after retries: {exc}") from exc
 
+        if response.is_error:
+            payload = self._read_error_payload(response)
+            message = self._format_api_error(response.status_code, payload)
+            raise HeyGenAPIError(message, status_code=response.status_code, payload=payload)
+        return response.json() if response.content else {}
+
     @staticmethod
-    def _read_error_payload(exc: urllib.error.HTTPError) -> Any:
+    def _read_error_payload(response: httpx.Response) -> Any:
         try:
-            raw = exc.read().decode("utf-8")
-            return json.loads(raw) if raw else None
+            return response.json() if response.content else None
         except (json.JSONDecodeError, UnicodeDecodeError):
             return None
 
@@ -103,20 +106,7 @@ class HeyGenClient:
                 return f"HTTP {status_code} [{code}]: {message}"
         return f"HTTP {status_code}: unexpected API error"
 
-    @staticmethod
-    def _should_retry_http(status_code: int, retry_count: int) -> bool:
-        if retry_count >= HTTP_MAX_RETRIES:
-            return False
-        return status_code in (408, 409, 425, 429, 500, 502, 503, 504)
-
-    @staticmethod
-    def _retry_wait_seconds(exc: urllib.error.HTTPError, retry_count: int) -> float:
-        retry_after = exc.headers.get("Retry-After")
-        if retry_after and retry_after.isdigit():
-            return float(retry_after)
-        return min(POLL_MAX_INTERVAL, POLL_INITIAL_INTERVAL * (2**retry_count))
-
-    def _get_paginated(
+    async def _get_paginated(
         self,
         path: str,
         params: dict[str, str],
@@ -138,7 +128,7 @@ class HeyGenClient:
                 del query["token"]
 
             qs = urllib.parse.urlencode(query)
-            response = self._request("GET", f"{path}?{qs}")
+            response = await self._request("GET", f"{path}?{qs}")
             batch = response.get("data")
             if isinstance(batch, list):
                 items.extend(item for item in batch if isinstance(item, dict))
@@ -151,16 +141,16 @@ class HeyGenClient:
 
         return items
 
-    def list_indonesian_voices(self) -> list[dict[str, Any]]:
-        return self._get_paginated(
+    async def list_indonesian_voices(self) -> list[dict[str, Any]]:
+        return await self._get_paginated(
             "/v3/voices",
             {"type": "public", "language": "Indonesian"},
             limit=50,
             max_pages=2,
         )
 
-    def list_public_avatars(self) -> list[dict[str, Any]]:
-        return self._get_paginated(
+    async def list_public_avatars(self) -> list[dict[str, Any]]:
+        return await self._get_paginated(
             "/v3/avatars/looks",
             {"ownership": "public"},
             limit=50,
@@ -220,8 +210,12 @@ class HeyGenClient:
 
         return score
 
-    def resolve_indonesian_defaults(self) -> tuple[str, str, str, str]:
-        voices = self.list_indonesian_voices()
+    async def resolve_indonesian_defaults(self) -> tuple[str, str, str, str]:
+        # Both catalogs are independent; fetch them concurrently.
+        voices, looks = await asyncio.gather(
+            self.list_indonesian_voices(),
+            self.list_public_avatars(),
+        )
         if not voices:
             raise HeyGenAPIError("No public Indonesian voices found. Set HEYGEN_VOICE_ID manually.")
 
@@ -229,7 +223,6 @@ class HeyGenClient:
         voice_id = str(best_voice["voice_id"])
         voice_name = str(best_voice.get("name", voice_id))
 
-        looks = self.list_public_avatars()
         if not looks:
             raise HeyGenAPIError("No public avatars found. Set HEYGEN_AVATAR_ID manually.")
 
@@ -241,7 +234,7 @@ class HeyGenClient:
 
         return avatar_id, voice_id, avatar_name, voice_name
 
-    def create_avatar_video(
+    async def create_avatar_video(
         self,
         *,
         avatar_id: str,
@@ -269,25 +262,25 @@ class HeyGenClient:
         if voice_locale:
             payload["voice_settings"] = {"locale": voice_locale}
 
-        response = self._request("POST", "/v3/videos", body=payload)
+        response = await self._request("POST", "/v3/videos", body=payload)
         data = response.get("data")
         if not isinstance(data, dict) or not data.get("video_id"):
             raise HeyGenAPIError("Create video response missing data.video_id", payload=response)
         return data
 
-    def get_video(self, video_id: str) -> dict[str, Any]:
-        response = self._request("GET", f"/v3/videos/{video_id}")
+    async def get_video(self, video_id: str) -> dict[str, Any]:
+        response = await self._request("GET", f"/v3/videos/{video_id}")
         data = response.get("data")
         if not isinstance(data, dict):
             raise HeyGenAPIError("Get video response missing data object", payload=response)
         return data
 
-    def poll_until_complete(self, video_id: str) -> dict[str, Any]:
+    async def poll_until_complete(self, video_id: str) -> dict[str, Any]:
         deadline = time.monotonic() + POLL_TIMEOUT
         interval = POLL_INITIAL_INTERVAL
 
         while time.monotonic() < deadline:
-            video = self.get_video(video_id)
+            video = await self.get_video(video_id)
             status = video.get("status", "unknown")
 
             if status == "completed":
@@ -297,7 +290,7 @@ class HeyGenClient:
                 message = video.get("failure_message", "Video generation failed.")
                 raise HeyGenAPIError(f"Video failed [{code}]: {message}", payload=video)
 
-            time.sleep(interval)
+            await asyncio.sleep(interval)
             interval = min(POLL_MAX_INTERVAL, interval * 2)
 
         raise HeyGenAPIError(
@@ -305,11 +298,77 @@ class HeyGenClient:
         )
 
 
+class CatalogDefaultsCache:
+    """
+    Process-wide cache of resolve_indonesian_defaults() results per API base URL.
+
+    Fresh entries are returned directly. Stale entries are still returned immediately
+    while one background task refreshes them; only the very first lookup waits on
+    the catalog pages. Concurrent misses share the same fetch.
+    """
+
+    def __init__(self, ttl_seconds: float = CATALOG_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, tuple[float, tuple[str, str, str, str]]] = {}
+        self._refreshes: dict[str, asyncio.Task] = {}
+
+    async def get(self, client: HeyGenClient) -> tuple[str, str, str, str]:
+        key = client.base_url
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, defaults = entry
+            if time.monotonic() - fetched_at >= self.ttl_seconds:
+                self.refresh(client)
+            return defaults
+        return await asyncio.shield(self.refresh(client))
+
+    def refresh(self, client: HeyGenClient) -> asyncio.Task:
+        key = client.base_url
+        task = self._refreshes.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._fetch(client))
+            self._refreshes[key] = task
+        return task
+
+    async def _fetch(self, client: HeyGenClient) -> tuple[str, str, str, str]:
+        key = client.base_url
+        try:
+            defaults = await client.resolve_indonesian_defaults()
+        except Exception as exc:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise
+            logger.warning("HeyGen catalog refresh failed, keeping cached defaults: %s", exc)
+            return entry[1]
+        self._entries[key] = (time.monotonic(), defaults)
+        logger.info("HeyGen catalog defaults refreshed: avatar=%s voice=%s", defaults[0], defaults[1])
+        return defaults
+
+
+catalog_defaults_cache = CatalogDefaultsCache()
+
+
+async def warm_catalog_defaults() -> None:
+    """Start resolving catalog defaults in the background so the first video request doesn't wait."""
+    api_key = os.getenv("HEYGEN_API_KEY", "")
+    try:
+        client = HeyGenClient(api_key)
+    except ValueError:
+        return
+    task = catalog_defaults_cache.refresh(client)
+    task.add_done_callback(_log_warmup_failure)
+
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("HeyGen catalog warm-up failed: %s", task.exception())
+
+
 def _needs_default_resolution(value: str | None) -> bool:
     return not value or value.startswith("YOUR_")
 
 
-def _resolve_avatar_voice(
+async def _resolve_avatar_voice(
     client: HeyGenClient,
     *,
     avatar_id: str | None,
@@ -323,7 +382,7 @@ def _resolve_avatar_voice(
 
     if auto_resolve or _needs_default_resolution(resolved_avatar) or _needs_default_resolution(resolved_voice):
         catalog_avatar, catalog_voice, catalog_avatar_name, catalog_voice_name = (
-            client.resolve_indonesian_defaults()
+            await catalog_defaults_cache.get(client)
         )
         if auto_resolve or _needs_default_resolution(resolved_avatar):
             resolved_avatar = catalog_avatar
@@ -335,7 +394,7 @@ def _resolve_avatar_voice(
     return resolved_avatar, resolved_voice, avatar_name, voice_name
 
 
-def generate_avatar_video(
+async def generate_avatar_video(
     *,
     script: str,
     title: str | None = None,
@@ -352,14 +411,14 @@ def generate_avatar_video(
     api_key = os.getenv("HEYGEN_API_KEY", "")
     client = HeyGenClient(api_key)
 
-    resolved_avatar, resolved_voice, avatar_name, voice_name = _resolve_avatar_voice(
+    resolved_avatar, resolved_voice, avatar_name, voice_name = await _resolve_avatar_voice(
         client,
         avatar_id=avatar_id,
         voice_id=voice_id,
         auto_resolve=auto_resolve_defaults,
     )
 
-    created = client.create_avatar_video(
+    created = await client.create_avatar_video(
         avatar_id=resolved_avatar,
         voice_id=resolved_voice,
         script=script,
@@ -382,7 +441,7 @@ def generate_avatar_video(
     }
 
     if wait_for_completion:
-        completed = client.poll_until_complete(video_id)
+        completed = await client.poll_until_complete(video_id)
         result.update(
             {
                 "status": completed.get("status", "completed"),
@@ -399,11 +458,11 @@ def generate_avatar_video(
     return result
 
 
-def get_video_status(video_id: str) -> dict[str, Any]:
+async def get_video_status(video_id: str) -> dict[str, Any]:
     """Fetch current HeyGen video status by ID."""
     api_key = os.getenv("HEYGEN_API_KEY", "")
     client = HeyGenClient(api_key)
-    video = client.get_video(video_id)
+    video = await client.get_video(video_id)
     return {
         "video_id": video_id,
         "status": video.get("status"),
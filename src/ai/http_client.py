@@ -0,0 +1,156 @@
+"""
+Shared HTTP clients for outbound calls (HeyGen, URL downloads, transcript fetches).
+
+One pooled httpx client per process keeps connections (and TLS sessions) alive across
+requests, negotiates HTTP/2 when the `h2` package is installed, and caps connections
+per host. Retries back off with asyncio.sleep instead of parking a thread.
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import logging
+import os
+import random
+import urllib.parse
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+USER_AGENT = "AkuMaju-API/1.0"
+
+RETRYABLE_HTTP_STATUS = (408, 409, 425, 429, 500, 502, 503, 504)
+TRANSIENT_HTTP_ERRORS = (httpx.TransportError,)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_client: Optional[httpx.Client] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide async client, bound to the running event loop."""
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=_limits(),
+            timeout=_timeout(),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+        _async_client_loop = loop
+        _host_slots.clear()
+    return _async_client
+
+
+def get_sync_http_client() -> httpx.Client:
+    """
+    Pooled client for code that already runs in a worker thread (the boto3-based
+    transcription pipeline); httpx.Client is safe to share between threads.
+    """
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=_limits(),
+            timeout=_timeout(),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+    return _sync_client
+
+
+async def close_http_clients() -> None:
+    global _async_client, _sync_client
+    async_client, _async_client = _async_client, None
+    sync_client, _sync_client = _sync_client, None
+    if async_client is not None and not async_client.is_closed:
+        await async_client.aclose()
+    if sync_client is not None:
+        sync_client.close()
+
+
+@contextlib.asynccontextmanager
+async def host_slot(url: str) -> AsyncIterator[None]:
+    """Hold one of HTTP_MAX_PER_HOST connections to the URL's host."""
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    slots = _host_slots.get(host)
+    if slots is None:
+        slots = _host_slots[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    async with slots:
+        yield
+
+
+def retry_delay(
+    attempt: int,
+    base_delay: float,
+    max_delay: float,
+    response: Optional[httpx.Response] = None,
+) -> float:
+    """Honour a numeric Retry-After, otherwise exponential backoff with jitter."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(max_delay, float(retry_after))
+    delay = min(max_delay, base_delay * (2**attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+async def request_with_retries(
+    method: str,
+    url: str,
+    *,
+    max_retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retry_statuses: Iterable[int] = RETRYABLE_HTTP_STATUS,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Send a request on the shared client, retrying transport errors and retryable
+    statuses. The final response is returned whatever its status; callers decide
+    how to surface errors.
+    """
+    client = get_http_client()
+    retry_statuses = tuple(retry_statuses)
+    attempt = 0
+    while True:
+        response: Optional[httpx.Response] = None
+        try:
+            async with host_slot(url):
+                response = await client.request(method, url, **kwargs)
+            if response.status_code not in retry_statuses or attempt >= max_retries:
+                return response
+        except TRANSIENT_HTTP_ERRORS as exc:
+            if attempt >= max_retries:
+                raise
+            logger.warning("%s %s failed (%s), retrying", method, url, type(exc).__name__)
+
+        delay = retry_delay(attempt, base_delay, max_delay, response)
+        attempt += 1
+        await asyncio.sleep(delay)
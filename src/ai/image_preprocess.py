@@ -0,0 +1,91 @@
+"""Image preparation for vision OCR: orientation, grayscale, downscale, re-encode."""
+
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, NamedTuple, Optional
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Longest side sent to the model; 2000px keeps resume body text legible.
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "2000"))
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", "80"))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+
+
+class PreparedImage(NamedTuple):
+    data: bytes
+    media_type: str
+    width: int
+    height: int
+    sha256: str
+
+
+def prepare_image(image: Image.Image, max_side: int = OCR_MAX_SIDE) -> PreparedImage:
+    """Grayscale, downscale and JPEG-encode an already oriented image."""
+    image = image.convert("L")
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=OCR_JPEG_QUALITY, optimize=True)
+    return PreparedImage(
+        data=buffer.getvalue(),
+        media_type="image/jpeg",
+        width=image.width,
+        height=image.height,
+        sha256=hashlib.sha256(image.tobytes()).hexdigest(),
+    )
+
+
+def preprocess_image(stream: BinaryIO, max_side: int = OCR_MAX_SIDE) -> PreparedImage:
+    """Auto-orient, grayscale and downscale an uploaded image, re-encoded as JPEG."""
+    try:
+        image = Image.open(stream)
+        # Lets the JPEG decoder downscale while decoding instead of after.
+        image.draft("L", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError) as exc:
+        raise HTTPException(status_code=400, detail=f"Could not read resume image: {exc}")
+    return prepare_image(image, max_side)
+
+
+def vision_token_estimate(width: int, height: int) -> int:
+    """Approximate high-detail vision input tokens: 85 base + 170 per 512px tile."""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+class OcrCache:
+    """
+    Small LRU of OCR results keyed by the SHA-256 of the prepared pixels. Only an
+    exact match is reused: look-alike images (CVs on one template) must not share text.
+    """
+
+    def __init__(self, size: int = OCR_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image: PreparedImage) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(image.sha256)
+            if text is not None:
+                self._entries.move_to_end(image.sha256)
+            return text
+
+    def put(self, image: PreparedImage, text: str) -> None:
+        with self._lock:
+            self._entries[image.sha256] = text
+            self._entries.move_to_end(image.sha256)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+ocr_cache = OcrCache()
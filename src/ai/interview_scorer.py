@@ -1,12 +1,17 @@
 import asyncio
 import json
-from typing import Dict, List, Optional, Tuple
+import logging
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from agents import Agent
 from pydantic import BaseModel, Field
 
+from .prompt_budget import fit_payload, truncate_text
 from .resume_scorer import MODEL, safe_runner_run
 
+logger = logging.getLogger(__name__)
+
 # --- Shared constants ---
 
 SCORE_RUBRIC = """
@@ -88,6 +93,14 @@ MAX_RED_FLAG_PENALTY = 1.5
 # Calibration agents may nudge preliminary averages within this band.
 MAX_CATEGORY_ADJUSTMENT = 1.5
 
+# Input token budgets for the calibration / synthesis agents. Per-answer text is sent
+# whole when the payload fits; otherwise it is cut to EVIDENCE_MAX_CHARS and trimmed
+# further until the serialized payload fits.
+CALIBRATION_TOKEN_BUDGET = int(os.getenv("INTERVIEW_CALIBRATION_TOKEN_BUDGET", "2500"))
+SYNTHESIS_TOKEN_BUDGET = int(os.getenv("INTERVIEW_SYNTHESIS_TOKEN_BUDGET", "5000"))
+EVIDENCE_MAX_CHARS = int(os.getenv("INTERVIEW_EVIDENCE_MAX_CHARS", "400"))
+JOB_DESCRIPTION_MAX_CHARS = int(os.getenv("INTERVIEW_JOB_DESCRIPTION_MAX_CHARS", "1200"))
+
 
 # --- Input / output schemas ---
 
@@ -328,8 +341,9 @@ def _build_category_calibration_agent(category_key: str) -> Agent:
 
         INPUT berisi:
         - preliminary_score: rata-rata skor aspek dari evaluasi per-pertanyaan
-        - evidence: ringkasan bukti per jawaban
-        - job_title / job_description / target_skills
+        - evidence: ringkasan bukti per jawaban, tiap item berisi
+          q (nomor pertanyaan), score (skor aspek ini), evidence (bukti), missing (yang kurang)
+        - job_title / job_description (bisa diringkas) / target_skills
         - consistency_summary (jika ada)
 
         TUGAS:
@@ -362,6 +376,8 @@ synthesis_agent = Agent(
     PENTING:
     - JANGAN menghitung atau mengubah skor — skor sudah dihitung oleh sistem
     - Gunakan skor aspek dan evaluasi per-pertanyaan yang diberikan sebagai dasar
+    - computed_scores.categories berisi skor akhir per aspek; question_evaluations berisi
+      q (nomor pertanyaan), scores, evidence, missing, feedback dan red_flags (teks bisa diringkas)
     - Semua output Bahasa Indonesia
     - strengths / weaknesses: masing-masing item 1 kalimat, to the point
     - red_flags: masalah serius (kontradiksi, jawaban kosong, exaggeration, dll.)
@@ -381,9 +397,7 @@ def _clamp_score(value: float) -> float:
 
 def _normalize_llm_score(raw: float, question_number: int, dimension: str) -> float:
     if raw < 0.0 or raw > 10.0:
-        print(
-            f"WARNING: Q{question_number} {dimension} out of range ({raw}), clamping"
-        )
+        logger.warning("Q%s %s out of range (%s), clamping", question_number, dimension, raw)
     return _clamp_score(raw)
 
 
@@ -584,6 +598,35 @@ async def _evaluate_question(
     return result.final_output
 
 
+def _failed_micro_result(qa: InterviewQAItem, error: BaseException) -> QuestionMicroResult:
+    """Stand-in for a question whose micro-evaluation failed after retries."""
+    return QuestionMicroResult(
+        question_number=qa.question_number,
+        question=qa.question,
+        should_skip=True,
+        skip_reason=f"Evaluasi otomatis gagal: {error}",
+    )
+
+
+def _tolerate_micro_failures(
+    qa_pairs: List[InterviewQAItem],
+    outcomes: List[object],
+) -> List[QuestionMicroResult]:
+    """Skip questions whose evaluation failed; only fail when every question failed."""
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    if failures and len(failures) == len(outcomes):
+        raise failures[0]
+
+    results: List[QuestionMicroResult] = []
+    for qa, outcome in zip(qa_pairs, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("Q%s micro-evaluation failed: %s", qa.question_number, outcome)
+            results.append(_failed_micro_result(qa, outcome))
+        else:
+            results.append(outcome)
+    return results
+
+
 async def _check_consistency(
     resume_text: str,
     evaluations: List[QuestionEvaluation],
@@ -620,35 +663,35 @@ async def _calibrate_category(
     target_skills: List[str],
     consistency: Optional[ConsistencyCheckResult],
 ) -> CategoryCalibrationResult:
-    evidence = [
-        {
-            "question_number": e.question_number,
-            "question": e.question,
-            "observed_evidence": e.observed_evidence,
-            "missing_elements": e.missing_elements,
-            "category_score": getattr(e, _score_attr(category_key)),
-            "feedback": e.feedback,
+    score_attr = _score_attr(category_key)
+
+    def build(field_chars: Optional[int]) -> dict:
+        # Label, description and weight already live in the agent instructions.
+        payload = {
+            "category_key": category_key,
+            "preliminary_score": round(preliminary_score, 2),
+            "max_adjustment": MAX_CATEGORY_ADJUSTMENT,
+            "job_title": job_title,
+            "job_description": truncate_text(job_description, JOB_DESCRIPTION_MAX_CHARS),
+            "target_skills": target_skills or None,
+            "evidence": [
+                {
+                    "q": e.question_number,
+                    "score": round(getattr(e, score_attr), 1),
+                    "evidence": truncate_text(e.observed_evidence, field_chars),
+                    "missing": truncate_text(e.missing_elements, field_chars),
+                }
+                for e in evaluations
+            ],
+            "consistency_summary": (
+                truncate_text(consistency.summary, field_chars) if consistency else None
+            ),
         }
-        for e in evaluations
-    ]
-    meta = ASPEK_DEFINITIONS[category_key]
-    payload = {
-        "category_key": category_key,
-        "category_label": meta["label"],
-        "category_description": meta["description"],
-        "weight": meta["weight"],
-        "preliminary_score": round(preliminary_score, 2),
-        "max_adjustment": MAX_CATEGORY_ADJUSTMENT,
-        "job_title": job_title,
-        "job_description": job_description,
-        "target_skills": target_skills,
-        "evidence": evidence,
-        "consistency_summary": consistency.summary if consistency else None,
-    }
-    payload = {k: v for k, v in payload.items() if v is not None}
+        return {k: v for k, v in payload.items() if v is not None}
 
     agent = category_calibration_agents[category_key]
-    result = await safe_runner_run(agent, json.dumps(payload, ensure_ascii=False))
+    payload = fit_payload(build, CALIBRATION_TOKEN_BUDGET, EVIDENCE_MAX_CHARS)
+    result = await safe_runner_run(agent, payload)
     if not isinstance(result.final_output, CategoryCalibrationResult):
         raise TypeError(f"Category calibrator {category_key} returned wrong type")
 
@@ -672,52 +715,65 @@ async def _synthesize_narrative(
     job_title: Optional[str],
     job_description: str,
 ) -> InterviewSynthesisResult:
-    payload = {
-        "job_title": job_title,
-        "job_description": job_description,
-        "computed_scores": breakdown.model_dump(),
-        "question_evaluations": [e.model_dump() for e in evaluations],
-        "skipped_questions": [s.model_dump() for s in skipped],
-        "consistency_check": consistency.model_dump() if consistency else None,
-    }
-    payload = {k: v for k, v in payload.items() if v is not None}
+    def build(field_chars: Optional[int]) -> dict:
+        payload = {
+            "job_title": job_title,
+            "job_description": truncate_text(job_description, JOB_DESCRIPTION_MAX_CHARS),
+            "computed_scores": {
+                "final_overall_score": breakdown.final_overall_score,
+                "base_weighted_score": breakdown.base_weighted_score,
+                "red_flag_penalty": breakdown.red_flag_penalty,
+                "categories": {
+                    c.label: round(c.adjusted_score, 2) for c in breakdown.category_scores
+                },
+            },
+            "question_evaluations": [
+                {
+                    "q": e.question_number,
+                    "scores": {
+                        key: round(getattr(e, _score_attr(key)), 1) for key in ASPEK_KEYS
+                    },
+                    "evidence": truncate_text(e.observed_evidence, field_chars),
+                    "missing": truncate_text(e.missing_elements, field_chars),
+                    "feedback": truncate_text(e.feedback, field_chars),
+                    "red_flags": e.red_flags or None,
+                }
+                for e in evaluations
+            ],
+            "skipped_questions": [
+                {"q": skip.question_number, "reason": truncate_text(skip.reason, field_chars)}
+                for skip in skipped
+            ] or None,
+            "consistency_check": (
+                {
+                    "consistency_score": consistency.consistency_score,
+                    "summary": truncate_text(consistency.summary, field_chars),
+                    "employment_date_discrepancies": consistency.employment_date_discrepancies,
+                    "skill_exaggerations": consistency.skill_exaggerations,
+                    "explicit_contradictions": consistency.explicit_contradictions,
+                }
+                if consistency
+                else None
+            ),
+        }
+        return {k: v for k, v in payload.items() if v is not None}
 
     result = await safe_runner_run(
-        synthesis_agent, json.dumps(payload, ensure_ascii=False)
+        synthesis_agent,
+        fit_payload(build, SYNTHESIS_TOKEN_BUDGET, EVIDENCE_MAX_CHARS),
     )
     if not isinstance(result.final_output, InterviewSynthesisResult):
         raise TypeError("Synthesis Agent returned wrong type")
     return result.final_output
 
 
-async def score_interview(
-    qa_pairs: List[InterviewQAItem],
-    job_description: str,
-    job_title: Optional[str] = None,
-    resume_text: Optional[str] = None,
-    target_skills: Optional[List[str]] = None,
-) -> dict:
-    """
-    Interview scoring pipeline against 6 aspek penilaian:
-    1. Parallel per-question micro-evaluation (6 category scores each)
-    2. Optional CV consistency check
-    3. Parallel per-aspek calibration agents (adjust preliminary averages)
-    4. Deterministic weighted aggregation + narrative synthesis
-    """
-    if not qa_pairs:
-        raise ValueError("qa_pairs wajib diisi minimal 1 pertanyaan")
-
-    skills = target_skills or []
-
-    # Stage 1: parallel micro-evaluations
-    micro_results = await asyncio.gather(
-        *(_evaluate_question(qa, job_description, job_title, skills) for qa in qa_pairs)
-    )
-
+def _partition_micro_results(
+    micro_results: List[QuestionMicroResult],
+) -> Tuple[List[QuestionEvaluation], List[SkippedQuestion]]:
     skipped: List[SkippedQuestion] = []
     evaluations: List[QuestionEvaluation] = []
 
-    for micro in micro_results:
+    for micro in sorted(micro_results, key=lambda m: m.question_number):
         if micro.should_skip:
             skipped.append(
                 SkippedQuestion(
@@ -737,41 +793,60 @@ async def score_interview(
                 )
             )
 
-    evaluations = normalize_evaluations(evaluations)
+    return normalize_evaluations(evaluations), skipped
+
+
+async def _finalize_interview(
+    micro_results: List[QuestionMicroResult],
+    job_description: str,
+    job_title: Optional[str],
+    resume_text: Optional[str],
+    skills: List[str],
+) -> dict:
+    """Stages 2-4: consistency check, aspek calibration, weighted reduce and synthesis."""
+    evaluations, skipped = _partition_micro_results(micro_results)
 
     # Stage 2: CV cross-reference (optional)
     consistency: Optional[ConsistencyCheckResult] = None
     consistency_score: Optional[float] = None
     if resume_text and resume_text.strip() and evaluations:
-        consistency = await _check_consistency(
-            resume_text, evaluations, job_description
-        )
-        consistency_score = _normalize_llm_score(
-            consistency.consistency_score, 0, "consistency"
-        )
+        try:
+            consistency = await _check_consistency(
+                resume_text, evaluations, job_description
+            )
+            consistency_score = _normalize_llm_score(
+                consistency.consistency_score, 0, "consistency"
+            )
+        except Exception as e:
+            logger.warning("CV consistency check failed, continuing without it: %s", e)
 
     # Stage 3a: preliminary averages
     preliminary = average_category_scores(evaluations)
 
     # Stage 3b: parallel aspek calibration agents
+    # A failed calibrator falls back to the preliminary average for that aspek.
     calibrations: List[CategoryCalibrationResult] = []
     if evaluations:
-        calibrations = list(
-            await asyncio.gather(
-                *(
-                    _calibrate_category(
-                        key,
-                        preliminary[key],
-                        evaluations,
-                        job_description,
-                        job_title,
-                        skills,
-                        consistency,
-                    )
-                    for key in ASPEK_KEYS
+        outcomes = await asyncio.gather(
+            *(
+                _calibrate_category(
+                    key,
+                    preliminary[key],
+                    evaluations,
+                    job_description,
+                    job_title,
+                    skills,
+                    consistency,
                 )
-            )
+                for key in ASPEK_KEYS
+            ),
+            return_exceptions=True,
         )
+        for key, outcome in zip(ASPEK_KEYS, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning("Calibration for %s failed, using preliminary score: %s", key, outcome)
+            else:
+                calibrations.append(outcome)
 
     category_details = apply_category_calibrations(preliminary, calibrations)
 
@@ -817,3 +892,118 @@ async def score_interview(
     )
 
     return {"scoring": result.model_dump()}
+
+
+async def score_interview(
+    qa_pairs: List[InterviewQAItem],
+    job_description: str,
+    job_title: Optional[str] = None,
+    resume_text: Optional[str] = None,
+    target_skills: Optional[List[str]] = None,
+) -> dict:
+    """
+    Interview scoring pipeline against 6 aspek penilaian:
+    1. Parallel per-question micro-evaluation (6 category scores each)
+    2. Optional CV consistency check
+    3. Parallel per-aspek calibration agents (adjust preliminary averages)
+    4. Deterministic weighted aggregation + narrative synthesis
+    """
+    if not qa_pairs:
+        raise ValueError("qa_pairs wajib diisi minimal 1 pertanyaan")
+
+    skills = target_skills or []
+
+    # Stage 1: parallel micro-evaluations (LLM concurrency is bounded by llm_scheduler)
+    outcomes = await asyncio.gather(
+        *(_evaluate_question(qa, job_description, job_title, skills) for qa in qa_pairs),
+        return_exceptions=True,
+    )
+    micro_results = _tolerate_micro_failures(qa_pairs, list(outcomes))
+
+    return await _finalize_interview(
+        micro_results, job_description, job_title, resume_text, skills
+    )
+
+
+async def score_interview_stream(
+    qa_stream: AsyncIterator[InterviewQAItem],
+    job_description: str,
+    job_title: Optional[str] = None,
+    resume_text: Optional[str] = None,
+    target_skills: Optional[List[str]] = None,
+) -> AsyncIterator[dict]:
+    """
+    Pipelined variant of score_interview for Q&A items that arrive over time
+    (e.g. transcripts finishing one by one).
+
+    Each item is micro-evaluated as soon as it arrives. Calibration and synthesis run
+    once the stream is exhausted and every micro-evaluation is in. Yields events:
+    {"event": "transcript", ...} per arriving item, {"event": "question_evaluation", ...}
+    per finished micro-evaluation and a final {"event": "result", "data": ...}.
+    """
+    skills = target_skills or []
+    events: "asyncio.Queue[Optional[dict]]" = asyncio.Queue()
+    qa_items: List[InterviewQAItem] = []
+    evaluation_tasks: List["asyncio.Task[object]"] = []
+
+    async def evaluate(qa: InterviewQAItem) -> object:
+        try:
+            micro = await _evaluate_question(qa, job_description, job_title, skills)
+        except Exception as e:
+            await events.put(
+                {
+                    "event": "question_evaluation",
+                    "question_number": qa.question_number,
+                    "should_skip": True,
+                    "error": str(e),
+                }
+            )
+            return e
+        await events.put(
+            {
+                "event": "question_evaluation",
+                "question_number": micro.question_number,
+                "should_skip": micro.should_skip,
+                "skip_reason": micro.skip_reason,
+                "evaluation": micro.evaluation.model_dump() if micro.evaluation else None,
+            }
+        )
+        return micro
+
+    async def consume() -> None:
+        async for qa in qa_stream:
+            await events.put({"event": "transcript", **qa.model_dump()})
+            qa_items.append(qa)
+            evaluation_tasks.append(asyncio.create_task(evaluate(qa)))
+        if evaluation_tasks:
+            await asyncio.gather(*evaluation_tasks)
+        await events.put(None)
+
+    consumer = asyncio.create_task(consume())
+    try:
+        while True:
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({getter, consumer}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                # Consumer finished without its sentinel: it failed.
+                getter.cancel()
+                consumer.result()
+            event = getter.result()
+            if event is None:
+                break
+            yield event
+
+        if not evaluation_tasks:
+            raise ValueError("qa_pairs wajib diisi minimal 1 pertanyaan")
+        micro_results = _tolerate_micro_failures(
+            qa_items, [task.result() for task in evaluation_tasks]
+        )
+
+        result = await _finalize_interview(
+            micro_results, job_description, job_title, resume_text, skills
+        )
+        yield {"event": "result", "data": result}
+    finally:
+        consumer.cancel()
+        for task in evaluation_tasks:
+            task.cancel()
@@ -1,15 +1,17 @@
 import asyncio
+import logging
 import os
 import re
-import shutil
-import tempfile
 import zipfile
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 
 from .url_fetch import download_url_to_temp, filename_from_url
-from .transcribe import ALLOWED_EXTENSIONS, transcribe_file
+from .transcribe import ALLOWED_EXTENSIONS, stream_sha256, transcribe_stream
+from .transcribe_scheduler import SharedTempFile, new_request_key, schedule_cached_transcription
+
+logger = logging.getLogger(__name__)
 
 VIDEO_EXTENSIONS = tuple(f".{ext}" for ext in ALLOWED_EXTENSIONS)
 QUESTIONS_FILENAME = "questions_list.txt"
@@ -41,27 +43,33 @@ def question_number_from_video(filename: str) -> Optional[int]:
     return int(match.group(1)) if match else None
 
 
-def discover_interview_files(extract_dir: str) -> Tuple[str, Dict[int, str], Dict[int, str]]:
-    questions_path: Optional[str] = None
+def discover_interview_members(archive: zipfile.ZipFile) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """
+    Locate questions_list.txt and QuestionN_ videos from the zip central directory.
+    Returns (questions, videos) where videos maps question number to member name.
+    """
+    questions_member: Optional[str] = None
     videos: Dict[int, str] = {}
 
-    for root, _, files in os.walk(extract_dir):
-        for filename in files:
-            full_path = os.path.join(root, filename)
-            lower_name = filename.lower()
+    for member in archive.infolist():
+        if member.is_dir():
+            continue
+
+        filename = os.path.basename(member.filename)
+        lower_name = filename.lower()
 
-            if lower_name == QUESTIONS_FILENAME:
-                questions_path = full_path
-                continue
+        if lower_name == QUESTIONS_FILENAME:
+            questions_member = member.filename
+            continue
 
-            if not lower_name.endswith(VIDEO_EXTENSIONS):
-                continue
+        if not lower_name.endswith(VIDEO_EXTENSIONS):
+            continue
 
-            question_number = question_number_from_video(filename)
-            if question_number is not None:
-                videos[question_number] = full_path
+        question_number = question_number_from_video(filename)
+        if question_number is not None:
+            videos[question_number] = member.filename
 
-    if not questions_path:
+    if not questions_member:
         raise HTTPException(
             status_code=400,
             detail=f"Zip must contain {QUESTIONS_FILENAME}",
@@ -73,8 +81,7 @@ def discover_interview_files(extract_dir: str) -> Tuple[str, Dict[int, str], Dic
             detail="Zip must contain at least one video named Question{N}_*.mp4",
         )
 
-    with open(questions_path, "r", encoding="utf-8") as questions_file:
-        questions = parse_questions_list(questions_file.read())
+    questions = parse_questions_list(archive.read(questions_member).decode("utf-8"))
 
     if not questions:
         raise HTTPException(
@@ -82,96 +89,152 @@ def discover_interview_files(extract_dir: str) -> Tuple[str, Dict[int, str], Dic
             detail=f"Could not parse any questions from {QUESTIONS_FILENAME}",
         )
 
-    return questions_path, questions, videos
+    return questions, videos
 
 
-def _validate_zip(zip_path: str, extract_dir: str) -> None:
+def _read_zip_index(zip_path: str) -> Tuple[Dict[int, str], Dict[int, str]]:
     if not zipfile.is_zipfile(zip_path):
         raise HTTPException(status_code=400, detail="Uploaded file is not a valid zip archive")
 
+    try:
+        with zipfile.ZipFile(zip_path, "r") as archive:
+            return discover_interview_members(archive)
+    except zipfile.BadZipFile as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid zip archive: {exc}") from exc
+
+
+def _hash_zip_member(zip_path: str, member_name: str) -> str:
+    with zipfile.ZipFile(zip_path, "r") as archive, archive.open(member_name, "r") as member:
+        return stream_sha256(member)
+
+
+def _transcribe_zip_member(
+    zip_path: str,
+    member_name: str,
+    language_code: str,
+    sha256: str,
+) -> dict:
+    """Stream one zip member straight into its S3 upload (runs in a worker thread)."""
+    # Each worker opens its own handle so concurrent members don't share file offsets.
     with zipfile.ZipFile(zip_path, "r") as archive:
-        for member in archive.infolist():
-            if member.is_dir():
-                continue
-            target = os.path.realpath(os.path.join(extract_dir, member.filename))
-            if not target.startswith(os.path.realpath(extract_dir) + os.sep):
-                raise HTTPException(status_code=400, detail="Zip archive contains unsafe paths")
-        archive.extractall(extract_dir)
+        return transcribe_stream(
+            lambda: archive.open(member_name, "r"),
+            os.path.basename(member_name),
+            language_code,
+            sha256=sha256,
+        )
 
 
 async def _transcribe_video(
-    video_path: str,
+    zip_file: SharedTempFile,
+    member_name: str,
     language_code: str,
+    request_key: str,
 ) -> Tuple[str, Optional[str]]:
-    filename = os.path.basename(video_path)
+    filename = os.path.basename(member_name)
     try:
-        result = await asyncio.to_thread(
-            transcribe_file, video_path, filename, language_code
+        sha256 = await asyncio.to_thread(_hash_zip_member, zip_file.path, member_name)
+        # A job started here may serve other requests after this one ends, so it holds
+        # the zip itself.
+        result = await schedule_cached_transcription(
+            sha256,
+            language_code,
+            _transcribe_zip_member,
+            zip_file.path,
+            member_name,
+            language_code,
+            sha256,
+            request_key=request_key,
+            input_file=zip_file,
         )
         return result["transcription"], None
     except HTTPException as exc:
-        return "", exc.detail
+        logger.warning("Transcription failed for %s: %s", filename, exc.detail)
+        return "", str(exc.detail)
     except Exception as exc:
+        logger.warning("Transcription failed for %s: %s", filename, exc)
         return "", str(exc)
 
 
-async def process_interview_zip(
-    zip_path: str,
-    language_code: str = "id-ID",
-    max_concurrent_transcriptions: int = 3,
-) -> List[dict]:
-    extract_dir = tempfile.mkdtemp(prefix="interview_zip_")
-
-    try:
-        _validate_zip(zip_path, extract_dir)
-        _, questions, videos = discover_interview_files(extract_dir)
-
-        all_numbers = sorted(set(questions) | set(videos))
-        semaphore = asyncio.Semaphore(max_concurrent_transcriptions)
-
-        async def transcribe_for_number(number: int) -> dict:
-            video_path = videos.get(number)
-            question = questions.get(number, f"Pertanyaan {number}")
+async def _interview_zip_jobs(
+    zip_file: SharedTempFile,
+    language_code: str,
+) -> List[Awaitable[dict]]:
+    """One awaitable per question number, each resolving to a qa_pairs item."""
+    questions, videos = await asyncio.to_thread(_read_zip_index, zip_file.path)
 
-            if not video_path:
-                return {
-                    "question_number": number,
-                    "question": question,
-                    "answer": "",
-                }
+    all_numbers = sorted(set(questions) | set(videos))
+    # No per-request cap: every video shares one request key, and transcribe_scheduler
+    # hands slots out round-robin across keys, so a large zip can't crowd others out.
+    request_key = new_request_key()
 
-            async with semaphore:
-                answer, _error = await _transcribe_video(video_path, language_code)
+    async def transcribe_for_number(number: int) -> dict:
+        member_name = videos.get(number)
+        question = questions.get(number, f"Pertanyaan {number}")
 
+        if not member_name:
             return {
                 "question_number": number,
                 "question": question,
-                "answer": answer,
+                "answer": "",
             }
 
-        return list(
-            await asyncio.gather(*(transcribe_for_number(n) for n in all_numbers))
+        answer, error = await _transcribe_video(
+            zip_file, member_name, language_code, request_key
         )
-    finally:
-        shutil.rmtree(extract_dir, ignore_errors=True)
 
+        item = {
+            "question_number": number,
+            "question": question,
+            "answer": answer,
+        }
+        if error:
+            item["error"] = error
+        return item
 
-async def process_interview_zip_from_url(
-    url: str,
+    return [transcribe_for_number(n) for n in all_numbers]
+
+
+async def process_interview_zip(
+    zip_file: SharedTempFile,
     language_code: str = "id-ID",
-    max_concurrent_transcriptions: int = 3,
 ) -> List[dict]:
+    """Transcribe every question; the caller releases `zip_file` afterwards."""
+    jobs = await _interview_zip_jobs(zip_file, language_code)
+    return list(await asyncio.gather(*jobs))
+
+
+async def iter_interview_zip(
+    zip_file: SharedTempFile,
+    language_code: str = "id-ID",
+) -> AsyncIterator[dict]:
+    """Yield qa_pairs items in completion order, as soon as each transcript is ready."""
+    jobs = await _interview_zip_jobs(zip_file, language_code)
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def download_interview_zip(url: str) -> str:
+    """Download a .zip interview bundle to a temp file; the caller deletes it."""
     filename = filename_from_url(url)
     if not filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="URL must point to a .zip file")
 
-    zip_path, _ = download_url_to_temp(url)
+    zip_path, _ = await download_url_to_temp(url)
+    return zip_path
+
+
+async def process_interview_zip_from_url(
+    url: str,
+    language_code: str = "id-ID",
+) -> List[dict]:
+    zip_file = SharedTempFile(await download_interview_zip(url))
     try:
-        return await process_interview_zip(
-            zip_path=zip_path,
-            language_code=language_code,
-            max_concurrent_transcriptions=max_concurrent_transcriptions,
-        )
+        return await process_interview_zip(zip_file=zip_file, language_code=language_code)
     finally:
-        if os.path.exists(zip_path):
-            os.unlink(zip_path)
+        zip_file.release()
@@ -0,0 +1,237 @@
+"""Shared rate limiter for every LLM call (agents and direct chat completions)."""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from .metrics import WaitTimeStats
+from .prompt_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+# Rough allowance for completion tokens charged against the TPM bucket per call.
+LLM_OUTPUT_TOKEN_ALLOWANCE = int(os.getenv("LLM_OUTPUT_TOKEN_ALLOWANCE", "1000"))
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """Prompt size in tokens (tiktoken when installed, ~4 characters per token otherwise)."""
+    return count_tokens(text)
+
+
+def is_retryable_llm_error(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; waiters are served in FIFO order."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(1, per_minute))
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        # A single oversized call may use the whole bucket but never waits forever.
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Give back an acquired amount that was never spent (cancelled or rejected call)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + min(float(amount), self.capacity))
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class LLMScheduler:
+    """
+    Gate for LLM calls: a concurrency cap plus request- and token-per-minute buckets,
+    with jittered retries on 429/5xx/connection errors and per-stage wait metrics.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_concurrent: int = LLM_MAX_CONCURRENT,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+        retry_max_delay: float = LLM_RETRY_MAX_DELAY,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._in_flight = 0
+        self._waiting = 0
+        self._wait_stats: Dict[str, WaitTimeStats] = {}
+        self._latency_stats: Dict[str, WaitTimeStats] = {}
+        self._calls: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._prompt_tokens: Dict[str, int] = {}
+        self._prompt_tokens_max: Dict[str, int] = {}
+        self._retries = 0
+
+    def _retry_delay(self, attempt: int) -> float:
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2**attempt))
+        return random.uniform(0, delay)
+
+    async def _admit(self, stage: str, estimated_tokens: int, use_slot: bool) -> None:
+        # Slot first: a caller queued behind the concurrency cap holds no rate budget,
+        # and whatever a cancelled waiter did take is handed back.
+        queued_at = time.monotonic()
+        self._waiting += 1
+        slot = requests = False
+        try:
+            if use_slot:
+                await self._slots.acquire()
+                slot = True
+            await self._requests.acquire(1)
+            requests = True
+            await self._tokens.acquire(estimated_tokens)
+        except BaseException:
+            if requests:
+                self._requests.refund(1)
+            if slot:
+                self._slots.release()
+            raise
+        finally:
+            self._waiting -= 1
+        self._wait_stats.setdefault(stage, WaitTimeStats()).record(time.monotonic() - queued_at)
+
+    async def call(
+        self,
+        stage: str,
+        func: Callable[[], Awaitable[T]],
+        *,
+        estimated_tokens: int = LLM_OUTPUT_TOKEN_ALLOWANCE,
+        prompt_tokens: Optional[int] = None,
+        use_slot: bool = True,
+    ) -> T:
+        """
+        Run `func()` once admitted. `use_slot=False` skips the concurrency cap (still rate
+        limited) for calls nested inside another scheduled call, e.g. output guardrails.
+        `prompt_tokens` (input payload size) is only recorded for the per-stage metrics.
+        """
+        self._calls[stage] = self._calls.get(stage, 0) + 1
+        if prompt_tokens is not None:
+            self._prompt_tokens[stage] = self._prompt_tokens.get(stage, 0) + prompt_tokens
+            self._prompt_tokens_max[stage] = max(self._prompt_tokens_max.get(stage, 0), prompt_tokens)
+        started = time.monotonic()
+        try:
+            return await self._call_with_retries(stage, func, estimated_tokens, use_slot)
+        finally:
+            # Queue wait, model time and retries: what the pipeline stage actually waited.
+            self._latency_stats.setdefault(stage, WaitTimeStats()).record(time.monotonic() - started)
+
+    async def _call_with_retries(
+        self,
+        stage: str,
+        func: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        use_slot: bool,
+    ) -> T:
+        attempt = 0
+        while True:
+            await self._admit(stage, estimated_tokens, use_slot)
+            self._in_flight += 1
+            try:
+                return await func()
+            except Exception as exc:
+                if not is_retryable_llm_error(exc) or attempt >= self.max_retries:
+                    self._failures[stage] = self._failures.get(stage, 0) + 1
+                    raise
+                # A rejected attempt consumed no tokens; the retry takes its estimate again.
+                self._tokens.refund(estimated_tokens)
+                delay = self._retry_delay(attempt)
+                attempt += 1
+                self._retries += 1
+                logger.warning(
+                    "LLM call %s failed (%s), retry %d/%d in %.1fs",
+                    stage,
+                    type(exc).__name__,
+                    attempt,
+                    self.max_retries,
+                    delay,
+                )
+            finally:
+                self._in_flight -= 1
+                if use_slot:
+                    self._slots.release()
+            await asyncio.sleep(delay)
+
+    def _prompt_token_summary(self, stage: str) -> Dict[str, int]:
+        total = self._prompt_tokens.get(stage, 0)
+        calls = self._calls.get(stage, 0)
+        return {
+            "total": total,
+            "avg": total // calls if calls else 0,
+            "max": self._prompt_tokens_max.get(stage, 0),
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "requests_available": round(self._requests.available, 2),
+            "tokens_available": round(self._tokens.available, 2),
+            "retries": self._retries,
+            "stages": {
+                stage: {
+                    "calls": self._calls.get(stage, 0),
+                    "failures": self._failures.get(stage, 0),
+                    "queue_wait": stats.snapshot(),
+                    "latency": self._latency_stats[stage].snapshot()
+                    if stage in self._latency_stats
+                    else None,
+                    "prompt_tokens": self._prompt_token_summary(stage),
+                }
+                for stage, stats in self._wait_stats.items()
+            },
+        }
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+from typing import Deque, Dict
+
+
+class WaitTimeStats:
+    """Rolling window of wait durations (seconds) with simple percentile summaries."""
+
+    def __init__(self, window: int = 500):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+            total = self.total
+            maximum = self.max
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[index], 4)
+
+        return {
+            "count": count,
+            "avg_seconds": round(total / count, 4) if count else 0.0,
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "max_seconds": round(maximum, 4),
+        }
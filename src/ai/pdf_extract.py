@@ -0,0 +1,233 @@
+"""
+PDF text extraction and page rasterization off the event loop.
+
+Parsing runs in a bounded process pool (PDF parsing is CPU-bound and holds the GIL),
+with a page cap and a per-document timeout. Backends are pluggable: PyPDF2 is always
+available; pypdfium2 is used when installed since it is much faster on long documents.
+Scanned PDFs have no text layer; their pages are rendered with pypdfium2 for OCR.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from .image_preprocess import OCR_MAX_SIDE, PreparedImage, prepare_image
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTRACT_BACKEND = os.getenv("PDF_EXTRACT_BACKEND", "auto")
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "20"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+# Scanned pages each cost a vision call, so OCR gets its own, lower page cap.
+PDF_OCR_MAX_PAGES = int(os.getenv("PDF_OCR_MAX_PAGES", "10"))
+# Extra time allowed for the in-worker alarm to fire before the pool is torn down.
+PDF_TIMEOUT_GRACE_SECONDS = 5.0
+
+PdfBackend = Callable[[str, int], str]
+
+
+def _extract_pypdf2(file_path: str, max_pages: int) -> str:
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(file_path)
+    parts = []
+    for page in reader.pages[:max_pages]:
+        page_text = page.extract_text()
+        if page_text:
+            parts.append(page_text)
+    return "\n".join(parts).strip()
+
+
+def _extract_pypdfium2(file_path: str, max_pages: int) -> str:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        parts = []
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                page_text = textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+            if page_text:
+                parts.append(page_text)
+        return "\n".join(parts).strip()
+    finally:
+        pdf.close()
+
+
+PDF_BACKENDS: Dict[str, PdfBackend] = {
+    "pypdf2": _extract_pypdf2,
+    "pypdfium2": _extract_pypdfium2,
+}
+
+
+def _render_pypdfium2(file_path: str, max_pages: int, max_side: int) -> List[PreparedImage]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages = []
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            try:
+                # Render straight at OCR resolution rather than rendering large and shrinking.
+                scale = max_side / max(page.get_size())
+                bitmap = page.render(scale=scale, grayscale=True)
+                pages.append(prepare_image(bitmap.to_pil(), max_side))
+            finally:
+                page.close()
+        return pages
+    finally:
+        pdf.close()
+
+
+def can_rasterize_pdf() -> bool:
+    try:
+        import pypdfium2  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def register_pdf_backend(name: str, backend: PdfBackend) -> None:
+    """Register a backend; it must be a module-level function so it can be pickled."""
+    PDF_BACKENDS[name] = backend
+
+
+def resolve_pdf_backend(name: str = PDF_EXTRACT_BACKEND) -> str:
+    if name != "auto":
+        if name not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend {name!r}; available: {sorted(PDF_BACKENDS)}")
+        return name
+    try:
+        import pypdfium2  # noqa: F401
+
+        return "pypdfium2"
+    except ImportError:
+        return "pypdf2"
+
+
+class _DocumentTimeout(BaseException):
+    # BaseException so parser code that catches Exception cannot swallow the deadline.
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _DocumentTimeout()
+
+
+def _run_with_deadline(timeout: float, func: Callable[..., Any], *args: Any) -> Any:
+    """Worker entry point: run `func` under a SIGALRM deadline where supported."""
+    use_alarm = hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _pool
+
+
+def _get_slots() -> asyncio.Semaphore:
+    # Documents wait here rather than in the executor queue, so the timeout only
+    # covers time spent parsing.
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(PDF_EXTRACT_WORKERS)
+    return _slots
+
+
+def _discard_pool() -> None:
+    """Tear down a pool whose worker is wedged (e.g. stuck inside native code)."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is None:
+        return
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(timeout: float, func: Callable[..., Any], *args: Any) -> Any:
+    timed_out = HTTPException(
+        status_code=400,
+        detail=f"PDF processing timed out after {timeout:g}s",
+    )
+    async with _get_slots():
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_pool(), _run_with_deadline, timeout, func, *args)
+        try:
+            return await asyncio.wait_for(future, timeout + PDF_TIMEOUT_GRACE_SECONDS)
+        except _DocumentTimeout:
+            raise timed_out
+        except asyncio.TimeoutError:
+            logger.warning("PDF worker did not honour its deadline; restarting the pool")
+            _discard_pool()
+            raise timed_out
+        except BrokenProcessPool:
+            _discard_pool()
+            raise HTTPException(status_code=500, detail="PDF extraction worker crashed")
+
+
+async def extract_pdf_text(
+    file_path: str,
+    backend: Optional[str] = None,
+    max_pages: int = PDF_MAX_PAGES,
+    timeout: float = PDF_EXTRACT_TIMEOUT_SECONDS,
+) -> str:
+    """Extract text from the first `max_pages` pages of a PDF in the worker pool."""
+    backend_name = resolve_pdf_backend(backend or PDF_EXTRACT_BACKEND)
+    started = time.monotonic()
+    text = await _run_in_pool(timeout, PDF_BACKENDS[backend_name], file_path, max_pages)
+    logger.info(
+        "Extracted %d chars from PDF with %s in %.2fs",
+        len(text),
+        backend_name,
+        time.monotonic() - started,
+    )
+    return text
+
+
+async def rasterize_pdf_pages(
+    file_path: str,
+    max_pages: int = PDF_OCR_MAX_PAGES,
+    max_side: int = OCR_MAX_SIDE,
+    timeout: float = PDF_EXTRACT_TIMEOUT_SECONDS,
+) -> List[PreparedImage]:
+    """Render the first `max_pages` pages as OCR-ready JPEGs, in page order."""
+    started = time.monotonic()
+    pages = await _run_in_pool(timeout, _render_pypdfium2, file_path, max_pages, max_side)
+    logger.info("Rendered %d PDF pages for OCR in %.2fs", len(pages), time.monotonic() - started)
+    return pages
@@ -0,0 +1,50 @@
+"""Token counting and budgeting for agent input payloads."""
+
+import json
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional; fall back to a character heuristic
+    _ENCODING = None
+
+MIN_FIELD_CHARS = 60
+SHRINK_FACTOR = 0.6
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4 + 1
+
+
+def truncate_text(text: str, max_chars: Optional[int]) -> str:
+    """Trim to at most `max_chars` (None: no limit), cutting on a word boundary when possible."""
+    text = (text or "").strip()
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def fit_payload(
+    build: Callable[[Optional[int]], Dict[str, Any]],
+    budget_tokens: int,
+    max_field_chars: int,
+) -> str:
+    """
+    Serialize `build(field_chars)` to JSON. Fields are left whole (`None`) when that
+    fits `budget_tokens`; otherwise the per-field character limit starts at
+    `max_field_chars` and shrinks until it fits (or bottoms out at MIN_FIELD_CHARS).
+    """
+    payload = json.dumps(build(None), ensure_ascii=False)
+    if count_tokens(payload) <= budget_tokens:
+        return payload
+    field_chars = max_field_chars
+    while True:
+        payload = json.dumps(build(field_chars), ensure_ascii=False)
+        if count_tokens(payload) <= budget_tokens or field_chars <= MIN_FIELD_CHARS:
+            return payload
+        field_chars = max(MIN_FIELD_CHARS, int(field_chars * SHRINK_FACTOR))
@@ -1,32 +1,33 @@
+import asyncio
 import base64
+import io
 import os
+import shutil
 import tempfile
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from dotenv import load_dotenv
 from fastapi import HTTPException, UploadFile
 from openai import AsyncOpenAI
-from PyPDF2 import PdfReader
+
+from .image_preprocess import PreparedImage, ocr_cache, preprocess_image, vision_token_estimate
+from .llm_scheduler import get_llm_scheduler
+from .pdf_extract import can_rasterize_pdf, extract_pdf_text, rasterize_pdf_pages
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", "..", ".env"))
 
 client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL = os.getenv("MODEL_CHOICE", "gpt-4o")
+OCR_MAX_TOKENS = 4096
+OCR_PAGE_CONCURRENCY = int(os.getenv("OCR_PAGE_CONCURRENCY", "4"))
+# Multiple of 3 so each chunk base64-encodes without padding and chunks concatenate.
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
 
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
 TEXT_EXTENSIONS = {".txt"}
 PDF_EXTENSION = ".pdf"
 SUPPORTED_RESUME_EXTENSIONS = IMAGE_EXTENSIONS | TEXT_EXTENSIONS | {PDF_EXTENSION}
 
-MIME_BY_EXTENSION = {
-    ".jpg": "image/jpeg",
-    ".jpeg": "image/jpeg",
-    ".png": "image/png",
-    ".webp": "image/webp",
-    ".gif": "image/gif",
-    ".bmp": "image/bmp",
-}
-
 RESUME_OCR_PROMPT = (
     "Extract all text from this resume/CV image. "
     "Return only the extracted text with no commentary. "
@@ -41,44 +42,74 @@ def _extension(filename: Optional[str]) -> str:
     return os.path.splitext(filename)[1].lower()
 
 
-def _media_type(file_extension: str, content_type: Optional[str]) -> str:
-    if content_type and content_type.startswith("image/"):
-        return content_type
-    return MIME_BY_EXTENSION.get(file_extension, "image/jpeg")
-
-
-def _extract_text_from_pdf(file_path: str) -> str:
-    reader = PdfReader(file_path)
-    text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text
-    return text.strip()
-
-
-async def _extract_text_from_image(file_path: str, media_type: str) -> str:
-    with open(file_path, "rb") as image_file:
-        encoded = base64.b64encode(image_file.read()).decode("utf-8")
-
-    response = await client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": RESUME_OCR_PROMPT},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:{media_type};base64,{encoded}"},
-                    },
-                ],
-            }
-        ],
-        max_tokens=4096,
+def _base64_data_url(stream: BinaryIO, media_type: str) -> str:
+    """Encode in chunks so the raw image is never held in memory next to its encoding."""
+    parts = [f"data:{media_type};base64,"]
+    while True:
+        chunk = stream.read(BASE64_CHUNK_SIZE)
+        if not chunk:
+            break
+        parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def _read_text(stream: BinaryIO) -> str:
+    wrapper = io.TextIOWrapper(stream, encoding="utf-8")
+    try:
+        return wrapper.read().strip()
+    finally:
+        # Leave the upload's file object open; FastAPI closes it.
+        wrapper.detach()
+
+
+def _spool_to_temp(stream: BinaryIO, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        shutil.copyfileobj(stream, temp_file)
+        return temp_file.name
+
+
+async def _ocr_prepared_image(prepared: PreparedImage) -> str:
+    """
+    Vision OCR for a preprocessed image; repeats of the exact same pixels come from
+    the cache. Look-alike images (CVs on one template, pages of one PDF) are OCR'd.
+    """
+    cached = ocr_cache.get(prepared)
+    if cached is not None:
+        return cached
+
+    data_url = await asyncio.to_thread(
+        _base64_data_url, io.BytesIO(prepared.data), prepared.media_type
+    )
+    response = await get_llm_scheduler().call(
+        "Resume OCR",
+        lambda: client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": RESUME_OCR_PROMPT},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": data_url},
+                        },
+                    ],
+                }
+            ],
+            max_tokens=OCR_MAX_TOKENS,
+        ),
+        estimated_tokens=vision_token_estimate(prepared.width, prepared.height) + OCR_MAX_TOKENS,
     )
 
     text = (response.choices[0].message.content or "").strip()
+    if text:
+        ocr_cache.put(prepared, text)
+    return text
+
+
+async def _extract_text_from_image(stream: BinaryIO) -> str:
+    prepared = await asyncio.to_thread(preprocess_image, stream)
+    text = await _ocr_prepared_image(prepared)
     if not text:
         raise HTTPException(
             status_code=400,
@@ -87,11 +118,25 @@ async def _extract_text_from_image(file_path: str, media_type: str) -> str:
     return text
 
 
+async def _extract_text_from_scanned_pdf(file_path: str) -> str:
+    """Render each page and OCR them concurrently, stitched back in page order."""
+    pages = await rasterize_pdf_pages(file_path)
+    slots = asyncio.Semaphore(OCR_PAGE_CONCURRENCY)
+
+    async def ocr_page(page: PreparedImage) -> str:
+        async with slots:
+            return await _ocr_prepared_image(page)
+
+    texts = await asyncio.gather(*(ocr_page(page) for page in pages))
+    return "\n\n".join(text for text in texts if text).strip()
+
+
 async def extract_resume_text_from_upload(upload_file: UploadFile) -> str:
     """
     Extract resume text from PDF, TXT, or image uploads (JPEG, PNG, WEBP, etc.).
 
-    Images and scanned resumes use OpenAI vision OCR.
+    Images and scanned resumes use OpenAI vision OCR; scanned PDFs are rendered
+    page by page and OCR'd in parallel.
     """
     file_extension = _extension(upload_file.filename)
     if file_extension not in SUPPORTED_RESUME_EXTENSIONS:
@@ -101,32 +146,34 @@ async def extract_resume_text_from_upload(upload_file: UploadFile) -> str:
             detail=f"Unsupported file type. Allowed: {supported}",
         )
 
-    content = await upload_file.read()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-        temp_file.write(content)
-        temp_path = temp_file.name
-
-    try:
-        if file_extension == PDF_EXTENSION:
-            text = _extract_text_from_pdf(temp_path)
-            if not text:
-                raise HTTPException(
-                    status_code=400,
-                    detail=(
-                        "Could not extract text from PDF. "
-                        "If this is a scanned resume, upload a photo (JPG/PNG) instead."
-                    ),
-                )
-            return text
-
-        if file_extension in TEXT_EXTENSIONS:
-            with open(temp_path, "r", encoding="utf-8") as text_file:
-                text = text_file.read().strip()
-            if not text:
-                raise HTTPException(status_code=400, detail="TXT file is empty")
-            return text
-
-        media_type = _media_type(file_extension, upload_file.content_type)
-        return await _extract_text_from_image(temp_path, media_type)
-    finally:
-        os.unlink(temp_path)
+    # Work from the upload's spooled file object instead of reading it into memory.
+    stream = upload_file.file
+    stream.seek(0)
+
+    if file_extension == PDF_EXTENSION:
+        # The parser runs in a worker process, so it needs a path rather than a handle.
+        temp_path = await asyncio.to_thread(_spool_to_temp, stream, file_extension)
+        try:
+            text = await extract_pdf_text(temp_path)
+            if not text and can_rasterize_pdf():
+                # No text layer: treat it as a scanned resume.
+                text = await _extract_text_from_scanned_pdf(temp_path)
+        finally:
+            os.unlink(temp_path)
+        if not text:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "Could not extract text from PDF. "
+                    "If this is a scanned resume, upload a photo (JPG/PNG) instead."
+                ),
+            )
+        return text
+
+    if file_extension in TEXT_EXTENSIONS:
+        text = await asyncio.to_thread(_read_text, stream)
+        if not text:
+            raise HTTPException(status_code=400, detail="TXT file is empty")
+        return text
+
+    return await _extract_text_from_image(stream)
@@ -20,6 +20,7 @@ from agents import (
 )
 
 from .resume_extractor import extract_resume_text_from_upload
+from .llm_scheduler import LLM_OUTPUT_TOKEN_ALLOWANCE, estimate_tokens, get_llm_scheduler
 
 # Print environment information for debugging
 print(f"Python version: {sys.version}")
@@ -150,6 +151,19 @@ class EnhancedJobRequirements(BaseModel):
 # --- Helper Functions ---
 
 async def safe_runner_run(agent, input_data):
+    """
+    Run an agent through the shared LLM scheduler (rate limits, retries, metrics).
+    """
+    prompt_tokens = estimate_tokens(str(input_data))
+    return await get_llm_scheduler().call(
+        agent.name,
+        lambda: _run_agent(agent, input_data),
+        estimated_tokens=prompt_tokens + LLM_OUTPUT_TOKEN_ALLOWANCE,
+        prompt_tokens=prompt_tokens,
+    )
+
+
+async def _run_agent(agent, input_data):
     """
     Safely run an agent with proper async/await handling.
     Handles both sync and async Runner.run() implementations.
@@ -603,6 +617,16 @@ indonesian_check_agent = Agent(
     model=MODEL
 )
 
+async def _run_guardrail_check(text_to_check: str, ctx: RunContextWrapper):
+    # Guardrails run inside an already-scheduled agent call, so skip the concurrency
+    # slot (avoids deadlock) but still count against the rate limits.
+    return await get_llm_scheduler().call(
+        indonesian_check_agent.name,
+        lambda: Runner.run(indonesian_check_agent, text_to_check, context=ctx.context),
+        estimated_tokens=estimate_tokens(text_to_check) + LLM_OUTPUT_TOKEN_ALLOWANCE,
+        use_slot=False,
+    )
+
 @output_guardrail
 async def indonesian_guardrail_job_enhancement(
     ctx: RunContextWrapper, agent: Agent, output: EnhancedJobRequirements
@@ -611,7 +635,7 @@ async def indonesian_guardrail_job_enhancement(
     Guardrail to ensure job enhancement output is in Indonesian language.
     """
     # Check if the enhanced requirements text is in Indonesian
-    result = await Runner.run(indonesian_check_agent, output.enhanced_requirements, context=ctx.context)
+    result = await _run_guardrail_check(output.enhanced_requirements, ctx)
     
     # Trip the guardrail if the text is NOT in Indonesian
     tripwire_triggered = not result.final_output.is_indonesian
@@ -650,7 +674,7 @@ async def indonesian_guardrail(
     text_to_check += " ".join(output.alternative_positions.suggested_positions) + " "
     
     # Check if the combined text is in Indonesian
-    result = await Runner.run(indonesian_check_agent, text_to_check, context=ctx.context)
+    result = await _run_guardrail_check(text_to_check, ctx)
     
     # Trip the guardrail if the text is NOT in Indonesian
     tripwire_triggered = not result.final_output.is_indonesian
@@ -2,24 +2,51 @@ import asyncio
 import json
 import logging
 import os
-import shutil
-import tempfile
 from typing import List, Optional
 
 from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as FormUploadFile
 from pydantic import BaseModel, ConfigDict, Field
 from dotenv import load_dotenv
 
 from .resume_scorer import score_resume, score_resume_file, enhance_job_requirements
-from .interview_scorer import InterviewQAItem, score_interview
-from .interview_zip import process_interview_zip, process_interview_zip_from_url
-from .transcribe import ALLOWED_EXTENSIONS, resolve_media_source, save_upload_to_temp, transcribe_file
-from .heygen import HeyGenAPIError, generate_avatar_video, get_video_status
+from .interview_scorer import InterviewQAItem, score_interview, score_interview_stream
+from .interview_zip import (
+    download_interview_zip,
+    iter_interview_zip,
+    process_interview_zip,
+    process_interview_zip_from_url,
+)
+from .transcribe import (
+    ALLOWED_EXTENSIONS,
+    file_sha256,
+    resolve_media_source,
+    save_upload_to_temp,
+    transcribe_file,
+)
+from .transcribe_scheduler import (
+    SharedTempFile,
+    get_transcription_scheduler,
+    schedule_cached_transcription,
+)
+from .llm_scheduler import get_llm_scheduler
+from .pdf_extract import shutdown_pdf_pool
+from .http_client import close_http_clients
+from .heygen import (
+    HeyGenAPIError,
+    generate_avatar_video,
+    get_video_status,
+    warm_catalog_defaults,
+)
 
 # Load environment variables
 load_dotenv()
 
 router = APIRouter(prefix="/ai", tags=["AI"])
+router.add_event_handler("shutdown", shutdown_pdf_pool)
+router.add_event_handler("shutdown", close_http_clients)
+router.add_event_handler("startup", warm_catalog_defaults)
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +58,8 @@ async def _optional_upload_file(request: Request) -> Optional[UploadFile]:
 
     form = await request.form()
     file = form.get("file")
-    if not isinstance(file, UploadFile) or not file.filename:
+    # request.form() yields Starlette's UploadFile, which FastAPI's subclasses.
+    if not isinstance(file, FormUploadFile) or not file.filename:
         return None
     return file
 
@@ -229,6 +257,7 @@ class ProcessInterviewZipItem(BaseModel):
     question_number: int
     question: str
     answer: str
+    error: Optional[str] = None
 
 
 class ProcessInterviewZipResponse(BaseModel):
@@ -441,7 +470,10 @@ async def root():
             "transcribe": "/ai/transcribe",
             "process_interview_zip": "/ai/process-interview-zip",
             "score_interview": "/ai/score-interview",
+            "score_interview_zip": "/ai/score-interview-zip",
             "text_to_speech": "/ai/text-to-speech",
+            "transcription_metrics": "/ai/transcription-metrics",
+            "llm_metrics": "/ai/llm-metrics",
             "docs": "/docs"
         }
     }
@@ -507,7 +539,7 @@ async def process_interview_zip_endpoint(
     if file and url:
         raise HTTPException(status_code=400, detail="Provide either url or a zip file upload, not both")
 
-    zip_path = None
+    zip_file = None
     try:
         if url:
             qa_pairs = await process_interview_zip_from_url(
@@ -518,12 +550,10 @@ async def process_interview_zip_endpoint(
             if not file.filename.lower().endswith(".zip"):
                 raise HTTPException(status_code=400, detail="Upload a .zip file")
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as temp_zip:
-                shutil.copyfileobj(file.file, temp_zip)
-                zip_path = temp_zip.name
+            zip_file = SharedTempFile(await asyncio.to_thread(save_upload_to_temp, file.file, "zip"))
 
             qa_pairs = await process_interview_zip(
-                zip_path=zip_path,
+                zip_file=zip_file,
                 language_code=language_code,
             )
 
@@ -541,8 +571,107 @@ async def process_interview_zip_endpoint(
             message="Gagal memproses zip wawancara",
         )
     finally:
-        if zip_path and os.path.exists(zip_path):
-            os.unlink(zip_path)
+        if zip_file:
+            zip_file.release()
+
+
+@router.post("/score-interview-zip")
+async def score_interview_zip_endpoint(
+    file: Optional[UploadFile] = File(None, description="Interview .zip bundle"),
+    url: Optional[str] = Form(
+        None,
+        description="HTTPS URL to a .zip interview bundle (no file upload needed)",
+    ),
+    job_description: str = Form(..., description="Job description text"),
+    job_title: Optional[str] = Form(None, description="Job title (optional)"),
+    target_skills: str = Form("[]", description="JSON string of target skills"),
+    resume_text: Optional[str] = Form(None, description="Resume text (optional)"),
+    language_code: str = Form(
+        "id-ID",
+        description="Amazon Transcribe language code (default: id-ID for Indonesian)",
+    ),
+) -> StreamingResponse:
+    """
+    Transcribe and score an interview zip in one pipelined call.
+
+    Each question is micro-evaluated as soon as its transcript is ready; calibration and
+    synthesis run once all questions are in. The response is newline-delimited JSON:
+    `transcript` and `question_evaluation` events as they happen, then one `result`
+    event with the same `data` as `/ai/score-interview` plus `qa_pairs`
+    (or an `error` event).
+
+    Every field is sent as form data, like `/ai/score-pdf`; provide **either** `url`
+    **or** a `file` upload — not both.
+    """
+    if file is not None and not file.filename:
+        file = None
+    if not file and not url:
+        raise HTTPException(status_code=400, detail="Provide either url or a zip file upload")
+    if file and url:
+        raise HTTPException(status_code=400, detail="Provide either url or a zip file upload, not both")
+    if file and not file.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Upload a .zip file")
+
+    try:
+        target_skills_list = json.loads(target_skills) if target_skills else []
+    except json.JSONDecodeError:
+        target_skills_list = []
+
+    zip_file = None
+    if file:
+        zip_file = SharedTempFile(await asyncio.to_thread(save_upload_to_temp, file.file, "zip"))
+
+    async def events():
+        nonlocal zip_file
+        qa_pairs: List[dict] = []
+        try:
+            if zip_file is None:
+                zip_file = SharedTempFile(await download_interview_zip(url))
+
+            async def qa_items():
+                async for item in iter_interview_zip(zip_file, language_code=language_code):
+                    qa_pairs.append(item)
+                    yield InterviewQAItem(
+                        question_number=item["question_number"],
+                        question=item["question"],
+                        answer=item["answer"],
+                    )
+
+            async for event in score_interview_stream(
+                qa_items(),
+                job_description=job_description,
+                job_title=job_title,
+                resume_text=resume_text,
+                target_skills=target_skills_list,
+            ):
+                if event["event"] == "result":
+                    event = {
+                        "event": "result",
+                        "success": True,
+                        "data": {
+                            **event["data"],
+                            "qa_pairs": sorted(qa_pairs, key=lambda qa: qa["question_number"]),
+                        },
+                        "message": "Wawancara berhasil dinilai",
+                    }
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error("score-interview-zip failed: %s", detail)
+            yield json.dumps(
+                {
+                    "event": "error",
+                    "success": False,
+                    "error": str(detail),
+                    "message": "Gagal menilai wawancara",
+                },
+                ensure_ascii=False,
+            ) + "\n"
+        finally:
+            if zip_file:
+                zip_file.release()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 
 @router.post("/transcribe", response_model=TranscribeResponse)
@@ -561,11 +690,13 @@ async def transcribe_audio(
     """
     file = await _optional_upload_file(request) if not url else None
     temp_file_path = None
+    sha256 = None
+    media_file = None
 
     try:
         if url:
-            temp_file_path, filename, _should_delete = resolve_media_source(
-                file_path=None, filename=None, url=url
+            temp_file_path, filename, _should_delete, sha256 = await resolve_media_source(
+                None, None, url
             )
         else:
             if not file:
@@ -577,7 +708,7 @@ async def transcribe_audio(
                     status_code=400,
                     detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
                 )
-            temp_file_path = save_upload_to_temp(file.file, file_ext)
+            temp_file_path = await asyncio.to_thread(save_upload_to_temp, file.file, file_ext)
             filename = file.filename
 
         file_ext = filename.split(".")[-1].lower() if "." in filename else ""
@@ -587,8 +718,18 @@ async def transcribe_audio(
                 detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
             )
 
-        result = await asyncio.to_thread(
-            transcribe_file, temp_file_path, filename, language_code
+        if not sha256:
+            sha256 = await asyncio.to_thread(file_sha256, temp_file_path)
+        media_file = SharedTempFile(temp_file_path)
+        result = await schedule_cached_transcription(
+            sha256,
+            language_code,
+            transcribe_file,
+            temp_file_path,
+            filename,
+            language_code,
+            sha256,
+            input_file=media_file,
         )
         return TranscribeResponse(**result)
     except HTTPException:
@@ -596,10 +737,25 @@ async def transcribe_audio(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
     finally:
-        if temp_file_path and os.path.exists(temp_file_path):
+        # Once handed to the scheduler, a job started here may still be reading the file.
+        if media_file:
+            media_file.release()
+        elif temp_file_path and os.path.exists(temp_file_path):
             os.unlink(temp_file_path)
 
 
+@router.get("/transcription-metrics")
+async def transcription_metrics_endpoint() -> dict:
+    """Global transcription scheduler state: active jobs, queue depth and wait times."""
+    return get_transcription_scheduler().metrics()
+
+
+@router.get("/llm-metrics")
+async def llm_metrics_endpoint() -> dict:
+    """Shared LLM scheduler state: in-flight calls, bucket levels and per-stage queue waits."""
+    return get_llm_scheduler().metrics()
+
+
 @router.post("/text-to-speech", response_model=TextToSpeechResponse)
 async def text_to_speech_endpoint(request: TextToSpeechRequest) -> TextToSpeechResponse:
     """
@@ -617,8 +773,7 @@ async def text_to_speech_endpoint(request: TextToSpeechRequest) -> TextToSpeechR
     )
     try:
         result = await asyncio.wait_for(
-            asyncio.to_thread(
-                generate_avatar_video,
+            generate_avatar_video(
                 script=request.script,
                 title=request.title,
                 avatar_id=request.avatar_id,
@@ -662,7 +817,7 @@ async def text_to_speech_endpoint(request: TextToSpeechRequest) -> TextToSpeechR
 async def text_to_speech_status_endpoint(video_id: str) -> TextToSpeechResponse:
     """Check HeyGen video generation status by video ID."""
     try:
-        result = await asyncio.to_thread(get_video_status, video_id)
+        result = await get_video_status(video_id)
         status = result.get("status")
         if status == "failed":
             return TextToSpeechResponse(
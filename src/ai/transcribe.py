@@ -1,29 +1,71 @@
-import json
+import hashlib
+import logging
 import os
 import shutil
 import tempfile
 import time
-import urllib.request
 import uuid
-from typing import Optional, Tuple
+from typing import BinaryIO, Callable, Optional, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
-from .url_fetch import download_url_to_temp, filename_from_url
+from .transcript_cache import get_cached_transcript, store_transcript
+from .http_client import get_sync_http_client
+from .url_fetch import download_url
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", "..", ".env"))
 
+logger = logging.getLogger(__name__)
+
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 S3_BUCKET = os.getenv("S3_BUCKET", "")
+# Optional S3-compatible endpoint (e.g. a local MinIO) for development.
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_MEDIA_PREFIX = "transcriptions/"
+# When set, ensure a bucket lifecycle rule expires media under S3_MEDIA_PREFIX after N days.
+# This is the only cleanup: keys are shared by every job for the same media, so a job
+# cannot tell whether another one (or a request that just found the key) still needs it.
+S3_MEDIA_EXPIRE_DAYS = int(os.getenv("S3_MEDIA_EXPIRE_DAYS", "0"))
+S3_LIFECYCLE_RULE_ID = "akumaju-transcription-media-expiry"
+
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16")) * MB,
+    multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "16")) * MB,
+    max_concurrency=int(os.getenv("S3_MAX_CONCURRENCY", "8")),
+    use_threads=True,
+)
 
 transcribe_client = boto3.client("transcribe", region_name=AWS_REGION)
-s3_client = boto3.client("s3", region_name=AWS_REGION)
+s3_client = boto3.client("s3", region_name=AWS_REGION, endpoint_url=S3_ENDPOINT_URL)
+_lifecycle_checked = False
 
 ALLOWED_EXTENSIONS = ["mp3", "mp4", "wav", "flac", "ogg", "amr", "webm", "m4a"]
 
+# AWS error codes that mean "slow down", surfaced as HTTP 429 so callers can retry.
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "LimitExceededException",
+    "RequestLimitExceeded",
+    "SlowDown",
+}
+POLL_INTERVAL_SECONDS = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_throttling_error(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def _client_error_status(error: ClientError) -> int:
+    return 429 if is_throttling_error(error) else 500
+
 
 def get_media_format(filename: str) -> str:
     ext = filename.lower().split(".")[-1]
@@ -40,12 +82,91 @@ def get_media_format(filename: str) -> str:
     return format_map.get(ext, "mp3")
 
 
+def media_s3_key(sha256: str, file_ext: str) -> str:
+    """Content-addressed key: identical media always maps to the same object."""
+    return f"{S3_MEDIA_PREFIX}{sha256}.{file_ext}"
+
+
+def s3_object_exists(s3_key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=S3_BUCKET, Key=s3_key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise HTTPException(
+            status_code=_client_error_status(e), detail=f"Failed to check S3 object: {str(e)}"
+        )
+
+
+def ensure_media_lifecycle_rule(expire_days: int = S3_MEDIA_EXPIRE_DAYS) -> None:
+    """Add (or update) a bucket lifecycle rule that expires uploaded media, keeping other rules."""
+    if expire_days <= 0:
+        return
+    try:
+        rules = s3_client.get_bucket_lifecycle_configuration(Bucket=S3_BUCKET).get("Rules", [])
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "NoSuchLifecycleConfiguration":
+            raise
+        rules = []
+
+    rule = {
+        "ID": S3_LIFECYCLE_RULE_ID,
+        "Filter": {"Prefix": S3_MEDIA_PREFIX},
+        "Status": "Enabled",
+        "Expiration": {"Days": expire_days},
+        "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 1},
+    }
+    existing = next((r for r in rules if r.get("ID") == S3_LIFECYCLE_RULE_ID), None)
+    if existing == rule:
+        return
+    rules = [r for r in rules if r.get("ID") != S3_LIFECYCLE_RULE_ID] + [rule]
+    s3_client.put_bucket_lifecycle_configuration(
+        Bucket=S3_BUCKET, LifecycleConfiguration={"Rules": rules}
+    )
+
+
+def _ensure_lifecycle_once() -> None:
+    global _lifecycle_checked
+    if _lifecycle_checked or S3_MEDIA_EXPIRE_DAYS <= 0:
+        return
+    _lifecycle_checked = True
+    try:
+        ensure_media_lifecycle_rule(S3_MEDIA_EXPIRE_DAYS)
+    except ClientError as e:
+        logger.warning("Could not set S3 lifecycle rule on %s: %s", S3_BUCKET, e)
+
+
 def upload_to_s3(file_path: str, s3_key: str) -> str:
+    """Upload a local file unless an object already exists at the (content-addressed) key."""
+    _ensure_lifecycle_once()
+    if s3_object_exists(s3_key):
+        return f"s3://{S3_BUCKET}/{s3_key}"
     try:
-        s3_client.upload_file(file_path, S3_BUCKET, s3_key)
+        s3_client.upload_file(file_path, S3_BUCKET, s3_key, Config=TRANSFER_CONFIG)
         return f"s3://{S3_BUCKET}/{s3_key}"
     except ClientError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload to S3: {str(e)}")
+        raise HTTPException(
+            status_code=_client_error_status(e), detail=f"Failed to upload to S3: {str(e)}"
+        )
+
+
+def upload_fileobj_to_s3(open_stream: Callable[[], BinaryIO], s3_key: str) -> str:
+    """
+    Stream a readable file object to S3 (multipart for large bodies). The stream is only
+    opened when no object exists at the key yet.
+    """
+    _ensure_lifecycle_once()
+    if s3_object_exists(s3_key):
+        return f"s3://{S3_BUCKET}/{s3_key}"
+    try:
+        with open_stream() as stream:
+            s3_client.upload_fileobj(stream, S3_BUCKET, s3_key, Config=TRANSFER_CONFIG)
+        return f"s3://{S3_BUCKET}/{s3_key}"
+    except ClientError as e:
+        raise HTTPException(
+            status_code=_client_error_status(e), detail=f"Failed to upload to S3: {str(e)}"
+        )
 
 
 def start_transcription_job(
@@ -60,7 +181,8 @@ def start_transcription_job(
         )
     except ClientError as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to start transcription job: {str(e)}"
+            status_code=_client_error_status(e),
+            detail=f"Failed to start transcription job: {str(e)}",
         )
 
 
@@ -86,25 +208,31 @@ def wait_for_job_completion(job_name: str, timeout: int = 300) -> dict:
                     status_code=500, detail=f"Transcription failed: {failure_reason}"
                 )
 
-            time.sleep(2)
+            time.sleep(POLL_INTERVAL_SECONDS)
         except ClientError as e:
+            if is_throttling_error(e):
+                # A throttled status poll says nothing about the job itself; keep waiting.
+                time.sleep(POLL_INTERVAL_SECONDS * 2)
+                continue
             raise HTTPException(
                 status_code=500, detail=f"Error checking job status: {str(e)}"
             )
 
 
 def get_transcription_result(transcript_uri: str) -> str:
+    # Runs in a transcription worker thread, so it uses the pooled sync client.
     try:
-        with urllib.request.urlopen(transcript_uri) as response:
-            transcript_data = json.loads(response.read().decode())
-            return transcript_data["results"]["transcripts"][0]["transcript"]
+        response = get_sync_http_client().get(transcript_uri)
+        response.raise_for_status()
+        transcript_data = response.json()
+        return transcript_data["results"]["transcripts"][0]["transcript"]
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve transcription: {str(e)}"
         )
 
 
-def transcribe_file(file_path: str, filename: str, language_code: str = "en-US") -> dict:
+def _validate_transcribe_input(filename: str) -> str:
     if not S3_BUCKET:
         raise HTTPException(
             status_code=500,
@@ -120,12 +248,21 @@ def transcribe_file(file_path: str, filename: str, language_code: str = "en-US")
             status_code=400,
             detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
         )
+    return file_ext
+
 
+def _transcribe_media(
+    upload: Callable[[str], str],
+    filename: str,
+    file_ext: str,
+    language_code: str,
+    sha256: str,
+) -> dict:
     job_name = f"transcribe-{uuid.uuid4().hex[:12]}"
     media_format = get_media_format(filename)
-    s3_key = f"transcriptions/{job_name}.{file_ext}"
+    s3_key = media_s3_key(sha256, file_ext)
 
-    media_uri = upload_to_s3(file_path, s3_key)
+    media_uri = upload(s3_key)
     start_transcription_job(job_name, media_uri, media_format, language_code)
     job_response = wait_for_job_completion(job_name)
 
@@ -141,20 +278,94 @@ def transcribe_file(file_path: str, filename: str, language_code: str = "en-US")
     }
 
 
+def stream_sha256(stream: BinaryIO) -> str:
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def file_sha256(file_path: str) -> str:
+    with open(file_path, "rb") as media_file:
+        return stream_sha256(media_file)
+
+
+def _transcribe_cached(
+    sha256: str, language_code: str, transcribe: Callable[[], dict]
+) -> dict:
+    cached = get_cached_transcript(sha256, language_code)
+    if cached:
+        return cached
+    result = transcribe()
+    store_transcript(sha256, language_code, result)
+    return result
+
+
+def transcribe_file(
+    file_path: str,
+    filename: str,
+    language_code: str = "en-US",
+    sha256: Optional[str] = None,
+) -> dict:
+    file_ext = _validate_transcribe_input(filename)
+    sha256 = sha256 or file_sha256(file_path)
+    return _transcribe_cached(
+        sha256,
+        language_code,
+        lambda: _transcribe_media(
+            lambda s3_key: upload_to_s3(file_path, s3_key),
+            filename,
+            file_ext,
+            language_code,
+            sha256,
+        ),
+    )
+
+
+def transcribe_stream(
+    open_stream: Callable[[], BinaryIO],
+    filename: str,
+    language_code: str = "en-US",
+    sha256: Optional[str] = None,
+) -> dict:
+    """
+    Transcribe media read from a stream (e.g. a zip member) without writing it to disk.
+    `open_stream` must return a fresh stream per call; it is used for hashing (when no
+    sha256 is given) and again for the upload if the object is not in S3 yet.
+    """
+    file_ext = _validate_transcribe_input(filename)
+    if not sha256:
+        with open_stream() as stream:
+            sha256 = stream_sha256(stream)
+
+    return _transcribe_cached(
+        sha256,
+        language_code,
+        lambda: _transcribe_media(
+            lambda s3_key: upload_fileobj_to_s3(open_stream, s3_key),
+            filename,
+            file_ext,
+            language_code,
+            sha256,
+        ),
+    )
+
+
 def save_upload_to_temp(upload_file, file_ext: str) -> str:
     with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as temp_file:
         shutil.copyfileobj(upload_file, temp_file)
         return temp_file.name
 
 
-def resolve_media_source(
+async def resolve_media_source(
     file_path: Optional[str],
     filename: Optional[str],
     url: Optional[str],
-) -> Tuple[str, str, bool]:
+) -> Tuple[str, str, bool, Optional[str]]:
     """
     Resolve transcribe input from local path or URL.
-    Returns (path, filename, should_delete_temp).
+    Returns (path, filename, should_delete_temp, sha256). sha256 is only known for
+    URL downloads, which hash while streaming.
     """
     if file_path and url:
         raise HTTPException(status_code=400, detail="Provide either a file upload or url, not both")
@@ -164,7 +375,7 @@ def resolve_media_source(
     if file_path:
         if not filename:
             raise HTTPException(status_code=400, detail="Filename is required for file upload")
-        return file_path, filename, False
+        return file_path, filename, False, None
 
-    temp_path, downloaded_name = download_url_to_temp(url)
-    return temp_path, downloaded_name, True
+    downloaded = await download_url(url)
+    return downloaded.path, downloaded.filename, True, downloaded.sha256
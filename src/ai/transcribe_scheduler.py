@@ -0,0 +1,232 @@
+"""Process-wide scheduler for Amazon Transcribe work (S3 upload + transcription job)."""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .metrics import WaitTimeStats
+from .transcript_cache import get_cached_transcript
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIBE_MAX_CONCURRENT = int(os.getenv("TRANSCRIBE_MAX_CONCURRENT", "10"))
+TRANSCRIBE_MAX_RETRIES = int(os.getenv("TRANSCRIBE_MAX_RETRIES", "4"))
+TRANSCRIBE_RETRY_BASE_DELAY = float(os.getenv("TRANSCRIBE_RETRY_BASE_DELAY", "2"))
+TRANSCRIBE_RETRY_MAX_DELAY = float(os.getenv("TRANSCRIBE_RETRY_MAX_DELAY", "30"))
+
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+class TranscriptionScheduler:
+    """
+    Global concurrency limit for transcription work with fair queuing.
+
+    Waiters are grouped per request key and slots are handed out round-robin across
+    keys, so one large interview zip cannot starve other requests queued behind it.
+    Throttled attempts (HTTP 429/503 from transcribe.py) are retried with backoff; the
+    slot is given up for the backoff and the retry queues again like a new job.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = TRANSCRIBE_MAX_CONCURRENT,
+        max_retries: int = TRANSCRIBE_MAX_RETRIES,
+        retry_base_delay: float = TRANSCRIBE_RETRY_BASE_DELAY,
+        retry_max_delay: float = TRANSCRIBE_RETRY_MAX_DELAY,
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._active = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wait_stats = WaitTimeStats()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def _acquire(self, request_key: str) -> None:
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(request_key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted right as we got cancelled; hand it on.
+                self._release()
+            else:
+                self._discard_waiter(request_key, waiter)
+            raise
+
+    def _discard_waiter(self, request_key: str, waiter: asyncio.Future) -> None:
+        queue = self._waiters.get(request_key)
+        if not queue:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[request_key]
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._waiters and self._active < self.max_concurrent:
+            request_key, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            # Rotate the key to the back so the next slot goes to another request.
+            del self._waiters[request_key]
+            if queue:
+                self._waiters[request_key] = queue
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+    def _retry_delay(self, attempt: int) -> float:
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2**attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def run(self, request_key: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking `func(*args)` in a worker thread once a global slot is free."""
+        self._submitted += 1
+        try:
+            attempt = 0
+            while True:
+                queued_at = time.monotonic()
+                await self._acquire(request_key)
+                self._wait_stats.record(time.monotonic() - queued_at)
+                try:
+                    result = await asyncio.to_thread(func, *args)
+                    self._completed += 1
+                    return result
+                except HTTPException as exc:
+                    if exc.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    attempt += 1
+                    self._retries += 1
+                    logger.warning(
+                        "Transcription throttled (attempt %d/%d), retrying in %.1fs: %s",
+                        attempt,
+                        self.max_retries,
+                        delay,
+                        exc.detail,
+                    )
+                finally:
+                    self._release()
+                # Back off without the slot, so other requests' jobs run meanwhile.
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._failed += 1
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "queued_requests": len(self._waiters),
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "retries": self._retries,
+            "wait_time": self._wait_stats.snapshot(),
+        }
+
+
+_scheduler: Optional[TranscriptionScheduler] = None
+
+
+def get_transcription_scheduler() -> TranscriptionScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TranscriptionScheduler()
+    return _scheduler
+
+
+def new_request_key() -> str:
+    return uuid.uuid4().hex
+
+
+async def schedule_transcription(
+    func: Callable[..., Any],
+    *args: Any,
+    request_key: Optional[str] = None,
+) -> Any:
+    return await get_transcription_scheduler().run(request_key or new_request_key(), func, *args)
+
+
+class SharedTempFile:
+    """
+    A temp file read by transcription jobs that may outlive the request that created it.
+
+    The creator holds the first reference and calls release() instead of deleting the
+    file; schedule_cached_transcription adds one per job it starts, released when that
+    job finishes. The file is deleted with the last reference, so callers that joined a
+    job keep working after the request that started it has gone away.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._holders = 1
+
+    def hold(self) -> None:
+        self._holders += 1
+
+    def release(self) -> None:
+        self._holders -= 1
+        if self._holders == 0 and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+_inflight: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+
+
+async def schedule_cached_transcription(
+    sha256: str,
+    language_code: str,
+    func: Callable[..., Any],
+    *args: Any,
+    request_key: Optional[str] = None,
+    input_file: Optional[SharedTempFile] = None,
+) -> Any:
+    """
+    Return a cached transcript for (sha256, language_code) without taking a slot, or
+    schedule `func(*args)`. Concurrent calls for the same media join the in-flight job.
+    A job started here holds `input_file` (what `func` reads) until it finishes.
+    """
+    cached = get_cached_transcript(sha256, language_code)
+    if cached:
+        return cached
+
+    key = (sha256, language_code)
+    job = _inflight.get(key)
+    if job is None:
+        job = asyncio.ensure_future(schedule_transcription(func, *args, request_key=request_key))
+        _inflight[key] = job
+        job.add_done_callback(lambda _job: _inflight.pop(key, None))
+        if input_file is not None:
+            input_file.hold()
+            job.add_done_callback(lambda _job: input_file.release())
+    # Shield so one caller disconnecting doesn't cancel the job other callers wait on.
+    return await asyncio.shield(job)
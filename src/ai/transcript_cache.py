@@ -0,0 +1,53 @@
+"""Local transcript store keyed by (SHA-256 of media, language code)."""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_DIR = os.getenv(
+    "TRANSCRIPT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "akumaju_transcripts"),
+)
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_LANGUAGE_PATTERN = re.compile(r"^[A-Za-z0-9-]+$")
+
+
+def _cache_path(sha256: str, language_code: str) -> Optional[str]:
+    if not _SHA256_PATTERN.match(sha256) or not _LANGUAGE_PATTERN.match(language_code):
+        return None
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{sha256}_{language_code}.json")
+
+
+def get_cached_transcript(sha256: str, language_code: str) -> Optional[dict]:
+    path = _cache_path(sha256, language_code)
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("Ignoring unreadable transcript cache entry %s: %s", path, exc)
+        return None
+
+
+def store_transcript(sha256: str, language_code: str, result: dict) -> None:
+    path = _cache_path(sha256, language_code)
+    if not path:
+        return
+    try:
+        os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+        # Write to a sibling temp file and rename so readers never see a partial entry.
+        fd, temp_path = tempfile.mkstemp(dir=TRANSCRIPT_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+            json.dump(result, temp_file, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError as exc:
+        logger.warning("Could not store transcript cache entry %s: %s", path, exc)
@@ -1,12 +1,32 @@
+import asyncio
+import hashlib
 import os
+import re
 import tempfile
 import urllib.parse
-import urllib.request
-from typing import Tuple
+from typing import NamedTuple, Tuple
 
+import httpx
 from fastapi import HTTPException
 
+from .http_client import get_http_client, host_slot
+
 MAX_DOWNLOAD_BYTES = 500 * 1024 * 1024  # 500 MB
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "180"))
+DOWNLOAD_MAX_RETRIES = int(os.getenv("DOWNLOAD_MAX_RETRIES", "3"))
+DOWNLOAD_RETRY_DELAY = float(os.getenv("DOWNLOAD_RETRY_DELAY", "1"))
+
+RETRYABLE_HTTP_STATUS = (408, 429, 500, 502, 503, 504)
+TRANSIENT_ERRORS = (httpx.TransportError,)
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-")
+
+
+class DownloadedFile(NamedTuple):
+    path: str
+    filename: str
+    sha256: str
+    size: int
 
 
 def normalize_download_url(url: str) -> str:
@@ -34,26 +54,120 @@ def filename_from_url(url: str) -> str:
     return name
 
 
-def download_url_to_temp(url: str) -> Tuple[str, str]:
-    """Download a URL to a temporary file. Returns (path, filename)."""
+def _size_limit_error() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File exceeds maximum download size ({MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB)",
+    )
+
+
+def _resumed_at(response: httpx.Response, offset: int) -> bool:
+    """True when a ranged response continues exactly at `offset`."""
+    if response.status_code != 206:
+        return False
+    match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+    return bool(match) and int(match.group(1)) == offset
+
+
+class _Progress:
+    """Bytes of the body already in the temp file and their running SHA-256."""
+
+    def __init__(self) -> None:
+        self.hasher = hashlib.sha256()
+        self.written = 0
+
+    def restart(self, temp_file) -> None:
+        temp_file.seek(0)
+        temp_file.truncate()
+        self.hasher = hashlib.sha256()
+        self.written = 0
+
+    def append(self, temp_file, chunk: bytes) -> None:
+        temp_file.write(chunk)
+        self.hasher.update(chunk)
+        self.written += len(chunk)
+
+
+async def _stream_attempt(
+    client: httpx.AsyncClient, url: str, temp_file, progress: _Progress
+) -> None:
+    """
+    One GET of the remaining body, holding a host slot only for this request. Disk
+    writes and hashing run in a worker thread so the event loop keeps serving.
+    """
+    # Raw bytes only, so Content-Length and Range offsets refer to the file.
+    headers = {"Accept-Encoding": "identity"}
+    if progress.written:
+        headers["Range"] = f"bytes={progress.written}-"
+
+    async with host_slot(url):
+        async with client.stream("GET", url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            if progress.written and not _resumed_at(response, progress.written):
+                # Server ignored or mangled the range; start over.
+                await asyncio.to_thread(progress.restart, temp_file)
+
+            content_length = response.headers.get("Content-Length")
+            expected = progress.written + int(content_length) if content_length else None
+            if expected is not None and expected > MAX_DOWNLOAD_BYTES:
+                raise _size_limit_error()
+            async for chunk in response.aiter_raw(DOWNLOAD_CHUNK_SIZE):
+                if progress.written + len(chunk) > MAX_DOWNLOAD_BYTES:
+                    raise _size_limit_error()
+                await asyncio.to_thread(progress.append, temp_file, chunk)
+            if expected is not None and progress.written < expected:
+                raise httpx.ReadError("Connection closed before the full body arrived")
+
+
+async def download_url(url: str) -> DownloadedFile:
+    """
+    Stream a URL to a temporary file in DOWNLOAD_CHUNK_SIZE chunks.
+
+    The size cap is enforced as bytes arrive and a SHA-256 of the content is computed
+    on the fly. Transient failures resume with an HTTP Range request when the server
+    supports it, otherwise the download restarts from the beginning.
+    """
     normalized_url = normalize_download_url(url)
     filename = filename_from_url(normalized_url)
     ext = os.path.splitext(filename)[1]
 
-    request = urllib.request.Request(normalized_url, headers={"User-Agent": "AkuMaju-API/1.0"})
+    client = get_http_client()
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=ext)
+    progress = _Progress()
+    attempt = 0
+
     try:
-        with urllib.request.urlopen(request, timeout=180) as response:
-            data = response.read(MAX_DOWNLOAD_BYTES + 1)
-            if len(data) > MAX_DOWNLOAD_BYTES:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File exceeds maximum download size ({MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB)",
-                )
+        with temp_file:
+            while True:
+                try:
+                    await _stream_attempt(client, normalized_url, temp_file, progress)
+                    break
+                except httpx.HTTPStatusError as exc:
+                    if (
+                        exc.response.status_code not in RETRYABLE_HTTP_STATUS
+                        or attempt >= DOWNLOAD_MAX_RETRIES
+                    ):
+                        raise
+                except TRANSIENT_ERRORS:
+                    if attempt >= DOWNLOAD_MAX_RETRIES:
+                        raise
+
+                # The host slot went back with the failed attempt, so other downloads
+                # from this host can use it while this one backs off.
+                attempt += 1
+                await asyncio.to_thread(temp_file.flush)
+                await asyncio.sleep(DOWNLOAD_RETRY_DELAY * (2 ** (attempt - 1)))
     except HTTPException:
+        os.unlink(temp_file.name)
         raise
     except Exception as exc:
+        os.unlink(temp_file.name)
         raise HTTPException(status_code=400, detail=f"Failed to download URL: {exc}") from exc
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
-        temp_file.write(data)
-        return temp_file.name, filename
+    return DownloadedFile(temp_file.name, filename, progress.hasher.hexdigest(), progress.written)
+
+
+async def download_url_to_temp(url: str) -> Tuple[str, str]:
+    """Download a URL to a temporary file. Returns (path, filename)."""
+    downloaded = await download_url(url)
+    return downloaded.path, downloaded.filename
@@ -1,11 +1,65 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 try:
-    from .date_filters import append_date_filters, month_bounds, start_of_day, end_of_day
+    from .date_filters import (
+        append_date_filters,
+        bind_date_range,
+        merged_periods,
+        month_bounds,
+        period_bounds,
+        period_of,
+        period_sql,
+        range_predicate,
+    )
+    from .eligible_rollup import RollupTotals, read_rollup, whole_month_periods
+    from .karyawan_ledger import (
+        INSTALLMENT_PAID_SQL,
+        KARYAWAN_LEDGER_TABLE,
+        LUMP_PAID_SQL,
+        karyawan_ledger_refreshed_at,
+        ledger_products,
+    )
+    from .reporting_dates import reporting_basis
+    from .sql_builder import (
+        Join,
+        Select,
+        loan_history_relation,
+        loan_relation,
+        org_joins,
+        project_management_join,
+        statement,
+    )
 except ImportError:
-    from loan.date_filters import append_date_filters, month_bounds, start_of_day, end_of_day
+    from loan.date_filters import (
+        append_date_filters,
+        bind_date_range,
+        merged_periods,
+        month_bounds,
+        period_bounds,
+        period_of,
+        period_sql,
+        range_predicate,
+    )
+    from loan.eligible_rollup import RollupTotals, read_rollup, whole_month_periods
+    from loan.karyawan_ledger import (
+        INSTALLMENT_PAID_SQL,
+        KARYAWAN_LEDGER_TABLE,
+        LUMP_PAID_SQL,
+        karyawan_ledger_refreshed_at,
+        ledger_products,
+    )
+    from loan.reporting_dates import reporting_basis
+    from loan.sql_builder import (
+        Join,
+        Select,
+        loan_history_relation,
+        loan_relation,
+        org_joins,
+        project_management_join,
+        statement,
+    )
 
 # Loan type constants
 # Aku Cicil is identified in loan_setting by loan_type (e.g. id 44); keep in sync with DB.
@@ -25,39 +79,6 @@ INSTALLMENT_LOAN_CONDITIONS = (
     f"(({EXTRADANA_LOAN_CONDITIONS}) OR ({AKU_CICIL_CONDITION}))"
 )
 
-# Bad debt recovery: a record is only "bad debt" once it was actually paid (not merely
-# overdue) and that payment landed three calendar months or more after the due date's
-# month — a pure M+3 rule, no day-of-month cutoff. The due month plus the next two
-# calendar months (M, M+1, M+2) still count as Repayment; only M+3 onward is Bad Debt
-# Recovery. E.g. due any day in Jan: paid anytime in Jan/Feb/Mar is NOT bad debt (still
-# Repayment), paid 1 Apr onward IS bad debt.
-# Still-unpaid loans never match this, regardless of how overdue — they remain in
-# repayment-risk's unrecovered/outstanding buckets instead.
-_BAD_DEBT_LUMP_PREDICATE = (
-    "l.payment_date IS NOT NULL AND l.payment_date != '0000-00-00' "
-    "AND PERIOD_DIFF(DATE_FORMAT(l.payment_date, '%Y%m'), DATE_FORMAT(l.repayment_date, '%Y%m')) >= 3"
-)
-_BAD_DEBT_INSTALLMENT_PREDICATE = (
-    "tlh.payment_date IS NOT NULL AND tlh.payment_date != '0000-00-00' "
-    "AND PERIOD_DIFF(DATE_FORMAT(tlh.payment_date, '%Y%m'), DATE_FORMAT(tlh.due_date, '%Y%m')) >= 3"
-)
-
-# repayment-risk reporting-month attribution: each repayment is counted in exactly one
-# month — the payment month if paid on/before its due date, or once it has crossed into
-# Bad Debt Recovery (see the predicates above); otherwise the original due month. A row
-# with no payment yet has no payment_date, so this always falls through to the due date,
-# consistent with the live unrecovered/outstanding buckets (which are keyed off due date).
-_REPORTING_DATE_LUMP = (
-    "CASE WHEN l.payment_date IS NOT NULL AND l.payment_date != '0000-00-00' "
-    "AND (l.payment_date <= l.repayment_date OR ({bad_debt})) "
-    "THEN l.payment_date ELSE l.repayment_date END"
-).format(bad_debt=_BAD_DEBT_LUMP_PREDICATE)
-_REPORTING_DATE_INSTALLMENT = (
-    "CASE WHEN tlh.payment_date IS NOT NULL AND tlh.payment_date != '0000-00-00' "
-    "AND (tlh.payment_date <= tlh.due_date OR ({bad_debt})) "
-    "THEN tlh.payment_date ELSE tlh.due_date END"
-).format(bad_debt=_BAD_DEBT_INSTALLMENT_PREDICATE)
-
 # Partial-payment credit: td_loan_payment / td_loan_payment_allocation is ak-mj's "Refund
 # Management" side-channel for manual/extra repayments made outside normal payroll
 # deduction (only a handful of rows out of ~127k fully-paid loans/installments go through
@@ -68,11 +89,11 @@ _REPORTING_DATE_INSTALLMENT = (
 # collected/recovered query above (gated on status = 2) never sees it even though real cash
 # came in. These fragments credit that partial amount instead, using the payment's own
 # created_at as its date (td_loan_payment.payment_date is unused/always NULL in practice)
-# and the same M+3 rule as the row-level predicates above, applied per payment: a partial
-# payment landing 3+ calendar months after the due month counts toward Bad Debt Recovery
-# (dated to the payment's own month); otherwise it counts toward ordinary Repayment
-# "collected" (dated to the due month, matching how a late-but-within-grace-period full
-# payment is attributed). Scoped to status/loan_status = 4 (overdue, still open) rows only —
+# and the same M+3 rule as the row-level predicates in reporting_dates.py, applied per
+# payment: a partial payment landing 3+ calendar months after the due month counts toward
+# Bad Debt Recovery (dated to the payment's own month); otherwise it counts toward ordinary
+# Repayment "collected" (dated to the due month, matching how a late-but-within-grace-period
+# full payment is attributed). Scoped to status/loan_status = 4 (overdue, still open) rows only —
 # a status = 2 row's payment(s) are already fully reflected via the row-level query above.
 # ak-mj never splits a payment between principal and admin fee, so the split here is
 # proportional to the loan's own principal:fee ratio (same ratio the row-level queries use
@@ -150,9 +171,10 @@ def _lump_partial_recovery_sql(loan_conditions: str) -> str:
     """
 
 
-def _partial_recovery_totals(
+def _filtered_partial_recovery_sql(
     db: Session,
     base_sql: str,
+    params: dict,
     *,
     reporting_date_expr: str,
     bad_debt_predicate: str,
@@ -167,16 +189,15 @@ def _partial_recovery_totals(
     start_date: str = None,
     end_date: str = None,
     db_for_filters: Session = None,
-) -> tuple[float, float, int]:
-    """(principal_total, fee_total, distinct_row_count) for a partial-recovery base query
-    (see _installment_partial_recovery_sql/_lump_partial_recovery_sql), after applying the
-    standard repayment-risk org filters and optional reporting-date range. Bad Debt Recovery
-    and repayment-risk's principal/admin-fee/performance metrics are mutually exclusive: pass
+) -> str:
+    """A partial-recovery base query (see _installment_partial_recovery_sql/
+    _lump_partial_recovery_sql) with the standard repayment-risk org filters, the
+    bad-debt split and the optional reporting-date range applied. Bad Debt Recovery and
+    repayment-risk's principal/admin-fee/performance metrics are mutually exclusive: pass
     bad_debt_filter=True to restrict to payments that themselves crossed the M+3 threshold
     (for the Bad Debt Recovery endpoints), bad_debt_filter=False to restrict to payments that
     have not (for repayment-risk's collected/unrecovered totals) — never leave it None for
     either of those two call sites, or the same payment gets credited to both."""
-    params: dict = {}
     query = _apply_repayment_risk_filters(
         base_sql,
         params,
@@ -197,12 +218,20 @@ def _partial_recovery_totals(
         query = append_date_filters(
             query, params, start_date=start_date, end_date=end_date, date_column=reporting_date_expr
         )
+    return query
+
+
+def _partial_recovery_totals(db: Session, base_sql: str, **options) -> tuple[float, float, int]:
+    """(principal_total, fee_total, distinct_row_count) for a partial-recovery base query;
+    `options` are those of _filtered_partial_recovery_sql."""
+    params: dict = {}
+    query = _filtered_partial_recovery_sql(db, base_sql, params, **options)
     wrapped = (
         "SELECT COALESCE(SUM(principal_portion), 0) AS principal_total, "
         "COALESCE(SUM(fee_portion), 0) AS fee_total, "
         f"COUNT(DISTINCT row_id) AS row_count FROM ({query}) t"
     )
-    record = db.execute(text(wrapped), params).fetchone()
+    record = db.execute(statement(wrapped), params).fetchone()
     if not record:
         return 0, 0, 0
     return (
@@ -212,65 +241,19 @@ def _partial_recovery_totals(
     )
 
 
-def _partial_recovery_monthly(
-    db: Session,
-    base_sql: str,
-    *,
-    reporting_date_expr: str,
-    bad_debt_predicate: str,
-    bad_debt_filter: bool | None = None,
-    employer_filter: str = None,
-    sourced_to_filter: str = None,
-    project_filter: str = None,
-    client_segment_filter: str = None,
-    product_type_filter: str = None,
-    loan_status_filter: int = None,
-    id_karyawan_filter: int = None,
-    start_date: str = None,
-    end_date: str = None,
-    db_for_filters: Session = None,
-) -> dict:
-    """Month-bucketed twin of _partial_recovery_totals: {month_year: (principal, fee, row_count)}.
-    See _partial_recovery_totals for bad_debt_filter semantics."""
-    params: dict = {}
-    query = _apply_repayment_risk_filters(
-        base_sql,
-        params,
-        employer_filter=employer_filter,
-        sourced_to_filter=sourced_to_filter,
-        project_filter=project_filter,
-        client_segment_filter=client_segment_filter,
-        product_type_filter=product_type_filter,
-        loan_status_filter=loan_status_filter,
-        id_karyawan_filter=id_karyawan_filter,
-        db=db_for_filters or db,
-    )
-    if bad_debt_filter is True:
-        query += f" AND {bad_debt_predicate}"
-    elif bad_debt_filter is False:
-        query += f" AND NOT ({bad_debt_predicate})"
-    if start_date and end_date:
-        query = append_date_filters(
-            query, params, start_date=start_date, end_date=end_date, date_column=reporting_date_expr
-        )
-    wrapped = f"""
-    SELECT DATE_FORMAT(reporting_date, '%M %Y') AS month_year,
+def _partial_recovery_monthly_sql(db: Session, base_sql: str, params: dict, product: str, **options) -> str:
+    """Month-bucketed twin of _partial_recovery_totals as SQL: (period, product,
+    principal_total, fee_total, row_count) rows, `product` being a literal label."""
+    query = _filtered_partial_recovery_sql(db, base_sql, params, **options)
+    return f"""
+    SELECT {period_sql('reporting_date')} AS period,
+        '{product}' AS product,
         COALESCE(SUM(principal_portion), 0) AS principal_total,
         COALESCE(SUM(fee_portion), 0) AS fee_total,
         COUNT(DISTINCT row_id) AS row_count
     FROM ({query}) t
-    GROUP BY DATE_FORMAT(reporting_date, '%M %Y')
+    GROUP BY period
     """
-    monthly = {}
-    for row in db.execute(text(wrapped), params).fetchall():
-        if row[0] is None:
-            continue
-        monthly[row[0]] = (
-            row[1] if row[1] is not None else 0,
-            row[2] if row[2] is not None else 0,
-            row[3] if row[3] is not None else 0,
-        )
-    return monthly
 
 
 ALL_LOAN_TYPES = ("kasbon", "extradana", "aku_cicil")
@@ -287,57 +270,28 @@ COMPANY_FILTER = (
 
 _cached_aku_cicil_id_list: Optional[str] = None
 
-_LOAN_GMC_JOINS = """
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1"""
-
-_KARYAWAN_GMC_JOINS = """
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1"""
+# Joins for td_loan l -> td_karyawan tk -> emp/src/prj, spliced into hand-written
+# FROM clauses; new queries should start from sql_builder.loan_relation() instead.
+_LOAN_GMC_JOINS = "\n    " + "\n    ".join(join.sql for join in loan_relation().joins)
+_KARYAWAN_GMC_JOINS = "\n    " + "\n    ".join(join.sql for join in org_joins())
 
 
 def _get_aku_cicil_id_list(db: Session) -> str:
     global _cached_aku_cicil_id_list
     if _cached_aku_cicil_id_list is None:
-        rows = db.execute(text(
+        rows = db.execute(statement(
             "SELECT ls.id FROM loan_setting ls WHERE ls.loan_type = 'AkuCicil'"
         )).fetchall()
         _cached_aku_cicil_id_list = ",".join(str(row[0]) for row in rows) if rows else "0"
     return _cached_aku_cicil_id_list
 
 
-def _loan_conditions_from_ids(loan_type: str, aku_ids: str) -> str:
-    loan = f"l.duration = 1 AND l.loan_id NOT IN ({aku_ids})"
-    extradana = f"l.duration != 1 AND l.disbursement != 4 AND l.loan_id NOT IN ({aku_ids})"
-    aku_cicil = f"l.loan_id IN ({aku_ids})"
+def _loan_conditions_from_ids(loan_type: str, aku_ids: str, alias: str = "l") -> str:
+    loan = f"{alias}.duration = 1 AND {alias}.loan_id NOT IN ({aku_ids})"
+    extradana = (
+        f"{alias}.duration != 1 AND {alias}.disbursement != 4 AND {alias}.loan_id NOT IN ({aku_ids})"
+    )
+    aku_cicil = f"{alias}.loan_id IN ({aku_ids})"
     installment = f"(({extradana}) OR ({aku_cicil}))"
     all_loans = f"(({loan}) OR ({extradana}) OR ({aku_cicil}))"
 
@@ -354,9 +308,8 @@ def _loan_conditions_from_ids(loan_type: str, aku_ids: str) -> str:
     return loan
 
 
-def _fetch_employee_counts_by_sourced_to(db: Session, company_filter: str) -> dict:
-    """Eligible and active employee counts per placement (sourced_to)."""
-    query = f"""
+# Eligible and active employee counts per placement (sourced_to).
+_EMPLOYEE_COUNTS_BY_SOURCED_TO_SQL = f"""
         SELECT
             src.keterangan AS sourced_to,
             SUM(CASE WHEN tk.loan_kasbon_eligible = '1' THEN 1 ELSE 0 END) AS eligible,
@@ -365,24 +318,13 @@ def _fetch_employee_counts_by_sourced_to(db: Session, company_filter: str) -> di
         {_KARYAWAN_GMC_JOINS}
         WHERE tk.status = '1'
         AND src.keterangan IS NOT NULL
-        AND emp.keterangan IN {company_filter}
+        AND emp.keterangan IN {COMPANY_FILTER}
         GROUP BY src.keterangan
     """
-    rows = db.execute(text(query)).fetchall()
-    return {
-        row[0]: {"eligible": int(row[1] or 0), "active": int(row[2] or 0)}
-        for row in rows
-        if row[0] is not None
-    }
 
 
 def _project_management_join_sql(required: bool = True) -> str:
-    join_type = "INNER" if required else "LEFT"
-    return f"""
-        {join_type} JOIN (
-            SELECT DISTINCT gmc_id, client_segment, product_type
-            FROM tbl_project_management
-        ) tpm ON tpm.gmc_id = prj.id"""
+    return "\n        " + project_management_join(required).sql
 
 
 def _project_management_label_joins_sql() -> str:
@@ -493,7 +435,7 @@ def _resolve_aggregate_segment_codes(db: Session, category: str) -> list[str]:
     """Load BFSI / Non-BFSI segment codes once per DB session (request)."""
     cache = db.info.setdefault("loan_segment_codes", {})
     if category not in cache:
-        rows = db.execute(text(_client_segment_codes_in_category_sql(category))).fetchall()
+        rows = db.execute(statement(_client_segment_codes_in_category_sql(category))).fetchall()
         cache[category] = [row[0] for row in rows if row[0]]
     return cache[category]
 
@@ -529,32 +471,12 @@ def _segment_filter_predicate(
     return f"tpm.client_segment IN ({_client_segment_codes_in_category_sql(category)})"
 
 
-def _inject_project_management_join(
-    query: str,
-    client_segment_filter: str = None,
-    product_type_filter: str = None,
-    *,
-    force_left_join: bool = False,
-) -> str:
-    if " tpm " in query or "\ntpm " in query:
-        return query
-    if not (client_segment_filter or product_type_filter or force_left_join):
-        return query
-    required = bool(client_segment_filter or product_type_filter)
-    fragment = _project_management_join_sql(required=required)
-    marker = "AND prj.keterangan3 = 1"
-    if marker not in query:
-        return query
-    return query.replace(marker, marker + fragment, 1)
-
-
 def _apply_project_management_filters(
     query: str,
     params: dict,
     client_segment_filter: str = None,
     product_type_filter: str = None,
     *,
-    force_left_join: bool = False,
     db: Session = None,
 ) -> str:
     segment_predicate = _segment_filter_predicate(client_segment_filter, params, db)
@@ -572,16 +494,6 @@ def _apply_project_management_filters(
         query += " AND " + " AND ".join(tpm_conditions)
         return query
 
-    if force_left_join:
-        query = _inject_project_management_join(
-            query,
-            client_segment_filter,
-            product_type_filter,
-            force_left_join=True,
-        )
-        query += " AND " + " AND ".join(tpm_conditions)
-        return query
-
     query += f"""
         AND EXISTS (
             SELECT 1 FROM tbl_project_management tpm
@@ -707,11 +619,11 @@ def _fetch_project_management_filter_options(db: Session) -> dict:
     """
     product_types = [
         {"option_id": row[0], "option_name": row[1]}
-        for row in db.execute(text(product_type_query)).fetchall()
+        for row in db.execute(statement(product_type_query)).fetchall()
         if row[0] is not None
     ]
     segment_options = _build_client_segment_filter_options(
-        db.execute(text(client_segment_query)).fetchall()
+        db.execute(statement(client_segment_query)).fetchall()
     )
     return {"product_types": product_types, **segment_options}
 
@@ -730,7 +642,6 @@ def _append_loan_org_filters(
     company_filter: str = COMPANY_FILTER,
     karyawan_prefix: str = "tk",
     loan_prefix: str = "l",
-    force_project_management_join: bool = False,
     db: Session = None,
 ) -> str:
     query = _apply_project_management_filters(
@@ -738,7 +649,6 @@ def _append_loan_org_filters(
         params,
         client_segment_filter,
         product_type_filter,
-        force_left_join=force_project_management_join,
         db=db,
     )
     query += f" AND emp.keterangan IN {company_filter}"
@@ -819,14 +729,34 @@ def _eligible_date_range(
     return month_bounds(today.month, today.year)
 
 
-def _month_year_date_range(month_year: str) -> tuple[str, str] | None:
-    """Convert 'March 2026' to (first_day, last_day)."""
-    from datetime import datetime
+def _calendar_month_period(range_start: str, range_end: str) -> int | None:
+    """YYYYMM period when (range_start, range_end) spans exactly one calendar month."""
     try:
-        dt = datetime.strptime(month_year, "%B %Y")
-        return month_bounds(dt.month, dt.year)
-    except ValueError:
+        period = period_of(int(range_start[:4]), int(range_start[5:7]))
+    except (TypeError, ValueError):
         return None
+    if (range_start, range_end) != period_bounds(period):
+        return None
+    return period
+
+
+def _split_calendar_months(month_ranges: dict) -> tuple[dict, str | None, str | None]:
+    """
+    For month-grouped snapshot queries: maps each month_ranges key whose range is
+    a whole calendar month to its YYYYMM period, and returns the overall
+    (range_start, range_end) those months span. Ranges that aren't a calendar
+    month are left out and handled per range.
+    """
+    calendar_months = {}
+    for month_key, (range_start, range_end) in month_ranges.items():
+        period = _calendar_month_period(range_start, range_end)
+        if period:
+            calendar_months[month_key] = period
+    if not calendar_months:
+        return calendar_months, None, None
+    span_start = min(month_ranges[month_key][0] for month_key in calendar_months)
+    span_end = max(month_ranges[month_key][1] for month_key in calendar_months)
+    return calendar_months, span_start, span_end
 
 
 _TOTAL_ELIGIBLE_SNAPSHOT_SQL = """
@@ -836,13 +766,7 @@ FROM (
     FROM data_record_eligible de
     WHERE de.snapshot_date BETWEEN :start_date AND :end_date
       AND de.is_loan_eligible = 1
-      AND ({allowed_employer_predicate})
-      AND (:f_employer IS NULL OR de.employer = :f_employer)
-      AND (:f_sourced_to IS NULL OR de.sourced_to = :f_sourced_to)
-      AND (:f_project IS NULL OR de.project = :f_project)
-      AND (:f_branch IS NULL OR de.branch = :f_branch)
-      AND ({segment_predicate})
-      AND (:f_product IS NULL OR de.product_type = :f_product)
+      AND {filter_sql}
 
     UNION ALL
 
@@ -896,7 +820,7 @@ def _resolve_gmc_code(
         return cache[cache_key]
 
     row = db.execute(
-        text(
+        statement(
             """
             SELECT kode_gmc
             FROM tbl_gmc
@@ -999,50 +923,40 @@ def get_total_eligible_employees(
             as_of_date=as_of_date,
         )
 
-        # de.employer stores numeric kode_gmc, while API employer filter is keterangan text.
-        employer_code = _resolve_gmc_code(
-            db, value=employer_filter, group_gmc="sub_client"
-        )
-        sourced_to_code = _resolve_gmc_code(
-            db, value=sourced_to_filter, group_gmc="placement_client"
-        )
-        project_code = _resolve_gmc_code(
-            db, value=project_filter, group_gmc="client_project"
+        rolled_up = _rollup_snapshot_count(
+            db,
+            range_start,
+            range_end,
+            distinct_column="de.id_karyawan",
+            presence_predicate=_ELIGIBLE_PRESENCE_PREDICATE,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            branch_filter=branch_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
         )
+        if rolled_up is not None:
+            return rolled_up
 
-        params = {
-            "start_date": range_start,
-            "end_date": range_end,
-            "f_employer": employer_code,
-            "f_sourced_to": sourced_to_code,
-            "f_project": project_code,
-            "f_branch": branch_filter,
-            "f_product": product_type_filter,
-        }
-        segment_predicate = _eligible_segment_predicate(
-            client_segment_filter, params, db
+        params, filter_sql, detail_filters_used = _eligible_snapshot_filters(
+            db,
+            range_start,
+            range_end,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            branch_filter=branch_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
         )
-        allowed_employer_predicate = _allowed_employer_predicate(db, params)
 
         # data_record fallback only supports the combined 4-company total (+ date);
         # skip when any filter narrows below that.
-        detail_filters_used = any(
-            [
-                employer_code,
-                sourced_to_code,
-                project_code,
-                branch_filter,
-                client_segment_filter,
-                product_type_filter,
-            ]
-        )
         params["allow_data_record_fallback"] = 0 if detail_filters_used else 1
 
-        query = _TOTAL_ELIGIBLE_SNAPSHOT_SQL.format(
-            segment_predicate=segment_predicate,
-            allowed_employer_predicate=allowed_employer_predicate,
-        )
-        record = db.execute(text(query), params).fetchone()
+        query = _TOTAL_ELIGIBLE_SNAPSHOT_SQL.format(filter_sql=filter_sql)
+        record = db.execute(statement(query), params).fetchone()
         return int(record[0] or 0) if record else 0
     except Exception:
         import traceback
@@ -1050,6 +964,232 @@ def get_total_eligible_employees(
         return 0
 
 
+# "Does the snapshot cover this range?" checks, shared by the raw and rollup reads.
+_ELIGIBLE_PRESENCE_PREDICATE = "de.is_loan_eligible = 1"
+_COVERAGE_PRESENCE_PREDICATE = (
+    "de.is_loan_eligible = 1 AND de.project IS NOT NULL AND de.project <> ''"
+)
+_PRODUCT_FLAGS_PRESENCE_PREDICATE = (
+    "(de.is_kasbon_eligible = 1 OR de.is_aku_cicil_eligible = 1"
+    " OR de.is_extradana_eligible = 1)"
+)
+
+def _eligible_snapshot_filters(
+    db: Session,
+    range_start: str,
+    range_end: str,
+    *,
+    employer_filter: str = None,
+    sourced_to_filter: str = None,
+    project_filter: str = None,
+    branch_filter: str = None,
+    client_segment_filter: str = None,
+    product_type_filter: str = None,
+) -> tuple[dict, str, bool]:
+    """
+    (params, filter predicate, detail_filters_used) for data_record_eligible-shaped
+    tables aliased `de` — the raw snapshot and its monthly rollup.
+
+    Only the filters actually set become predicates: MySQL can't plan an index
+    around `(:f IS NULL OR de.col = :f)`, so those made every call a plain
+    snapshot_date range scan. Plain equalities let it pick the matching
+    (col, snapshot_date) index (see snapshot_indexes.DATA_RECORD_ELIGIBLE_INDEXES).
+    """
+    # de.employer stores numeric kode_gmc, while API employer filter is keterangan text.
+    employer_code = _resolve_gmc_code(db, value=employer_filter, group_gmc="sub_client")
+    sourced_to_code = _resolve_gmc_code(db, value=sourced_to_filter, group_gmc="placement_client")
+    project_code = _resolve_gmc_code(db, value=project_filter, group_gmc="client_project")
+
+    params = {"start_date": range_start, "end_date": range_end}
+    predicates = [_allowed_employer_predicate(db, params)]
+    for column, key, value in (
+        ("de.employer", "f_employer", employer_code),
+        ("de.sourced_to", "f_sourced_to", sourced_to_code),
+        ("de.project", "f_project", project_code),
+        ("de.branch", "f_branch", branch_filter),
+        ("de.product_type", "f_product", product_type_filter),
+    ):
+        if value is not None:
+            params[key] = value
+            predicates.append(f"{column} = :{key}")
+    if client_segment_filter:
+        predicates.append(_eligible_segment_predicate(client_segment_filter, params, db))
+
+    detail_filters_used = any(
+        [
+            employer_code,
+            sourced_to_code,
+            project_code,
+            branch_filter,
+            client_segment_filter,
+            product_type_filter,
+        ]
+    )
+    return params, " AND ".join(predicates), detail_filters_used
+
+
+# Which RollupTotals figure stands in for COUNT(DISTINCT <column>).
+_ROLLUP_METRICS = {"de.id_karyawan": "employees", "de.project": "project_count"}
+
+
+def _eligible_rollup_totals(
+    db: Session,
+    range_start: str,
+    range_end: str,
+    *,
+    presence_predicate: str,
+    count_predicate: str = "1=1",
+    **filters,
+) -> dict | None:
+    """
+    Per-period RollupTotals from data_record_eligible_monthly, or None when the
+    range isn't a run of whole, already rolled-up months (see eligible_rollup).
+    """
+    periods = whole_month_periods(range_start, range_end)
+    if periods is None:
+        return None
+    params, filter_sql, _ = _eligible_snapshot_filters(db, range_start, range_end, **filters)
+    return read_rollup(
+        db,
+        periods,
+        presence_predicate=presence_predicate,
+        match_predicate=f"{presence_predicate} AND {count_predicate} AND {filter_sql}",
+        params=params,
+    )
+
+
+def _rollup_snapshot_count(
+    db: Session,
+    range_start: str,
+    range_end: str,
+    *,
+    distinct_column: str,
+    presence_predicate: str,
+    count_predicate: str = "1=1",
+    **filters,
+) -> int | None:
+    """
+    Rollup answer for a single-range snapshot COUNT(DISTINCT distinct_column), or
+    None if the rollup can't answer or holds no presence_predicate rows for the
+    range (callers then run their raw query, including its legacy fallback).
+    """
+    totals = _eligible_rollup_totals(
+        db,
+        range_start,
+        range_end,
+        presence_predicate=presence_predicate,
+        count_predicate=count_predicate,
+        **filters,
+    )
+    if not totals or not any(month.present for month in totals.values()):
+        return None
+    merged = RollupTotals()
+    for month in totals.values():
+        merged.merge(month)
+    return getattr(merged, _ROLLUP_METRICS[distinct_column])
+
+
+_SNAPSHOT_COUNTS_BY_MONTH_SQL = """
+SELECT
+    YEAR(de.snapshot_date) * 100 + MONTH(de.snapshot_date) AS period,
+    COUNT(DISTINCT CASE
+        WHEN {count_predicate}
+          AND {filter_sql}
+        THEN {distinct_column}
+    END) AS total
+FROM data_record_eligible de
+WHERE de.snapshot_date BETWEEN :start_date AND :end_date
+  AND {presence_predicate}
+GROUP BY period
+"""
+
+# Latest legacy data_record value per month; same company = '1' caveat as the
+# fallback branch of _TOTAL_ELIGIBLE_SNAPSHOT_SQL.
+_DATA_RECORD_BY_MONTH_SQL = """
+SELECT
+    latest_snapshot.period,
+    SUM(CAST(dr.value AS UNSIGNED)) AS total
+FROM data_record dr
+INNER JOIN (
+    SELECT company, YEAR(created_at) * 100 + MONTH(created_at) AS period, MAX(created_at) AS max_created_at
+    FROM data_record
+    WHERE parameter = :parameter
+      AND company = '1'
+      AND DATE(created_at) BETWEEN :start_date AND :end_date
+    GROUP BY company, period
+) latest_snapshot ON latest_snapshot.company = dr.company
+    AND latest_snapshot.max_created_at = dr.created_at
+WHERE dr.parameter = :parameter
+GROUP BY latest_snapshot.period
+"""
+
+
+def _snapshot_counts_by_month(
+    db: Session,
+    range_start: str,
+    range_end: str,
+    *,
+    distinct_column: str,
+    presence_predicate: str,
+    count_predicate: str = "1=1",
+    data_record_parameter: str = None,
+    **filters,
+) -> dict:
+    """
+    Month-grouped counterpart of the data_record_eligible snapshot COUNTs:
+    {YYYYMM period: COUNT(DISTINCT distinct_column)} over [range_start, range_end]
+    for the filtered rows matching count_predicate. Read from the monthly rollup
+    when it covers the range, otherwise from one grouped scan of the raw table.
+
+    A month appears in the result only if it has at least one (unfiltered) row
+    matching presence_predicate — the same per-range "does the snapshot cover
+    this?" check the single-range queries do with NOT EXISTS / EXISTS, so callers
+    take their fallback decision for every month from this one result set. With
+    data_record_parameter set, months without snapshot rows are filled from the
+    legacy data_record value when no filter narrows below the combined total.
+    SQL errors (e.g. per-product columns not migrated yet) propagate to the caller.
+    """
+    params, filter_sql, detail_filters_used = _eligible_snapshot_filters(
+        db, range_start, range_end, **filters
+    )
+
+    totals = _eligible_rollup_totals(
+        db,
+        range_start,
+        range_end,
+        presence_predicate=presence_predicate,
+        count_predicate=count_predicate,
+        **filters,
+    )
+    if totals is not None:
+        metric = _ROLLUP_METRICS[distinct_column]
+        counts = {
+            period: getattr(month, metric) for period, month in totals.items() if month.present
+        }
+    else:
+        query = _SNAPSHOT_COUNTS_BY_MONTH_SQL.format(
+            count_predicate=count_predicate,
+            distinct_column=distinct_column,
+            presence_predicate=presence_predicate,
+            filter_sql=filter_sql,
+        )
+        counts = {
+            int(row[0]): int(row[1] or 0)
+            for row in db.execute(statement(query), params).fetchall()
+            if row[0] is not None
+        }
+
+    if data_record_parameter and not detail_filters_used:
+        legacy = db.execute(
+            statement(_DATA_RECORD_BY_MONTH_SQL),
+            {"parameter": data_record_parameter, "start_date": range_start, "end_date": range_end},
+        ).fetchall()
+        for period, total in legacy:
+            if period is not None and period not in counts:
+                counts[int(period)] = int(total or 0)
+    return counts
+
+
 def _loan_setting_type_predicate(loan_type: str) -> Optional[str]:
     """SQL predicate on loan_setting.loan_type identifying the rows that define a
     given product's eligibility rules, for the live (non-snapshot) fallback in
@@ -1136,7 +1276,7 @@ def get_total_eligible_employees_by_product(
             product_type_filter=product_type_filter,
             db=db,
         )
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         return int(record[0] or 0) if record else 0
     except Exception:
         import traceback
@@ -1175,7 +1315,7 @@ def _has_computed_eligible_product_snapshot(db: Session, range_start: str, range
     to the caller to catch.
     """
     return bool(db.execute(
-        text(
+        statement(
             "SELECT EXISTS (SELECT 1 FROM data_record_eligible "
             "WHERE snapshot_date BETWEEN :start_date AND :end_date "
             "AND (is_kasbon_eligible = 1 OR is_aku_cicil_eligible = 1 OR is_extradana_eligible = 1))"
@@ -1197,34 +1337,25 @@ def _eligible_product_snapshot_count(
     product_type_filter: str = None,
 ) -> int:
     """Runs the data_record_eligible per-product snapshot COUNT for one date range."""
-    employer_code = _resolve_gmc_code(db, value=employer_filter, group_gmc="sub_client")
-    sourced_to_code = _resolve_gmc_code(db, value=sourced_to_filter, group_gmc="placement_client")
-    project_code = _resolve_gmc_code(db, value=project_filter, group_gmc="client_project")
-
-    params = {
-        "start_date": range_start,
-        "end_date": range_end,
-        "f_employer": employer_code,
-        "f_sourced_to": sourced_to_code,
-        "f_project": project_code,
-        "f_product": product_type_filter,
-    }
-    segment_predicate = _eligible_segment_predicate(client_segment_filter, params, db)
-    allowed_employer_predicate = _allowed_employer_predicate(db, params)
+    params, filter_sql, _ = _eligible_snapshot_filters(
+        db,
+        range_start,
+        range_end,
+        employer_filter=employer_filter,
+        sourced_to_filter=sourced_to_filter,
+        project_filter=project_filter,
+        client_segment_filter=client_segment_filter,
+        product_type_filter=product_type_filter,
+    )
 
     query = f"""
     SELECT COUNT(DISTINCT de.id_karyawan)
     FROM data_record_eligible de
     WHERE de.snapshot_date BETWEEN :start_date AND :end_date
       AND {snapshot_predicate}
-      AND ({allowed_employer_predicate})
-      AND (:f_employer IS NULL OR de.employer = :f_employer)
-      AND (:f_sourced_to IS NULL OR de.sourced_to = :f_sourced_to)
-      AND (:f_project IS NULL OR de.project = :f_project)
-      AND ({segment_predicate})
-      AND (:f_product IS NULL OR de.product_type = :f_product)
+      AND {filter_sql}
     """
-    record = db.execute(text(query), params).fetchone()
+    record = db.execute(statement(query), params).fetchone()
     return int(record[0] or 0) if record else 0
 
 
@@ -1291,6 +1422,21 @@ def get_total_eligible_employees_for_loan_type(
         range_start, range_end = _eligible_date_range(
             start_date=start_date, end_date=end_date, as_of_date=as_of_date
         )
+        rolled_up = _rollup_snapshot_count(
+            db,
+            range_start,
+            range_end,
+            distinct_column="de.id_karyawan",
+            presence_predicate=_PRODUCT_FLAGS_PRESENCE_PREDICATE,
+            count_predicate=snapshot_predicate,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
+        )
+        if rolled_up is not None:
+            return rolled_up
         if not _has_computed_eligible_product_snapshot(db, range_start, range_end):
             return _live_fallback()
 
@@ -1328,8 +1474,14 @@ def get_monthly_eligible_employees_for_loan_type(
 ) -> dict:
     """
     Batched version of get_total_eligible_employees_for_loan_type for
-    /loan/coverage-utilization-monthly: month_ranges is {month_year: (range_start,
-    range_end)}, returns {month_year: total_eligible_employees}.
+    /loan/coverage-utilization-monthly: month_ranges is {period: (range_start,
+    range_end)}, returns {period: total_eligible_employees}.
+
+    Calendar months are counted with one month-grouped scan of
+    data_record_eligible (_snapshot_counts_by_month) instead of an
+    EXISTS + COUNT pair per month; a month is trusted to the snapshot when that
+    scan found a row with a per-product flag set, same rule as
+    _has_computed_eligible_product_snapshot.
 
     The live td_karyawan+loan_setting fallback is date-independent (it always
     reflects "now"), so any month lacking snapshot data would recompute the exact
@@ -1338,20 +1490,41 @@ def get_monthly_eligible_employees_for_loan_type(
     accumulate in data_record_eligible, which can never happen for months before
     this migration). Computed at most once per request here instead.
     """
+    filters = dict(
+        employer_filter=employer_filter,
+        sourced_to_filter=sourced_to_filter,
+        project_filter=project_filter,
+        client_segment_filter=client_segment_filter,
+        product_type_filter=product_type_filter,
+    )
+    calendar_months, span_start, span_end = _split_calendar_months(month_ranges)
     snapshot_predicate = _eligible_product_snapshot_predicate(loan_type)
+
     if snapshot_predicate is None:
+        by_month = {}
+        if calendar_months:
+            try:
+                by_month = _snapshot_counts_by_month(
+                    db,
+                    span_start,
+                    span_end,
+                    distinct_column="de.id_karyawan",
+                    presence_predicate=_ELIGIBLE_PRESENCE_PREDICATE,
+                    data_record_parameter="loan_eligible_company",
+                    **filters,
+                )
+            except Exception:
+                import traceback
+                traceback.print_exc()
         return {
-            month_year: get_total_eligible_employees(
-                db,
-                start_date=range_start,
-                end_date=range_end,
-                employer_filter=employer_filter,
-                sourced_to_filter=sourced_to_filter,
-                project_filter=project_filter,
-                client_segment_filter=client_segment_filter,
-                product_type_filter=product_type_filter,
+            period: (
+                by_month.get(calendar_months[period], 0)
+                if period in calendar_months
+                else get_total_eligible_employees(
+                    db, start_date=range_start, end_date=range_end, **filters
+                )
             )
-            for month_year, (range_start, range_end) in month_ranges.items()
+            for period, (range_start, range_end) in month_ranges.items()
         }
 
     live_value = None
@@ -1362,39 +1535,54 @@ def get_monthly_eligible_employees_for_loan_type(
             live_value = get_total_eligible_employees_by_product(
                 db,
                 loan_setting_predicate=_loan_setting_type_predicate(loan_type),
-                employer_filter=employer_filter,
-                sourced_to_filter=sourced_to_filter,
-                project_filter=project_filter,
-                client_segment_filter=client_segment_filter,
-                product_type_filter=product_type_filter,
+                **filters,
             )
         return live_value
 
+    by_month = None
+    if calendar_months:
+        try:
+            by_month = _snapshot_counts_by_month(
+                db,
+                span_start,
+                span_end,
+                distinct_column="de.id_karyawan",
+                presence_predicate=_PRODUCT_FLAGS_PRESENCE_PREDICATE,
+                count_predicate=snapshot_predicate,
+                **filters,
+            )
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
     results = {}
-    for month_year, (range_start, range_end) in month_ranges.items():
+    for period, (range_start, range_end) in month_ranges.items():
+        month_key = calendar_months.get(period)
         try:
+            if month_key is not None:
+                if by_month is not None and month_key in by_month:
+                    results[period] = by_month[month_key]
+                else:
+                    results[period] = _live_fallback()
+                continue
             if not _has_computed_eligible_product_snapshot(db, range_start, range_end):
-                results[month_year] = _live_fallback()
+                results[period] = _live_fallback()
                 continue
-            results[month_year] = _eligible_product_snapshot_count(
+            results[period] = _eligible_product_snapshot_count(
                 db,
                 snapshot_predicate,
                 range_start,
                 range_end,
-                employer_filter=employer_filter,
-                sourced_to_filter=sourced_to_filter,
-                project_filter=project_filter,
-                client_segment_filter=client_segment_filter,
-                product_type_filter=product_type_filter,
+                **filters,
             )
         except Exception:
             import traceback
             traceback.print_exc()
             try:
-                results[month_year] = _live_fallback()
+                results[period] = _live_fallback()
             except Exception:
                 traceback.print_exc()
-                results[month_year] = 0
+                results[period] = 0
 
     return results
 
@@ -1407,13 +1595,7 @@ FROM (
     WHERE de.snapshot_date BETWEEN :start_date AND :end_date
       AND de.is_loan_eligible = 1
       AND de.project IS NOT NULL AND de.project <> ''
-      AND ({allowed_employer_predicate})
-      AND (:f_employer IS NULL OR de.employer = :f_employer)
-      AND (:f_sourced_to IS NULL OR de.sourced_to = :f_sourced_to)
-      AND (:f_project IS NULL OR de.project = :f_project)
-      AND (:f_branch IS NULL OR de.branch = :f_branch)
-      AND ({segment_predicate})
-      AND (:f_product IS NULL OR de.product_type = :f_product)
+      AND {filter_sql}
 
     UNION ALL
 
@@ -1470,47 +1652,37 @@ def get_total_coverage_project(
             as_of_date=as_of_date,
         )
 
-        employer_code = _resolve_gmc_code(
-            db, value=employer_filter, group_gmc="sub_client"
-        )
-        sourced_to_code = _resolve_gmc_code(
-            db, value=sourced_to_filter, group_gmc="placement_client"
-        )
-        project_code = _resolve_gmc_code(
-            db, value=project_filter, group_gmc="client_project"
-        )
-
-        params = {
-            "start_date": range_start,
-            "end_date": range_end,
-            "f_employer": employer_code,
-            "f_sourced_to": sourced_to_code,
-            "f_project": project_code,
-            "f_branch": branch_filter,
-            "f_product": product_type_filter,
-        }
-        segment_predicate = _eligible_segment_predicate(
-            client_segment_filter, params, db
-        )
-        allowed_employer_predicate = _allowed_employer_predicate(db, params)
-
-        detail_filters_used = any(
-            [
-                employer_code,
-                sourced_to_code,
-                project_code,
-                branch_filter,
-                client_segment_filter,
-                product_type_filter,
-            ]
+        rolled_up = _rollup_snapshot_count(
+            db,
+            range_start,
+            range_end,
+            distinct_column="de.project",
+            presence_predicate=_COVERAGE_PRESENCE_PREDICATE,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            branch_filter=branch_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
         )
-        params["allow_data_record_fallback"] = 0 if detail_filters_used else 1
+        if rolled_up is not None:
+            return rolled_up
 
-        query = _TOTAL_ELIGIBLE_WITH_PROJECT_SNAPSHOT_SQL.format(
-            segment_predicate=segment_predicate,
-            allowed_employer_predicate=allowed_employer_predicate,
-        )
-        record = db.execute(text(query), params).fetchone()
+        params, filter_sql, detail_filters_used = _eligible_snapshot_filters(
+            db,
+            range_start,
+            range_end,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            branch_filter=branch_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
+        )
+        params["allow_data_record_fallback"] = 0 if detail_filters_used else 1
+
+        query = _TOTAL_ELIGIBLE_WITH_PROJECT_SNAPSHOT_SQL.format(filter_sql=filter_sql)
+        record = db.execute(statement(query), params).fetchone()
         return int(record[0] or 0) if record else 0
     except Exception:
         import traceback
@@ -1518,19 +1690,68 @@ def get_total_coverage_project(
         return 0
 
 
+def get_monthly_total_coverage_project(
+    db: Session,
+    month_ranges: dict,
+    *,
+    employer_filter: str = None,
+    sourced_to_filter: str = None,
+    project_filter: str = None,
+    branch_filter: str = None,
+    client_segment_filter: str = None,
+    product_type_filter: str = None,
+) -> dict:
+    """
+    Batched get_total_coverage_project for /loan/coverage-utilization-monthly:
+    month_ranges is {period: (range_start, range_end)}, returns
+    {period: total_coverage_project}. Calendar months share one
+    month-grouped scan (plus one data_record query for the legacy fallback);
+    any other range goes through get_total_coverage_project.
+    """
+    filters = dict(
+        employer_filter=employer_filter,
+        sourced_to_filter=sourced_to_filter,
+        project_filter=project_filter,
+        branch_filter=branch_filter,
+        client_segment_filter=client_segment_filter,
+        product_type_filter=product_type_filter,
+    )
+    calendar_months, span_start, span_end = _split_calendar_months(month_ranges)
+    by_month = {}
+    if calendar_months:
+        try:
+            by_month = _snapshot_counts_by_month(
+                db,
+                span_start,
+                span_end,
+                distinct_column="de.project",
+                presence_predicate=_COVERAGE_PRESENCE_PREDICATE,
+                data_record_parameter="loan_project_covered",
+                **filters,
+            )
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
+    return {
+        period: (
+            by_month.get(calendar_months[period], 0)
+            if period in calendar_months
+            else get_total_coverage_project(
+                db, start_date=range_start, end_date=range_end, **filters
+            )
+        )
+        for period, (range_start, range_end) in month_ranges.items()
+    }
+
+
 _TOTAL_ACTIVE_SNAPSHOT_SQL = """
 SELECT COALESCE(SUM(total_active), 0) AS total_active
 FROM (
     SELECT COUNT(DISTINCT de.id_karyawan) AS total_active
     FROM data_record_eligible de
     WHERE de.snapshot_date BETWEEN :start_date AND :end_date
-      AND ({allowed_employer_predicate})
-      AND (:f_employer IS NULL OR de.employer = :f_employer)
-      AND (:f_sourced_to IS NULL OR de.sourced_to = :f_sourced_to)
-      AND (:f_project IS NULL OR de.project = :f_project)
-      AND (:f_branch IS NULL OR de.branch = :f_branch)
-      AND ({segment_predicate})
-      AND (:f_product IS NULL OR de.product_type = :f_product)
+      AND {filter_sql}
 
     UNION ALL
 
@@ -1591,47 +1812,21 @@ def get_total_active_employees(
             as_of_date=as_of_date,
         )
 
-        employer_code = _resolve_gmc_code(
-            db, value=employer_filter, group_gmc="sub_client"
-        )
-        sourced_to_code = _resolve_gmc_code(
-            db, value=sourced_to_filter, group_gmc="placement_client"
-        )
-        project_code = _resolve_gmc_code(
-            db, value=project_filter, group_gmc="client_project"
-        )
-
-        params = {
-            "start_date": range_start,
-            "end_date": range_end,
-            "f_employer": employer_code,
-            "f_sourced_to": sourced_to_code,
-            "f_project": project_code,
-            "f_branch": branch_filter,
-            "f_product": product_type_filter,
-        }
-        segment_predicate = _eligible_segment_predicate(
-            client_segment_filter, params, db
-        )
-        allowed_employer_predicate = _allowed_employer_predicate(db, params)
-
-        detail_filters_used = any(
-            [
-                employer_code,
-                sourced_to_code,
-                project_code,
-                branch_filter,
-                client_segment_filter,
-                product_type_filter,
-            ]
+        params, filter_sql, detail_filters_used = _eligible_snapshot_filters(
+            db,
+            range_start,
+            range_end,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            branch_filter=branch_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
         )
         params["allow_data_record_fallback"] = 0 if detail_filters_used else 1
 
-        query = _TOTAL_ACTIVE_SNAPSHOT_SQL.format(
-            segment_predicate=segment_predicate,
-            allowed_employer_predicate=allowed_employer_predicate,
-        )
-        record = db.execute(text(query), params).fetchone()
+        query = _TOTAL_ACTIVE_SNAPSHOT_SQL.format(filter_sql=filter_sql)
+        record = db.execute(statement(query), params).fetchone()
         return int(record[0] or 0) if record else 0
     except Exception:
         import traceback
@@ -1649,138 +1844,85 @@ def _append_proses_date_range(query: str, params: dict, start_date: str, end_dat
     )
 
 
-_UNRECOVERED_LUMP_PAYMENT_SQL = """
-    SELECT GREATEST(l.total_payment - (
+def _paid_against_sql(history_match: str) -> str:
+    """Confirmed payments netted against one due amount: unallocated td_loan_payment rows
+    plus td_loan_payment_allocation slices, matched on loan_history_id `history_match`."""
+    return f"""(
               SELECT COALESCE(SUM(amt), 0) FROM (
                 SELECT p.amount amt FROM td_loan_payment p
-                WHERE p.loan_id = l.id AND p.status = 1 AND p.loan_history_id IS NULL
+                WHERE p.loan_id = l.id AND p.status = 1 AND p.loan_history_id {history_match}
                   AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
                 UNION ALL
                 SELECT a.amount FROM td_loan_payment_allocation a
                 INNER JOIN td_loan_payment p ON p.id = a.payment_id
-                WHERE p.loan_id = l.id AND p.status = 1 AND a.loan_history_id IS NULL
-              ) t), 0) AS payment_due
-    FROM td_loan l
-    INNER JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-    INNER JOIN tbl_gmc emp
-        ON tk.valdo_inc = emp.kode_gmc
-        AND emp.group_gmc = 'sub_client'
-        AND emp.aktif = 'Yes'
-        AND emp.keterangan3 = 1
-    LEFT JOIN tbl_gmc src
-        ON tk.placement = src.kode_gmc
-        AND src.group_gmc = 'placement_client'
-        AND src.aktif = 'Yes'
-        AND src.keterangan3 = 1
-    LEFT JOIN tbl_gmc prj
-        ON tk.project = prj.kode_gmc
-        AND prj.group_gmc = 'client_project'
-        AND prj.aktif = 'Yes'
-        AND prj.keterangan3 = 1
-    WHERE l.loan_status IN (1, 4)
-      AND l.duration = 1
-      AND (l.payment_date IS NULL OR l.payment_date = '0000-00-00')
-      AND l.repayment_date < CURDATE()
-"""
+                WHERE p.loan_id = l.id AND p.status = 1 AND a.loan_history_id {history_match}
+              ) t)"""
 
-_UNRECOVERED_INSTALLMENT_PAYMENT_SQL = """
-    SELECT GREATEST(th.monthly - (
-              SELECT COALESCE(SUM(amt), 0) FROM (
-                SELECT p.amount amt FROM td_loan_payment p
-                WHERE p.loan_id = l.id AND p.status = 1 AND p.loan_history_id = th.id
-                  AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
-                UNION ALL
-                SELECT a.amount FROM td_loan_payment_allocation a
-                INNER JOIN td_loan_payment p ON p.id = a.payment_id
-                WHERE p.loan_id = l.id AND p.status = 1 AND a.loan_history_id = th.id
-              ) t), 0) AS payment_due
-    FROM td_loan l
-    INNER JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-    INNER JOIN tbl_gmc emp
-        ON tk.valdo_inc = emp.kode_gmc
-        AND emp.group_gmc = 'sub_client'
-        AND emp.aktif = 'Yes'
-        AND emp.keterangan3 = 1
-    LEFT JOIN tbl_gmc src
-        ON tk.placement = src.kode_gmc
-        AND src.group_gmc = 'placement_client'
-        AND src.aktif = 'Yes'
-        AND src.keterangan3 = 1
-    LEFT JOIN tbl_gmc prj
-        ON tk.project = prj.kode_gmc
-        AND prj.group_gmc = 'client_project'
-        AND prj.aktif = 'Yes'
-        AND prj.keterangan3 = 1
-    INNER JOIN td_loan_history th ON th.loan_form_id = l.id
-    WHERE l.loan_status IN (1, 4)
-      AND l.duration > 1
-      AND (th.payment_date IS NULL OR th.payment_date = '0000-00-00')
-      AND th.due_date < CURDATE()
-"""
 
-# Outstanding = not yet paid, but due date hasn't arrived yet (still waiting), as opposed
-# to "unrecovered" above which is not yet paid AND already past its due date.
-_OUTSTANDING_LUMP_PAYMENT_SQL = _UNRECOVERED_LUMP_PAYMENT_SQL.replace(
-    "AND l.repayment_date < CURDATE()", "AND l.repayment_date >= CURDATE()"
-)
-_OUTSTANDING_INSTALLMENT_PAYMENT_SQL = _UNRECOVERED_INSTALLMENT_PAYMENT_SQL.replace(
-    "AND th.due_date < CURDATE()", "AND th.due_date >= CURDATE()"
+_REPAYMENT_RELATION = loan_relation(karyawan_kind="INNER", employer_kind="INNER")
+_INSTALLMENT_REPAYMENT_RELATION = _REPAYMENT_RELATION.with_join(
+    Join("th", "INNER JOIN td_loan_history th ON th.loan_form_id = l.id")
 )
 
+
+def _unpaid_lump_payment(due_comparison: str) -> Select:
+    return Select(
+        (f"GREATEST(l.total_payment - {_paid_against_sql('IS NULL')}, 0) AS payment_due",),
+        _REPAYMENT_RELATION,
+        (
+            "l.loan_status IN (1, 4)",
+            "l.duration = 1",
+            "(l.payment_date IS NULL OR l.payment_date = '0000-00-00')",
+            f"l.repayment_date {due_comparison} CURDATE()",
+        ),
+    )
+
+
+def _unpaid_installment_payment(due_comparison: str) -> Select:
+    return Select(
+        (f"GREATEST(th.monthly - {_paid_against_sql('= th.id')}, 0) AS payment_due",),
+        _INSTALLMENT_REPAYMENT_RELATION,
+        (
+            "l.loan_status IN (1, 4)",
+            "l.duration > 1",
+            "(th.payment_date IS NULL OR th.payment_date = '0000-00-00')",
+            f"th.due_date {due_comparison} CURDATE()",
+        ),
+    )
+
+
+# Unrecovered = not yet paid AND already past its due date; outstanding = not yet paid,
+# but the due date hasn't arrived yet (still waiting).
+_UNRECOVERED_LUMP_PAYMENT = _unpaid_lump_payment("<")
+_UNRECOVERED_INSTALLMENT_PAYMENT = _unpaid_installment_payment("<")
+_OUTSTANDING_LUMP_PAYMENT = _unpaid_lump_payment(">=")
+_OUTSTANDING_INSTALLMENT_PAYMENT = _unpaid_installment_payment(">=")
+
 # Expected = the full amount that became due in the period, paid or not (no GREATEST/
 # payment-subtraction, no due-date-vs-CURDATE() restriction) — backs total_expected_
 # repayment/-monthly. Due-date basis, matching how HRIS reconciles: a multi-month
 # installment loan only contributes its per-month installment to the month it's due in,
 # not its full contract value to its disbursement month.
-_EXPECTED_LUMP_PAYMENT_SQL = """
-    SELECT {select_prefix}l.total_payment AS payment_due
-    FROM td_loan l
-    INNER JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-    INNER JOIN tbl_gmc emp
-        ON tk.valdo_inc = emp.kode_gmc
-        AND emp.group_gmc = 'sub_client'
-        AND emp.aktif = 'Yes'
-        AND emp.keterangan3 = 1
-    LEFT JOIN tbl_gmc src
-        ON tk.placement = src.kode_gmc
-        AND src.group_gmc = 'placement_client'
-        AND src.aktif = 'Yes'
-        AND src.keterangan3 = 1
-    LEFT JOIN tbl_gmc prj
-        ON tk.project = prj.kode_gmc
-        AND prj.group_gmc = 'client_project'
-        AND prj.aktif = 'Yes'
-        AND prj.keterangan3 = 1
-    WHERE l.loan_status IN (1, 2, 4)
-      AND l.duration = 1
-"""
+_EXPECTED_LUMP_PAYMENT = Select(
+    ("l.total_payment AS payment_due",),
+    _REPAYMENT_RELATION,
+    ("l.loan_status IN (1, 2, 4)", "l.duration = 1"),
+)
+_EXPECTED_INSTALLMENT_PAYMENT = Select(
+    ("th.monthly AS payment_due",),
+    _INSTALLMENT_REPAYMENT_RELATION,
+    ("l.loan_status IN (1, 2, 4)", "l.duration > 1"),
+)
 
-_EXPECTED_INSTALLMENT_PAYMENT_SQL = """
-    SELECT {select_prefix}th.monthly AS payment_due
-    FROM td_loan l
-    INNER JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-    INNER JOIN tbl_gmc emp
-        ON tk.valdo_inc = emp.kode_gmc
-        AND emp.group_gmc = 'sub_client'
-        AND emp.aktif = 'Yes'
-        AND emp.keterangan3 = 1
-    LEFT JOIN tbl_gmc src
-        ON tk.placement = src.kode_gmc
-        AND src.group_gmc = 'placement_client'
-        AND src.aktif = 'Yes'
-        AND src.keterangan3 = 1
-    LEFT JOIN tbl_gmc prj
-        ON tk.project = prj.kode_gmc
-        AND prj.group_gmc = 'client_project'
-        AND prj.aktif = 'Yes'
-        AND prj.keterangan3 = 1
-    INNER JOIN td_loan_history th ON th.loan_form_id = l.id
-    WHERE l.loan_status IN (1, 2, 4)
-      AND l.duration > 1
-"""
+_PAYMENT_DUE_SELECTS = {
+    "unrecovered": (_UNRECOVERED_LUMP_PAYMENT, _UNRECOVERED_INSTALLMENT_PAYMENT),
+    "outstanding": (_OUTSTANDING_LUMP_PAYMENT, _OUTSTANDING_INSTALLMENT_PAYMENT),
+    "expected": (_EXPECTED_LUMP_PAYMENT, _EXPECTED_INSTALLMENT_PAYMENT),
+}
 
 
-def _build_expected_repayment_parts(
+def _build_payment_due_parts(
+    basis: str,
     *,
     include_lump: bool,
     include_installment: bool,
@@ -1797,68 +1939,36 @@ def _build_expected_repayment_parts(
     start_date: str = None,
     end_date: str = None,
     db: Session = None,
-    lump_sql: str = _EXPECTED_LUMP_PAYMENT_SQL,
-    installment_sql: str = _EXPECTED_INSTALLMENT_PAYMENT_SQL,
 ) -> list[str]:
-    """Due-date-based twin of _build_unrecovered_repayment_parts, backing total_expected_
-    repayment/-monthly (and, via the lump_sql/installment_sql overrides, total_collected_
-    repayment/-monthly too): same (include_lump, include_installment, extra_loan_predicate)
-    scope resolution and org filters, but sums the full due amount instead of the unpaid
-    remainder. Reusing _unrecovered_repayment_scope here means every loan_type variant
-    (kasbon, extradana, aku_cicil, installment, all) that already resolves correctly for
-    total_unrecovered_repayment resolves correctly here too."""
-    company_filter = COMPANY_FILTER
+    """payment_due parts (lump-sum on l.repayment_date, installment on th.due_date) for
+    basis "unrecovered", "outstanding" or "expected" (see _PAYMENT_DUE_SELECTS), with the
+    same (include_lump, include_installment, extra_loan_predicate) scope resolution and org
+    filters for all three. Reusing _unrecovered_repayment_scope means every loan_type
+    variant (kasbon, extradana, aku_cicil, installment, all) resolves the same way for
+    total_unrecovered/-outstanding/-expected_repayment."""
+    lump_select, installment_select = _PAYMENT_DUE_SELECTS[basis]
     parts: list[str] = []
-
-    if include_lump:
-        month_col = (
-            "DATE_FORMAT(l.repayment_date, '%M %Y') AS month_year, " if group_by_month else ""
-        )
-        lump_query = lump_sql.format(select_prefix=month_col)
+    for included, select, due_column in (
+        (include_lump, lump_select, "l.repayment_date"),
+        (include_installment, installment_select, "th.due_date"),
+    ):
+        if not included:
+            continue
         if group_by_month:
-            lump_query += " AND l.repayment_date IS NOT NULL"
-        if extra_loan_predicate:
-            lump_query += f" AND {extra_loan_predicate}"
-        if start_date and end_date:
-            lump_query = append_date_filters(
-                lump_query,
-                params,
-                start_date=start_date,
-                end_date=end_date,
-                date_column="l.repayment_date",
-            )
-        lump_query = _append_loan_org_filters(
-            lump_query,
-            params,
-            id_karyawan_filter=id_karyawan_filter,
-            employer_filter=employer_filter,
-            sourced_to_filter=sourced_to_filter,
-            project_filter=project_filter,
-            client_segment_filter=client_segment_filter,
-            product_type_filter=product_type_filter,
-            loan_status_filter=loan_status_filter,
-            company_filter=company_filter,
-            db=db,
-        )
-        parts.append(lump_query)
-
-    if include_installment:
-        month_col = (
-            "DATE_FORMAT(th.due_date, '%M %Y') AS month_year, " if group_by_month else ""
-        )
-        installment_query = installment_sql.format(select_prefix=month_col)
-        if extra_loan_predicate:
-            installment_query += f" AND {extra_loan_predicate}"
+            select = select.with_columns_first(f"{period_sql(due_column)} AS period")
+            if due_column == "l.repayment_date":
+                select = select.and_where("l.repayment_date IS NOT NULL")
+        query = select.and_where(extra_loan_predicate).sql()
         if start_date and end_date:
-            installment_query = append_date_filters(
-                installment_query,
+            query = append_date_filters(
+                query,
                 params,
                 start_date=start_date,
                 end_date=end_date,
-                date_column="th.due_date",
+                date_column=due_column,
             )
-        installment_query = _append_loan_org_filters(
-            installment_query,
+        query = _append_loan_org_filters(
+            query,
             params,
             id_karyawan_filter=id_karyawan_filter,
             employer_filter=employer_filter,
@@ -1867,12 +1977,10 @@ def _build_expected_repayment_parts(
             client_segment_filter=client_segment_filter,
             product_type_filter=product_type_filter,
             loan_status_filter=loan_status_filter,
-            company_filter=company_filter,
-            loan_prefix="l",
+            company_filter=COMPANY_FILTER,
             db=db,
         )
-        parts.append(installment_query)
-
+        parts.append(query)
     return parts
 
 
@@ -1957,8 +2065,8 @@ def _recalculate_repayment_risk_derivatives(summary: dict) -> dict:
 
     total_loan_principal_collected/total_admin_fee_collected and their unrecovered/
     expected counterparts (the principal-repayment and admin-fee-repayment sections)
-    are reporting-date based (see _REPORTING_DATE_LUMP/_INSTALLMENT) and loan_status=4
-    ("Bad Debt Recovery") aware.
+    are reporting-date based (see REPORTING_DATE_LUMP/_INSTALLMENT in reporting_dates.py)
+    and loan_status=4 ("Bad Debt Recovery") aware.
 
     delinquency_by_expected_repayment/delinquency_by_admin_fee are unrecovered-vs-
     disbursement ratios: total_unrecovered_repayment over total_disbursed_amount (matched
@@ -2013,107 +2121,6 @@ def _recalculate_repayment_risk_derivatives(summary: dict) -> dict:
     return summary
 
 
-def _build_unrecovered_repayment_parts(
-    *,
-    include_lump: bool,
-    include_installment: bool,
-    extra_loan_predicate: str | None,
-    group_by_month: bool,
-    params: dict,
-    employer_filter: str = None,
-    sourced_to_filter: str = None,
-    project_filter: str = None,
-    client_segment_filter: str = None,
-    product_type_filter: str = None,
-    loan_status_filter: int = None,
-    id_karyawan_filter: int = None,
-    start_date: str = None,
-    end_date: str = None,
-    db: Session = None,
-    lump_sql: str = _UNRECOVERED_LUMP_PAYMENT_SQL,
-    installment_sql: str = _UNRECOVERED_INSTALLMENT_PAYMENT_SQL,
-) -> list[str]:
-    company_filter = COMPANY_FILTER
-    parts: list[str] = []
-
-    if include_lump:
-        lump_select = (
-            "DATE_FORMAT(l.repayment_date, '%M %Y') AS month_year, "
-            if group_by_month
-            else ""
-        )
-        lump_query = lump_sql.replace(
-            "SELECT GREATEST(",
-            f"SELECT {lump_select}GREATEST(",
-            1,
-        )
-        if group_by_month:
-            lump_query += " AND l.repayment_date IS NOT NULL"
-        if extra_loan_predicate:
-            lump_query += f" AND {extra_loan_predicate}"
-        if start_date and end_date:
-            lump_query = append_date_filters(
-                lump_query,
-                params,
-                start_date=start_date,
-                end_date=end_date,
-                date_column="l.repayment_date",
-            )
-        lump_query = _append_loan_org_filters(
-            lump_query,
-            params,
-            id_karyawan_filter=id_karyawan_filter,
-            employer_filter=employer_filter,
-            sourced_to_filter=sourced_to_filter,
-            project_filter=project_filter,
-            client_segment_filter=client_segment_filter,
-            product_type_filter=product_type_filter,
-            loan_status_filter=loan_status_filter,
-            company_filter=company_filter,
-            db=db,
-        )
-        parts.append(lump_query)
-
-    if include_installment:
-        installment_select = (
-            "DATE_FORMAT(th.due_date, '%M %Y') AS month_year, "
-            if group_by_month
-            else ""
-        )
-        installment_query = installment_sql.replace(
-            "SELECT GREATEST(",
-            f"SELECT {installment_select}GREATEST(",
-            1,
-        )
-        if extra_loan_predicate:
-            installment_query += f" AND {extra_loan_predicate}"
-        if start_date and end_date:
-            installment_query = append_date_filters(
-                installment_query,
-                params,
-                start_date=start_date,
-                end_date=end_date,
-                date_column="th.due_date",
-            )
-        installment_query = _append_loan_org_filters(
-            installment_query,
-            params,
-            id_karyawan_filter=id_karyawan_filter,
-            employer_filter=employer_filter,
-            sourced_to_filter=sourced_to_filter,
-            project_filter=project_filter,
-            client_segment_filter=client_segment_filter,
-            product_type_filter=product_type_filter,
-            loan_status_filter=loan_status_filter,
-            company_filter=company_filter,
-            loan_prefix="l",
-            db=db,
-        )
-        parts.append(installment_query)
-
-    return parts
-
-
 def get_total_unrecovered_repayment(
     db: Session,
     *,
@@ -2134,7 +2141,8 @@ def get_total_unrecovered_repayment(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_unrecovered_repayment_parts(
+        parts = _build_payment_due_parts(
+            "unrecovered",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2160,7 +2168,7 @@ def get_total_unrecovered_repayment(
         else:
             query = f"SELECT COALESCE(SUM(payment_due), 0) FROM ({' UNION ALL '.join(parts)}) x"
 
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         return record[0] if record and record[0] is not None else 0
     except Exception:
         import traceback
@@ -2182,13 +2190,14 @@ def get_total_unrecovered_repayment_monthly(
     end_date: str = None,
     loan_type: str = "loan",
 ) -> dict:
-    """Outstanding payment due grouped by month_year."""
+    """Outstanding payment due grouped by YYYYMM due period."""
     try:
         include_lump, include_installment, extra_loan_predicate = _unrecovered_repayment_scope(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_unrecovered_repayment_parts(
+        parts = _build_payment_due_parts(
+            "unrecovered",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2211,17 +2220,17 @@ def get_total_unrecovered_repayment_monthly(
 
         union_sql = parts[0] if len(parts) == 1 else f"{' UNION ALL '.join(parts)}"
         query = f"""
-        SELECT month_year, COALESCE(SUM(payment_due), 0) AS total_unrecovered_repayment
+        SELECT period, COALESCE(SUM(payment_due), 0) AS total_unrecovered_repayment
         FROM ({union_sql}) x
-        WHERE month_year IS NOT NULL
-        GROUP BY month_year
+        WHERE period IS NOT NULL
+        GROUP BY period
         """
 
         monthly_data = {}
-        for row in db.execute(text(query), params).fetchall():
+        for row in db.execute(statement(query), params).fetchall():
             if row[0] is None:
                 continue
-            monthly_data[row[0]] = row[1] if row[1] is not None else 0
+            monthly_data[int(row[0])] = row[1] if row[1] is not None else 0
         return monthly_data
     except Exception:
         import traceback
@@ -2249,7 +2258,8 @@ def get_total_outstanding_repayment(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_unrecovered_repayment_parts(
+        parts = _build_payment_due_parts(
+            "outstanding",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2265,8 +2275,6 @@ def get_total_outstanding_repayment(
             start_date=start_date,
             end_date=end_date,
             db=db,
-            lump_sql=_OUTSTANDING_LUMP_PAYMENT_SQL,
-            installment_sql=_OUTSTANDING_INSTALLMENT_PAYMENT_SQL,
         )
 
         if not parts:
@@ -2277,7 +2285,7 @@ def get_total_outstanding_repayment(
         else:
             query = f"SELECT COALESCE(SUM(payment_due), 0) FROM ({' UNION ALL '.join(parts)}) x"
 
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         return record[0] if record and record[0] is not None else 0
     except Exception:
         import traceback
@@ -2299,13 +2307,14 @@ def get_total_outstanding_repayment_monthly(
     end_date: str = None,
     loan_type: str = "loan",
 ) -> dict:
-    """Not-yet-due payment due (still waiting), grouped by month_year."""
+    """Not-yet-due payment due (still waiting), grouped by YYYYMM due period."""
     try:
         include_lump, include_installment, extra_loan_predicate = _unrecovered_repayment_scope(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_unrecovered_repayment_parts(
+        parts = _build_payment_due_parts(
+            "outstanding",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2321,8 +2330,6 @@ def get_total_outstanding_repayment_monthly(
             start_date=start_date,
             end_date=end_date,
             db=db,
-            lump_sql=_OUTSTANDING_LUMP_PAYMENT_SQL,
-            installment_sql=_OUTSTANDING_INSTALLMENT_PAYMENT_SQL,
         )
 
         if not parts:
@@ -2330,17 +2337,17 @@ def get_total_outstanding_repayment_monthly(
 
         union_sql = parts[0] if len(parts) == 1 else f"{' UNION ALL '.join(parts)}"
         query = f"""
-        SELECT month_year, COALESCE(SUM(payment_due), 0) AS total_outstanding_repayment
+        SELECT period, COALESCE(SUM(payment_due), 0) AS total_outstanding_repayment
         FROM ({union_sql}) x
-        WHERE month_year IS NOT NULL
-        GROUP BY month_year
+        WHERE period IS NOT NULL
+        GROUP BY period
         """
 
         monthly_data = {}
-        for row in db.execute(text(query), params).fetchall():
+        for row in db.execute(statement(query), params).fetchall():
             if row[0] is None:
                 continue
-            monthly_data[row[0]] = row[1] if row[1] is not None else 0
+            monthly_data[int(row[0])] = row[1] if row[1] is not None else 0
         return monthly_data
     except Exception:
         import traceback
@@ -2366,7 +2373,7 @@ def get_total_expected_repayment(
     the date window (paid or not), matching how HRIS reconciles collected+unrecovered.
     A multi-month installment loan contributes only its per-month installment(s) that fall
     in-window, not its full contract value on its disbursement month (see
-    _build_expected_repayment_parts/_unrecovered_repayment_scope, which this shares with
+    _build_payment_due_parts/_unrecovered_repayment_scope, which this shares with
     total_unrecovered_repayment so every loan_type — kasbon, extradana, aku_cicil,
     installment, all — resolves consistently)."""
     try:
@@ -2374,7 +2381,8 @@ def get_total_expected_repayment(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_expected_repayment_parts(
+        parts = _build_payment_due_parts(
+            "expected",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2400,7 +2408,7 @@ def get_total_expected_repayment(
         else:
             query = f"SELECT COALESCE(SUM(payment_due), 0) FROM ({' UNION ALL '.join(parts)}) x"
 
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         return record[0] if record and record[0] is not None else 0
     except Exception:
         import traceback
@@ -2422,14 +2430,15 @@ def get_total_expected_repayment_monthly(
     end_date: str = None,
     loan_type: str = "loan",
 ) -> dict:
-    """get_total_expected_repayment, grouped by due month_year. See that function's
+    """get_total_expected_repayment, grouped by YYYYMM due period. See that function's
     docstring for the due-date-basis rationale."""
     try:
         include_lump, include_installment, extra_loan_predicate = _unrecovered_repayment_scope(
             loan_type, db
         )
         params: dict = {}
-        parts = _build_expected_repayment_parts(
+        parts = _build_payment_due_parts(
+            "expected",
             include_lump=include_lump,
             include_installment=include_installment,
             extra_loan_predicate=extra_loan_predicate,
@@ -2452,17 +2461,17 @@ def get_total_expected_repayment_monthly(
 
         union_sql = parts[0] if len(parts) == 1 else f"{' UNION ALL '.join(parts)}"
         query = f"""
-        SELECT month_year, COALESCE(SUM(payment_due), 0) AS total_expected_repayment
+        SELECT period, COALESCE(SUM(payment_due), 0) AS total_expected_repayment
         FROM ({union_sql}) x
-        WHERE month_year IS NOT NULL
-        GROUP BY month_year
+        WHERE period IS NOT NULL
+        GROUP BY period
         """
 
         monthly_data = {}
-        for row in db.execute(text(query), params).fetchall():
+        for row in db.execute(statement(query), params).fetchall():
             if row[0] is None:
                 continue
-            monthly_data[row[0]] = row[1] if row[1] is not None else 0
+            monthly_data[int(row[0])] = row[1] if row[1] is not None else 0
         return monthly_data
     except Exception:
         import traceback
@@ -2521,7 +2530,7 @@ def get_total_disbursed_amount(
                 query, params, start_date=start_date, end_date=end_date, date_column="l.proses_date"
             )
 
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         return {
             "total_disbursed_amount": record[0] if record and record[0] is not None else 0,
             "total_admin_fee_disbursed": record[1] if record and record[1] is not None else 0,
@@ -2546,18 +2555,22 @@ def get_total_disbursed_amount_monthly(
     end_date: str = None,
     loan_type: str = "loan",
 ) -> dict:
-    """get_total_disbursed_amount, grouped by disbursement month_year."""
+    """get_total_disbursed_amount, grouped by YYYYMM disbursement period."""
     try:
         loan_conditions = resolve_loan_conditions(loan_type, db)
         query = """
-        SELECT DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+        SELECT {period} as period,
                SUM(l.total_loan) as total_disbursed_amount,
                SUM(l.admin_fee) as total_admin_fee_disbursed
         FROM td_loan l
         {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
+        """.format(
+            period=period_sql("l.proses_date"),
+            gmc_joins=_LOAN_GMC_JOINS,
+            loan_conditions=loan_conditions,
+        )
 
         params: dict = {}
         query = _apply_repayment_risk_filters(
@@ -2576,16 +2589,13 @@ def get_total_disbursed_amount_monthly(
             query = append_date_filters(
                 query, params, start_date=start_date, end_date=end_date, date_column="l.proses_date"
             )
-        query += """
-        GROUP BY DATE_FORMAT(l.proses_date, '%M %Y')
-        ORDER BY MIN(l.proses_date)
-        """
+        query += " GROUP BY period"
 
         monthly_data = {}
-        for row in db.execute(text(query), params).fetchall():
+        for row in db.execute(statement(query), params).fetchall():
             if row[0] is None:
                 continue
-            monthly_data[row[0]] = {
+            monthly_data[int(row[0])] = {
                 "total_disbursed_amount": row[1] if row[1] is not None else 0,
                 "total_admin_fee_disbursed": row[2] if row[2] is not None else 0,
             }
@@ -2621,9 +2631,12 @@ def is_all_loan_types(loan_type: str) -> bool:
     return bool(loan_type) and loan_type.lower() == "all"
 
 
-def resolve_loan_conditions(loan_type: str, db: Session = None) -> str:
+def resolve_loan_conditions(loan_type: str, db: Session = None, alias: str = "l") -> str:
+    """td_loan predicate for loan_type, written against the td_loan alias `alias`."""
     if db is not None:
-        return _loan_conditions_from_ids(loan_type, _get_aku_cicil_id_list(db))
+        return _loan_conditions_from_ids(loan_type, _get_aku_cicil_id_list(db), alias)
+    if alias != "l":
+        return _loan_conditions_from_ids(loan_type, _AKU_CICIL_SETTING_IDS, alias)
     if is_all_loan_types(loan_type):
         return ALL_LOAN_CONDITIONS
     if loan_type == "extradana":
@@ -2678,8 +2691,8 @@ def _merge_monthly_repayment_risk(monthly_dicts: List[dict]) -> dict:
     month's derived rates via _recalculate_repayment_risk_derivatives."""
     merged: dict = {}
     for monthly_data in monthly_dicts:
-        for month_year, metrics in monthly_data.items():
-            bucket = merged.setdefault(month_year, {key: 0 for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS})
+        for period, metrics in monthly_data.items():
+            bucket = merged.setdefault(period, {key: 0 for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS})
             for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS:
                 bucket[key] += metrics.get(key, 0) or 0
     return merged
@@ -2726,7 +2739,7 @@ def get_enhanced_karyawan(db: Session, limit: int = 1000000,
 
     try:
         # Build the base query with table joins (same database)
-        base_query = """
+        base_query = f"""
         SELECT
             tk.id_karyawan,
             tk.status,
@@ -2736,21 +2749,7 @@ def get_enhanced_karyawan(db: Session, limit: int = 1000000,
             src.keterangan AS sourced_to_name,
             prj.keterangan AS project_name
         FROM td_karyawan tk
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {_KARYAWAN_GMC_JOINS}
         WHERE 1=1
         """
 
@@ -2784,7 +2783,7 @@ def get_enhanced_karyawan(db: Session, limit: int = 1000000,
 
 
         # Execute the main query
-        result = db.execute(text(base_query), params)
+        result = db.execute(statement(base_query), params)
         records = result.fetchall()
 
 
@@ -2819,24 +2818,10 @@ def get_user_coverage_summary(db: Session,
         # Set default loan conditions for kasbon/loan type
         loan_conditions = LOAN_CONDITIONS
         # Build the eligible count query
-        eligible_count_query = """
+        eligible_count_query = f"""
         SELECT COUNT(*)
         FROM td_karyawan tk
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {_KARYAWAN_GMC_JOINS}
         WHERE tk.status = '1'
         AND tk.loan_kasbon_eligible = '1'
         """
@@ -2845,73 +2830,25 @@ def get_user_coverage_summary(db: Session,
         processed_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 3, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the pending loan requests query
         pending_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status = 0
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the first-time borrowers query
         first_borrow_query = """
         SELECT COUNT(DISTINCT l.id_karyawan)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (0, 1, 2, 3)
         AND NOT EXISTS (
             SELECT 1
@@ -2922,134 +2859,54 @@ def get_user_coverage_summary(db: Session,
             AND {loan_conditions}
         )
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the approved requests query
         approved_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the rejected requests query
         rejected_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status = 3
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the average approval time query
         avg_approval_time_query = """
         SELECT AVG(DATEDIFF(l.proses_date, l.received_date))
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status = 1
         AND l.proses_date IS NOT NULL
         AND l.received_date IS NOT NULL
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the total disbursed amount query
         total_disbursed_amount_query = """
         SELECT SUM(l.total_loan)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the total loans query (for average calculation - count all loans, not unique borrowers)
         total_loans_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -3156,32 +3013,32 @@ def get_user_coverage_summary(db: Session,
 
 
         # Execute all queries
-        eligible_result = db.execute(text(eligible_count_query), params)
+        eligible_result = db.execute(statement(eligible_count_query), params)
         total_eligible = eligible_result.fetchone()[0]
 
-        processed_result = db.execute(text(processed_requests_query), params)
+        processed_result = db.execute(statement(processed_requests_query), params)
         total_processed = processed_result.fetchone()[0]
 
-        pending_result = db.execute(text(pending_requests_query), params)
+        pending_result = db.execute(statement(pending_requests_query), params)
         total_pending = pending_result.fetchone()[0]
 
-        first_borrow_result = db.execute(text(first_borrow_query), params)
+        first_borrow_result = db.execute(statement(first_borrow_query), params)
         total_first_borrow = first_borrow_result.fetchone()[0]
 
-        approved_result = db.execute(text(approved_requests_query), params)
+        approved_result = db.execute(statement(approved_requests_query), params)
         total_approved = approved_result.fetchone()[0]
 
-        rejected_result = db.execute(text(rejected_requests_query), params)
+        rejected_result = db.execute(statement(rejected_requests_query), params)
         total_rejected = rejected_result.fetchone()[0]
 
-        avg_approval_time_result = db.execute(text(avg_approval_time_query), params)
+        avg_approval_time_result = db.execute(statement(avg_approval_time_query), params)
         avg_approval_time = avg_approval_time_result.fetchone()[0] or 0
 
         # Execute the new queries
-        total_disbursed_amount_result = db.execute(text(total_disbursed_amount_query), params)
+        total_disbursed_amount_result = db.execute(statement(total_disbursed_amount_query), params)
         total_disbursed_amount = total_disbursed_amount_result.fetchone()[0] or 0
 
-        total_loans_result = db.execute(text(total_loans_query), params)
+        total_loans_result = db.execute(statement(total_loans_query), params)
         total_loans = total_loans_result.fetchone()[0] or 0
 
         # Calculate penetration rate
@@ -3281,7 +3138,7 @@ def get_user_coverage_monthly_summary(
 
         monthly_query = f"""
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             COUNT(CASE WHEN l.loan_status IN (1, 2, 3, 4) THEN 1 END) as total_processed_loan_requests,
             COALESCE(SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END), 0) as total_disbursed_amount
         FROM td_loan l
@@ -3309,13 +3166,12 @@ def get_user_coverage_monthly_summary(
                 end_date=end_date,
             )
         monthly_query += """
-        GROUP BY DATE_FORMAT(l.proses_date, '%M %Y')
-        ORDER BY MIN(l.proses_date)
+        GROUP BY period
         """
 
-        total_eligible = db.execute(text(eligible_count_query), params).fetchone()[0] or 0
+        total_eligible = db.execute(statement(eligible_count_query), params).fetchone()[0] or 0
         monthly_data = {}
-        for row in db.execute(text(monthly_query), params).fetchall():
+        for row in db.execute(statement(monthly_query), params).fetchall():
             if row[0] is None:
                 continue
             processed = row[1] or 0
@@ -3344,76 +3200,28 @@ def get_requests_endpoint(db: Session,
         approved_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the rejected requests query
         rejected_requests_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status = 3
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the total processed requests query (for approval rate calculation)
         total_processed_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 3, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the average approval time query
         avg_approval_time_query = """
@@ -3429,26 +3237,10 @@ def get_requests_endpoint(db: Session,
             END
         )
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status = 1
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -3509,16 +3301,16 @@ def get_requests_endpoint(db: Session,
         )
 
         # Execute all queries
-        approved_result = db.execute(text(approved_requests_query), params)
+        approved_result = db.execute(statement(approved_requests_query), params)
         total_approved = approved_result.fetchone()[0]
 
-        rejected_result = db.execute(text(rejected_requests_query), params)
+        rejected_result = db.execute(statement(rejected_requests_query), params)
         total_rejected = rejected_result.fetchone()[0]
 
-        total_processed_result = db.execute(text(total_processed_query), params)
+        total_processed_result = db.execute(statement(total_processed_query), params)
         total_processed = total_processed_result.fetchone()[0]
 
-        avg_approval_time_result = db.execute(text(avg_approval_time_query), params)
+        avg_approval_time_result = db.execute(statement(avg_approval_time_query), params)
         avg_approval_time_record = avg_approval_time_result.fetchone()
         avg_approval_time = avg_approval_time_record[0] if avg_approval_time_record and avg_approval_time_record[0] is not None else 0
 
@@ -3565,51 +3357,19 @@ def get_disbursement_endpoint(db: Session,
         total_disbursed_amount_query = """
         SELECT SUM(l.total_loan)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build the total loan count query (for average calculation - count all loans, not unique borrowers)
         total_loans_query = """
         SELECT COUNT(*)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -3652,10 +3412,10 @@ def get_disbursement_endpoint(db: Session,
         )
 
         # Execute all queries
-        total_disbursed_amount_result = db.execute(text(total_disbursed_amount_query), params)
+        total_disbursed_amount_result = db.execute(statement(total_disbursed_amount_query), params)
         total_disbursed_amount = total_disbursed_amount_result.fetchone()[0] or 0
 
-        total_loans_result = db.execute(text(total_loans_query), params)
+        total_loans_result = db.execute(statement(total_loans_query), params)
         total_loans = total_loans_result.fetchone()[0] or 0
 
         # Calculate average disbursed amount (per loan, not per borrower)
@@ -3689,37 +3449,23 @@ def get_disbursement_monthly_endpoint(db: Session, start_date: str = None, end_d
         loan_conditions = LOAN_CONDITIONS
         monthly_query = """
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END) as total_disbursed_amount,
             COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) as total_loans
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.proses_date IS NOT NULL
-        AND l.proses_date BETWEEN :start_date AND :end_date
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for monthly query
-        monthly_params = {
-            'start_date': start_date,
-            'end_date': end_date
-        }
+        monthly_params = {}
+        monthly_query = append_date_filters(
+            monthly_query,
+            monthly_params,
+            start_date=start_date,
+            end_date=end_date,
+        )
 
         # Add filters to monthly query
         if id_karyawan_filter:
@@ -3740,21 +3486,20 @@ def get_disbursement_monthly_endpoint(db: Session, start_date: str = None, end_d
         )
 
         monthly_query += """
-        GROUP BY DATE_FORMAT(l.proses_date, '%M %Y')
-        ORDER BY l.proses_date
+        GROUP BY period
         """
 
 
 
         # Execute monthly query
-        result = db.execute(text(monthly_query), monthly_params)
+        result = db.execute(statement(monthly_query), monthly_params)
         rows = result.fetchall()
 
         # Process results
         monthly_data = {}
         for row in rows:
-            month_year = row[0]
-            if month_year is None:
+            period = row[0]
+            if period is None:
                 continue
 
             total_disbursed_amount = row[1] or 0
@@ -3765,7 +3510,7 @@ def get_disbursement_monthly_endpoint(db: Session, start_date: str = None, end_d
             if total_loans > 0:
                 average_disbursed_amount = total_disbursed_amount / total_loans
 
-            monthly_data[month_year] = {
+            monthly_data[period] = {
                 "total_disbursed_amount": total_disbursed_amount,
                 "total_loans": total_loans,
                 "average_disbursed_amount": average_disbursed_amount
@@ -3790,6 +3535,9 @@ def get_loans_with_karyawan(db: Session, limit: int = 1000000,
 
     try:
         loan_conditions = resolve_loan_conditions(loan_type, db)
+        # tk, emp and src as usual; prj stays hand-written because this listing requires a
+        # project and ignores its aktif flag.
+        employee_joins = "\n    ".join(join.sql for join in loan_relation(karyawan_kind="INNER").joins[:3])
 
         base_query = f"""
         SELECT
@@ -3820,18 +3568,7 @@ def get_loans_with_karyawan(db: Session, limit: int = 1000000,
             tpm.product_type AS product_type_id,
             pt.keterangan AS product_type_name
         FROM td_loan l
-        INNER JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
+        {employee_joins}
         INNER JOIN tbl_gmc prj
             ON tk.project = prj.kode_gmc
             AND prj.group_gmc = 'client_project'
@@ -3871,7 +3608,7 @@ def get_loans_with_karyawan(db: Session, limit: int = 1000000,
 
         base_query += f" LIMIT {limit}"
 
-        result = db.execute(text(base_query), params)
+        result = db.execute(statement(base_query), params)
         records = result.fetchall()
 
         loans_list = []
@@ -3985,9 +3722,9 @@ def get_available_filter_values(db: Session, employer_filter: str = None, placem
             project_params['placement'] = placement_filter
 
         # Execute queries
-        employers = [row[0] for row in db.execute(text(employer_query)).fetchall()]
-        placements = [row[0] for row in db.execute(text(placement_query), placement_params).fetchall()]
-        projects = [row[0] for row in db.execute(text(project_query), project_params).fetchall()]
+        employers = [row[0] for row in db.execute(statement(employer_query)).fetchall()]
+        placements = [row[0] for row in db.execute(statement(placement_query), placement_params).fetchall()]
+        projects = [row[0] for row in db.execute(statement(project_query), project_params).fetchall()]
         pm_options = _fetch_project_management_filter_options(db)
 
         return {
@@ -4030,26 +3767,10 @@ def get_loan_fees_summary(db: Session,
             COUNT(CASE WHEN l.loan_status = 2 THEN 1 END) as collected_loans_count,
             SUM(CASE WHEN l.loan_status = 4 THEN l.total_loan ELSE 0 END) as total_failed_payment
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE 1=1
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -4087,7 +3808,7 @@ def get_loan_fees_summary(db: Session,
             )
 
         # Execute the query
-        result = db.execute(text(fees_query), params)
+        result = db.execute(statement(fees_query), params)
         record = result.fetchone()
 
         # Extract the values (handle None values)
@@ -4135,33 +3856,17 @@ def get_loan_fees_monthly_summary(db: Session,
         # Build the query to calculate admin fees by month
         fees_query = """
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.admin_fee ELSE 0 END) as total_expected_admin_fee,
             COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) as expected_loans_count,
             SUM(CASE WHEN l.loan_status = 2 THEN l.admin_fee ELSE 0 END) as total_collected_admin_fee,
             COUNT(CASE WHEN l.loan_status = 2 THEN 1 END) as collected_loans_count,
             SUM(CASE WHEN l.loan_status = 4 THEN l.total_loan ELSE 0 END) as total_failed_payment
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.proses_date IS NOT NULL
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -4190,30 +3895,29 @@ def get_loan_fees_monthly_summary(db: Session,
             params['loan_status'] = loan_status_filter
 
         # Add date range filters based on proses_date
-        if start_date:
-            fees_query += " AND l.proses_date >= :start_date"
-            params['start_date'] = start_date
-
-        if end_date:
-            fees_query += " AND l.proses_date <= :end_date"
-            params['end_date'] = end_date
+        fees_query = append_date_filters(
+            fees_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+            open_ended=True,
+        )
 
         # Group by month and year, order by date
         fees_query += """
-        GROUP BY DATE_FORMAT(l.proses_date, '%M %Y')
-        ORDER BY MIN(l.proses_date)
+        GROUP BY period
         """
 
         # Execute the query
-        result = db.execute(text(fees_query), params)
+        result = db.execute(statement(fees_query), params)
         records = result.fetchall()
 
-        # Convert to dictionary with month_year as key
+        # Convert to dictionary with the YYYYMM period as key
         monthly_data = {}
         for record in records:
-            month_year = record[0]
-            # Skip records with NULL month_year
-            if month_year is None:
+            period = record[0]
+            # Skip records with NULL period
+            if period is None:
                 continue
 
             total_expected = record[1] if record[1] is not None else 0
@@ -4225,7 +3929,7 @@ def get_loan_fees_monthly_summary(db: Session,
             # Calculate admin_fee_profit: total_collected_admin_fee - total_failed_payment
             admin_fee_profit = total_collected - total_failed_payment
 
-            monthly_data[month_year] = {
+            monthly_data[period] = {
                 "total_expected_admin_fee": total_expected,
                 "expected_loans_count": expected_count,
                 "total_collected_admin_fee": total_collected,
@@ -4260,26 +3964,10 @@ def get_loan_risk_summary(db: Session,
             SUM(CASE WHEN l.loan_status = 2 THEN l.total_loan ELSE 0 END) as total_paid,
             SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END) as total_disbursed
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE 1=1
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -4317,7 +4005,7 @@ def get_loan_risk_summary(db: Session,
             )
 
         # Execute the query
-        result = db.execute(text(risk_query), params)
+        result = db.execute(statement(risk_query), params)
         record = result.fetchone()
 
         # Extract the values (handle None values)
@@ -4363,33 +4051,17 @@ def get_loan_risk_monthly_summary(db: Session,
         # Build the query to calculate risk metrics by month
         risk_query = """
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             SUM(CASE WHEN l.loan_status = 4 THEN l.total_loan ELSE 0 END) as total_unrecovered_loan,
             COUNT(CASE WHEN l.loan_status = 4 THEN 1 END) as unrecovered_loan_count,
             SUM(CASE WHEN l.loan_status IN (1, 4) THEN l.total_payment ELSE 0 END) as total_expected_repayment,
             SUM(CASE WHEN l.loan_status = 2 THEN l.total_loan ELSE 0 END) as total_paid,
             SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END) as total_disbursed
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.proses_date IS NOT NULL
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -4418,32 +4090,31 @@ def get_loan_risk_monthly_summary(db: Session,
             params['loan_status'] = loan_status_filter
 
         # Add date range filters based on proses_date
-        if start_date:
-            risk_query += " AND l.proses_date >= :start_date"
-            params['start_date'] = start_date
-
-        if end_date:
-            risk_query += " AND l.proses_date <= :end_date"
-            params['end_date'] = end_date
+        risk_query = append_date_filters(
+            risk_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+            open_ended=True,
+        )
 
         # Group by month and year, order by date
         risk_query += """
-        GROUP BY DATE_FORMAT(l.proses_date, '%M %Y')
-        ORDER BY MIN(l.proses_date)
+        GROUP BY period
         """
 
 
 
         # Execute the query
-        result = db.execute(text(risk_query), params)
+        result = db.execute(statement(risk_query), params)
         records = result.fetchall()
 
-        # Convert to dictionary with month_year as key
+        # Convert to dictionary with the YYYYMM period as key
         monthly_data = {}
         for record in records:
-            month_year = record[0]
-            # Skip records with NULL month_year
-            if month_year is None:
+            period = record[0]
+            # Skip records with NULL period
+            if period is None:
                 continue
 
             total_unrecovered_kasbon = record[1] if record[1] is not None else 0
@@ -4457,7 +4128,7 @@ def get_loan_risk_monthly_summary(db: Session,
             if total_disbursed > 0:
                 loan_principal_recovery_rate = total_paid / total_disbursed
 
-            monthly_data[month_year] = {
+            monthly_data[period] = {
                 "total_unrecovered_kasbon": total_unrecovered_kasbon,
                 "unrecovered_kasbon_count": unrecovered_kasbon_count,
                 "total_expected_repayment": total_expected_repayment,
@@ -4474,6 +4145,123 @@ def get_loan_risk_monthly_summary(db: Session,
         return {}
 
 
+def _append_karyawan_overdue_filters(
+    query: str,
+    params: dict,
+    karyawan_column: str,
+    *,
+    employer_filter: str = None,
+    sourced_to_filter: str = None,
+    project_filter: str = None,
+    client_segment_filter: str = None,
+    product_type_filter: str = None,
+    id_karyawan_filter: int = None,
+    db: Session = None,
+) -> str:
+    """Employee and org filters of the overdue list, over tk/emp/src/prj."""
+    if id_karyawan_filter:
+        query += f" AND {karyawan_column} = :id_karyawan"
+        params['id_karyawan'] = id_karyawan_filter
+
+    # Restrict to only PT Valdo companies
+    query += f" AND emp.keterangan IN {COMPANY_FILTER}"
+
+    # If employer_filter is provided and it's one of the allowed companies, filter further
+    if employer_filter and employer_filter in ALLOWED_COMPANIES:
+        query += " AND emp.keterangan = :employer"
+        params['employer'] = employer_filter
+
+    if sourced_to_filter:
+        query += " AND src.keterangan = :sourced_to"
+        params['sourced_to'] = sourced_to_filter
+
+    if project_filter:
+        query += " AND prj.keterangan = :project"
+        params['project'] = project_filter
+
+    return _apply_project_management_filters(query, params, client_segment_filter, product_type_filter, db=db)
+
+
+def _karyawan_overdue_rows(records) -> List[dict]:
+    """(id_karyawan, ktp, name, company, sourced_to, project, total_amount_owed,
+    repayment_date, total_admin_fee, total_payment) rows -> overdue list entries."""
+    from datetime import datetime, date
+
+    overdue_list = []
+    for record in records:
+        if record[0] is None:
+            continue
+
+        days_overdue = 0
+        if record[7] is not None:
+            try:
+                repayment_date = record[7]
+                if isinstance(repayment_date, str):
+                    repayment_date = datetime.strptime(repayment_date, '%Y-%m-%d').date()
+                elif hasattr(repayment_date, 'date'):
+                    repayment_date = repayment_date.date()
+                today = date.today()
+                days_overdue = (today - repayment_date).days
+            except Exception:
+                days_overdue = 0
+
+        overdue_list.append({
+            "id_karyawan": record[0],
+            "ktp": record[1],
+            "name": record[2],
+            "company": record[3],
+            "sourced_to": record[4],
+            "project": record[5],
+            "total_amount_owed": record[6] if record[6] is not None else 0,
+            "repayment_date": str(record[7]) if record[7] else None,
+            "days_overdue": days_overdue,
+            "admin_fee": record[8] if record[8] is not None else 0,
+            "total_payment": record[9] if record[9] is not None else 0
+        })
+
+    return overdue_list
+
+
+def _karyawan_overdue_from_ledger(db: Session, products: Tuple[str, ...], **filters) -> List[dict]:
+    """The overdue list for `products` from loan_karyawan_ledger; `filters` are those of
+    _append_karyawan_overdue_filters."""
+    product_list = ", ".join(f"'{product}'" for product in products)
+    query = f"""
+    SELECT
+        tk.id_karyawan,
+        tk.ktp AS ktp,
+        tk.nama AS name,
+        emp.keterangan AS company,
+        src.keterangan AS sourced_to,
+        prj.keterangan AS project,
+        ROUND(SUM(kl.overdue_principal), 0) AS total_amount_owed,
+        MAX(kl.last_due_date) AS repayment_date,
+        ROUND(SUM(kl.overdue_admin_fee), 0) AS total_admin_fee,
+        SUM(kl.overdue_payment) AS total_payment
+    FROM {KARYAWAN_LEDGER_TABLE} kl
+    INNER JOIN td_karyawan tk ON tk.id_karyawan = kl.id_karyawan
+    {_KARYAWAN_GMC_JOINS}
+    WHERE kl.product IN ({product_list})
+    AND kl.overdue_count > 0
+    """
+    params = {}
+    query = _append_karyawan_overdue_filters(query, params, "kl.id_karyawan", db=db, **filters)
+    query += """
+    GROUP BY tk.id_karyawan, tk.nama, tk.ktp, emp.keterangan, src.keterangan, prj.keterangan
+    ORDER BY total_amount_owed DESC
+    """
+    return _karyawan_overdue_rows(db.execute(statement(query), params).fetchall())
+
+
+def karyawan_overdue_ledger_refreshed_at(db: Session, loan_status_filter: int = None,
+                                         start_date: str = None, end_date: str = None) -> Optional[datetime]:
+    """The ledger refresh an overdue request with these filters is answered from, or
+    None when it is aggregated from the loan tables directly."""
+    if (start_date and end_date) or loan_status_filter not in (None, 4):
+        return None
+    return karyawan_ledger_refreshed_at(db)
+
+
 def get_karyawan_overdue_summary(db: Session,
                                  employer_filter: str = None, sourced_to_filter: str = None,
                                  project_filter: str = None, client_segment_filter: str = None, product_type_filter: str = None, loan_status_filter: int = None,
@@ -4511,6 +4299,20 @@ def get_karyawan_overdue_summary(db: Session,
                 ),
             ])
 
+        # Unranged requests read the precomputed ledger (see karyawan_ledger.py); a due-date
+        # range or another status needs the per-row aggregation below.
+        if karyawan_overdue_ledger_refreshed_at(db, loan_status_filter, start_date, end_date):
+            return _karyawan_overdue_from_ledger(
+                db,
+                ledger_products(loan_type),
+                employer_filter=employer_filter,
+                sourced_to_filter=sourced_to_filter,
+                project_filter=project_filter,
+                client_segment_filter=client_segment_filter,
+                product_type_filter=product_type_filter,
+                id_karyawan_filter=id_karyawan_filter,
+            )
+
         loan_conditions = resolve_loan_conditions(loan_type, db)
 
         # For kasbon and default, use td_loan table directly (like the old "loan" type)
@@ -4523,19 +4325,9 @@ def get_karyawan_overdue_summary(db: Session,
             # total_payment is the remaining pokok+bunga still owed (monthly - paid);
             # total_amount_owed (pokok) and total_admin_fee (bunga) are that same
             # remainder split proportionally, so owed + admin_fee == total_payment.
-            # Mirrors the netting done in _UNRECOVERED_LUMP_PAYMENT_SQL.
-            _lump_paid_subquery = """(
-                SELECT COALESCE(SUM(amt), 0) FROM (
-                    SELECT p.amount amt FROM td_loan_payment p
-                    WHERE p.loan_id = l.id AND p.status = 1 AND p.loan_history_id IS NULL
-                      AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
-                    UNION ALL
-                    SELECT a.amount FROM td_loan_payment_allocation a
-                    INNER JOIN td_loan_payment p ON p.id = a.payment_id
-                    WHERE p.loan_id = l.id AND p.status = 1 AND a.loan_history_id IS NULL
-                ) t
-            )"""
-            _lump_remaining_payment = f"GREATEST(l.total_payment - {_lump_paid_subquery}, 0)"
+            # Mirrors the netting done in _UNRECOVERED_LUMP_PAYMENT; the paid amount is
+            # karyawan_ledger.LUMP_PAID_SQL.
+            _lump_remaining_payment = f"GREATEST(l.total_payment - {LUMP_PAID_SQL}, 0)"
 
             overdue_query = """
             SELECT DISTINCT
@@ -4554,31 +4346,14 @@ def get_karyawan_overdue_summary(db: Session,
                     ELSE 0 END), 0) as total_admin_fee,
                 SUM({remaining_payment}) as total_payment
             FROM td_loan l""".format(remaining_payment=_lump_remaining_payment) + """
-            LEFT JOIN td_karyawan tk
-                ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE l.loan_status = 4
             AND l.id_karyawan IS NOT NULL
             AND {loan_conditions}
-            """.format(loan_conditions=loan_conditions)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
         else:
             # For extradana and aku_cicil, use td_loan_history table
-            # Adapt loan_conditions for td_loan_history context by replacing l. with tl.
-            loan_conditions_tl = loan_conditions.replace('l.', 'tl.')
+            loan_conditions_tl = resolve_loan_conditions(loan_type, db, alias="tl")
 
             # Netting out partial payments already recorded against an installment
             # (duration > 1): a given month's td_loan_history row can be status = 4
@@ -4587,19 +4362,9 @@ def get_karyawan_overdue_summary(db: Session,
             # total_payment is the remaining pokok+bunga still owed (monthly - paid);
             # total_amount_owed (pokok) and total_admin_fee (bunga) are that same
             # remainder split proportionally, so owed + admin_fee == total_payment.
-            # Mirrors the netting done in _UNRECOVERED_INSTALLMENT_PAYMENT_SQL.
-            _installment_paid_subquery = """(
-                SELECT COALESCE(SUM(amt), 0) FROM (
-                    SELECT p.amount amt FROM td_loan_payment p
-                    WHERE p.loan_id = tl.id AND p.status = 1 AND p.loan_history_id = tlh.id
-                      AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
-                    UNION ALL
-                    SELECT a.amount FROM td_loan_payment_allocation a
-                    INNER JOIN td_loan_payment p ON p.id = a.payment_id
-                    WHERE p.loan_id = tl.id AND p.status = 1 AND a.loan_history_id = tlh.id
-                ) t
-            )"""
-            _installment_remaining_payment = f"GREATEST(tlh.monthly - {_installment_paid_subquery}, 0)"
+            # Mirrors the netting done in _UNRECOVERED_INSTALLMENT_PAYMENT; the paid amount
+            # is karyawan_ledger.INSTALLMENT_PAID_SQL.
+            _installment_remaining_payment = f"GREATEST(tlh.monthly - {INSTALLMENT_PAID_SQL}, 0)"
 
             overdue_query = """
             SELECT DISTINCT
@@ -4617,29 +4382,16 @@ def get_karyawan_overdue_summary(db: Session,
                     THEN ROUND(tl.admin_fee / tl.duration, 0) * {remaining_payment} / tlh.monthly
                     ELSE 0 END), 0) as total_admin_fee,
                 SUM({remaining_payment}) as total_payment
-            FROM td_loan_history tlh""".format(remaining_payment=_installment_remaining_payment) + """
-            LEFT JOIN td_loan tl ON tlh.loan_form_id = tl.id
-            LEFT JOIN td_karyawan tk ON tl.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {relation}
             WHERE tlh.due_date IS NOT NULL
             AND tlh.status = 4
             AND tl.id_karyawan IS NOT NULL
             AND {loan_conditions_tl}
-            """.format(loan_conditions_tl=loan_conditions_tl)
+            """.format(
+                remaining_payment=_installment_remaining_payment,
+                relation=loan_history_relation(loan_kind="LEFT").sql(),
+                loan_conditions_tl=loan_conditions_tl,
+            )
 
         # Build parameters dict for filters
         params = {}
@@ -4647,32 +4399,18 @@ def get_karyawan_overdue_summary(db: Session,
         # Determine if using td_loan (kasbon/default) or td_loan_history (extradana/aku_cicil/installment)
         use_td_loan = loan_type not in ("extradana", "aku_cicil", "installment")
 
-        # Add filters
-        if id_karyawan_filter:
-            if use_td_loan:
-                overdue_query += " AND l.id_karyawan = :id_karyawan"
-            else:
-                overdue_query += " AND tl.id_karyawan = :id_karyawan"
-            params['id_karyawan'] = id_karyawan_filter
-
-        # Restrict to only PT Valdo companies
-        company_filter = COMPANY_FILTER
-        overdue_query += f" AND emp.keterangan IN {company_filter}"
-
-        # If employer_filter is provided and it's one of the allowed companies, filter further
-        if employer_filter and employer_filter in ALLOWED_COMPANIES:
-            overdue_query += " AND emp.keterangan = :employer"
-            params['employer'] = employer_filter
-
-        if sourced_to_filter:
-            overdue_query += " AND src.keterangan = :sourced_to"
-            params['sourced_to'] = sourced_to_filter
-
-        if project_filter:
-            overdue_query += " AND prj.keterangan = :project"
-            params['project'] = project_filter
-
-        overdue_query = _apply_project_management_filters(overdue_query, params, client_segment_filter, product_type_filter, db=db)
+        overdue_query = _append_karyawan_overdue_filters(
+            overdue_query,
+            params,
+            "l.id_karyawan" if use_td_loan else "tl.id_karyawan",
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
+            id_karyawan_filter=id_karyawan_filter,
+            db=db,
+        )
 
         if loan_status_filter is not None:
             if use_td_loan:
@@ -4681,58 +4419,21 @@ def get_karyawan_overdue_summary(db: Session,
                 overdue_query += " AND tlh.status = :loan_status"
             params['loan_status'] = loan_status_filter
 
-        if start_date and end_date:
-            if use_td_loan:
-                overdue_query += " AND l.repayment_date >= :start_date"
-                overdue_query += " AND l.repayment_date <= :end_date"
-            else:
-                overdue_query += " AND tlh.due_date >= :start_date"
-                overdue_query += " AND tlh.due_date <= :end_date"
-            params["start_date"] = start_date
-            params["end_date"] = end_date
+        overdue_query = append_date_filters(
+            overdue_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+            date_column="l.repayment_date" if use_td_loan else "tlh.due_date",
+        )
 
         overdue_query += """
         GROUP BY tk.id_karyawan, tk.nama, tk.ktp, emp.keterangan, src.keterangan, prj.keterangan
         ORDER BY total_amount_owed DESC
         """
 
-        result = db.execute(text(overdue_query), params)
-        records = result.fetchall()
-
-        overdue_list = []
-        for record in records:
-            if record[0] is None:
-                continue
-
-            days_overdue = 0
-            if record[7] is not None:
-                from datetime import datetime, date
-                try:
-                    repayment_date = record[7]
-                    if isinstance(repayment_date, str):
-                        repayment_date = datetime.strptime(repayment_date, '%Y-%m-%d').date()
-                    elif hasattr(repayment_date, 'date'):
-                        repayment_date = repayment_date.date()
-                    today = date.today()
-                    days_overdue = (today - repayment_date).days
-                except Exception:
-                    days_overdue = 0
-
-            overdue_list.append({
-                "id_karyawan": record[0],
-                "ktp": record[1],
-                "name": record[2],
-                "company": record[3],
-                "sourced_to": record[4],
-                "project": record[5],
-                "total_amount_owed": record[6] if record[6] is not None else 0,
-                "repayment_date": str(record[7]) if record[7] else None,
-                "days_overdue": days_overdue,
-                "admin_fee": record[8] if record[8] is not None else 0,
-                "total_payment": record[9] if record[9] is not None else 0
-            })
-
-        return overdue_list
+        result = db.execute(statement(overdue_query), params)
+        return _karyawan_overdue_rows(result.fetchall())
 
     except Exception as e:
         import traceback
@@ -4764,26 +4465,10 @@ def get_loan_purpose_summary(db: Session,
         FROM td_loan l
         LEFT JOIN loan_purpose lp
             ON l.purpose = lp.id
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE 1=1
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         params = {}
 
@@ -4821,7 +4506,7 @@ def get_loan_purpose_summary(db: Session,
         ORDER BY total_amount DESC
         """
 
-        result = db.execute(text(purpose_query), params)
+        result = db.execute(statement(purpose_query), params)
         records = result.fetchall()
 
         purpose_list = []
@@ -4962,9 +4647,9 @@ def get_loan_applicant_insights(db: Session,
         age_query = append_date_filters(age_query, params, start_date=start_date, end_date=end_date)
         age_query += f" GROUP BY age_range ORDER BY {_AGE_RANGE_SORT_CASE_SQL}"
 
-        reject_rows = db.execute(text(reject_query), params).fetchall()
-        gender_rows = db.execute(text(gender_query), params).fetchall()
-        age_rows = db.execute(text(age_query), params).fetchall()
+        reject_rows = db.execute(statement(reject_query), params).fetchall()
+        gender_rows = db.execute(statement(gender_query), params).fetchall()
+        age_rows = db.execute(statement(age_query), params).fetchall()
 
         top_reject_reasons = [
             {
@@ -5030,25 +4715,9 @@ def get_total_admin_fee_collected(db: Session,
             admin_fee_collected_query = """
             SELECT SUM(CASE WHEN l.loan_status = 2 THEN l.admin_fee ELSE 0 END) as total_admin_fee_collected
             FROM td_loan l
-            LEFT JOIN td_karyawan tk
-                ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE {loan_conditions}
-            """.format(loan_conditions=loan_conditions)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         else:
             if loan_type == "extradana":
@@ -5060,26 +4729,11 @@ def get_total_admin_fee_collected(db: Session,
             SELECT SUM(ROUND(l.admin_fee / l.duration, 0)) as total_admin_fee_collected
             FROM td_loan_history tlh
             LEFT JOIN td_loan l ON tlh.loan_form_id = l.id
-            LEFT JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE tlh.due_date IS NOT NULL
             AND l.loan_status IN (1, 2, 4)
             AND {loan_conditions_tl}
-            """.format(loan_conditions_tl=loan_conditions_tl)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions_tl=loan_conditions_tl)
 
         if id_karyawan_filter:
             admin_fee_collected_query += " AND l.id_karyawan = :id_karyawan"
@@ -5106,15 +4760,15 @@ def get_total_admin_fee_collected(db: Session,
             admin_fee_collected_query += " AND l.loan_status = :loan_status"
             params['loan_status'] = loan_status_filter
 
-        if start_date and end_date:
-            if loan_type in ("extradana", "aku_cicil"):
-                admin_fee_collected_query += " AND tlh.due_date >= :start_date AND tlh.due_date <= :end_date"
-            else:
-                admin_fee_collected_query += " AND l.proses_date >= :start_date AND l.proses_date <= :end_date"
-            params["start_date"] = start_date
-            params["end_date"] = end_date
+        admin_fee_collected_query = append_date_filters(
+            admin_fee_collected_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+            date_column="tlh.due_date" if loan_type in ("extradana", "aku_cicil") else "l.proses_date",
+        )
 
-        result = db.execute(text(admin_fee_collected_query), params)
+        result = db.execute(statement(admin_fee_collected_query), params)
         record = result.fetchone()
         return record[0] if record[0] is not None else 0
 
@@ -5149,25 +4803,9 @@ def get_total_loan_principal_collected(db: Session,
             principal_collected_query = """
             SELECT SUM(CASE WHEN l.loan_status = 2 THEN l.total_loan ELSE 0 END) as total_loan_principal_collected
             FROM td_loan l
-            LEFT JOIN td_karyawan tk
-                ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE {loan_conditions}
-            """.format(loan_conditions=loan_conditions)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         else:  # extradana or aku_cicil
             # For extradana and aku_cicil, use td_loan_history table with monthly principal calculation
@@ -5183,26 +4821,11 @@ def get_total_loan_principal_collected(db: Session,
             SELECT SUM(ROUND(l.total_loan / l.duration, 0)) as total_loan_principal_collected
             FROM td_loan_history tlh
             LEFT JOIN td_loan l ON tlh.loan_form_id = l.id
-            LEFT JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE tlh.due_date IS NOT NULL
             AND l.loan_status IN (1, 2, 4)
             AND {loan_conditions_tl}
-            """.format(loan_conditions_tl=loan_conditions_tl)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions_tl=loan_conditions_tl)
 
         # Add filters
         if id_karyawan_filter:
@@ -5234,15 +4857,15 @@ def get_total_loan_principal_collected(db: Session,
             params['loan_status'] = loan_status_filter
 
         # Add date filters based on due_date for extradana, proses_date for loan
-        if start_date and end_date:
-            if loan_type in ("extradana", "aku_cicil"):
-                principal_collected_query += " AND tlh.due_date >= :start_date AND tlh.due_date <= :end_date"
-            else:
-                principal_collected_query += " AND l.proses_date >= :start_date AND l.proses_date <= :end_date"
-            params["start_date"] = start_date
-            params["end_date"] = end_date
+        principal_collected_query = append_date_filters(
+            principal_collected_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+            date_column="tlh.due_date" if loan_type in ("extradana", "aku_cicil") else "l.proses_date",
+        )
 
-        result = db.execute(text(principal_collected_query), params)
+        result = db.execute(statement(principal_collected_query), params)
         record = result.fetchone()
 
         # Extract the value (handle None values)
@@ -5276,47 +4899,16 @@ def get_expected_repayment(db: Session,
             SELECT SUM(tlh.monthly) as total_expected_repayment
             FROM td_loan_history tlh
             LEFT JOIN td_loan l ON tlh.loan_form_id = l.id
-            LEFT JOIN td_karyawan tk ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {gmc_joins}
             WHERE tlh.due_date IS NOT NULL
             AND l.loan_status IN (1, 2, 4)
             AND {loan_conditions_tl}
-            """.format(loan_conditions_tl=loan_conditions_tl)
+            """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions_tl=loan_conditions_tl)
         else:
-            expected_repayment_query = """
+            expected_repayment_query = f"""
             SELECT SUM(l.total_payment) as total_expected_repayment
             FROM td_loan l
-            LEFT JOIN td_karyawan tk
-                ON l.id_karyawan = tk.id_karyawan
-            LEFT JOIN tbl_gmc emp
-                ON tk.valdo_inc = emp.kode_gmc
-                AND emp.group_gmc = 'sub_client'
-                AND emp.aktif = 'Yes'
-                AND emp.keterangan3 = 1
-            LEFT JOIN tbl_gmc src
-                ON tk.placement = src.kode_gmc
-                AND src.group_gmc = 'placement_client'
-                AND src.aktif = 'Yes'
-                AND src.keterangan3 = 1
-            LEFT JOIN tbl_gmc prj
-                ON tk.project = prj.kode_gmc
-                AND prj.group_gmc = 'client_project'
-                AND prj.aktif = 'Yes'
-                AND prj.keterangan3 = 1
+            {_LOAN_GMC_JOINS}
             WHERE l.loan_status IN (1, 2, 4)
             """
 
@@ -5366,7 +4958,7 @@ def get_expected_repayment(db: Session,
                 )
 
         # Execute the query
-        result = db.execute(text(expected_repayment_query), params)
+        result = db.execute(statement(expected_repayment_query), params)
         record = result.fetchone()
 
         # Extract the value (handle None values)
@@ -5403,8 +4995,8 @@ def get_repayment_risk_summary(db: Session,
       paid on/before the due date, otherwise their original due date. When start_date/
       end_date are given, these fields filter on that reporting date, not the raw due date.
       A row that crossed into Bad Debt Recovery (paid 3+ calendar months after its due month
-      — see _BAD_DEBT_LUMP_PREDICATE/_INSTALLMENT) is excluded from total_loan_principal_
-      collected/total_admin_fee_collected entirely (`AND NOT (bad_debt_predicate)`) — it
+      — see BAD_DEBT_LUMP_PREDICATE/_INSTALLMENT in reporting_dates.py) is excluded from
+      total_loan_principal_collected/total_admin_fee_collected entirely (`AND NOT (bad_debt_predicate)`) — it
       shows up only via /loan/bad-debt-recovery, dated to its payment month, never both.
       total_collected_repayment is simply total_loan_principal_collected +
       total_admin_fee_collected (per explicit user decision to match the Principal/Admin-Fee
@@ -5518,6 +5110,7 @@ def get_repayment_risk_summary(db: Session,
             else:
                 loan_conditions_tl = loan_conditions
 
+            basis = reporting_basis(db, installment=True, ranged=bool(start_date and end_date))
             risk_query = """
             SELECT
                 SUM(CASE WHEN tlh.status = 2 AND NOT ({bad_debt}) THEN ROUND(l.total_loan / l.duration, 0) ELSE 0 END) as total_loan_principal_collected,
@@ -5529,14 +5122,16 @@ def get_repayment_risk_summary(db: Session,
             FROM td_loan_history tlh
             INNER JOIN td_loan l ON tlh.loan_form_id = l.id
             {gmc_joins}
+            {reporting_join}
             WHERE tlh.due_date IS NOT NULL
             AND l.id_karyawan IS NOT NULL
             AND l.loan_status IN (1, 2, 4)
             AND {loan_conditions_tl}
             """.format(
                 gmc_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions_tl=loan_conditions_tl,
-                bad_debt=_BAD_DEBT_INSTALLMENT_PREDICATE,
+                bad_debt=basis.bad_debt,
             )
 
             params: dict = {}
@@ -5558,10 +5153,10 @@ def get_repayment_risk_summary(db: Session,
                     params,
                     start_date=start_date,
                     end_date=end_date,
-                    date_column=_REPORTING_DATE_INSTALLMENT,
+                    date_column=basis.reporting_date,
                 )
 
-            record = db.execute(text(risk_query), params).fetchone()
+            record = db.execute(statement(risk_query), params).fetchone()
             total_loan_principal_collected = record[0] if record and record[0] is not None else 0
             total_admin_fee_collected = record[1] if record and record[1] is not None else 0
             total_unrecovered_loan_principal = record[2] if record and record[2] is not None else 0
@@ -5570,6 +5165,7 @@ def get_repayment_risk_summary(db: Session,
             total_expected_admin_fee = record[5] if record and record[5] is not None else 0
         else:
             # kasbon / loan: single td_loan aggregate for principal/admin-fee collected.
+            basis = reporting_basis(db, installment=False, ranged=bool(start_date and end_date))
             risk_query = """
             SELECT
                 SUM(CASE WHEN l.loan_status = 2 AND NOT ({bad_debt}) THEN l.total_loan ELSE 0 END) as total_loan_principal_collected,
@@ -5580,12 +5176,14 @@ def get_repayment_risk_summary(db: Session,
                 SUM(l.admin_fee) as total_expected_admin_fee
             FROM td_loan l
             {gmc_joins}
+            {reporting_join}
             WHERE l.loan_status IN (1, 2, 4)
             AND {loan_conditions}
             """.format(
                 gmc_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions=loan_conditions,
-                bad_debt=_BAD_DEBT_LUMP_PREDICATE,
+                bad_debt=basis.bad_debt,
             )
 
             params: dict = {}
@@ -5607,10 +5205,10 @@ def get_repayment_risk_summary(db: Session,
                     params,
                     start_date=start_date,
                     end_date=end_date,
-                    date_column=_REPORTING_DATE_LUMP,
+                    date_column=basis.reporting_date,
                 )
 
-            record = db.execute(text(risk_query), params).fetchone()
+            record = db.execute(statement(risk_query), params).fetchone()
             total_loan_principal_collected = record[0] if record and record[0] is not None else 0
             total_admin_fee_collected = record[1] if record and record[1] is not None else 0
             total_unrecovered_loan_principal = record[2] if record and record[2] is not None else 0
@@ -5720,8 +5318,8 @@ def get_repayment_risk_monthly_summary(db: Session,
     total_collected_repayment/total_loan_principal_collected/total_admin_fee_collected
     (and the performance metrics derived from them) are bucketed by reporting month — the
     payment month if paid on/before its due date, otherwise its original due date (see
-    _REPORTING_DATE_LUMP/_INSTALLMENT) — and total_loan_principal_collected/total_admin_
-    fee_collected exclude rows that crossed into Bad Debt Recovery entirely (paid 3+
+    REPORTING_DATE_LUMP/_INSTALLMENT in reporting_dates.py) — and total_loan_principal_
+    collected/total_admin_fee_collected exclude rows that crossed into Bad Debt Recovery entirely (paid 3+
     calendar months late), which are reported only via /loan/bad-debt-recovery instead,
     never both; total_collected_repayment is simply their sum, so it inherits the same
     reporting-month bucketing and bad-debt exclusion (per explicit user decision — see
@@ -5801,16 +5399,11 @@ def get_repayment_risk_monthly_summary(db: Session,
                 end_date=end_date,
                 loan_type="all",
             )
-            all_months = (
-                set(merged.keys())
-                | set(expected_monthly.keys())
-                | set(unrecovered_monthly.keys())
-                | set(outstanding_monthly.keys())
-                | set(disbursed_monthly.keys())
-            )
-            for month_year in all_months:
-                bucket = merged.setdefault(month_year, {key: 0 for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS})
-                bucket["total_expected_repayment"] = expected_monthly.get(month_year, 0) or 0
+            for period in merged_periods(
+                merged, expected_monthly, unrecovered_monthly, outstanding_monthly, disbursed_monthly
+            ):
+                bucket = merged.setdefault(period, {key: 0 for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS})
+                bucket["total_expected_repayment"] = expected_monthly.get(period, 0) or 0
                 # total_collected_repayment = total_loan_principal_collected +
                 # total_admin_fee_collected, already summed across products in bucket by
                 # _merge_monthly_repayment_risk above — see get_repayment_risk_summary's
@@ -5818,10 +5411,10 @@ def get_repayment_risk_monthly_summary(db: Session,
                 bucket["total_collected_repayment"] = (
                     bucket["total_loan_principal_collected"] + bucket["total_admin_fee_collected"]
                 )
-                bucket["total_unrecovered_repayment"] = unrecovered_monthly.get(month_year, 0) or 0
-                bucket["total_outstanding_repayment"] = outstanding_monthly.get(month_year, 0) or 0
-                bucket.update(disbursed_monthly.get(month_year, {}))
-                merged[month_year] = _recalculate_repayment_risk_derivatives(bucket)
+                bucket["total_unrecovered_repayment"] = unrecovered_monthly.get(period, 0) or 0
+                bucket["total_outstanding_repayment"] = outstanding_monthly.get(period, 0) or 0
+                bucket.update(disbursed_monthly.get(period, {}))
+                merged[period] = _recalculate_repayment_risk_derivatives(bucket)
             return merged
 
         loan_conditions = resolve_loan_conditions(loan_type, db)
@@ -5841,11 +5434,11 @@ def get_repayment_risk_monthly_summary(db: Session,
             else:
                 loan_conditions_tl = loan_conditions
 
-            reporting_date = _REPORTING_DATE_INSTALLMENT
+            basis = reporting_basis(db, installment=True, ranged=bool(start_date and end_date))
 
             risk_query = """
             SELECT
-                DATE_FORMAT({reporting_date}, '%M %Y') as month_year,
+                YEAR({reporting_date}) * 100 + MONTH({reporting_date}) AS period,
                 SUM(CASE WHEN tlh.status = 2 AND NOT ({bad_debt}) THEN ROUND(l.total_loan / l.duration, 0) ELSE 0 END) as total_loan_principal_collected,
                 SUM(CASE WHEN tlh.status = 2 AND NOT ({bad_debt}) THEN ROUND(l.admin_fee / l.duration, 0) ELSE 0 END) as total_admin_fee_collected,
                 SUM(CASE WHEN tlh.status = 4 THEN ROUND(l.total_loan / l.duration, 0) ELSE 0 END) as total_unrecovered_loan_principal,
@@ -5855,21 +5448,23 @@ def get_repayment_risk_monthly_summary(db: Session,
             FROM td_loan_history tlh
             INNER JOIN td_loan l ON tlh.loan_form_id = l.id
             {gmc_joins}
+            {reporting_join}
             WHERE tlh.due_date IS NOT NULL
             AND l.loan_status IN (1, 2, 4)
             AND {loan_conditions_tl}
             """.format(
-                reporting_date=reporting_date,
+                reporting_date=basis.reporting_date,
                 gmc_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions_tl=loan_conditions_tl,
-                bad_debt=_BAD_DEBT_INSTALLMENT_PREDICATE,
+                bad_debt=basis.bad_debt,
             )
         else:
-            reporting_date = _REPORTING_DATE_LUMP
+            basis = reporting_basis(db, installment=False, ranged=bool(start_date and end_date))
 
             risk_query = """
             SELECT
-                DATE_FORMAT({reporting_date}, '%M %Y') as month_year,
+                YEAR({reporting_date}) * 100 + MONTH({reporting_date}) AS period,
                 SUM(CASE WHEN l.loan_status = 2 AND NOT ({bad_debt}) THEN l.total_loan ELSE 0 END) as total_loan_principal_collected,
                 SUM(CASE WHEN l.loan_status = 2 AND NOT ({bad_debt}) THEN l.admin_fee ELSE 0 END) as total_admin_fee_collected,
                 SUM(CASE WHEN l.loan_status = 4 THEN l.total_loan ELSE 0 END) as total_unrecovered_loan_principal,
@@ -5878,13 +5473,15 @@ def get_repayment_risk_monthly_summary(db: Session,
                 SUM(l.admin_fee) as total_expected_admin_fee
             FROM td_loan l
             {gmc_joins}
+            {reporting_join}
             WHERE l.loan_status IN (1, 2, 4)
             AND {loan_conditions}
             """.format(
-                reporting_date=reporting_date,
+                reporting_date=basis.reporting_date,
                 gmc_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions=loan_conditions,
-                bad_debt=_BAD_DEBT_LUMP_PREDICATE,
+                bad_debt=basis.bad_debt,
             )
 
         params: dict = {}
@@ -5906,16 +5503,15 @@ def get_repayment_risk_monthly_summary(db: Session,
                 params,
                 start_date=start_date,
                 end_date=end_date,
-                date_column=reporting_date,
+                date_column=basis.reporting_date,
             )
 
         risk_query += f"""
-        GROUP BY DATE_FORMAT({reporting_date}, '%M %Y')
-        ORDER BY MIN({reporting_date})
+        GROUP BY period
         """
 
         # Execute the query
-        result = db.execute(text(risk_query), params)
+        result = db.execute(statement(risk_query), params)
         records = result.fetchall()
 
         monthly_unrecovered = get_total_unrecovered_repayment_monthly(
@@ -5963,10 +5559,10 @@ def get_repayment_risk_monthly_summary(db: Session,
         # Principal/admin-fee collected/unrecovered, keyed by reporting month.
         principal_by_month = {}
         for record in records:
-            month_year = record[0]
-            if month_year is None:
+            period = record[0]
+            if period is None:
                 continue
-            principal_by_month[month_year] = {
+            principal_by_month[period] = {
                 "total_loan_principal_collected": record[1] if record[1] is not None else 0,
                 "total_admin_fee_collected": record[2] if record[2] is not None else 0,
                 "total_unrecovered_loan_principal": record[3] if record[3] is not None else 0,
@@ -5977,31 +5573,25 @@ def get_repayment_risk_monthly_summary(db: Session,
 
         # total_expected_repayment (expected_monthly, keyed by due month) and the
         # principal/admin-fee fields (principal_by_month, keyed by reporting month) can
-        # each produce month_year keys the other doesn't have, so union across both
-        # sources before building each month's bucket.
-        all_months = (
-            set(expected_monthly.keys())
-            | set(principal_by_month.keys())
-            | set(monthly_unrecovered.keys())
-            | set(monthly_outstanding.keys())
-            | set(disbursed_monthly.keys())
-        )
-
+        # each produce periods the other doesn't have, so union across both sources
+        # before building each month's bucket.
         monthly_data = {}
-        for month_year in all_months:
+        for period in merged_periods(
+            expected_monthly, principal_by_month, monthly_unrecovered, monthly_outstanding, disbursed_monthly
+        ):
             bucket = {key: 0 for key in _MONTHLY_REPAYMENT_RISK_SUM_KEYS}
-            bucket["total_expected_repayment"] = expected_monthly.get(month_year, 0) or 0
-            bucket.update(principal_by_month.get(month_year, {}))
+            bucket["total_expected_repayment"] = expected_monthly.get(period, 0) or 0
+            bucket.update(principal_by_month.get(period, {}))
             # total_collected_repayment = total_loan_principal_collected +
             # total_admin_fee_collected for this reporting month (see
             # get_repayment_risk_summary's docstring).
             bucket["total_collected_repayment"] = (
                 bucket["total_loan_principal_collected"] + bucket["total_admin_fee_collected"]
             )
-            bucket["total_unrecovered_repayment"] = monthly_unrecovered.get(month_year, 0) or 0
-            bucket["total_outstanding_repayment"] = monthly_outstanding.get(month_year, 0) or 0
-            bucket.update(disbursed_monthly.get(month_year, {}))
-            monthly_data[month_year] = _recalculate_repayment_risk_derivatives(bucket)
+            bucket["total_unrecovered_repayment"] = monthly_unrecovered.get(period, 0) or 0
+            bucket["total_outstanding_repayment"] = monthly_outstanding.get(period, 0) or 0
+            bucket.update(disbursed_monthly.get(period, {}))
+            monthly_data[period] = _recalculate_repayment_risk_derivatives(bucket)
 
         return monthly_data
 
@@ -6030,7 +5620,7 @@ def get_bad_debt_recovery_summary(db: Session,
     """Get bad debt recovery summary: loans/installments paid three calendar months or more
     after their due month (the M+3 rule; see _BAD_DEBT_*_PREDICATE). These same repayments
     are also reported in repayment-risk, attributed to their payment month rather than
-    their due month — see _REPORTING_DATE_LUMP/_INSTALLMENT.
+    their due month — see REPORTING_DATE_LUMP/_INSTALLMENT in reporting_dates.py.
 
     Also includes partial payments (td_loan_payment/td_loan_payment_allocation) against
     still-open (status=4) rows whose partial payment itself landed 3+ calendar months after
@@ -6072,6 +5662,7 @@ def get_bad_debt_recovery_summary(db: Session,
             else:
                 loan_conditions_tl = loan_conditions
 
+            basis = reporting_basis(db, installment=True, ranged=bool(start_date and end_date), bad_debt_only=True)
             query = """
             SELECT
                 SUM(ROUND(l.total_loan / l.duration, 0)) as total_principal_recovered,
@@ -6080,6 +5671,7 @@ def get_bad_debt_recovery_summary(db: Session,
             FROM td_loan_history tlh
             INNER JOIN td_loan l ON tlh.loan_form_id = l.id
             {karyawan_joins}
+            {reporting_join}
             WHERE tlh.due_date IS NOT NULL
             AND l.id_karyawan IS NOT NULL
             AND {loan_conditions_tl}
@@ -6087,14 +5679,16 @@ def get_bad_debt_recovery_summary(db: Session,
             AND {bad_debt_predicate}
             """.format(
                 karyawan_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions_tl=loan_conditions_tl,
-                bad_debt_predicate=_BAD_DEBT_INSTALLMENT_PREDICATE,
+                bad_debt_predicate=basis.bad_debt,
             )
-            date_column = "tlh.payment_date"
+            date_column = basis.recovered_date
             partial_base_sql = _installment_partial_recovery_sql(loan_conditions_tl)
             partial_reporting_date = _REPORTING_DATE_PARTIAL_INSTALLMENT
             partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_INSTALLMENT_PREDICATE
         else:
+            basis = reporting_basis(db, installment=False, ranged=bool(start_date and end_date), bad_debt_only=True)
             query = """
             SELECT
                 SUM(l.total_loan) as total_principal_recovered,
@@ -6102,15 +5696,17 @@ def get_bad_debt_recovery_summary(db: Session,
                 COUNT(DISTINCT l.id) as loan_request_count
             FROM td_loan l
             {karyawan_joins}
+            {reporting_join}
             WHERE {loan_conditions}
             AND l.loan_status = 2
             AND {bad_debt_predicate}
             """.format(
                 karyawan_joins=_LOAN_GMC_JOINS,
+                reporting_join=basis.join,
                 loan_conditions=loan_conditions,
-                bad_debt_predicate=_BAD_DEBT_LUMP_PREDICATE,
+                bad_debt_predicate=basis.bad_debt,
             )
-            date_column = "l.payment_date"
+            date_column = basis.recovered_date
             partial_base_sql = _lump_partial_recovery_sql(loan_conditions)
             partial_reporting_date = _REPORTING_DATE_PARTIAL_LUMP
             partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_LUMP_PREDICATE
@@ -6137,7 +5733,7 @@ def get_bad_debt_recovery_summary(db: Session,
                 date_column=date_column,
             )
 
-        record = db.execute(text(query), params).fetchone()
+        record = db.execute(statement(query), params).fetchone()
         total_principal_recovered = record[0] if record and record[0] is not None else 0
         total_admin_fee_recovered = record[1] if record and record[1] is not None else 0
         loan_request_count = record[2] if record and record[2] is not None else 0
@@ -6177,182 +5773,180 @@ def get_bad_debt_recovery_summary(db: Session,
         }
 
 
-def get_bad_debt_recovery_monthly_summary(db: Session,
-                                          employer_filter: str = None, sourced_to_filter: str = None,
-                                          project_filter: str = None, client_segment_filter: str = None, product_type_filter: str = None, loan_status_filter: int = None,
-                                          id_karyawan_filter: int = None, start_date: str = None,
-                                          end_date: str = None, loan_type: str = "loan") -> dict:
-    """Get bad debt recovery separated by month, bucketed by the month the late payment posted.
-    Matches the reporting month repayment-risk-monthly attributes the same repayment to."""
-
-    try:
-        if is_all_loan_types(loan_type):
-            monthly_dicts = [
-                get_bad_debt_recovery_monthly_summary(
-                    db,
-                    employer_filter=employer_filter,
-                    sourced_to_filter=sourced_to_filter,
-                    project_filter=project_filter,
-                    client_segment_filter=client_segment_filter,
-                    product_type_filter=product_type_filter,
-                    loan_status_filter=loan_status_filter,
-                    id_karyawan_filter=id_karyawan_filter,
-                    start_date=start_date,
-                    end_date=end_date,
-                    loan_type=product_type,
-                )
-                for product_type in ALL_LOAN_TYPES
-            ]
-            merged: dict = {}
-            for monthly in monthly_dicts:
-                for month_year, metrics in monthly.items():
-                    bucket = merged.setdefault(month_year, {
-                        "total_principal_recovered": 0,
-                        "total_admin_fee_recovered": 0,
-                        "loan_request_count": 0,
-                    })
-                    bucket["total_principal_recovered"] += metrics["total_principal_recovered"]
-                    bucket["total_admin_fee_recovered"] += metrics["total_admin_fee_recovered"]
-                    bucket["loan_request_count"] += metrics["loan_request_count"]
-            return {
-                month_year: _finalize_bad_debt_recovery(
-                    metrics["total_principal_recovered"],
-                    metrics["total_admin_fee_recovered"],
-                    metrics["loan_request_count"],
-                )
-                for month_year, metrics in merged.items()
-            }
+def _bad_debt_recovery_monthly_branches(db: Session, params: dict, product: str,
+                                        employer_filter: str = None, sourced_to_filter: str = None,
+                                        project_filter: str = None, client_segment_filter: str = None,
+                                        product_type_filter: str = None, loan_status_filter: int = None,
+                                        id_karyawan_filter: int = None, start_date: str = None,
+                                        end_date: str = None) -> Tuple[str, str]:
+    """(row-level, partial-payment) SELECTs for one product, each yielding (period,
+    product, principal, admin_fee, request_count) rows grouped by the month the late
+    payment posted. Every branch binds the same parameters (same filters), so any number
+    of them can be UNION ALL-ed into a single statement."""
+    loan_conditions = resolve_loan_conditions(product, db)
+    # The label is spliced into the SQL; loan_type comes from the query string and any
+    # unrecognised value already resolves to the plain loan conditions.
+    label = product if product in ALL_LOAN_TYPES + ("loan", "installment") else "loan"
+
+    if product in ("extradana", "aku_cicil"):
+        if product == "extradana":
+            loan_conditions_tl = (
+                "l.loan_id IN (SELECT ls.id FROM loan_setting ls WHERE ls.loan_type LIKE 'Extradana%')"
+            )
+        else:
+            loan_conditions_tl = loan_conditions
 
-        loan_conditions = resolve_loan_conditions(loan_type, db)
-        params = {}
+        basis = reporting_basis(db, installment=True, ranged=bool(start_date and end_date), bad_debt_only=True)
+        query = """
+        SELECT
+            YEAR({recovered_date}) * 100 + MONTH({recovered_date}) AS period,
+            '{product}' AS product,
+            SUM(ROUND(l.total_loan / l.duration, 0)) as total_principal_recovered,
+            SUM(ROUND(l.admin_fee / l.duration, 0)) as total_admin_fee_recovered,
+            COUNT(DISTINCT l.id) as loan_request_count
+        FROM td_loan_history tlh
+        INNER JOIN td_loan l ON tlh.loan_form_id = l.id
+        {karyawan_joins}
+        {reporting_join}
+        WHERE tlh.due_date IS NOT NULL
+        AND l.id_karyawan IS NOT NULL
+        AND {loan_conditions_tl}
+        AND tlh.status = 2
+        AND {bad_debt_predicate}
+        """.format(
+            recovered_date=basis.recovered_date,
+            product=label,
+            karyawan_joins=_LOAN_GMC_JOINS,
+            reporting_join=basis.join,
+            loan_conditions_tl=loan_conditions_tl,
+            bad_debt_predicate=basis.bad_debt,
+        )
+        partial_base_sql = _installment_partial_recovery_sql(loan_conditions_tl)
+        partial_reporting_date = _REPORTING_DATE_PARTIAL_INSTALLMENT
+        partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_INSTALLMENT_PREDICATE
+    else:
+        basis = reporting_basis(db, installment=False, ranged=bool(start_date and end_date), bad_debt_only=True)
+        query = """
+        SELECT
+            YEAR({recovered_date}) * 100 + MONTH({recovered_date}) AS period,
+            '{product}' AS product,
+            SUM(l.total_loan) as total_principal_recovered,
+            SUM(l.admin_fee) as total_admin_fee_recovered,
+            COUNT(DISTINCT l.id) as loan_request_count
+        FROM td_loan l
+        {karyawan_joins}
+        {reporting_join}
+        WHERE {loan_conditions}
+        AND l.loan_status = 2
+        AND {bad_debt_predicate}
+        """.format(
+            recovered_date=basis.recovered_date,
+            product=label,
+            karyawan_joins=_LOAN_GMC_JOINS,
+            reporting_join=basis.join,
+            loan_conditions=loan_conditions,
+            bad_debt_predicate=basis.bad_debt,
+        )
+        partial_base_sql = _lump_partial_recovery_sql(loan_conditions)
+        partial_reporting_date = _REPORTING_DATE_PARTIAL_LUMP
+        partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_LUMP_PREDICATE
 
-        if loan_type in ("extradana", "aku_cicil"):
-            if loan_type == "extradana":
-                loan_conditions_tl = (
-                    "l.loan_id IN (SELECT ls.id FROM loan_setting ls WHERE ls.loan_type LIKE 'Extradana%')"
-                )
-            else:
-                loan_conditions_tl = loan_conditions
-
-            query = """
-            SELECT
-                DATE_FORMAT(tlh.payment_date, '%M %Y') as month_year,
-                SUM(ROUND(l.total_loan / l.duration, 0)) as total_principal_recovered,
-                SUM(ROUND(l.admin_fee / l.duration, 0)) as total_admin_fee_recovered,
-                COUNT(DISTINCT l.id) as loan_request_count
-            FROM td_loan_history tlh
-            INNER JOIN td_loan l ON tlh.loan_form_id = l.id
-            {karyawan_joins}
-            WHERE tlh.due_date IS NOT NULL
-            AND l.id_karyawan IS NOT NULL
-            AND {loan_conditions_tl}
-            AND tlh.status = 2
-            AND {bad_debt_predicate}
-            """.format(
-                karyawan_joins=_LOAN_GMC_JOINS,
-                loan_conditions_tl=loan_conditions_tl,
-                bad_debt_predicate=_BAD_DEBT_INSTALLMENT_PREDICATE,
-            )
-            date_column = "tlh.payment_date"
-            partial_base_sql = _installment_partial_recovery_sql(loan_conditions_tl)
-            partial_reporting_date = _REPORTING_DATE_PARTIAL_INSTALLMENT
-            partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_INSTALLMENT_PREDICATE
-        else:
-            query = """
-            SELECT
-                DATE_FORMAT(l.payment_date, '%M %Y') as month_year,
-                SUM(l.total_loan) as total_principal_recovered,
-                SUM(l.admin_fee) as total_admin_fee_recovered,
-                COUNT(DISTINCT l.id) as loan_request_count
-            FROM td_loan l
-            {karyawan_joins}
-            WHERE {loan_conditions}
-            AND l.loan_status = 2
-            AND {bad_debt_predicate}
-            """.format(
-                karyawan_joins=_LOAN_GMC_JOINS,
-                loan_conditions=loan_conditions,
-                bad_debt_predicate=_BAD_DEBT_LUMP_PREDICATE,
-            )
-            date_column = "l.payment_date"
-            partial_base_sql = _lump_partial_recovery_sql(loan_conditions)
-            partial_reporting_date = _REPORTING_DATE_PARTIAL_LUMP
-            partial_bad_debt_predicate = _BAD_DEBT_PARTIAL_LUMP_PREDICATE
+    query = _append_loan_org_filters(
+        query,
+        params,
+        id_karyawan_filter=id_karyawan_filter,
+        employer_filter=employer_filter,
+        sourced_to_filter=sourced_to_filter,
+        project_filter=project_filter,
+        client_segment_filter=client_segment_filter,
+        product_type_filter=product_type_filter,
+        loan_status_filter=loan_status_filter,
+        db=db,
+    )
 
-        query = _append_loan_org_filters(
+    if start_date and end_date:
+        query = append_date_filters(
             query,
             params,
-            id_karyawan_filter=id_karyawan_filter,
-            employer_filter=employer_filter,
-            sourced_to_filter=sourced_to_filter,
-            project_filter=project_filter,
-            client_segment_filter=client_segment_filter,
-            product_type_filter=product_type_filter,
-            loan_status_filter=loan_status_filter,
-            db=db,
+            start_date=start_date,
+            end_date=end_date,
+            date_column=basis.recovered_date,
         )
 
-        if start_date and end_date:
-            query = append_date_filters(
-                query,
-                params,
-                start_date=start_date,
-                end_date=end_date,
-                date_column=date_column,
-            )
+    partial_query = _partial_recovery_monthly_sql(
+        db,
+        partial_base_sql,
+        params,
+        label,
+        reporting_date_expr=partial_reporting_date,
+        bad_debt_predicate=partial_bad_debt_predicate,
+        bad_debt_filter=True,
+        employer_filter=employer_filter,
+        sourced_to_filter=sourced_to_filter,
+        project_filter=project_filter,
+        client_segment_filter=client_segment_filter,
+        product_type_filter=product_type_filter,
+        loan_status_filter=loan_status_filter,
+        id_karyawan_filter=id_karyawan_filter,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return query + "\n        GROUP BY period\n", partial_query
 
-        query += f" GROUP BY DATE_FORMAT({date_column}, '%M %Y') ORDER BY MIN({date_column})"
 
-        records = db.execute(text(query), params).fetchall()
+def _accumulate_bad_debt_recovery(rows) -> dict:
+    """Sum (period, product, principal, admin_fee, request_count) rows into one
+    _finalize_bad_debt_recovery bucket per period, in a single pass."""
+    totals: dict = {}
+    for period, _product, principal, admin_fee, request_count in rows:
+        if period is None:
+            continue
+        bucket = totals.get(period)
+        if bucket is None:
+            bucket = totals[period] = [0, 0, 0]
+        bucket[0] += principal or 0
+        bucket[1] += admin_fee or 0
+        bucket[2] += request_count or 0
+    return {
+        period: _finalize_bad_debt_recovery(principal, admin_fee, request_count)
+        for period, (principal, admin_fee, request_count) in totals.items()
+    }
 
-        monthly_data = {}
-        for record in records:
-            month_year = record[0]
-            if month_year is None:
-                continue
-            total_principal_recovered = record[1] if record[1] is not None else 0
-            total_admin_fee_recovered = record[2] if record[2] is not None else 0
-            loan_request_count = record[3] if record[3] is not None else 0
-            monthly_data[month_year] = {
-                "total_principal_recovered": total_principal_recovered,
-                "total_admin_fee_recovered": total_admin_fee_recovered,
-                "loan_request_count": loan_request_count,
-            }
 
-        partial_monthly = _partial_recovery_monthly(
-            db,
-            partial_base_sql,
-            reporting_date_expr=partial_reporting_date,
-            bad_debt_predicate=partial_bad_debt_predicate,
-            bad_debt_filter=True,
-            employer_filter=employer_filter,
-            sourced_to_filter=sourced_to_filter,
-            project_filter=project_filter,
-            client_segment_filter=client_segment_filter,
-            product_type_filter=product_type_filter,
-            loan_status_filter=loan_status_filter,
-            id_karyawan_filter=id_karyawan_filter,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        for month_year, (partial_principal, partial_fee, partial_row_count) in partial_monthly.items():
-            bucket = monthly_data.setdefault(month_year, {
-                "total_principal_recovered": 0,
-                "total_admin_fee_recovered": 0,
-                "loan_request_count": 0,
-            })
-            bucket["total_principal_recovered"] += partial_principal
-            bucket["total_admin_fee_recovered"] += partial_fee
-            bucket["loan_request_count"] += partial_row_count
+def get_bad_debt_recovery_monthly_summary(db: Session,
+                                          employer_filter: str = None, sourced_to_filter: str = None,
+                                          project_filter: str = None, client_segment_filter: str = None, product_type_filter: str = None, loan_status_filter: int = None,
+                                          id_karyawan_filter: int = None, start_date: str = None,
+                                          end_date: str = None, loan_type: str = "loan") -> dict:
+    """Get bad debt recovery separated by month, bucketed by the month the late payment posted.
+    Matches the reporting month repayment-risk-monthly attributes the same repayment to.
 
-        return {
-            month_year: _finalize_bad_debt_recovery(
-                metrics["total_principal_recovered"],
-                metrics["total_admin_fee_recovered"],
-                metrics["loan_request_count"],
+    loan_type=all runs every product's row-level and partial-payment recoveries as one
+    UNION ALL statement rather than one pair of scans per product."""
+
+    try:
+        products = ALL_LOAN_TYPES if is_all_loan_types(loan_type) else (loan_type,)
+        params: dict = {}
+        branches = [
+            branch
+            for product in products
+            for branch in _bad_debt_recovery_monthly_branches(
+                db,
+                params,
+                product,
+                employer_filter=employer_filter,
+                sourced_to_filter=sourced_to_filter,
+                project_filter=project_filter,
+                client_segment_filter=client_segment_filter,
+                product_type_filter=product_type_filter,
+                loan_status_filter=loan_status_filter,
+                id_karyawan_filter=id_karyawan_filter,
+                start_date=start_date,
+                end_date=end_date,
             )
-            for month_year, metrics in monthly_data.items()
-        }
+        ]
+        query = "    UNION ALL".join(branches)
+        return _accumulate_bad_debt_recovery(db.execute(statement(query), params).fetchall())
 
     except Exception as e:
         import traceback
@@ -6382,26 +5976,10 @@ def get_disbursed_amount(db: Session,
         disbursed_query = """
         SELECT SUM(l.total_loan)
         FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
+        {gmc_joins}
         WHERE l.loan_status IN (1, 2, 4)
         AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
+        """.format(gmc_joins=_LOAN_GMC_JOINS, loan_conditions=loan_conditions)
 
         # Build parameters dict for filters
         params = {}
@@ -6435,15 +6013,16 @@ def get_disbursed_amount(db: Session,
             disbursed_query += " AND l.loan_status = :loan_status"
             params['loan_status'] = loan_status_filter
 
-        # Apply date range filters using proper month boundaries
-        if start_date and end_date:
-            disbursed_query += " AND l.proses_date >= :start_date AND l.proses_date < :end_date"
-            params['start_date'] = start_date
-            params['end_date'] = end_date
+        disbursed_query = append_date_filters(
+            disbursed_query,
+            params,
+            start_date=start_date,
+            end_date=end_date,
+        )
 
 
         # Execute query
-        result = db.execute(text(disbursed_query), params)
+        result = db.execute(statement(disbursed_query), params)
         total_disbursed_amount = result.fetchone()[0] or 0
 
 
@@ -6506,33 +6085,32 @@ def get_coverage_utilization_summary(db: Session,
 
         # Loan requests by received_date; approved/rejected/disbursed by proses_date.
         if start_date and end_date:
-            params["start_date"] = start_of_day(start_date)
-            params["end_date"] = end_of_day(end_date)
+            bind_date_range(params, start_date, end_date)
             loan_metrics_query = f"""
             SELECT
                 COUNT(CASE
-                    WHEN l.received_date >= :start_date
-                     AND l.received_date <= :end_date
+                    WHEN l.received_date >= :range_start
+                     AND l.received_date < :range_end
                     THEN 1 END) AS total_loan_requests,
                 COUNT(CASE
                     WHEN l.loan_status IN (1, 2, 4)
-                     AND l.proses_date >= :start_date
-                     AND l.proses_date <= :end_date
+                     AND l.proses_date >= :range_start
+                     AND l.proses_date < :range_end
                     THEN 1 END) AS total_approved_requests,
                 COUNT(CASE
                     WHEN l.loan_status = 3
-                     AND l.proses_date >= :start_date
-                     AND l.proses_date <= :end_date
+                     AND l.proses_date >= :range_start
+                     AND l.proses_date < :range_end
                     THEN 1 END) AS total_rejected_requests,
                 COALESCE(SUM(CASE
                     WHEN l.loan_status IN (1, 2, 4)
-                     AND l.proses_date >= :start_date
-                     AND l.proses_date <= :end_date
+                     AND l.proses_date >= :range_start
+                     AND l.proses_date < :range_end
                     THEN l.total_loan ELSE 0 END), 0) AS total_disbursed_amount,
                 AVG(CASE
                     WHEN l.loan_status IN (1, 2, 4)
-                     AND l.proses_date >= :start_date
-                     AND l.proses_date <= :end_date
+                     AND l.proses_date >= :range_start
+                     AND l.proses_date < :range_end
                      AND l.received_date IS NOT NULL
                      AND l.proses_date > l.received_date
                      AND l.received_date >= '1900-01-01'
@@ -6541,8 +6119,8 @@ def get_coverage_utilization_summary(db: Session,
             FROM td_loan l
             {_LOAN_GMC_JOINS}
             WHERE (
-                (l.received_date >= :start_date AND l.received_date <= :end_date)
-                OR (l.proses_date >= :start_date AND l.proses_date <= :end_date)
+                (l.received_date >= :range_start AND l.received_date < :range_end)
+                OR (l.proses_date >= :range_start AND l.proses_date < :range_end)
             )
             AND {loan_conditions}
             """
@@ -6616,7 +6194,7 @@ def get_coverage_utilization_summary(db: Session,
 
         eligible_rate = (total_eligible_employees / total_active_employees) if total_active_employees > 0 else 0.0
 
-        metrics_row = db.execute(text(loan_metrics_query), params).fetchone()
+        metrics_row = db.execute(statement(loan_metrics_query), params).fetchone()
         total_approved_requests = metrics_row[1] or 0
         total_rejected_requests = metrics_row[2] or 0
         # Total requests = approved + rejected, so it stays consistent with
@@ -6626,7 +6204,7 @@ def get_coverage_utilization_summary(db: Session,
         average_approval_time = metrics_row[4] if metrics_row[4] is not None else 0
         disbursed_loans_count = total_approved_requests
 
-        first_borrow_record = db.execute(text(first_borrow_query), params).fetchone()
+        first_borrow_record = db.execute(statement(first_borrow_query), params).fetchone()
         total_new_borrowers = first_borrow_record[0] if first_borrow_record and first_borrow_record[0] is not None else 0
 
         average_disbursed_amount = 0
@@ -6692,242 +6270,13 @@ def get_coverage_utilization_monthly_summary(db: Session,
     try:
         loan_conditions = resolve_loan_conditions(loan_type, db)
 
-        # Build the eligible count query (exactly as in get_user_coverage_summary)
-        eligible_count_query = """
-        SELECT COUNT(*)
-        FROM td_karyawan tk
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE tk.status = '1'
-        AND tk.loan_kasbon_eligible = '1'
-        """
-
-        # Build the processed loan requests query (exactly as in get_user_coverage_summary)
-        processed_requests_query = """
-        SELECT COUNT(*)
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE l.loan_status IN (1, 2, 3, 4)
-        AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
-
-        # Build the approved requests query (exactly as in get_user_coverage_summary)
-        approved_requests_query = """
-        SELECT COUNT(*)
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE l.loan_status IN (1, 2, 4)
-        AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
-
-        # Build the rejected requests query (exactly as in get_user_coverage_summary)
-        rejected_requests_query = """
-        SELECT COUNT(*)
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE l.loan_status = 3
-        AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
-
-        # Build the total disbursed amount query (exactly as in get_user_coverage_summary)
-        total_disbursed_amount_query = """
-        SELECT SUM(l.total_loan)
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE l.loan_status IN (1, 2, 4)
-        AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
-
-        # Build the first-time borrowers query (exactly as in get_user_coverage_summary)
-        first_borrow_query = """
-        SELECT COUNT(DISTINCT l.id_karyawan)
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE l.loan_status IN (0, 1, 2, 3)
-        AND NOT EXISTS (
-            SELECT 1
-            FROM td_loan l2
-            WHERE l2.id_karyawan = l.id_karyawan
-            AND l2.loan_status = 2
-            AND l2.proses_date < l.proses_date
-            AND {loan_conditions}
-        )
-        AND {loan_conditions}
-        """.format(loan_conditions=loan_conditions)
-
-        # Build parameters dict for filters
         params = {}
-
-        # Add filters to all queries (exactly as in get_user_coverage_summary)
-        if id_karyawan_filter:
-            eligible_count_query += " AND tk.id_karyawan = :id_karyawan"
-            processed_requests_query += " AND l.id_karyawan = :id_karyawan"
-            approved_requests_query += " AND l.id_karyawan = :id_karyawan"
-            rejected_requests_query += " AND l.id_karyawan = :id_karyawan"
-            total_disbursed_amount_query += " AND l.id_karyawan = :id_karyawan"
-            first_borrow_query += " AND l.id_karyawan = :id_karyawan"
-            params['id_karyawan'] = id_karyawan_filter
-
-        # Restrict to allowed Valdo companies
         company_filter = COMPANY_FILTER
 
-        eligible_count_query += f" AND emp.keterangan IN {company_filter}"
-        processed_requests_query += f" AND emp.keterangan IN {company_filter}"
-        approved_requests_query += f" AND emp.keterangan IN {company_filter}"
-        rejected_requests_query += f" AND emp.keterangan IN {company_filter}"
-        total_disbursed_amount_query += f" AND emp.keterangan IN {company_filter}"
-        first_borrow_query += f" AND emp.keterangan IN {company_filter}"
-
-        # If employer_filter is provided and it's one of the allowed companies, filter further
-        if employer_filter and employer_filter in ALLOWED_COMPANIES:
-            eligible_count_query += " AND emp.keterangan = :employer"
-            processed_requests_query += " AND emp.keterangan = :employer"
-            approved_requests_query += " AND emp.keterangan = :employer"
-            rejected_requests_query += " AND emp.keterangan = :employer"
-            total_disbursed_amount_query += " AND emp.keterangan = :employer"
-            first_borrow_query += " AND emp.keterangan = :employer"
-            params['employer'] = employer_filter
-
-        if sourced_to_filter:
-            eligible_count_query += " AND src.keterangan = :sourced_to"
-            processed_requests_query += " AND src.keterangan = :sourced_to"
-            approved_requests_query += " AND src.keterangan = :sourced_to"
-            rejected_requests_query += " AND src.keterangan = :sourced_to"
-            total_disbursed_amount_query += " AND src.keterangan = :sourced_to"
-            first_borrow_query += " AND src.keterangan = :sourced_to"
-            params['sourced_to'] = sourced_to_filter
-
-        if project_filter:
-            eligible_count_query += " AND prj.keterangan = :project"
-            processed_requests_query += " AND prj.keterangan = :project"
-            approved_requests_query += " AND prj.keterangan = :project"
-            rejected_requests_query += " AND prj.keterangan = :project"
-            total_disbursed_amount_query += " AND prj.keterangan = :project"
-            first_borrow_query += " AND prj.keterangan = :project"
-            params['project'] = project_filter
-
-        if loan_status_filter is not None:
-            processed_requests_query += " AND l.loan_status = :loan_status"
-            approved_requests_query += " AND l.loan_status = :loan_status"
-            rejected_requests_query += " AND l.loan_status = :loan_status"
-            total_disbursed_amount_query += " AND l.loan_status = :loan_status"
-            first_borrow_query += " AND l.loan_status = :loan_status"
-            params['loan_status'] = loan_status_filter
-
-        # Add date range filters based on proses_date
-        if start_date:
-            processed_requests_query += " AND l.proses_date >= :start_date"
-            approved_requests_query += " AND l.proses_date >= :start_date"
-            rejected_requests_query += " AND l.proses_date >= :start_date"
-            total_disbursed_amount_query += " AND l.proses_date >= :start_date"
-            first_borrow_query += " AND l.proses_date >= :start_date"
-            params['start_date'] = start_date
-
-        if end_date:
-            processed_requests_query += " AND l.proses_date <= :end_date"
-            approved_requests_query += " AND l.proses_date <= :end_date"
-            rejected_requests_query += " AND l.proses_date <= :end_date"
-            total_disbursed_amount_query += " AND l.proses_date <= :end_date"
-            first_borrow_query += " AND l.proses_date <= :end_date"
-            params['end_date'] = end_date
-
         # Monthly loan metrics: requests by received_date; approved/rejected/disbursed by proses_date.
         monthly_requests_query = f"""
         SELECT
-            DATE_FORMAT(l.received_date, '%M %Y') as month_year,
+            YEAR(l.received_date) * 100 + MONTH(l.received_date) AS period,
             COUNT(*) as total_loan_requests
         FROM td_loan l
         {_LOAN_GMC_JOINS}
@@ -6936,7 +6285,7 @@ def get_coverage_utilization_monthly_summary(db: Session,
 
         monthly_proses_query = f"""
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) as total_approved_requests,
             COUNT(CASE WHEN l.loan_status = 3 THEN 1 END) as total_rejected_requests,
             COALESCE(SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END), 0) as total_disbursed_amount
@@ -6947,7 +6296,7 @@ def get_coverage_utilization_monthly_summary(db: Session,
 
         monthly_first_borrow_query = f"""
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') as month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             COUNT(DISTINCT l.id_karyawan) as total_first_borrow
         FROM td_loan l
         {_LOAN_GMC_JOINS}
@@ -7024,13 +6373,13 @@ def get_coverage_utilization_monthly_summary(db: Session,
                 date_column="l.proses_date",
             )
 
-        monthly_requests_query += " GROUP BY DATE_FORMAT(l.received_date, '%M %Y') ORDER BY MIN(l.received_date)"
-        monthly_proses_query += " GROUP BY DATE_FORMAT(l.proses_date, '%M %Y') ORDER BY MIN(l.proses_date)"
-        monthly_first_borrow_query += " GROUP BY DATE_FORMAT(l.proses_date, '%M %Y') ORDER BY MIN(l.proses_date)"
+        monthly_requests_query += " GROUP BY period"
+        monthly_proses_query += " GROUP BY period"
+        monthly_first_borrow_query += " GROUP BY period"
 
-        monthly_requests_result = db.execute(text(monthly_requests_query), params)
-        monthly_proses_result = db.execute(text(monthly_proses_query), params)
-        monthly_first_borrow_result = db.execute(text(monthly_first_borrow_query), params)
+        monthly_requests_result = db.execute(statement(monthly_requests_query), params)
+        monthly_proses_result = db.execute(statement(monthly_proses_query), params)
+        monthly_first_borrow_result = db.execute(statement(monthly_first_borrow_query), params)
 
         monthly_processed_data = {
             row[0]: row[1] for row in monthly_requests_result.fetchall() if row[0] is not None
@@ -7050,15 +6399,18 @@ def get_coverage_utilization_monthly_summary(db: Session,
 
         # Combine all monthly data
         monthly_data = {}
-        all_months = set(monthly_processed_data.keys()) | set(monthly_approved_data.keys()) | set(monthly_rejected_data.keys()) | set(monthly_disbursed_data.keys()) | set(monthly_first_borrow_data.keys())
-
-        # Batched so the (date-independent) live fallback runs at most once per
-        # request instead of once per month lacking snapshot data — see
-        # get_monthly_eligible_employees_for_loan_type.
-        month_ranges = {
-            month_year: (_month_year_date_range(month_year) or (start_date, end_date))
-            for month_year in all_months
-        }
+        all_periods = merged_periods(
+            monthly_processed_data,
+            monthly_approved_data,
+            monthly_rejected_data,
+            monthly_disbursed_data,
+            monthly_first_borrow_data,
+        )
+
+        # Batched: eligible and coverage counts each come from one month-grouped
+        # snapshot scan, and the (date-independent) live fallback runs at most
+        # once per request — see get_monthly_eligible_employees_for_loan_type.
+        month_ranges = {period: period_bounds(period) for period in all_periods}
         eligible_by_month = get_monthly_eligible_employees_for_loan_type(
             db,
             loan_type,
@@ -7069,27 +6421,26 @@ def get_coverage_utilization_monthly_summary(db: Session,
             client_segment_filter=client_segment_filter,
             product_type_filter=product_type_filter,
         )
+        coverage_project_by_month = get_monthly_total_coverage_project(
+            db,
+            month_ranges,
+            employer_filter=employer_filter,
+            sourced_to_filter=sourced_to_filter,
+            project_filter=project_filter,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
+        )
 
-        for month_year in all_months:
-            total_approved_requests = monthly_approved_data.get(month_year, 0) or 0
-            total_rejected_requests = monthly_rejected_data.get(month_year, 0) or 0
+        for period in all_periods:
+            total_approved_requests = monthly_approved_data.get(period, 0) or 0
+            total_rejected_requests = monthly_rejected_data.get(period, 0) or 0
             # Total requests = approved + rejected, so it stays consistent with
             # the approved/rejected breakdown shown directly below it in the UI.
             total_loan_requests = total_approved_requests + total_rejected_requests
-            total_disbursed_amount = monthly_disbursed_data.get(month_year, 0) or 0
-            total_first_borrow = monthly_first_borrow_data.get(month_year, 0) or 0
-            range_start, range_end = month_ranges[month_year]
-            total_eligible_employees = eligible_by_month.get(month_year, 0)
-            total_coverage_project = get_total_coverage_project(
-                db,
-                start_date=range_start,
-                end_date=range_end,
-                employer_filter=employer_filter,
-                sourced_to_filter=sourced_to_filter,
-                project_filter=project_filter,
-                client_segment_filter=client_segment_filter,
-                product_type_filter=product_type_filter,
-            )
+            total_disbursed_amount = monthly_disbursed_data.get(period, 0) or 0
+            total_first_borrow = monthly_first_borrow_data.get(period, 0) or 0
+            total_eligible_employees = eligible_by_month.get(period, 0)
+            total_coverage_project = coverage_project_by_month.get(period, 0)
             # Matches get_coverage_utilization_summary: penetration is approved
             # requests over eligible employees, not total (approved+rejected) requests.
             penetration_rate = 0
@@ -7103,7 +6454,7 @@ def get_coverage_utilization_monthly_summary(db: Session,
                 approval_rate = total_approved_requests / total_processed_requests
                 rejected_rate = total_rejected_requests / total_processed_requests
 
-            monthly_data[month_year] = {
+            monthly_data[period] = {
                 "total_first_borrow": total_first_borrow,
                 "total_loan_requests": total_loan_requests,
                 "total_approved_requests": total_approved_requests,
@@ -7121,17 +6472,7 @@ def get_coverage_utilization_monthly_summary(db: Session,
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return {
-            "total_eligible_employees": 0,
-            "total_coverage_project": 0,
-            "total_loan_requests": 0,
-            "penetration_rate": 0,
-            "total_approved_requests": 0,
-            "total_rejected_requests": 0,
-            "approval_rate": 0,
-            "total_new_borrowers": 0,
-            "total_disbursed_amount": 0
-        }
+        return {}
 
 
 def get_disbursement_expected_return_summary(db: Session,
@@ -7178,7 +6519,7 @@ def get_disbursement_expected_return_summary(db: Session,
             db=db,
         )
 
-        row = db.execute(text(query), params).fetchone()
+        row = db.execute(statement(query), params).fetchone()
         disbursed_loans_count = row[0] or 0
         total_disbursed_amount = row[1] or 0
         total_expected_admin_fee = row[2] or 0
@@ -7223,7 +6564,7 @@ def get_disbursement_expected_return_monthly_summary(db: Session,
 
         query = f"""
         SELECT
-            DATE_FORMAT(l.proses_date, '%M %Y') AS month_year,
+            YEAR(l.proses_date) * 100 + MONTH(l.proses_date) AS period,
             COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) AS disbursed_loans_count,
             COALESCE(SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END), 0) AS total_disbursed_amount,
             COALESCE(SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.admin_fee ELSE 0 END), 0) AS total_expected_admin_fee
@@ -7249,14 +6590,14 @@ def get_disbursement_expected_return_monthly_summary(db: Session,
 
         query = append_date_filters(query, params, start_date=start_date, end_date=end_date)
 
-        query += " GROUP BY DATE_FORMAT(l.proses_date, '%M %Y') ORDER BY MIN(l.proses_date)"
+        query += " GROUP BY period"
 
-        rows = db.execute(text(query), params).fetchall()
+        rows = db.execute(statement(query), params).fetchall()
 
         monthly_data = {}
         for row in rows:
-            month_year = row[0]
-            if month_year is None:
+            period = row[0]
+            if period is None:
                 continue
             disbursed_loans_count = row[1] or 0
             total_disbursed_amount = row[2] or 0
@@ -7267,7 +6608,7 @@ def get_disbursement_expected_return_monthly_summary(db: Session,
             if total_disbursed_amount > 0:
                 expected_return_rate = total_expected_return / total_disbursed_amount
 
-            monthly_data[month_year] = {
+            monthly_data[period] = {
                 "disbursed_loans_count": disbursed_loans_count,
                 "total_disbursed_amount": total_disbursed_amount,
                 "total_expected_admin_fee": total_expected_admin_fee,
@@ -7283,328 +6624,243 @@ def get_disbursement_expected_return_monthly_summary(db: Session,
         return {}
 
 
-def _apply_installment_delinquency_override(
+def _installment_paid_join(due_date_filter: str) -> Join:
+    """Installment payments already credited per (loan, installment) via td_loan_payment /
+    td_loan_payment_allocation, pre-aggregated once instead of a correlated subquery per
+    td_loan_history row. Same netting as _UNRECOVERED_INSTALLMENT_PAYMENT. Only payments
+    for installments h passing `due_date_filter` are aggregated, so the derived table
+    stays as small as the installments the outer query reads."""
+    return Join(
+        "paid",
+        f"""LEFT JOIN (
+        SELECT credited.loan_id, credited.loan_history_id, SUM(credited.amount) AS amount
+        FROM (
+            SELECT p.loan_id, p.loan_history_id, p.amount
+            FROM td_loan_history h
+            INNER JOIN td_loan_payment p ON p.loan_history_id = h.id AND p.status = 1
+            WHERE {due_date_filter}
+              AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
+            UNION ALL
+            SELECT p.loan_id, a.loan_history_id, a.amount
+            FROM td_loan_history h
+            INNER JOIN td_loan_payment_allocation a ON a.loan_history_id = h.id
+            INNER JOIN td_loan_payment p ON p.id = a.payment_id AND p.status = 1
+            WHERE {due_date_filter}
+        ) credited
+        GROUP BY credited.loan_id, credited.loan_history_id
+    ) paid ON paid.loan_id = tl.id AND paid.loan_history_id = tlh.id""",
+    )
+
+
+# Sortable /loan/client-summary fields, as expressions over the grouped client rows `s`.
+# Rates use float division (* 1e0) so ties break the same way as the Python-side values.
+CLIENT_SUMMARY_SORT_FIELDS = {
+    "sourced_to": "s.sourced_to",
+    "project": "s.project",
+    "total_disbursement": "s.total_disbursement",
+    "total_requests": "s.total_requests",
+    "approved_requests": "s.approved_requests",
+    "delinquent_requests": "s.delinquent_requests",
+    "eligible_employees": "s.eligible_employees",
+    "active_employees": "s.active_employees",
+    "eligible_rate": "COALESCE(s.eligible_employees * 1e0 / NULLIF(s.active_employees, 0), 0)",
+    "penetration_rate": "COALESCE(s.requesting_employees * 1e0 / NULLIF(s.eligible_employees, 0), 0)",
+    "total_admin_fee_collected": "s.total_admin_fee_collected",
+    "total_unrecovered_payment": "s.total_unrecovered_payment",
+    "admin_fee_profit": "s.total_admin_fee_collected - s.total_unrecovered_payment",
+    "delinquency_rate": "COALESCE(s.total_unrecovered_payment * 1e0 / NULLIF(s.payment_base, 0), 0)",
+}
+
+
+def _installment_scoped(column: str) -> str:
+    """Per-client aggregate of `column` from the installment-delinquency rows when the
+    client has any, else from its td_loan rows (see get_client_summary)."""
+    return f"COALESCE(SUM(CASE WHEN c.installment_scope = 1 THEN c.{column} END), SUM(c.{column}))"
+
+
+def _client_summary_sql(
     db: Session,
-    client_disbursements: list,
-    counts_by_sourced_to: dict,
+    params: dict,
     *,
-    loan_conditions: str,
-    company_filter: str,
-    client_segment_filter: str = None,
-    product_type_filter: str = None,
+    loan_type: str,
     start_date: str = None,
     end_date: str = None,
-) -> None:
-    """Recompute delinquent_requests/total_unrecovered_payment/delinquency_rate for
-    extradana/aku_cicil/installment loan_type using td_loan_history (per-installment
-    due_date/status) instead of td_loan (proses_date/loan_status), and add any client
-    (sourced_to/project) that only shows up via an overdue installment in this period.
-    See get_client_summary for why this is scoped separately from disbursement metrics."""
-
-    loan_conditions_tl = loan_conditions.replace('l.', 'tl.')
-    params: dict = {}
+    client_segment_filter: str = None,
+    product_type_filter: str = None,
+) -> str:
+    """One row per (sourced_to, project) with every /loan/client-summary input metric.
 
-    # Net out partial payments already recorded against this specific installment (via
-    # td_loan_payment / td_loan_payment_allocation) — an installment can be status = 4
-    # (overdue) while part of its `monthly` amount has already been paid. Mirrors the
-    # netting in get_karyawan_overdue_summary / _UNRECOVERED_INSTALLMENT_PAYMENT_SQL.
-    _installment_paid_subquery = """(
-        SELECT COALESCE(SUM(amt), 0) FROM (
-            SELECT p.amount amt FROM td_loan_payment p
-            WHERE p.loan_id = tl.id AND p.status = 1 AND p.loan_history_id = tlh.id
-              AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
-            UNION ALL
-            SELECT a.amount FROM td_loan_payment_allocation a
-            INNER JOIN td_loan_payment p ON p.id = a.payment_id
-            WHERE p.loan_id = tl.id AND p.status = 1 AND a.loan_history_id = tlh.id
-        ) t
-    )"""
-    _installment_remaining_payment = f"GREATEST(tlh.monthly - {_installment_paid_subquery}, 0)"
+    td_loan rows give the disbursement/request metrics and, for single-payment products,
+    delinquency. For installment products a second branch scopes delinquency to the
+    td_loan_history installments due in the period; both branches are UNION ALL-ed and
+    merged per client in SQL, with employee counts joined per placement."""
+    loan_conditions = resolve_loan_conditions(loan_type, db)
 
-    query = f"""
+    loans = f"""
     SELECT
-        src.keterangan as sourced_to,
-        prj.keterangan as project,
-        COUNT(DISTINCT CASE WHEN tlh.status = 4 THEN tlh.loan_form_id END) as delinquent_requests,
-        SUM(CASE WHEN tlh.status IN (1, 4) THEN {_installment_remaining_payment} ELSE 0 END) as total_unrecovered_payment,
-        SUM(CASE WHEN tlh.status IN (1, 2, 4) THEN {_installment_remaining_payment} ELSE 0 END) as denom
-    FROM td_loan_history tlh
-    INNER JOIN td_loan tl ON tlh.loan_form_id = tl.id
-    LEFT JOIN td_karyawan tk
-        ON tl.id_karyawan = tk.id_karyawan
-    LEFT JOIN tbl_gmc emp
-        ON tk.valdo_inc = emp.kode_gmc
-        AND emp.group_gmc = 'sub_client'
-        AND emp.aktif = 'Yes'
-        AND emp.keterangan3 = 1
-    LEFT JOIN tbl_gmc src
-        ON tk.placement = src.kode_gmc
-        AND src.group_gmc = 'placement_client'
-        AND src.aktif = 'Yes'
-        AND src.keterangan3 = 1
-    LEFT JOIN tbl_gmc prj
-        ON tk.project = prj.kode_gmc
-        AND prj.group_gmc = 'client_project'
-        AND prj.aktif = 'Yes'
-        AND prj.keterangan3 = 1
-    WHERE tlh.due_date IS NOT NULL
-    AND {loan_conditions_tl}
+        src.keterangan AS sourced_to,
+        COALESCE(prj.keterangan, 'Unknown') AS project,
+        SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END) AS total_disbursement,
+        COUNT(CASE WHEN l.loan_status IN (1, 2, 3, 4) THEN 1 END) AS total_requests,
+        COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) AS approved_requests,
+        COUNT(DISTINCT CASE WHEN l.loan_status IN (1, 2, 3, 4) THEN l.id_karyawan END) AS requesting_employees,
+        SUM(CASE WHEN l.loan_status = 2 THEN l.admin_fee ELSE 0 END) AS admin_fee_collected,
+        0 AS installment_scope,
+        COUNT(CASE WHEN l.loan_status IN (1, 4) THEN 1 END) AS delinquent_requests,
+        SUM(CASE WHEN l.loan_status IN (1, 4) THEN l.total_payment ELSE 0 END) AS unrecovered_payment,
+        SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_payment ELSE 0 END) AS payment_base
+    FROM td_loan l
+    {_LOAN_GMC_JOINS}
+    WHERE {loan_conditions}
     AND src.keterangan IS NOT NULL
-    AND emp.keterangan IN {company_filter}
+    AND emp.keterangan IN {COMPANY_FILTER}
     """
-
-    query = _apply_project_management_filters(
-        query, params, client_segment_filter, product_type_filter, db=db
+    loans = _apply_project_management_filters(
+        loans, params, client_segment_filter, product_type_filter, db=db
     )
-
     if start_date and end_date:
-        query = append_date_filters(
-            query,
-            params,
-            start_date=start_date,
-            end_date=end_date,
-            date_column="tlh.due_date",
+        loans = append_date_filters(loans, params, start_date=start_date, end_date=end_date)
+    branches = [loans + "\n    GROUP BY src.keterangan, prj.keterangan\n"]
+
+    # Installment products (extradana/aku_cicil/installment) are billed month-by-month via
+    # td_loan_history rather than the single td_loan row. A loan can be disbursed (proses_date)
+    # in one month while one of its later installments (due_date) becomes overdue in a
+    # completely different month. The disbursement metrics above intentionally stay scoped to
+    # td_loan/proses_date (when was the loan requested), but delinquency must instead be scoped
+    # to which installment is actually due/overdue within [start_date, end_date] — otherwise a
+    # loan disbursed in-period but overdue on a later month is wrongly counted here, while a
+    # client whose installment is overdue *this* period (disbursed earlier) is wrongly dropped.
+    # This mirrors get_karyawan_overdue_summary's td_loan_history/due_date handling.
+    if loan_type in ("extradana", "aku_cicil", "installment"):
+        loan_conditions_tl = resolve_loan_conditions(loan_type, db, alias="tl")
+        # An installment can be status = 4 (overdue) while part of its `monthly` amount
+        # has already been paid; only the remainder is unrecovered.
+        remaining = "GREATEST(tlh.monthly - COALESCE(paid.amount, 0), 0)"
+        # Same due_date scope as the outer filter below (which binds :range_start/:range_end).
+        due_date_filter = (
+            range_predicate("h.due_date") if start_date and end_date else "h.due_date IS NOT NULL"
+        )
+        installments = f"""
+    SELECT
+        src.keterangan AS sourced_to,
+        COALESCE(prj.keterangan, 'Unknown') AS project,
+        0, 0, 0, 0, 0,
+        1,
+        COUNT(DISTINCT CASE WHEN tlh.status = 4 THEN tlh.loan_form_id END),
+        SUM(CASE WHEN tlh.status IN (1, 4) THEN {remaining} ELSE 0 END),
+        SUM(CASE WHEN tlh.status IN (1, 2, 4) THEN {remaining} ELSE 0 END)
+    {loan_history_relation().with_join(_installment_paid_join(due_date_filter)).sql()}
+    WHERE tlh.due_date IS NOT NULL
+    AND {loan_conditions_tl}
+    AND src.keterangan IS NOT NULL
+    AND emp.keterangan IN {COMPANY_FILTER}
+    """
+        installments = _apply_project_management_filters(
+            installments, params, client_segment_filter, product_type_filter, db=db
         )
-
-    query += " GROUP BY src.keterangan, prj.keterangan"
-
-    rows = db.execute(text(query), params).fetchall()
-
-    index_by_key = {
-        f"{row['sourced_to']}_{row['project']}": row for row in client_disbursements
-    }
-
-    for sourced_to, project, delinquent_requests, unrecovered, denom in rows:
-        sourced_to = sourced_to if sourced_to else "Unknown"
-        project = project if project else "Unknown"
-        key = f"{sourced_to}_{project}"
-
-        delinquent_requests = int(delinquent_requests) if delinquent_requests else 0
-        unrecovered = float(unrecovered) if unrecovered else 0.0
-        denom = float(denom) if denom else 0.0
-        delinquency_rate = (unrecovered / denom) if denom > 0 else 0.0
-
-        existing = index_by_key.get(key)
-        if existing is not None:
-            existing["delinquent_requests"] = delinquent_requests
-            existing["total_unrecovered_payment"] = unrecovered
-            existing["delinquency_rate"] = delinquency_rate
-            existing["admin_fee_profit"] = existing["total_admin_fee_collected"] - unrecovered
-        else:
-            employee_data = counts_by_sourced_to.get(sourced_to, {"eligible": 0, "active": 0})
-            new_row = {
-                "sourced_to": sourced_to,
-                "project": project,
-                "total_disbursement": 0,
-                "total_requests": 0,
-                "approved_requests": 0,
-                "delinquent_requests": delinquent_requests,
-                "eligible_employees": employee_data["eligible"],
-                "active_employees": employee_data["active"],
-                "eligible_rate": (employee_data["eligible"] / employee_data["active"]) if employee_data["active"] > 0 else 0,
-                "penetration_rate": 0,
-                "total_admin_fee_collected": 0,
-                "total_unrecovered_payment": unrecovered,
-                "admin_fee_profit": -unrecovered,
-                "delinquency_rate": delinquency_rate,
-            }
-            client_disbursements.append(new_row)
-            index_by_key[key] = new_row
-
-
-def get_client_summary(db: Session, start_date: str = None, end_date: str = None, loan_type: str = "kasbon",
-                       client_segment_filter: str = None, product_type_filter: str = None) -> list:
-    """Get comprehensive client summary with disbursement and other metrics"""
-
-    try:
-        loan_conditions = resolve_loan_conditions(loan_type, db)
-        company_filter = COMPANY_FILTER
-
-        # Installment products (extradana/aku_cicil/installment) are billed month-by-month via
-        # td_loan_history rather than the single td_loan row. A loan can be disbursed (proses_date)
-        # in one month while one of its later installments (due_date) becomes overdue in a
-        # completely different month. The disbursement metrics below intentionally stay scoped to
-        # td_loan/proses_date (when was the loan requested), but delinquency must instead be scoped
-        # to which installment is actually due/overdue within [start_date, end_date] — otherwise a
-        # loan disbursed in-period but overdue on a later month is wrongly counted here, while a
-        # client whose installment is overdue *this* period (disbursed earlier) is wrongly dropped.
-        # This mirrors get_karyawan_overdue_summary's td_loan_history/due_date handling.
-        needs_installment_delinquency = loan_type in ("extradana", "aku_cicil", "installment")
-
-        # Build parameters dict for filters (needed for both queries)
-        params = {}
-
-        # Get employee counts using the exact same approach as coverage utilization
-        # For each sourced_to and project combination, we'll run the same query as coverage utilization
-        employee_counts = {}
-
-        # Keyed only by sourced_to (not project) — reused for any client added by the
-        # installment delinquency override below, which may not appear in combinations_query.
-        counts_by_sourced_to = {}
-
-        # Get unique sourced_to and project combinations from the loan data first
-        combinations_query = f"""
-        SELECT DISTINCT
-            src.keterangan as sourced_to,
-            prj.keterangan as project
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE {loan_conditions}
-        AND src.keterangan IS NOT NULL
-        AND emp.keterangan IN {company_filter}
-        """
-
         if start_date and end_date:
-            combinations_query = append_date_filters(
-                combinations_query,
+            installments = append_date_filters(
+                installments,
                 params,
                 start_date=start_date,
                 end_date=end_date,
+                date_column="tlh.due_date",
             )
+        branches.append(installments + "\n    GROUP BY src.keterangan, prj.keterangan\n")
 
-        combinations_query = _apply_project_management_filters(
-            combinations_query, params, client_segment_filter, product_type_filter, db=db
-        )
-
-        try:
-            combinations_result = db.execute(text(combinations_query), params)
-            combinations = combinations_result.fetchall()
-
-            counts_by_sourced_to = _fetch_employee_counts_by_sourced_to(db, company_filter)
-            for combo in combinations:
-                sourced_to = combo[0] if combo[0] else "Unknown"
-                project = combo[1] if combo[1] else "Unknown"
-                key = f"{sourced_to}_{project}"
-                employee_counts[key] = counts_by_sourced_to.get(
-                    sourced_to,
-                    {"eligible": 0, "active": 0},
-                )
+    union = "    UNION ALL".join(branches)
+    delinquent = _installment_scoped("delinquent_requests")
+    unrecovered = _installment_scoped("unrecovered_payment")
+    payment_base = _installment_scoped("payment_base")
+    return f"""
+    SELECT
+        c.sourced_to,
+        c.project,
+        SUM(c.total_disbursement) AS total_disbursement,
+        SUM(c.total_requests) AS total_requests,
+        SUM(c.approved_requests) AS approved_requests,
+        {delinquent} AS delinquent_requests,
+        COALESCE(MAX(ec.eligible), 0) AS eligible_employees,
+        COALESCE(MAX(ec.active), 0) AS active_employees,
+        SUM(c.requesting_employees) AS requesting_employees,
+        SUM(c.admin_fee_collected) AS total_admin_fee_collected,
+        {unrecovered} AS total_unrecovered_payment,
+        {payment_base} AS payment_base
+    FROM ({union}) c
+    LEFT JOIN ({_EMPLOYEE_COUNTS_BY_SOURCED_TO_SQL}) ec ON ec.sourced_to = c.sourced_to
+    GROUP BY c.sourced_to, c.project
+    """
 
-        except Exception:
-            # Fallback: return empty employee counts
-            employee_counts = {}
 
-        # Build the main loan summary query (without correlated subqueries)
-        client_summary_query = """
-        SELECT
-            src.keterangan as sourced_to,
-            prj.keterangan as project,
-            SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_loan ELSE 0 END) as total_disbursement,
-            COUNT(CASE WHEN l.loan_status IN (1, 2, 3, 4) THEN 1 END) as total_requests,
-            COUNT(CASE WHEN l.loan_status IN (1, 2, 4) THEN 1 END) as approved_requests,
-            COUNT(CASE WHEN l.loan_status IN (1, 4) THEN 1 END) as delinquent_requests,
-            SUM(CASE WHEN l.loan_status = 2 THEN l.admin_fee ELSE 0 END) as total_admin_fee_collected,
-            SUM(CASE WHEN l.loan_status IN (1, 4) THEN l.total_payment ELSE 0 END) as total_unrecovered_payment,
-            CASE
-                WHEN SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_payment ELSE 0 END) > 0
-                THEN SUM(CASE WHEN l.loan_status IN (1, 4) THEN l.total_payment ELSE 0 END) / SUM(CASE WHEN l.loan_status IN (1, 2, 4) THEN l.total_payment ELSE 0 END)
-                ELSE 0
-            END as delinquency_rate,
-            COUNT(DISTINCT CASE WHEN l.loan_status IN (1, 2, 3, 4) THEN l.id_karyawan END) as unique_requesting_employees
-        FROM td_loan l
-        LEFT JOIN td_karyawan tk
-            ON l.id_karyawan = tk.id_karyawan
-        LEFT JOIN tbl_gmc emp
-            ON tk.valdo_inc = emp.kode_gmc
-            AND emp.group_gmc = 'sub_client'
-            AND emp.aktif = 'Yes'
-            AND emp.keterangan3 = 1
-        LEFT JOIN tbl_gmc src
-            ON tk.placement = src.kode_gmc
-            AND src.group_gmc = 'placement_client'
-            AND src.aktif = 'Yes'
-            AND src.keterangan3 = 1
-        LEFT JOIN tbl_gmc prj
-            ON tk.project = prj.kode_gmc
-            AND prj.group_gmc = 'client_project'
-            AND prj.aktif = 'Yes'
-            AND prj.keterangan3 = 1
-        WHERE {loan_conditions}
-        AND src.keterangan IS NOT NULL
-        AND emp.keterangan IN {company_filter}
-        """.format(loan_conditions=loan_conditions, company_filter=company_filter)
+def _client_summary_row(row) -> dict:
+    eligible = int(row.eligible_employees or 0)
+    active = int(row.active_employees or 0)
+    admin_fee_collected = float(row.total_admin_fee_collected or 0)
+    unrecovered = float(row.total_unrecovered_payment or 0)
+    payment_base = float(row.payment_base or 0)
+    return {
+        "sourced_to": row.sourced_to,
+        "project": row.project,
+        "total_disbursement": float(row.total_disbursement or 0),
+        "total_requests": int(row.total_requests or 0),
+        "approved_requests": int(row.approved_requests or 0),
+        "delinquent_requests": int(row.delinquent_requests or 0),
+        "eligible_employees": eligible,
+        "active_employees": active,
+        "eligible_rate": (eligible / active) if active > 0 else 0,
+        "penetration_rate": (int(row.requesting_employees or 0) / eligible) if eligible > 0 else 0,
+        "total_admin_fee_collected": admin_fee_collected,
+        "total_unrecovered_payment": unrecovered,
+        "admin_fee_profit": admin_fee_collected - unrecovered,
+        "delinquency_rate": (unrecovered / payment_base) if payment_base > 0 else 0.0,
+    }
 
-        client_summary_query = _apply_project_management_filters(
-            client_summary_query, params, client_segment_filter, product_type_filter, db=db
-        )
 
-        if start_date and end_date:
-            client_summary_query = append_date_filters(
-                client_summary_query,
-                params,
-                start_date=start_date,
-                end_date=end_date,
-            )
+def get_client_summary(db: Session, start_date: str = None, end_date: str = None, loan_type: str = "kasbon",
+                       client_segment_filter: str = None, product_type_filter: str = None,
+                       sort_by: str = "sourced_to", sort_order: str = "asc",
+                       limit: int = None, offset: int = 0) -> tuple[list, int]:
+    """Get comprehensive client summary with disbursement and other metrics.
+
+    Rows are sorted by `sort_by` (a CLIENT_SUMMARY_SORT_FIELDS key) and paged with
+    limit/offset in SQL; sourced_to/project break ties so pages are stable. Returns the
+    page and the number of clients before paging, counted in the same query."""
+    if sort_by not in CLIENT_SUMMARY_SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of: {', '.join(CLIENT_SUMMARY_SORT_FIELDS)}")
+    if sort_order.lower() not in ("asc", "desc"):
+        raise ValueError("sort_order must be 'asc' or 'desc'")
 
-        # Group by sourced_to and project
-        client_summary_query += """
-        GROUP BY src.keterangan, prj.keterangan
-        ORDER BY src.keterangan, prj.keterangan
+    try:
+        params = {}
+        grouped = _client_summary_sql(
+            db,
+            params,
+            loan_type=loan_type,
+            start_date=start_date,
+            end_date=end_date,
+            client_segment_filter=client_segment_filter,
+            product_type_filter=product_type_filter,
+        )
+        query = f"""
+        SELECT s.*, COUNT(*) OVER () AS total_count FROM ({grouped}) s
+        ORDER BY {CLIENT_SUMMARY_SORT_FIELDS[sort_by]} {sort_order.upper()}, s.sourced_to, s.project
         """
-
-        # Execute main query
-        result = db.execute(text(client_summary_query), params)
-        records = result.fetchall()
-
-        # Format results
-        client_disbursements = []
-        for record in records:
-            sourced_to = record[0] if record[0] else "Unknown"
-            project = record[1] if record[1] else "Unknown"
-            key = f"{sourced_to}_{project}"
-
-            # Get employee counts from the pre-calculated dictionary
-            employee_data = employee_counts.get(key, {"eligible": 0, "active": 0})
-
-            client_disbursements.append({
-                "sourced_to": sourced_to,
-                "project": project,
-                "total_disbursement": float(record[2]) if record[2] else 0,
-                "total_requests": int(record[3]) if record[3] else 0,
-                "approved_requests": int(record[4]) if record[4] else 0,
-                "delinquent_requests": int(record[5]) if record[5] else 0,
-                "eligible_employees": employee_data["eligible"],
-                "active_employees": employee_data["active"],
-                "eligible_rate": (employee_data["eligible"] / employee_data["active"]) if employee_data["active"] > 0 else 0,
-                "penetration_rate": (int(record[9]) / employee_data["eligible"]) if employee_data["eligible"] > 0 else 0,  # unique_requesting_employees / eligible_employees
-                "total_admin_fee_collected": float(record[6]) if record[6] else 0,
-                "total_unrecovered_payment": float(record[7]) if record[7] else 0,
-                "admin_fee_profit": (float(record[6]) if record[6] else 0) - (float(record[7]) if record[7] else 0),
-                "delinquency_rate": float(record[8]) if record[8] else 0,
-            })
-
-        if needs_installment_delinquency:
-            _apply_installment_delinquency_override(
-                db,
-                client_disbursements,
-                counts_by_sourced_to,
-                loan_conditions=loan_conditions,
-                company_filter=company_filter,
-                client_segment_filter=client_segment_filter,
-                product_type_filter=product_type_filter,
-                start_date=start_date,
-                end_date=end_date,
-            )
-
-        return client_disbursements
+        if limit is not None:
+            query += " LIMIT :limit OFFSET :offset"
+            params["limit"] = limit
+            params["offset"] = offset
+
+        rows = db.execute(statement(query), params).fetchall()
+        if rows:
+            total = int(rows[0].total_count)
+        elif offset and limit is not None:
+            # A page past the end carries no window count to read.
+            total = db.execute(statement(f"SELECT COUNT(*) FROM ({grouped}) s"), params).scalar() or 0
+        else:
+            total = 0
+        return [_client_summary_row(row) for row in rows], total
 
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return []
+        return [], 0
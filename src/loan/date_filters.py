@@ -1,20 +1,42 @@
-"""SQL helper for optional start_date/end_date loan filters."""
+"""SQL helpers for optional start_date/end_date loan filters and month buckets.
+
+Day ranges are emitted as a half-open `column >= :range_start AND column < :range_end`
+on the bare column with DATE bounds (date_range), so MySQL can use an index on the
+column and prune RANGE partitions on it (see partitioning.py); the old
+`<= 'YYYY-MM-DD 23:59:59'` form compared a string against every row's value and also
+missed fractional seconds on the last day. default_window can bound requests that
+arrive without a range; it is off unless LOAN_DEFAULT_WINDOW_MONTHS is set.
+
+Monthly queries group by an integer YYYYMM period (period_sql) and keep those keys
+through every merge; the "March 2026" month_year labels the API responds with are
+only produced at the router, by label_periods.
+"""
 
 import calendar
+import os
+from datetime import date, timedelta
+
+# Months of history an endpoint reads when called without start_date/end_date.
+# 0 (the default) keeps those reads unbounded; setting it changes what such
+# requests return, so it is an opt-in for deployments that want the cap.
+DEFAULT_WINDOW_MONTHS = int(os.getenv("LOAN_DEFAULT_WINDOW_MONTHS", "0"))
+
+
+def _day(value: str) -> date:
+    return date.fromisoformat(value.strip()[:10])
+
+
+def date_range(start_date: str, end_date: str) -> tuple[date, date]:
+    """Inclusive YYYY-MM-DD start/end days -> [range_start, range_end) DATE bounds."""
+    return _day(start_date), _day(end_date) + timedelta(days=1)
 
 
-def start_of_day(value: str) -> str:
-    """Normalize YYYY-MM-DD to start-of-day datetime string."""
-    if value and len(value.strip()) == 10:
-        return f"{value.strip()} 00:00:00"
-    return value
+def range_predicate(column: str) -> str:
+    return f"{column} >= :range_start AND {column} < :range_end"
 
 
-def end_of_day(value: str) -> str:
-    """Normalize YYYY-MM-DD to end-of-day datetime string."""
-    if value and len(value.strip()) == 10:
-        return f"{value.strip()} 23:59:59"
-    return value
+def bind_date_range(params: dict, start_date: str, end_date: str) -> None:
+    params["range_start"], params["range_end"] = date_range(start_date, end_date)
 
 
 def append_date_filters(
@@ -24,17 +46,77 @@ def append_date_filters(
     start_date: str = None,
     end_date: str = None,
     date_column: str = "l.proses_date",
+    open_ended: bool = False,
 ) -> str:
+    """Filter date_column to the inclusive start_date..end_date days. Only a full range
+    filters unless open_ended, which also applies a lone start or end bound."""
     if start_date and end_date:
-        query += f" AND {date_column} >= :start_date"
-        query += f" AND {date_column} <= :end_date"
-        params["start_date"] = start_of_day(start_date)
-        params["end_date"] = end_of_day(end_date)
+        query += f" AND {range_predicate(date_column)}"
+        bind_date_range(params, start_date, end_date)
+    elif open_ended and start_date:
+        query += f" AND {date_column} >= :range_start"
+        params["range_start"] = _day(start_date)
+    elif open_ended and end_date:
+        query += f" AND {date_column} < :range_end"
+        params["range_end"] = _day(end_date) + timedelta(days=1)
     return query
 
 
+def default_window(
+    start_date: str = None,
+    end_date: str = None,
+    months: int = DEFAULT_WINDOW_MONTHS,
+    today: date = None,
+) -> tuple[str, str]:
+    """Complete a partial or missing range: end_date defaults to today and start_date
+    to the first day of the month `months - 1` before end_date's, so the range spans
+    `months` calendar months. A full range, or months <= 0, is returned unchanged."""
+    if months <= 0 or (start_date and end_date):
+        return start_date, end_date
+    end = _day(end_date) if end_date else (today or date.today())
+    if not start_date:
+        first_month = end.year * 12 + end.month - months
+        start_date = date(first_month // 12, first_month % 12 + 1, 1).isoformat()
+    return start_date, end.isoformat()
+
+
 def month_bounds(month: int, year: int) -> tuple[str, str]:
     start_date = f"{year}-{month:02d}-01"
     last_day = calendar.monthrange(year, month)[1]
     end_date = f"{year}-{month:02d}-{last_day:02d}"
     return start_date, end_date
+
+
+_MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+
+
+def period_of(year: int, month: int) -> int:
+    return year * 100 + month
+
+
+def period_bounds(period: int) -> tuple[str, str]:
+    return month_bounds(period % 100, period // 100)
+
+
+def period_sql(column: str) -> str:
+    """YYYYMM bucket of a DATE/DATETIME column: groups and sorts as an integer, and
+    unlike DATE_FORMAT(column, '%M %Y') doesn't depend on the session's lc_time_names."""
+    return f"(YEAR({column}) * 100 + MONTH({column}))"
+
+
+def period_label(period: int) -> str:
+    """202603 -> 'March 2026'."""
+    return f"{_MONTH_NAMES[period % 100 - 1]} {period // 100}"
+
+
+def merged_periods(*monthly: dict) -> list[int]:
+    """Chronological union of the period keys of several {period: ...} dicts."""
+    return sorted(set().union(*monthly))
+
+
+def label_periods(monthly: dict) -> dict:
+    """{period: value} -> {month_year label: value}, in chronological order."""
+    return {period_label(period): monthly[period] for period in sorted(monthly)}
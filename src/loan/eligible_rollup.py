@@ -0,0 +1,363 @@
+"""
+Monthly rollup of data_record_eligible.
+
+data_record_eligible gains a row per employee per day, so COUNT(DISTINCT ...) over
+a month rescans the whole headcount ~30 times. This rollup keeps one row per
+(month, employer, sourced_to, project, branch, client_segment, product_type,
+eligibility flags) cell with its distinct employee count and the employee ids
+themselves (sorted, delta-encoded and compressed: a couple of bytes per id). Any
+filter combination (and any run of whole months) is answered exactly by the union
+of the matching cells' ids, without touching the raw snapshot rows.
+
+Refresh it nightly, after ak-mj's daily_data_record() has written the day's
+snapshot:
+
+    python -m src.loan.eligible_rollup            # current and previous month
+    python -m src.loan.eligible_rollup --start 2025-01 --end 2025-12   # backfill
+
+A month is only read from the rollup once a refresh has run after the month
+ended; the current month keeps reading data_record_eligible directly. Rollups
+written by the earlier sketch-based version are dropped on the next refresh, so
+backfill after upgrading.
+"""
+
+import argparse
+import os
+import sys
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    from .date_filters import period_bounds, period_of
+except ImportError:
+    from loan.date_filters import period_bounds, period_of
+
+ELIGIBLE_ROLLUP_ENABLED = os.getenv("ELIGIBLE_ROLLUP_ENABLED", "1") == "1"
+INSERT_BATCH_SIZE = 1000
+# Employee id deltas are stored as 4-byte unsigned ints (id_karyawan is an INT).
+_ID_TYPECODE = "I"
+
+ROLLUP_TABLE = "data_record_eligible_monthly"
+ROLLUP_STATE_TABLE = "data_record_eligible_rollup_state"
+
+_DIMENSIONS = ("employer", "sourced_to", "project", "branch", "client_segment", "product_type")
+_FLAGS = ("is_loan_eligible", "is_kasbon_eligible", "is_aku_cicil_eligible", "is_extradana_eligible")
+
+_CREATE_ROLLUP_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    period INT NOT NULL,
+    employer VARCHAR(64) NOT NULL DEFAULT '',
+    sourced_to VARCHAR(64) NOT NULL DEFAULT '',
+    project VARCHAR(64) NOT NULL DEFAULT '',
+    branch VARCHAR(64) NOT NULL DEFAULT '',
+    client_segment VARCHAR(64) NOT NULL DEFAULT '',
+    product_type VARCHAR(64) NOT NULL DEFAULT '',
+    is_loan_eligible TINYINT NOT NULL DEFAULT 0,
+    is_kasbon_eligible TINYINT NOT NULL DEFAULT 0,
+    is_aku_cicil_eligible TINYINT NOT NULL DEFAULT 0,
+    is_extradana_eligible TINYINT NOT NULL DEFAULT 0,
+    employees INT NOT NULL,
+    employee_ids MEDIUMBLOB NOT NULL,
+    PRIMARY KEY (
+        period, employer, sourced_to, project, branch, client_segment, product_type,
+        is_loan_eligible, is_kasbon_eligible, is_aku_cicil_eligible, is_extradana_eligible
+    )
+)
+"""
+
+_CREATE_STATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_STATE_TABLE} (
+    period INT NOT NULL PRIMARY KEY,
+    covered_through DATE NOT NULL,
+    refreshed_at DATETIME NOT NULL
+)
+"""
+
+# One row per employee per cell for the month; employees whose flags or
+# dimensions changed mid-month land in every cell they passed through.
+_MONTH_CELLS_SQL = """
+SELECT DISTINCT
+    COALESCE(de.employer, ''),
+    COALESCE(de.sourced_to, ''),
+    COALESCE(de.project, ''),
+    COALESCE(de.branch, ''),
+    COALESCE(de.client_segment, ''),
+    COALESCE(de.product_type, ''),
+    COALESCE(de.is_loan_eligible, 0),
+    COALESCE(de.is_kasbon_eligible, 0),
+    COALESCE(de.is_aku_cicil_eligible, 0),
+    COALESCE(de.is_extradana_eligible, 0),
+    de.id_karyawan
+FROM data_record_eligible de
+WHERE de.snapshot_date BETWEEN :start_date AND :end_date
+  AND de.id_karyawan IS NOT NULL
+  AND (
+      de.is_loan_eligible = 1
+      OR de.is_kasbon_eligible = 1
+      OR de.is_aku_cicil_eligible = 1
+      OR de.is_extradana_eligible = 1
+  )
+"""
+
+
+def encode_ids(ids: Iterable[int]) -> bytes:
+    """Sorted distinct ids as compressed deltas."""
+    ordered = sorted(set(ids))
+    deltas = array(
+        _ID_TYPECODE, (current - previous for previous, current in zip([0] + ordered, ordered))
+    )
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes())
+
+
+def decode_ids(data: bytes) -> Iterable[int]:
+    deltas = array(_ID_TYPECODE)
+    deltas.frombytes(zlib.decompress(data))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return accumulate(deltas)
+
+
+class RollupTotals:
+    """Merged rollup cells for one month (or a run of months)."""
+
+    def __init__(self):
+        self.present = False
+        self.cells = 0
+        self.cell_sum = 0
+        self.projects = set()
+        self.id_sets: List[bytes] = []
+
+    def add_cell(self, project: str, employees: int, ids: bytes) -> None:
+        self.cells += 1
+        self.cell_sum += employees
+        if project and employees:
+            self.projects.add(project)
+        self.id_sets.append(ids)
+
+    def merge(self, other: "RollupTotals") -> None:
+        self.present = self.present or other.present
+        self.cells += other.cells
+        self.cell_sum += other.cell_sum
+        self.projects |= other.projects
+        self.id_sets.extend(other.id_sets)
+
+    @property
+    def employees(self) -> int:
+        if self.cells <= 1:
+            return self.cell_sum
+        # An employee can sit in several cells (mid-month changes, several months).
+        employees = set()
+        for ids in self.id_sets:
+            employees.update(decode_ids(ids))
+        return len(employees)
+
+    @property
+    def project_count(self) -> int:
+        return len(self.projects)
+
+
+def _next_period(period: int) -> int:
+    year, month = divmod(period, 100)
+    return period_of(year + 1, 1) if month == 12 else period_of(year, month + 1)
+
+
+def periods_between(start_period: int, end_period: int) -> List[int]:
+    periods = []
+    period = start_period
+    while period <= end_period:
+        periods.append(period)
+        period = _next_period(period)
+    return periods
+
+
+def whole_month_periods(range_start: str, range_end: str) -> Optional[List[int]]:
+    """Periods covered by [range_start, range_end], or None unless it is a run of whole months."""
+    try:
+        start_period = period_of(int(range_start[:4]), int(range_start[5:7]))
+        end_period = period_of(int(range_end[:4]), int(range_end[5:7]))
+    except (TypeError, ValueError):
+        return None
+    if range_start != period_bounds(start_period)[0] or range_end != period_bounds(end_period)[1]:
+        return None
+    if end_period < start_period:
+        return None
+    return periods_between(start_period, end_period)
+
+
+def ensure_rollup_tables(db: Session) -> None:
+    sketch_based = db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = :table AND column_name = 'employee_sketch'"
+        ),
+        {"table": ROLLUP_TABLE},
+    ).scalar()
+    if sketch_based:
+        # Approximate sketches can't be turned into id sets: rebuild from the snapshot.
+        db.execute(text(f"DROP TABLE IF EXISTS {ROLLUP_TABLE}"))
+        db.execute(text(f"DROP TABLE IF EXISTS {ROLLUP_STATE_TABLE}"))
+    db.execute(text(_CREATE_ROLLUP_TABLE_SQL))
+    db.execute(text(_CREATE_STATE_TABLE_SQL))
+
+
+def refresh_month(db: Session, period: int, today: date = None) -> int:
+    """Rebuild one month of the rollup from data_record_eligible; returns the cell count."""
+    today = today or date.today()
+    range_start, range_end = period_bounds(period)
+
+    # Streamed from a server-side cursor; only each cell's ids are kept, 4 bytes apiece.
+    cells: Dict[tuple, array] = {}
+    result = db.execute(
+        text(_MONTH_CELLS_SQL),
+        {"start_date": range_start, "end_date": range_end},
+        execution_options={"stream_results": True},
+    )
+    for row in result:
+        key = tuple(str(value) for value in row[:6]) + tuple(int(value) for value in row[6:10])
+        ids = cells.get(key)
+        if ids is None:
+            ids = cells[key] = array(_ID_TYPECODE)
+        ids.append(int(row[10]))
+
+    db.execute(text(f"DELETE FROM {ROLLUP_TABLE} WHERE period = :period"), {"period": period})
+    columns = ("period",) + _DIMENSIONS + _FLAGS + ("employees", "employee_ids")
+    insert = text(
+        f"INSERT INTO {ROLLUP_TABLE} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + column for column in columns)})"
+    )
+    batch = []
+    for key, ids in cells.items():
+        row = dict(zip(_DIMENSIONS + _FLAGS, key))
+        row.update(period=period, employees=len(ids), employee_ids=encode_ids(ids))
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.execute(insert, batch)
+            batch = []
+    if batch:
+        db.execute(insert, batch)
+
+    # Today's snapshot may still be written after this run.
+    covered_through = min(date.fromisoformat(range_end), today - timedelta(days=1))
+    db.execute(
+        text(
+            f"INSERT INTO {ROLLUP_STATE_TABLE} (period, covered_through, refreshed_at) "
+            "VALUES (:period, :covered_through, :refreshed_at) "
+            "ON DUPLICATE KEY UPDATE covered_through = VALUES(covered_through), "
+            "refreshed_at = VALUES(refreshed_at)"
+        ),
+        {"period": period, "covered_through": covered_through, "refreshed_at": datetime.now()},
+    )
+    db.commit()
+    return len(cells)
+
+
+def refresh_rollup(db: Session, periods: Iterable[int], today: date = None) -> Dict[int, int]:
+    ensure_rollup_tables(db)
+    return {period: refresh_month(db, period, today) for period in periods}
+
+
+def read_rollup(
+    db: Session,
+    periods: List[int],
+    *,
+    presence_predicate: str,
+    match_predicate: str,
+    params: dict,
+) -> Optional[Dict[int, RollupTotals]]:
+    """
+    Merged cells per period for rows matching match_predicate (table aliased `de`,
+    so the data_record_eligible filter predicates apply unchanged).
+
+    `present` on each period mirrors the raw queries' "does the snapshot cover this
+    month?" check: at least one unfiltered cell matches presence_predicate. Returns
+    None when the rollup can't answer — disabled, not created yet, or any of the
+    periods not refreshed since the month ended — so callers read the raw snapshot.
+    """
+    if not ELIGIBLE_ROLLUP_ENABLED or not periods:
+        return None
+    bounds = {"rollup_start": periods[0], "rollup_end": periods[-1]}
+    try:
+        state = db.execute(
+            text(
+                f"SELECT period, covered_through FROM {ROLLUP_STATE_TABLE} "
+                "WHERE period BETWEEN :rollup_start AND :rollup_end"
+            ),
+            bounds,
+        ).fetchall()
+    except Exception:
+        # Rollup tables not created yet (the refresh job hasn't run in this environment).
+        return None
+    covered = {
+        int(period): str(covered_through)[:10] for period, covered_through in state
+    }
+    for period in periods:
+        if covered.get(period, "") < period_bounds(period)[1]:
+            return None
+
+    totals = {period: RollupTotals() for period in periods}
+    rows = db.execute(
+        text(
+            f"""
+            SELECT
+                de.period,
+                ({match_predicate}) AS matched,
+                de.project,
+                de.employees,
+                CASE WHEN ({match_predicate}) THEN de.employee_ids END
+            FROM {ROLLUP_TABLE} de
+            WHERE de.period BETWEEN :rollup_start AND :rollup_end
+              AND {presence_predicate}
+            """
+        ),
+        {**params, **bounds},
+    )
+    for period, matched, project, employees, ids in rows:
+        month = totals.get(int(period))
+        if month is None:
+            continue
+        month.present = True
+        if matched:
+            month.add_cell(project, int(employees or 0), ids)
+    return totals
+
+
+def _parse_period(value: str) -> int:
+    parsed = datetime.strptime(value, "%Y-%m")
+    return period_of(parsed.year, parsed.month)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh the data_record_eligible monthly rollup.")
+    parser.add_argument("--start", help="First month to rebuild, YYYY-MM (default: previous month)")
+    parser.add_argument("--end", help="Last month to rebuild, YYYY-MM (default: current month)")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    current = period_of(today.year, today.month)
+    previous = period_of(today.year - 1, 12) if today.month == 1 else current - 1
+    start = _parse_period(args.start) if args.start else previous
+    end = _parse_period(args.end) if args.end else current
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        for period, cells in refresh_rollup(db, periods_between(start, end), today).items():
+            print(f"{period}: {cells} cells")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
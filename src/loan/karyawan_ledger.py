@@ -0,0 +1,472 @@
+"""
+Per-employee loan ledger for /loan/karyawan-overdue.
+
+The overdue list aggregates every overdue td_loan row (kasbon) or td_loan_history row
+(extradana / aku_cicil) per employee, netting each row's partial payments from
+td_loan_payment / td_loan_payment_allocation through correlated subqueries. That is
+a multi-table aggregation on every request for a list that only changes when a loan,
+installment or payment does.
+
+loan_karyawan_ledger keeps one row per (product, id_karyawan): loan_count (the
+employee's product mix), and over the overdue rows their count, the outstanding
+principal / admin fee / payment left after netting, the partial payments already
+netted (overdue_paid), and the oldest and latest due dates (max days overdue and the
+last repayment date). An unranged overdue request becomes a primary-key range read of
+the products it covers plus the employee/org lookups.
+
+A refresh recomputes only employees that changed since the last one:
+
+- new loans (td_loan.id above the loan watermark),
+- new payments (td_loan_payment.id above the payment watermark),
+- overdue rows that changed, found by comparing per-employee signatures of the
+  status = 4 rows with the ledger: their count and id sum (rows entering or leaving
+  overdue), the sum of their amounts (edits to an existing loan or installment) and
+  their oldest / latest due dates,
+- payments that changed after they were inserted (confirmed, cancelled or
+  re-allocated, or their amount edited), found by comparing each employee's sum of
+  confirmed payment and allocation amounts with the ledger's paid_signature.
+
+Only the dirty employees' rows are rebuilt (the per-row netting subqueries are the
+expensive part), but finding them is not incremental. None of td_loan, td_loan_history,
+td_loan_payment or td_loan_payment_allocation carries an updated-at column, and an id
+watermark misses status and amount updates. So every run recomputes the overdue and
+paid signatures over all overdue rows and all payment / allocation rows. Those are
+plain grouped scans without the netting, but their cost grows with the tables.
+
+A full rebuild still runs whenever the last one is older than
+KARYAWAN_LEDGER_FULL_REFRESH_HOURS, as a backstop for edits none of these see:
+
+    python -m src.loan.karyawan_ledger           # incremental (full when due)
+    python -m src.loan.karyawan_ledger --full
+
+crud reads the ledger only while the last refresh started less than
+KARYAWAN_LEDGER_MAX_AGE_MINUTES ago, and evaluates the aggregation inline otherwise.
+A ledger answer can therefore lag the tables by up to that window (plus
+FRESHNESS_CHECK_SECONDS), so /loan/karyawan-overdue reports the refresh it was served
+from as ledger_refreshed_at.
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+KARYAWAN_LEDGER_ENABLED = os.getenv("KARYAWAN_LEDGER_ENABLED", "1") == "1"
+KARYAWAN_LEDGER_MAX_AGE_MINUTES = int(os.getenv("KARYAWAN_LEDGER_MAX_AGE_MINUTES", "30"))
+KARYAWAN_LEDGER_FULL_REFRESH_HOURS = int(os.getenv("KARYAWAN_LEDGER_FULL_REFRESH_HOURS", "24"))
+FRESHNESS_CHECK_SECONDS = 60
+
+KARYAWAN_LEDGER_TABLE = "loan_karyawan_ledger"
+KARYAWAN_LEDGER_STATE_TABLE = "loan_karyawan_ledger_state"
+KARYAWAN_LEDGER_DIRTY_TABLE = "loan_karyawan_ledger_dirty"
+
+# Partial payments credited to one overdue lump-sum loan l / installment tlh of loan tl:
+# unallocated confirmed td_loan_payment rows plus td_loan_payment_allocation slices.
+LUMP_PAID_SQL = """(
+                SELECT COALESCE(SUM(amt), 0) FROM (
+                    SELECT p.amount amt FROM td_loan_payment p
+                    WHERE p.loan_id = l.id AND p.status = 1 AND p.loan_history_id IS NULL
+                      AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
+                    UNION ALL
+                    SELECT a.amount FROM td_loan_payment_allocation a
+                    INNER JOIN td_loan_payment p ON p.id = a.payment_id
+                    WHERE p.loan_id = l.id AND p.status = 1 AND a.loan_history_id IS NULL
+                ) t
+            )"""
+INSTALLMENT_PAID_SQL = """(
+                SELECT COALESCE(SUM(amt), 0) FROM (
+                    SELECT p.amount amt FROM td_loan_payment p
+                    WHERE p.loan_id = tl.id AND p.status = 1 AND p.loan_history_id = tlh.id
+                      AND NOT EXISTS (SELECT 1 FROM td_loan_payment_allocation a WHERE a.payment_id = p.id)
+                    UNION ALL
+                    SELECT a.amount FROM td_loan_payment_allocation a
+                    INNER JOIN td_loan_payment p ON p.id = a.payment_id
+                    WHERE p.loan_id = tl.id AND p.status = 1 AND a.loan_history_id = tlh.id
+                ) t
+            )"""
+
+# The overdue rows of each source: status 4, and for installments a known due date.
+OVERDUE_LUMP = "l.loan_status = 4"
+OVERDUE_INSTALLMENT = "tlh.status = 4 AND tlh.due_date IS NOT NULL"
+
+# (product, installment source?)
+LEDGER_PRODUCTS: Tuple[Tuple[str, bool], ...] = (
+    ("kasbon", False),
+    ("extradana", True),
+    ("aku_cicil", True),
+)
+
+_CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {KARYAWAN_LEDGER_TABLE} (
+    product VARCHAR(16) NOT NULL,
+    id_karyawan INT NOT NULL,
+    loan_count INT NOT NULL DEFAULT 0,
+    overdue_count INT NOT NULL DEFAULT 0,
+    overdue_signature BIGINT NOT NULL DEFAULT 0,
+    overdue_principal DECIMAL(24,4) NOT NULL DEFAULT 0,
+    overdue_admin_fee DECIMAL(24,4) NOT NULL DEFAULT 0,
+    overdue_payment DECIMAL(24,4) NOT NULL DEFAULT 0,
+    overdue_paid DECIMAL(24,4) NOT NULL DEFAULT 0,
+    oldest_due_date DATE NULL,
+    last_due_date DATE NULL,
+    amount_signature DECIMAL(24,4) NOT NULL DEFAULT 0,
+    paid_signature DECIMAL(24,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (product, id_karyawan),
+    KEY idx_lkl_overdue (product, overdue_count, overdue_principal),
+    KEY idx_lkl_karyawan (id_karyawan)
+)
+"""
+
+_CREATE_STATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {KARYAWAN_LEDGER_STATE_TABLE} (
+    id TINYINT NOT NULL PRIMARY KEY,
+    refreshed_at DATETIME NOT NULL,
+    full_refreshed_at DATETIME NOT NULL,
+    loan_watermark BIGINT NOT NULL,
+    payment_watermark BIGINT NOT NULL
+)
+"""
+
+_CREATE_DIRTY_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {KARYAWAN_LEDGER_DIRTY_TABLE} (
+    id_karyawan INT NOT NULL PRIMARY KEY
+)
+"""
+
+_LEDGER_COLUMNS = (
+    "id_karyawan, product, loan_count, overdue_count, overdue_signature, overdue_principal, "
+    "overdue_admin_fee, overdue_payment, overdue_paid, oldest_due_date, last_due_date, "
+    "amount_signature, paid_signature"
+)
+
+# Columns added since the ledger table was first created; a table without them is
+# rebuilt in full.
+_SIGNATURE_COLUMNS = ("amount_signature", "paid_signature")
+
+# Per-row amounts behind the ledger's figures, summed into amount_signature.
+LUMP_AMOUNTS = "l.total_payment + l.total_loan + l.admin_fee"
+INSTALLMENT_AMOUNTS = (
+    "tlh.monthly + ROUND(tl.total_loan / tl.duration, 0) + ROUND(tl.admin_fee / tl.duration, 0)"
+)
+
+
+def _product_conditions(db: Session) -> Dict[str, str]:
+    try:
+        from .crud import resolve_loan_conditions
+    except ImportError:
+        from loan.crud import resolve_loan_conditions
+
+    return {
+        product: resolve_loan_conditions(product, db, alias="tl" if installment else "l")
+        for product, installment in LEDGER_PRODUCTS
+    }
+
+
+def _scope_join(karyawan_column: str, scoped: bool) -> str:
+    if not scoped:
+        return ""
+    return f"INNER JOIN {KARYAWAN_LEDGER_DIRTY_TABLE} d ON d.id_karyawan = {karyawan_column}"
+
+
+def _ledger_rows_sql(conditions: Dict[str, str], scoped: bool) -> str:
+    """One ledger row per (employee, product); `scoped` limits it to the dirty employees."""
+    branches = []
+    for product, installment in LEDGER_PRODUCTS:
+        if installment:
+            branches.append(f"""
+        SELECT tl.id_karyawan, '{product}' AS product, tl.id AS loan_id, tlh.id AS row_id,
+            CASE WHEN {OVERDUE_INSTALLMENT} THEN 1 ELSE 0 END AS overdue,
+            ROUND(tl.total_loan / tl.duration, 0) AS principal,
+            ROUND(tl.admin_fee / tl.duration, 0) AS admin_fee,
+            tlh.monthly AS amount_due,
+            tlh.due_date AS due_date,
+            CASE WHEN {OVERDUE_INSTALLMENT} THEN {INSTALLMENT_PAID_SQL} ELSE 0 END AS paid,
+            {INSTALLMENT_AMOUNTS} AS amounts
+        FROM td_loan_history tlh
+        INNER JOIN td_loan tl ON tlh.loan_form_id = tl.id
+        {_scope_join("tl.id_karyawan", scoped)}
+        WHERE tl.id_karyawan IS NOT NULL
+        AND {conditions[product]}""")
+        else:
+            branches.append(f"""
+        SELECT l.id_karyawan, '{product}' AS product, l.id AS loan_id, l.id AS row_id,
+            CASE WHEN {OVERDUE_LUMP} THEN 1 ELSE 0 END AS overdue,
+            l.total_loan AS principal,
+            l.admin_fee AS admin_fee,
+            l.total_payment AS amount_due,
+            l.repayment_date AS due_date,
+            CASE WHEN {OVERDUE_LUMP} THEN {LUMP_PAID_SQL} ELSE 0 END AS paid,
+            {LUMP_AMOUNTS} AS amounts
+        FROM td_loan l
+        {_scope_join("l.id_karyawan", scoped)}
+        WHERE l.id_karyawan IS NOT NULL
+        AND {conditions[product]}""")
+    remaining = "GREATEST(r.amount_due - r.paid, 0)"
+    return f"""
+    SELECT g.*, COALESCE(ps.paid_signature, 0)
+    FROM (
+        SELECT
+            r.id_karyawan,
+            r.product,
+            COUNT(DISTINCT r.loan_id),
+            SUM(r.overdue),
+            SUM(CASE WHEN r.overdue = 1 THEN r.row_id ELSE 0 END),
+            COALESCE(SUM(CASE WHEN r.overdue = 1 AND r.amount_due > 0
+                THEN r.principal * {remaining} / r.amount_due ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN r.overdue = 1 AND r.amount_due > 0
+                THEN r.admin_fee * {remaining} / r.amount_due ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN r.overdue = 1 THEN {remaining} END), 0),
+            COALESCE(SUM(r.paid), 0),
+            DATE(MIN(CASE WHEN r.overdue = 1 THEN r.due_date END)),
+            DATE(MAX(CASE WHEN r.overdue = 1 THEN r.due_date END)),
+            COALESCE(ROUND(SUM(CASE WHEN r.overdue = 1 THEN r.amounts END), 2), 0)
+        FROM ({" UNION ALL ".join(branches)}
+        ) r
+        GROUP BY r.id_karyawan, r.product
+    ) g
+    LEFT JOIN ({_paid_signatures_sql(conditions, scoped)}
+    ) ps ON ps.id_karyawan = g.id_karyawan AND ps.product = g.product
+    """
+
+
+def _overdue_signatures_sql(conditions: Dict[str, str]) -> str:
+    """(id_karyawan, product, overdue_count, overdue_signature, amount_signature,
+    oldest_due_date, last_due_date) from the overdue rows alone."""
+    branches = []
+    for product, installment in LEDGER_PRODUCTS:
+        if installment:
+            branches.append(f"""
+        SELECT tl.id_karyawan, '{product}' AS product, COUNT(*) AS overdue_count, SUM(tlh.id) AS overdue_signature,
+            COALESCE(ROUND(SUM({INSTALLMENT_AMOUNTS}), 2), 0) AS amount_signature,
+            DATE(MIN(tlh.due_date)) AS oldest_due_date, DATE(MAX(tlh.due_date)) AS last_due_date
+        FROM td_loan_history tlh
+        INNER JOIN td_loan tl ON tlh.loan_form_id = tl.id
+        WHERE {OVERDUE_INSTALLMENT} AND tl.id_karyawan IS NOT NULL AND {conditions[product]}
+        GROUP BY tl.id_karyawan""")
+        else:
+            branches.append(f"""
+        SELECT l.id_karyawan, '{product}' AS product, COUNT(*) AS overdue_count, SUM(l.id) AS overdue_signature,
+            COALESCE(ROUND(SUM({LUMP_AMOUNTS}), 2), 0) AS amount_signature,
+            DATE(MIN(l.repayment_date)) AS oldest_due_date, DATE(MAX(l.repayment_date)) AS last_due_date
+        FROM td_loan l
+        WHERE {OVERDUE_LUMP} AND l.id_karyawan IS NOT NULL AND {conditions[product]}
+        GROUP BY l.id_karyawan""")
+    return " UNION ALL ".join(branches)
+
+
+def _paid_signatures_sql(conditions: Dict[str, str], scoped: bool = False) -> str:
+    """(id_karyawan, product, paid_signature): confirmed payment plus allocation amounts
+    on each employee's loans of the product. Any payment confirmed, cancelled,
+    re-allocated or edited after it was inserted moves the sum."""
+    branches = []
+    for product, installment in LEDGER_PRODUCTS:
+        alias = "tl" if installment else "l"
+        loan = f"""INNER JOIN td_loan {alias} ON {alias}.id = p.loan_id
+            {_scope_join(f"{alias}.id_karyawan", scoped)}
+            WHERE p.status = 1 AND {alias}.id_karyawan IS NOT NULL AND {conditions[product]}"""
+        branches.append(f"""
+            SELECT {alias}.id_karyawan, '{product}' AS product, p.amount AS amount
+            FROM td_loan_payment p
+            {loan}""")
+        branches.append(f"""
+            SELECT {alias}.id_karyawan, '{product}' AS product, a.amount AS amount
+            FROM td_loan_payment_allocation a
+            INNER JOIN td_loan_payment p ON p.id = a.payment_id
+            {loan}""")
+    return f"""
+        SELECT s.id_karyawan, s.product, COALESCE(ROUND(SUM(s.amount), 2), 0) AS paid_signature
+        FROM ({" UNION ALL ".join(branches)}
+        ) s
+        GROUP BY s.id_karyawan, s.product"""
+
+
+def _mark_dirty_sql(conditions: Dict[str, str]) -> List[str]:
+    """Statements that fill the dirty table. The first two read only rows above the
+    watermarks; the signature comparisons scan every overdue row and every payment /
+    allocation row (see the module docstring)."""
+    signatures = _overdue_signatures_sql(conditions)
+    paid = _paid_signatures_sql(conditions)
+    insert = f"INSERT IGNORE INTO {KARYAWAN_LEDGER_DIRTY_TABLE} (id_karyawan)"
+    return [
+        f"""{insert}
+        SELECT DISTINCT l.id_karyawan FROM td_loan l
+        WHERE l.id > :loan_watermark AND l.id_karyawan IS NOT NULL""",
+        f"""{insert}
+        SELECT DISTINCT l.id_karyawan FROM td_loan_payment p
+        INNER JOIN td_loan l ON l.id = p.loan_id
+        WHERE p.id > :payment_watermark AND l.id_karyawan IS NOT NULL""",
+        f"""{insert}
+        SELECT cur.id_karyawan FROM ({signatures}
+        ) cur
+        LEFT JOIN {KARYAWAN_LEDGER_TABLE} kl
+            ON kl.product = cur.product AND kl.id_karyawan = cur.id_karyawan
+        WHERE kl.id_karyawan IS NULL
+           OR kl.overdue_count != cur.overdue_count
+           OR kl.overdue_signature != cur.overdue_signature
+           OR kl.amount_signature != cur.amount_signature
+           OR NOT (kl.oldest_due_date <=> cur.oldest_due_date)
+           OR NOT (kl.last_due_date <=> cur.last_due_date)""",
+        f"""{insert}
+        SELECT kl.id_karyawan FROM {KARYAWAN_LEDGER_TABLE} kl
+        LEFT JOIN ({signatures}
+        ) cur ON cur.product = kl.product AND cur.id_karyawan = kl.id_karyawan
+        WHERE kl.overdue_count > 0 AND cur.id_karyawan IS NULL""",
+        f"""{insert}
+        SELECT cur.id_karyawan FROM ({paid}
+        ) cur
+        LEFT JOIN {KARYAWAN_LEDGER_TABLE} kl
+            ON kl.product = cur.product AND kl.id_karyawan = cur.id_karyawan
+        WHERE kl.id_karyawan IS NULL OR kl.paid_signature != cur.paid_signature""",
+        f"""{insert}
+        SELECT kl.id_karyawan FROM {KARYAWAN_LEDGER_TABLE} kl
+        LEFT JOIN ({paid}
+        ) cur ON cur.product = kl.product AND cur.id_karyawan = kl.id_karyawan
+        WHERE kl.paid_signature != 0 AND cur.id_karyawan IS NULL""",
+    ]
+
+
+def ensure_karyawan_ledger_tables(db: Session) -> bool:
+    """Create the ledger tables; returns True when the ledger table was (re)created
+    and needs a full rebuild."""
+    present = db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = :table"
+            f" AND column_name IN ({', '.join(repr(column) for column in _SIGNATURE_COLUMNS)})"
+        ),
+        {"table": KARYAWAN_LEDGER_TABLE},
+    ).scalar()
+    created = present != len(_SIGNATURE_COLUMNS)
+    if created:
+        db.execute(text(f"DROP TABLE IF EXISTS {KARYAWAN_LEDGER_TABLE}"))
+    db.execute(text(_CREATE_TABLE_SQL))
+    db.execute(text(_CREATE_STATE_TABLE_SQL))
+    db.execute(text(_CREATE_DIRTY_TABLE_SQL))
+    return created
+
+
+def refresh_karyawan_ledger(db: Session, full: bool = False) -> Dict[str, int]:
+    """Recompute the ledger rows of employees changed since the last refresh (all of
+    them when `full` or a full rebuild is due); returns the employee count and mode."""
+    created = ensure_karyawan_ledger_tables(db)
+    state = db.execute(
+        text(
+            f"SELECT full_refreshed_at, loan_watermark, payment_watermark "
+            f"FROM {KARYAWAN_LEDGER_STATE_TABLE} WHERE id = 1"
+        )
+    ).fetchone()
+    # Stamp and read the watermarks first: anything written during the run is picked up
+    # next time as well.
+    started_at = datetime.now()
+    watermarks = {
+        "loan_watermark": db.execute(text("SELECT COALESCE(MAX(id), 0) FROM td_loan")).scalar(),
+        "payment_watermark": db.execute(text("SELECT COALESCE(MAX(id), 0) FROM td_loan_payment")).scalar(),
+    }
+    full = full or created or state is None or (
+        started_at - state[0] > timedelta(hours=KARYAWAN_LEDGER_FULL_REFRESH_HOURS)
+    )
+    conditions = _product_conditions(db)
+
+    if full:
+        db.execute(text(f"DELETE FROM {KARYAWAN_LEDGER_TABLE}"))
+        db.execute(text(
+            f"INSERT INTO {KARYAWAN_LEDGER_TABLE} ({_LEDGER_COLUMNS}) "
+            + _ledger_rows_sql(conditions, scoped=False)
+        ))
+        employees = db.execute(
+            text(f"SELECT COUNT(DISTINCT id_karyawan) FROM {KARYAWAN_LEDGER_TABLE}")
+        ).scalar()
+        full_refreshed_at = started_at
+    else:
+        db.execute(text(f"DELETE FROM {KARYAWAN_LEDGER_DIRTY_TABLE}"))
+        previous = {"loan_watermark": state[1], "payment_watermark": state[2]}
+        for sql in _mark_dirty_sql(conditions):
+            db.execute(text(sql), previous)
+        db.execute(text(
+            f"DELETE kl FROM {KARYAWAN_LEDGER_TABLE} kl "
+            f"INNER JOIN {KARYAWAN_LEDGER_DIRTY_TABLE} d ON d.id_karyawan = kl.id_karyawan"
+        ))
+        db.execute(text(
+            f"INSERT INTO {KARYAWAN_LEDGER_TABLE} ({_LEDGER_COLUMNS}) "
+            + _ledger_rows_sql(conditions, scoped=True)
+        ))
+        employees = db.execute(text(f"SELECT COUNT(*) FROM {KARYAWAN_LEDGER_DIRTY_TABLE}")).scalar()
+        full_refreshed_at = state[0]
+
+    db.execute(
+        text(
+            f"INSERT INTO {KARYAWAN_LEDGER_STATE_TABLE} "
+            "(id, refreshed_at, full_refreshed_at, loan_watermark, payment_watermark) "
+            "VALUES (1, :refreshed_at, :full_refreshed_at, :loan_watermark, :payment_watermark) "
+            "ON DUPLICATE KEY UPDATE refreshed_at = VALUES(refreshed_at), "
+            "full_refreshed_at = VALUES(full_refreshed_at), "
+            "loan_watermark = VALUES(loan_watermark), payment_watermark = VALUES(payment_watermark)"
+        ),
+        {"refreshed_at": started_at, "full_refreshed_at": full_refreshed_at, **watermarks},
+    )
+    db.commit()
+    _freshness.update(checked_at=0.0)
+    return {"full": int(full), "employees": employees or 0}
+
+
+_freshness: Dict[str, object] = {"checked_at": 0.0, "refreshed_at": None}
+
+
+def karyawan_ledger_refreshed_at(db: Session) -> Optional[datetime]:
+    """Start of the last ledger refresh while it is recent enough to answer overdue
+    requests, None otherwise; the answer is cached for FRESHNESS_CHECK_SECONDS."""
+    if not KARYAWAN_LEDGER_ENABLED:
+        return None
+    now = time.monotonic()
+    if now - _freshness["checked_at"] < FRESHNESS_CHECK_SECONDS:
+        return _freshness["refreshed_at"]
+    try:
+        refreshed_at = db.execute(
+            text(f"SELECT refreshed_at FROM {KARYAWAN_LEDGER_STATE_TABLE} WHERE id = 1")
+        ).scalar()
+    except Exception:
+        # Table not created yet (the refresh job hasn't run in this environment).
+        refreshed_at = None
+    if refreshed_at is not None and (
+        datetime.now() - refreshed_at > timedelta(minutes=KARYAWAN_LEDGER_MAX_AGE_MINUTES)
+    ):
+        refreshed_at = None
+    _freshness.update(checked_at=now, refreshed_at=refreshed_at)
+    return refreshed_at
+
+
+def ledger_products(loan_type: str) -> Tuple[str, ...]:
+    """Ledger products behind a single (non-"all") overdue loan_type: kasbon reads
+    td_loan, the installment types td_loan_history."""
+    if loan_type == "installment":
+        return ("extradana", "aku_cicil")
+    if loan_type in ("extradana", "aku_cicil"):
+        return (loan_type,)
+    return ("kasbon",)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh the per-employee loan ledger.")
+    parser.add_argument("--full", action="store_true", help="Rebuild every employee's rows")
+    args = parser.parse_args(argv)
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        result = refresh_karyawan_ledger(db, full=args.full)
+        mode = "full" if result["full"] else "incremental"
+        print(f"{mode} refresh: {result['employees']} employees recomputed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Time partitioning for the td_loan / td_loan_history analytics reads.
+
+Every dated analytics query filters one of these tables on a plain day range
+(date_filters.range_predicate: `column >= :range_start AND column < :range_end`), so
+with the tables RANGE COLUMNS-partitioned on that column MySQL only opens the
+partitions the range touches. The layout is a strategy picked by
+LOAN_TIME_PARTITIONING:
+
+    none     leave the tables as they are (default)
+    monthly  one partition per calendar month
+    yearly   one partition per calendar year
+
+Either range strategy keeps everything older than LOAN_ARCHIVE_AFTER_MONTHS in a
+single p_archive partition (long-closed loans that only all-history reads touch),
+LOAN_PARTITION_LOOKAHEAD partitions ahead of the current one, and a p_future
+catch-all. Rows whose partition date is NULL (requests not processed yet) sort
+below every bound and land in p_archive, which ranged reads prune anyway.
+
+    python -m src.loan.partitioning            # print the statements for this layout
+    python -m src.loan.partitioning --apply    # run them
+
+The first run partitions the table; later runs roll it forward, folding partitions
+that have aged past the cutoff into p_archive and splitting new ones off p_future.
+MySQL requires every PRIMARY/UNIQUE key to include the partition column, so the
+initial ALTER needs `id` keys widened to (id, <column>) first; the plan is printed
+for review rather than applied by default.
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+LOAN_TIME_PARTITIONING = os.getenv("LOAN_TIME_PARTITIONING", "none")
+LOAN_ARCHIVE_AFTER_MONTHS = int(os.getenv("LOAN_ARCHIVE_AFTER_MONTHS", "24"))
+LOAN_PARTITION_LOOKAHEAD = int(os.getenv("LOAN_PARTITION_LOOKAHEAD", "3"))
+
+# table -> the column its dated reads filter on
+PARTITIONED_COLUMNS: Dict[str, str] = {
+    "td_loan": "proses_date",
+    "td_loan_history": "due_date",
+}
+
+ARCHIVE_PARTITION = "p_archive"
+FUTURE_PARTITION = "p_future"
+
+
+def _month_start(month_index: int) -> date:
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+@dataclass(frozen=True)
+class RangePartitioning:
+    """Fixed-width RANGE COLUMNS partitions of `step_months` calendar months."""
+
+    step_months: int
+    archive_after_months: int = LOAN_ARCHIVE_AFTER_MONTHS
+    lookahead: int = LOAN_PARTITION_LOOKAHEAD
+
+    def partition_name(self, lower: date) -> str:
+        if self.step_months % 12 == 0:
+            return f"p{lower.year}"
+        return f"p{lower.year}{lower.month:02d}"
+
+    def bounds(self, today: date) -> List[Tuple[str, date]]:
+        """[(name, exclusive upper bound)] from p_archive up to the last lookahead
+        partition, aligned to step boundaries; p_future is implied."""
+        current = today.year * 12 + today.month - 1
+        current -= current % self.step_months
+        archive_bound = current - self.archive_after_months
+        archive_bound -= archive_bound % self.step_months
+        result = [(ARCHIVE_PARTITION, _month_start(archive_bound))]
+        lower = archive_bound
+        while lower <= current + self.lookahead * self.step_months:
+            upper = lower + self.step_months
+            result.append((self.partition_name(_month_start(lower)), _month_start(upper)))
+            lower = upper
+        return result
+
+
+STRATEGIES: Dict[str, Optional[RangePartitioning]] = {
+    "none": None,
+    "monthly": RangePartitioning(step_months=1),
+    "yearly": RangePartitioning(step_months=12),
+}
+
+
+def get_strategy(name: str = LOAN_TIME_PARTITIONING) -> Optional[RangePartitioning]:
+    if name not in STRATEGIES:
+        raise ValueError(f"LOAN_TIME_PARTITIONING must be one of {', '.join(STRATEGIES)}, got {name!r}")
+    return STRATEGIES[name]
+
+
+def _partition_sql(name: str, upper: Optional[date]) -> str:
+    bound = "MAXVALUE" if upper is None else f"'{upper.isoformat()}'"
+    return f"PARTITION {name} VALUES LESS THAN ({bound})"
+
+
+def create_partitions_sql(table: str, column: str, bounds: Sequence[Tuple[str, date]]) -> str:
+    partitions = [_partition_sql(name, upper) for name, upper in bounds]
+    partitions.append(_partition_sql(FUTURE_PARTITION, None))
+    body = ",\n    ".join(partitions)
+    return f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS ({column}) (\n    {body}\n)"
+
+
+def roll_partitions_sql(
+    table: str,
+    existing: Sequence[Tuple[str, Optional[date]]],
+    bounds: Sequence[Tuple[str, date]],
+) -> List[str]:
+    """REORGANIZE statements taking the current [(name, upper or None)] layout to
+    `bounds`: aged partitions merge into p_archive, new ones split off p_future."""
+    statements = []
+    archive_bound = bounds[0][1]
+    aged = [
+        (name, upper) for name, upper in existing
+        if name != ARCHIVE_PARTITION and upper is not None and upper <= archive_bound
+    ]
+    if aged:
+        # A REORGANIZE must cover exactly the merged ranges, so p_archive grows to the
+        # last aged partition's bound rather than to archive_bound itself.
+        merged = ", ".join([ARCHIVE_PARTITION] + [name for name, _ in aged])
+        statements.append(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {merged} "
+            f"INTO ({_partition_sql(ARCHIVE_PARTITION, aged[-1][1])})"
+        )
+    last_upper = max((upper for _, upper in existing if upper is not None), default=archive_bound)
+    added = [(name, upper) for name, upper in bounds[1:] if upper > last_upper]
+    if added:
+        partitions = [_partition_sql(name, upper) for name, upper in added]
+        partitions.append(_partition_sql(FUTURE_PARTITION, None))
+        statements.append(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} "
+            f"INTO ({', '.join(partitions)})"
+        )
+    return statements
+
+
+def existing_partitions(db: Session, table: str) -> List[Tuple[str, Optional[date]]]:
+    """[(name, exclusive upper bound or None for MAXVALUE)]; empty if unpartitioned."""
+    rows = db.execute(
+        text(
+            "SELECT partition_name, partition_description FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :table AND partition_name IS NOT NULL "
+            "ORDER BY partition_ordinal_position"
+        ),
+        {"table": table},
+    ).fetchall()
+    return [
+        (name, None if description == "MAXVALUE" else date.fromisoformat(description.strip("'")))
+        for name, description in rows
+    ]
+
+
+def partition_plan(db: Session, strategy: RangePartitioning, today: Optional[date] = None) -> List[str]:
+    bounds = strategy.bounds(today or date.today())
+    statements = []
+    for table, column in PARTITIONED_COLUMNS.items():
+        existing = existing_partitions(db, table)
+        if existing:
+            statements.extend(roll_partitions_sql(table, existing, bounds))
+        else:
+            statements.append(create_partitions_sql(table, column, bounds))
+    return statements
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Plan or apply td_loan / td_loan_history time partitions.")
+    parser.add_argument("--strategy", default=LOAN_TIME_PARTITIONING, choices=sorted(STRATEGIES),
+                        help="Partition layout (default: LOAN_TIME_PARTITIONING)")
+    parser.add_argument("--apply", action="store_true", help="Run the statements instead of printing them")
+    args = parser.parse_args(argv)
+
+    strategy = get_strategy(args.strategy)
+    if strategy is None:
+        print("Partitioning strategy is 'none'; nothing to do")
+        return
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        statements = partition_plan(db, strategy)
+        for sql in statements:
+            print(f"{sql};")
+            if args.apply:
+                db.execute(text(sql))
+        if not statements:
+            print("Partitions are up to date")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
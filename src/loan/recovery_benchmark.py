@@ -0,0 +1,290 @@
+"""
+Benchmark for bad-debt recovery monthly with loan_type=all.
+
+Compares the combined path (every product's row-level and partial-payment recoveries
+in one UNION ALL statement, accumulated in one pass) with the per-product path it
+replaced (one row-level and one partial-payment statement per product, merged month by
+month in Python). Both paths build their SQL from the same branches, so the timings
+differ only in round trips, scans and the merge; the results are checked for equality.
+
+    python -m src.loan.recovery_benchmark --months 36 --repeat 5
+
+To run without production data, point DB_NAME at a scratch database and seed synthetic
+loans first (refuses if any of the loan tables already exists):
+
+    python -m src.loan.recovery_benchmark --seed-synthetic 50000 --months 36
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    from . import crud
+    from .date_filters import period_bounds, period_of
+    from .sql_builder import statement
+except ImportError:
+    from loan import crud
+    from loan.date_filters import period_bounds, period_of
+    from loan.sql_builder import statement
+
+_SYNTHETIC_TABLES = {
+    "tbl_gmc": """
+        CREATE TABLE tbl_gmc (
+            id INT PRIMARY KEY, kode_gmc VARCHAR(32), group_gmc VARCHAR(32), aktif VARCHAR(3),
+            keterangan VARCHAR(128), keterangan3 TINYINT
+        )""",
+    "loan_setting": "CREATE TABLE loan_setting (id INT PRIMARY KEY, loan_type VARCHAR(64))",
+    "tbl_project_management": """
+        CREATE TABLE tbl_project_management (
+            id INT AUTO_INCREMENT PRIMARY KEY, gmc_id INT, client_segment VARCHAR(32), product_type VARCHAR(32)
+        )""",
+    "td_karyawan": """
+        CREATE TABLE td_karyawan (
+            id_karyawan INT PRIMARY KEY, valdo_inc VARCHAR(32), placement VARCHAR(32), project VARCHAR(32),
+            status CHAR(1), loan_kasbon_eligible CHAR(1), klient VARCHAR(32)
+        )""",
+    "td_loan": """
+        CREATE TABLE td_loan (
+            id INT PRIMARY KEY, id_karyawan INT, loan_id INT, duration INT, disbursement INT,
+            total_loan BIGINT, admin_fee BIGINT, total_payment BIGINT, loan_status INT,
+            payment_date DATE NULL, repayment_date DATE, proses_date DATETIME,
+            KEY idx_bench_loan_status (loan_status)
+        )""",
+    "td_loan_history": """
+        CREATE TABLE td_loan_history (
+            id INT PRIMARY KEY, loan_form_id INT, due_date DATE, payment_date DATE NULL, status INT,
+            monthly BIGINT, KEY idx_bench_loan_form (loan_form_id)
+        )""",
+    "td_loan_payment": """
+        CREATE TABLE td_loan_payment (
+            id INT PRIMARY KEY, loan_id INT, loan_history_id INT NULL, amount BIGINT, status INT,
+            created_at DATETIME, payment_date DATE NULL, KEY idx_bench_payment_loan (loan_id)
+        )""",
+    "td_loan_payment_allocation": """
+        CREATE TABLE td_loan_payment_allocation (
+            id INT AUTO_INCREMENT PRIMARY KEY, payment_id INT, loan_history_id INT, amount BIGINT,
+            created_at DATETIME
+        )""",
+}
+
+# loan_setting ids: kasbon, extradana and aku_cicil (looked up by loan_type = 'AkuCicil').
+_PRODUCT_SETTINGS = {"kasbon": (1, "Kasbon"), "extradana": (2, "Extradana 3 Bulan"), "aku_cicil": (44, "AkuCicil")}
+
+# Payment offsets in days from the due date: on time, within M+2, and M+3 or later.
+_PAYMENT_OFFSETS = (-5, 10, 40, 95, 130, 200)
+
+
+def synthetic_rows(loans: int, months: int, seed: int = 7) -> Iterator[Tuple[str, dict]]:
+    """(table, row) pairs for a synthetic loan book disbursed over the last `months` months."""
+    rng = random.Random(seed)
+    yield "tbl_gmc", dict(id=1, kode_gmc="EMP", group_gmc="sub_client", aktif="Yes",
+                          keterangan=crud.ALLOWED_COMPANIES[0], keterangan3=1)
+    placements = [f"SRC{index}" for index in range(20)]
+    projects = [f"PRJ{index}" for index in range(60)]
+    for index, code in enumerate(placements):
+        yield "tbl_gmc", dict(id=100 + index, kode_gmc=code, group_gmc="placement_client", aktif="Yes",
+                              keterangan=f"Placement {index}", keterangan3=1)
+    for index, code in enumerate(projects):
+        yield "tbl_gmc", dict(id=200 + index, kode_gmc=code, group_gmc="client_project", aktif="Yes",
+                              keterangan=f"Project {index}", keterangan3=1)
+        yield "tbl_project_management", dict(gmc_id=200 + index, client_segment=str(index % 4),
+                                             product_type=str(index % 3))
+    for setting_id, loan_type in _PRODUCT_SETTINGS.values():
+        yield "loan_setting", dict(id=setting_id, loan_type=loan_type)
+
+    employees = max(1, loans // 4)
+    for id_karyawan in range(1, employees + 1):
+        yield "td_karyawan", dict(id_karyawan=id_karyawan, valdo_inc="EMP", placement=rng.choice(placements),
+                                  project=rng.choice(projects), status="1", loan_kasbon_eligible="1", klient="x")
+
+    first_day = date.today() - timedelta(days=months * 30)
+    history_id = payment_id = 0
+    for loan_id in range(1, loans + 1):
+        product = rng.choice(tuple(_PRODUCT_SETTINGS))
+        duration = 1 if product == "kasbon" else rng.choice((3, 6, 12))
+        proses_date = first_day + timedelta(days=rng.randrange(months * 30))
+        due_date = proses_date + timedelta(days=30)
+        total_loan = rng.randrange(5, 50) * 100000
+        admin_fee = total_loan // 10
+        status = rng.choice((2, 2, 2, 4, 1))
+        paid = due_date + timedelta(days=rng.choice(_PAYMENT_OFFSETS)) if status == 2 and duration == 1 else None
+        yield "td_loan", dict(id=loan_id, id_karyawan=rng.randrange(1, employees + 1),
+                              loan_id=_PRODUCT_SETTINGS[product][0], duration=duration, disbursement=1,
+                              total_loan=total_loan, admin_fee=admin_fee, total_payment=total_loan + admin_fee,
+                              loan_status=status, payment_date=paid, repayment_date=due_date,
+                              proses_date=proses_date)
+        if duration == 1:
+            if status == 4 and rng.random() < 0.3:
+                payment_id += 1
+                yield "td_loan_payment", dict(id=payment_id, loan_id=loan_id, loan_history_id=None,
+                                              amount=(total_loan + admin_fee) // 3, status=1,
+                                              created_at=due_date + timedelta(days=rng.choice((10, 100))),
+                                              payment_date=None)
+            continue
+        monthly = (total_loan + admin_fee) // duration
+        for installment in range(duration):
+            history_id += 1
+            installment_due = due_date + timedelta(days=30 * installment)
+            installment_status = rng.choice((2, 2, 4, 1))
+            installment_paid = (
+                installment_due + timedelta(days=rng.choice(_PAYMENT_OFFSETS))
+                if installment_status == 2 else None
+            )
+            yield "td_loan_history", dict(id=history_id, loan_form_id=loan_id, due_date=installment_due,
+                                          payment_date=installment_paid, status=installment_status,
+                                          monthly=monthly)
+            if installment_status == 4 and rng.random() < 0.3:
+                payment_id += 1
+                yield "td_loan_payment", dict(id=payment_id, loan_id=loan_id, loan_history_id=history_id,
+                                              amount=monthly // 2, status=1,
+                                              created_at=installment_due + timedelta(days=rng.choice((10, 120))),
+                                              payment_date=None)
+
+
+def seed_synthetic_loans(db: Session, loans: int, months: int, seed: int = 7, batch_size: int = 5000) -> int:
+    """Create and fill the loan tables in a scratch database; returns rows inserted."""
+    tables = ", ".join(f"'{table}'" for table in _SYNTHETIC_TABLES)
+    present = db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            f"WHERE table_schema = DATABASE() AND table_name IN ({tables})"
+        )
+    ).scalar()
+    if present:
+        raise SystemExit("loan tables already exist; seed only into a scratch database")
+    for ddl in _SYNTHETIC_TABLES.values():
+        db.execute(text(ddl))
+
+    batches: Dict[str, List[dict]] = {table: [] for table in _SYNTHETIC_TABLES}
+    rows = 0
+
+    def flush(table: str) -> None:
+        batch = batches[table]
+        if batch:
+            columns = list(batch[0])
+            db.execute(
+                text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"),
+                batch,
+            )
+            batches[table] = []
+
+    for table, row in synthetic_rows(loans, months, seed):
+        batches[table].append(row)
+        rows += 1
+        if len(batches[table]) >= batch_size:
+            flush(table)
+    for table in _SYNTHETIC_TABLES:
+        flush(table)
+    db.commit()
+    for table in _SYNTHETIC_TABLES:
+        db.execute(text(f"ANALYZE TABLE {table}"))
+    return rows
+
+
+def combined_monthly(db: Session, start_date: str, end_date: str) -> dict:
+    return crud.get_bad_debt_recovery_monthly_summary(
+        db, start_date=start_date, end_date=end_date, loan_type="all"
+    )
+
+
+def per_product_monthly(db: Session, start_date: str, end_date: str) -> dict:
+    """The replaced loan_type=all path: each product's row-level and partial-payment
+    branch as its own statement, merged month by month."""
+    merged: dict = {}
+    for product in crud.ALL_LOAN_TYPES:
+        params: dict = {}
+        branches = crud._bad_debt_recovery_monthly_branches(
+            db, params, product, start_date=start_date, end_date=end_date
+        )
+        for branch in branches:
+            for period, _product, principal, admin_fee, request_count in db.execute(
+                statement(branch), params
+            ).fetchall():
+                if period is None:
+                    continue
+                bucket = merged.setdefault(period, {
+                    "total_principal_recovered": 0,
+                    "total_admin_fee_recovered": 0,
+                    "loan_request_count": 0,
+                })
+                bucket["total_principal_recovered"] += principal or 0
+                bucket["total_admin_fee_recovered"] += admin_fee or 0
+                bucket["loan_request_count"] += request_count or 0
+    return {
+        period: crud._finalize_bad_debt_recovery(
+            metrics["total_principal_recovered"],
+            metrics["total_admin_fee_recovered"],
+            metrics["loan_request_count"],
+        )
+        for period, metrics in merged.items()
+    }
+
+
+def month_window(months: int, today: Optional[date] = None) -> Tuple[str, str]:
+    """First day of the month `months - 1` months back through the end of this month."""
+    today = today or date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    start_date, _ = period_bounds(period_of(month_index // 12, month_index % 12 + 1))
+    _, end_date = period_bounds(period_of(today.year, today.month))
+    return start_date, end_date
+
+
+def _time(run: Callable[[], dict], repeat: int) -> Tuple[List[float], dict]:
+    timings, result = [], {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, result
+
+
+def run_benchmark(db: Session, months: int = 36, repeat: int = 5) -> dict:
+    start_date, end_date = month_window(months)
+    per_product_ms, per_product = _time(lambda: per_product_monthly(db, start_date, end_date), repeat)
+    combined_ms, combined = _time(lambda: combined_monthly(db, start_date, end_date), repeat)
+    per_product_median = statistics.median(per_product_ms)
+    combined_median = statistics.median(combined_ms)
+    return {
+        "window": [start_date, end_date],
+        "months_with_recoveries": len(combined),
+        "results_match": per_product == combined,
+        "per_product_statements": 2 * len(crud.ALL_LOAN_TYPES),
+        "per_product_median_ms": round(per_product_median, 1),
+        "combined_median_ms": round(combined_median, 1),
+        "speedup": round(per_product_median / combined_median, 2) if combined_median else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bad-debt recovery monthly for loan_type=all.")
+    parser.add_argument("--seed-synthetic", type=int, metavar="LOANS",
+                        help="Create synthetic loan tables (scratch databases only)")
+    parser.add_argument("--months", type=int, default=36, help="Months of loans and of the queried window")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        if args.seed_synthetic:
+            rows = seed_synthetic_loans(db, args.seed_synthetic, args.months)
+            print(f"Seeded {rows} synthetic rows")
+        for key, value in run_benchmark(db, args.months, args.repeat).items():
+            print(f"{key:<26}{value}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
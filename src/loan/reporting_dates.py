@@ -0,0 +1,383 @@
+"""
+Materialized reporting dates for repayment-risk and bad-debt recovery.
+
+Repayment-risk attributes each repayment to a reporting month, and bad-debt recovery
+selects repayments that landed M+3 or later (see the rules below). Evaluated inline,
+both are CASE / PERIOD_DIFF expressions over td_loan and td_loan_history columns, so a
+date-ranged query can't use an index and scans every loan or installment.
+
+loan_reporting_date stores the result per row: source 'L' (td_loan, lump-sum) or
+'H' (td_loan_history, installment), row_id, its loan_id, the due/payment dates it was
+computed from, reporting_date and is_bad_debt.
+
+Reads INNER JOIN the rows in range: stored rows filtered directly on the indexed
+reporting_date / is_bad_debt columns, UNION ALL-ed with the rows the last refresh
+can't have seen -- ids past its row watermark and rows of loans that received a
+td_loan_payment past its payment watermark -- evaluated inline. A lagging refresh
+therefore never changes a result, as long as payment dates move together with a
+td_loan_payment row; any other edit is picked up by the next full compare.
+
+A refresh is driven by watermarks, like the karyawan ledger: it re-derives rows with
+an id above the stored td_loan / td_loan_history watermark and rows of loans that
+received a td_loan_payment above the payment watermark, instead of comparing every
+row. A full compare (which also drops rows whose loan or installment is gone) runs
+when the last one is older than REPORTING_DATES_FULL_REFRESH_HOURS:
+
+    python -m src.loan.reporting_dates           # incremental (full when due)
+    python -m src.loan.reporting_dates --full
+
+The crud functions read the table only while the last refresh started less than
+REPORTING_DATES_MAX_AGE_MINUTES ago. Otherwise, or while the table doesn't exist yet,
+they evaluate the same expressions inline.
+"""
+
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    from .date_filters import range_predicate
+except ImportError:
+    from loan.date_filters import range_predicate
+
+REPORTING_DATES_ENABLED = os.getenv("REPORTING_DATES_ENABLED", "1") == "1"
+REPORTING_DATES_MAX_AGE_MINUTES = int(os.getenv("REPORTING_DATES_MAX_AGE_MINUTES", "30"))
+REPORTING_DATES_FULL_REFRESH_HOURS = int(os.getenv("REPORTING_DATES_FULL_REFRESH_HOURS", "24"))
+FRESHNESS_CHECK_SECONDS = 60
+
+REPORTING_DATE_TABLE = "loan_reporting_date"
+REPORTING_DATE_STATE_TABLE = "loan_reporting_date_state"
+
+# Bad debt recovery: a record is only "bad debt" once it was actually paid (not merely
+# overdue) and that payment landed three calendar months or more after the due date's
+# month — a pure M+3 rule, no day-of-month cutoff. The due month plus the next two
+# calendar months (M, M+1, M+2) still count as Repayment; only M+3 onward is Bad Debt
+# Recovery. E.g. due any day in Jan: paid anytime in Jan/Feb/Mar is NOT bad debt (still
+# Repayment), paid 1 Apr onward IS bad debt.
+# Still-unpaid loans never match this, regardless of how overdue — they remain in
+# repayment-risk's unrecovered/outstanding buckets instead.
+BAD_DEBT_LUMP_PREDICATE = (
+    "l.payment_date IS NOT NULL AND l.payment_date != '0000-00-00' "
+    "AND PERIOD_DIFF(DATE_FORMAT(l.payment_date, '%Y%m'), DATE_FORMAT(l.repayment_date, '%Y%m')) >= 3"
+)
+BAD_DEBT_INSTALLMENT_PREDICATE = (
+    "tlh.payment_date IS NOT NULL AND tlh.payment_date != '0000-00-00' "
+    "AND PERIOD_DIFF(DATE_FORMAT(tlh.payment_date, '%Y%m'), DATE_FORMAT(tlh.due_date, '%Y%m')) >= 3"
+)
+
+# repayment-risk reporting-month attribution: each repayment is counted in exactly one
+# month — the payment month if paid on/before its due date, or once it has crossed into
+# Bad Debt Recovery (see the predicates above); otherwise the original due month. A row
+# with no payment yet has no payment_date, so this always falls through to the due date,
+# consistent with the live unrecovered/outstanding buckets (which are keyed off due date).
+REPORTING_DATE_LUMP = (
+    "CASE WHEN l.payment_date IS NOT NULL AND l.payment_date != '0000-00-00' "
+    "AND (l.payment_date <= l.repayment_date OR ({bad_debt})) "
+    "THEN l.payment_date ELSE l.repayment_date END"
+).format(bad_debt=BAD_DEBT_LUMP_PREDICATE)
+REPORTING_DATE_INSTALLMENT = (
+    "CASE WHEN tlh.payment_date IS NOT NULL AND tlh.payment_date != '0000-00-00' "
+    "AND (tlh.payment_date <= tlh.due_date OR ({bad_debt})) "
+    "THEN tlh.payment_date ELSE tlh.due_date END"
+).format(bad_debt=BAD_DEBT_INSTALLMENT_PREDICATE)
+
+
+@dataclass(frozen=True)
+class ReportingBasis:
+    """SQL for one source: `join` (appended after the FROM joins), `reporting_date`,
+    the `bad_debt` predicate, and `recovered_date` — the date a bad-debt recovery is
+    attributed to (its payment date, which is also its reporting date)."""
+
+    join: str
+    reporting_date: str
+    bad_debt: str
+    recovered_date: str
+
+
+# (source, base table + alias, row id, due date, payment date, reporting date, bad debt,
+#  recovered date)
+_SOURCES = (
+    ("L", "td_loan l", "l.id", "l.repayment_date", "l.payment_date",
+     REPORTING_DATE_LUMP, BAD_DEBT_LUMP_PREDICATE, "l.payment_date"),
+    ("H", "td_loan_history tlh", "tlh.id", "tlh.due_date", "tlh.payment_date",
+     REPORTING_DATE_INSTALLMENT, BAD_DEBT_INSTALLMENT_PREDICATE, "tlh.payment_date"),
+)
+
+# Loan id behind a row: stored with it, and matched against loans with new payments.
+_LOAN_ID_COLUMNS = {"L": "l.id", "H": "tlh.loan_form_id"}
+
+
+def _payment_sql(payment_date: str) -> str:
+    return f"DATE(NULLIF({payment_date}, '0000-00-00'))"
+
+
+def _materialized_basis(source, base, row_id, _due_date, _payment_date, reporting_date,
+                        bad_debt, _recovered_date, ranged: bool, bad_debt_only: bool) -> ReportingBasis:
+    """Stored rows up to the row watermark whose loan has no payment past the payment
+    watermark, plus every other row evaluated inline. `ranged` keeps only rows whose
+    reporting date is within :range_start/:range_end and `bad_debt_only` only bad-debt
+    rows, so both filters reach idx_lrd_reporting / idx_lrd_bad_debt."""
+    state = f"FROM {REPORTING_DATE_STATE_TABLE} WHERE id = 1"
+    row_watermark = f"(SELECT row_watermark_{source.lower()} {state})"
+    new_payment_loans = (
+        f"SELECT p.loan_id FROM td_loan_payment p "
+        f"WHERE p.id > (SELECT payment_watermark {state}) AND p.loan_id IS NOT NULL"
+    )
+    stored = [f"rd.source = '{source}'"]
+    inline = []
+    if bad_debt_only:
+        stored.append("rd.is_bad_debt = 1")
+        inline.append(f"({bad_debt})")
+    if ranged:
+        stored.append(range_predicate("rd.reporting_date"))
+        inline.append(range_predicate(f"DATE({reporting_date})"))
+    inline_columns = f"{row_id}, DATE({reporting_date}), CASE WHEN {bad_debt} THEN 1 ELSE 0 END"
+    inline_filter = "".join(f"\n          AND {predicate}" for predicate in inline)
+    stored_filter = "\n          AND ".join(stored)
+    return ReportingBasis(
+        f"""INNER JOIN (
+        SELECT rd.row_id, rd.reporting_date, rd.is_bad_debt
+        FROM {REPORTING_DATE_TABLE} rd
+        WHERE {stored_filter}
+          AND rd.row_id <= {row_watermark}
+          AND rd.loan_id NOT IN ({new_payment_loans})
+        UNION ALL
+        SELECT {inline_columns}
+        FROM {base}
+        WHERE {row_id} > {row_watermark}{inline_filter}
+        UNION ALL
+        SELECT {inline_columns}
+        FROM {base}
+        WHERE {row_id} <= {row_watermark}
+          AND {_LOAN_ID_COLUMNS[source]} IN ({new_payment_loans}){inline_filter}
+    ) rd ON rd.row_id = {row_id}""",
+        "rd.reporting_date",
+        "rd.is_bad_debt = 1",
+        "rd.reporting_date",
+    )
+
+
+INLINE_LUMP = ReportingBasis("", REPORTING_DATE_LUMP, BAD_DEBT_LUMP_PREDICATE, "l.payment_date")
+INLINE_INSTALLMENT = ReportingBasis(
+    "", REPORTING_DATE_INSTALLMENT, BAD_DEBT_INSTALLMENT_PREDICATE, "tlh.payment_date"
+)
+
+_CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {REPORTING_DATE_TABLE} (
+    source CHAR(1) NOT NULL,
+    row_id INT NOT NULL,
+    loan_id INT NOT NULL,
+    due_date DATE NULL,
+    payment_date DATE NULL,
+    reporting_date DATE NULL,
+    is_bad_debt TINYINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, row_id),
+    KEY idx_lrd_reporting (source, reporting_date, row_id, loan_id, is_bad_debt),
+    KEY idx_lrd_bad_debt (source, is_bad_debt, reporting_date, row_id, loan_id)
+)
+"""
+
+_CREATE_STATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {REPORTING_DATE_STATE_TABLE} (
+    id TINYINT NOT NULL PRIMARY KEY,
+    refreshed_at DATETIME NOT NULL,
+    full_refreshed_at DATETIME NOT NULL,
+    row_watermark_l BIGINT NOT NULL,
+    row_watermark_h BIGINT NOT NULL,
+    payment_watermark BIGINT NOT NULL
+)
+"""
+
+
+def _upsert_changed_sql(source, base, row_id, due_date, payment_date, reporting_date, bad_debt,
+                        _recovered_date, incremental: bool = False) -> str:
+    """Upsert rows whose due/payment date differs from the stored one; `incremental`
+    only considers rows past the row watermark or on loans with new payments."""
+    payment = _payment_sql(payment_date)
+    candidates = ""
+    if incremental:
+        candidates = f"""AND ({row_id} > :row_watermark
+         OR {_LOAN_ID_COLUMNS[source]} IN (
+            SELECT p.loan_id FROM td_loan_payment p WHERE p.id > :payment_watermark
+         ))"""
+    return f"""
+    INSERT INTO {REPORTING_DATE_TABLE}
+        (source, row_id, loan_id, due_date, payment_date, reporting_date, is_bad_debt)
+    SELECT
+        '{source}',
+        {row_id},
+        {_LOAN_ID_COLUMNS[source]},
+        DATE({due_date}),
+        {payment},
+        DATE({reporting_date}),
+        CASE WHEN {bad_debt} THEN 1 ELSE 0 END
+    FROM {base}
+    LEFT JOIN {REPORTING_DATE_TABLE} rd ON rd.source = '{source}' AND rd.row_id = {row_id}
+    WHERE (rd.row_id IS NULL
+       OR NOT (rd.due_date <=> DATE({due_date}))
+       OR NOT (rd.payment_date <=> {payment}))
+    {candidates}
+    ON DUPLICATE KEY UPDATE
+        loan_id = VALUES(loan_id),
+        due_date = VALUES(due_date),
+        payment_date = VALUES(payment_date),
+        reporting_date = VALUES(reporting_date),
+        is_bad_debt = VALUES(is_bad_debt)
+    """
+
+
+def _delete_orphans_sql(source, base, row_id, *_) -> str:
+    return f"""
+    DELETE rd FROM {REPORTING_DATE_TABLE} rd
+    LEFT JOIN {base} ON {row_id} = rd.row_id
+    WHERE rd.source = '{source}' AND {row_id} IS NULL
+    """
+
+
+def _has_column(db: Session, table: str, column: str) -> bool:
+    return bool(db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() "
+            "AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    ).scalar())
+
+
+def ensure_reporting_date_tables(db: Session) -> None:
+    # Tables from before the watermarks lack loan_id / the watermark columns; recreating
+    # them (the state table included) makes the next refresh a full one.
+    if not _has_column(db, REPORTING_DATE_TABLE, "loan_id"):
+        db.execute(text(f"DROP TABLE IF EXISTS {REPORTING_DATE_TABLE}"))
+        db.execute(text(f"DROP TABLE IF EXISTS {REPORTING_DATE_STATE_TABLE}"))
+    elif not _has_column(db, REPORTING_DATE_STATE_TABLE, "payment_watermark"):
+        db.execute(text(f"DROP TABLE IF EXISTS {REPORTING_DATE_STATE_TABLE}"))
+    db.execute(text(_CREATE_TABLE_SQL))
+    db.execute(text(_CREATE_STATE_TABLE_SQL))
+
+
+def refresh_reporting_dates(db: Session, full: bool = False) -> Dict[str, int]:
+    """Upsert rows whose due/payment date changed since the last refresh (every row when
+    `full` or a full compare is due, which also drops rows whose loan or installment is
+    gone); returns the affected row count per source and the mode."""
+    ensure_reporting_date_tables(db)
+    state = db.execute(
+        text(
+            f"SELECT full_refreshed_at, row_watermark_l, row_watermark_h, payment_watermark "
+            f"FROM {REPORTING_DATE_STATE_TABLE} WHERE id = 1"
+        )
+    ).fetchone()
+    # Stamp and read the watermarks first: anything written during the run is picked up
+    # next time as well.
+    started_at = datetime.now()
+    watermarks = {
+        "row_watermark_l": db.execute(text("SELECT COALESCE(MAX(id), 0) FROM td_loan")).scalar(),
+        "row_watermark_h": db.execute(text("SELECT COALESCE(MAX(id), 0) FROM td_loan_history")).scalar(),
+        "payment_watermark": db.execute(text("SELECT COALESCE(MAX(id), 0) FROM td_loan_payment")).scalar(),
+    }
+    full = full or state is None or (
+        started_at - state[0] > timedelta(hours=REPORTING_DATES_FULL_REFRESH_HOURS)
+    )
+
+    changed = {"full": int(full)}
+    for source_spec in _SOURCES:
+        source = source_spec[0]
+        if full:
+            upserted = db.execute(text(_upsert_changed_sql(*source_spec))).rowcount
+            deleted = db.execute(text(_delete_orphans_sql(*source_spec))).rowcount
+        else:
+            previous = {
+                "row_watermark": state[1] if source == "L" else state[2],
+                "payment_watermark": state[3],
+            }
+            upserted = db.execute(
+                text(_upsert_changed_sql(*source_spec, incremental=True)), previous
+            ).rowcount
+            deleted = 0
+        changed[source] = max(upserted, 0) + max(deleted, 0)
+
+    db.execute(
+        text(
+            f"INSERT INTO {REPORTING_DATE_STATE_TABLE} "
+            "(id, refreshed_at, full_refreshed_at, row_watermark_l, row_watermark_h, payment_watermark) "
+            "VALUES (1, :refreshed_at, :full_refreshed_at, :row_watermark_l, :row_watermark_h, "
+            ":payment_watermark) "
+            "ON DUPLICATE KEY UPDATE refreshed_at = VALUES(refreshed_at), "
+            "full_refreshed_at = VALUES(full_refreshed_at), "
+            "row_watermark_l = VALUES(row_watermark_l), row_watermark_h = VALUES(row_watermark_h), "
+            "payment_watermark = VALUES(payment_watermark)"
+        ),
+        {
+            "refreshed_at": started_at,
+            "full_refreshed_at": started_at if full else state[0],
+            **watermarks,
+        },
+    )
+    db.commit()
+    _freshness.update(checked_at=0.0)
+    return changed
+
+
+_freshness = {"checked_at": 0.0, "fresh": False}
+
+
+def reporting_dates_fresh(db: Session) -> bool:
+    """Whether the table was refreshed recently enough to stand in for the inline
+    expressions; the answer is cached for FRESHNESS_CHECK_SECONDS."""
+    if not REPORTING_DATES_ENABLED:
+        return False
+    now = time.monotonic()
+    if now - _freshness["checked_at"] < FRESHNESS_CHECK_SECONDS:
+        return _freshness["fresh"]
+    try:
+        refreshed_at = db.execute(
+            text(f"SELECT refreshed_at FROM {REPORTING_DATE_STATE_TABLE} WHERE id = 1")
+        ).scalar()
+    except Exception:
+        # Table not created yet (the refresh job hasn't run in this environment).
+        refreshed_at = None
+    fresh = refreshed_at is not None and (
+        datetime.now() - refreshed_at <= timedelta(minutes=REPORTING_DATES_MAX_AGE_MINUTES)
+    )
+    _freshness.update(checked_at=now, fresh=fresh)
+    return fresh
+
+
+def reporting_basis(db: Session, installment: bool, *, ranged: bool = False,
+                    bad_debt_only: bool = False) -> ReportingBasis:
+    """Materialized reporting dates when fresh, else the equivalent inline expressions.
+    With `ranged` the caller must bind :range_start/:range_end (append_date_filters on
+    basis.reporting_date does); `bad_debt_only` callers still filter on basis.bad_debt."""
+    if reporting_dates_fresh(db):
+        return _materialized_basis(*_SOURCES[int(installment)], ranged, bad_debt_only)
+    return INLINE_INSTALLMENT if installment else INLINE_LUMP
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh the materialized reporting dates.")
+    parser.add_argument("--full", action="store_true", help="Compare every row, not just changed ones")
+    args = parser.parse_args(argv)
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        changed = refresh_reporting_dates(db, full=args.full)
+        mode = "full" if changed.pop("full") else "incremental"
+        for source, rows in changed.items():
+            print(f"{source}: {rows} rows changed ({mode})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
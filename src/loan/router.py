@@ -5,15 +5,38 @@ from sqlalchemy.orm import Session
 try:
     # Try relative imports first (for Docker)
     from . import crud, schemas
+    from .date_filters import DEFAULT_WINDOW_MONTHS, default_window, label_periods
     from ..db import get_db
 except ImportError:
     # Fall back to absolute imports (for local development)
     from loan import crud, schemas
+    from loan.date_filters import DEFAULT_WINDOW_MONTHS, default_window, label_periods
     from db import get_db
 
 
 router = APIRouter(prefix="/loan", tags=["loan"])
 
+# Months of history each summary endpoint reads when called without a full
+# start_date/end_date (see date_filters.default_window). Unbounded unless the
+# deployment opts in with LOAN_DEFAULT_WINDOW_MONTHS, since a window changes the
+# results of requests that omit dates. loan-risk ranges over origination dates and
+# reports on loans still being repaid, so it looks further back. karyawan-overdue
+# (point-in-time) and coverage-utilization (a range switches its eligible count to
+# the daily snapshots) keep their unbounded defaults.
+ENDPOINT_WINDOW_MONTHS = {
+    "client-summary": DEFAULT_WINDOW_MONTHS,
+    "summary": DEFAULT_WINDOW_MONTHS,
+    "requests": DEFAULT_WINDOW_MONTHS,
+    "disbursement": DEFAULT_WINDOW_MONTHS,
+    "loan-purpose": DEFAULT_WINDOW_MONTHS,
+    "applicant-insights": DEFAULT_WINDOW_MONTHS,
+    "loan-fees": DEFAULT_WINDOW_MONTHS,
+    "loan-risk": DEFAULT_WINDOW_MONTHS * 3,
+    "repayment-risk": DEFAULT_WINDOW_MONTHS,
+    "bad-debt-recovery": DEFAULT_WINDOW_MONTHS,
+    "disbursement-expected-return": DEFAULT_WINDOW_MONTHS,
+}
+
 
 
 @router.get("/karyawan", response_model=schemas.KaryawanEnhancedListResponse)
@@ -68,22 +91,35 @@ async def get_client_summary(
     loan_type: str = "loan",
     client_segment: str = None,
     product_type: str = None,
+    sort_by: str = "sourced_to",
+    sort_order: str = "asc",
+    limit: int = None,
+    offset: int = 0,
     db: Session = Depends(get_db)
 ):
-    """Get comprehensive client summary. Use loan_type=all to combine kasbon, extradana, and aku_cicil."""
+    """Get comprehensive client summary. Use loan_type=all to combine kasbon, extradana, and aku_cicil.
+
+    sort_by takes any result field (see crud.CLIENT_SUMMARY_SORT_FIELDS); limit/offset page
+    the sorted clients, and `total` is the client count before paging."""
     try:
-        client_summaries = crud.get_client_summary(
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["client-summary"])
+        client_summaries, total = crud.get_client_summary(
             db,
             start_date=start_date,
             end_date=end_date,
             loan_type=loan_type,
             client_segment_filter=client_segment,
             product_type_filter=product_type,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            offset=offset,
         )
 
         return {
             "status": "success",
             "count": len(client_summaries),
+            "total": total,
             "results": client_summaries
         }
     except Exception as e:
@@ -109,6 +145,7 @@ async def get_summary(
 ):
     """Get loan summary with eligible count and loan request metrics"""
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["summary"])
         coverage_summary = crud.get_user_coverage_summary(
             db,
             id_karyawan_filter=id_karyawan,
@@ -174,6 +211,7 @@ async def get_requests(
 ):
     """Get requests metrics: total_approved_requests, total_rejected_requests, approval_rate, average_approval_time"""
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["requests"])
         requests_data = crud.get_requests_endpoint(
             db,
             id_karyawan_filter=id_karyawan,
@@ -223,6 +261,7 @@ async def get_disbursement(
 ):
     """Get disbursement metrics: total_disbursed_amount, average_disbursed_amount"""
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["disbursement"])
         disbursement_data = crud.get_disbursement_endpoint(
             db,
             id_karyawan_filter=id_karyawan,
@@ -283,7 +322,7 @@ async def get_disbursement_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_disbursement
+            "monthly_data": label_periods(monthly_disbursement)
         }
     except Exception as e:
         # Return error response with status
@@ -325,7 +364,7 @@ async def get_summary_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_coverage
+            "monthly_data": label_periods(monthly_coverage)
         }
     except Exception as e:
         # Return error response with status
@@ -394,6 +433,7 @@ async def get_loan_purpose_summary(
     """Get loan summary grouped by purpose with total count and sum of total_loan"""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["loan-purpose"])
         purpose_summary = crud.get_loan_purpose_summary(
             db,
             loan_type=loan_type,
@@ -442,6 +482,7 @@ async def get_loan_applicant_insights(
     """Get combined loan applicant insights: top reject reasons, applicants by gender, and applicants by age range"""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["applicant-insights"])
         insights = crud.get_loan_applicant_insights(
             db,
             employer_filter=employer,
@@ -517,6 +558,7 @@ async def get_loan_fees(
     """Get loan fees summary (total expected and collected admin fees)"""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["loan-fees"])
         fees_summary = crud.get_loan_fees_summary(
             db,
             employer_filter=employer,
@@ -593,7 +635,7 @@ async def get_loan_fees_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_fees_summary
+            "monthly_data": label_periods(monthly_fees_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -620,6 +662,7 @@ async def get_loan_risk(
     """Get loan risk summary with various risk metrics"""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["loan-risk"])
         risk_summary = crud.get_loan_risk_summary(
             db,
             employer_filter=employer,
@@ -692,7 +735,7 @@ async def get_loan_risk_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_risk_summary
+            "monthly_data": label_periods(monthly_risk_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -717,9 +760,17 @@ async def get_karyawan_overdue(
     loan_type: str = "loan",
     db: Session = Depends(get_db)
 ):
-    """Get karyawan with overdue loans. Use loan_type=all to combine kasbon, extradana, and aku_cicil."""
+    """Get karyawan with overdue loans. Use loan_type=all to combine kasbon, extradana, and aku_cicil.
+
+    Without a date range (and for loan_status 4) the list is read from the per-employee
+    ledger, which can lag the loan tables by up to KARYAWAN_LEDGER_MAX_AGE_MINUTES (30 by
+    default); ledger_refreshed_at is the refresh it reflects, null when computed live.
+    """
 
     try:
+        ledger_refreshed_at = crud.karyawan_overdue_ledger_refreshed_at(
+            db, loan_status_filter=loan_status, start_date=start_date, end_date=end_date
+        )
         overdue_list = crud.get_karyawan_overdue_summary(
             db,
             employer_filter=employer,
@@ -739,6 +790,7 @@ async def get_karyawan_overdue(
         return {
             "status": "success",
             "count": len(overdue_list),
+            "ledger_refreshed_at": ledger_refreshed_at.isoformat() if ledger_refreshed_at else None,
             "results": overdue_list
         }
     except Exception as e:
@@ -785,6 +837,7 @@ async def get_repayment_risk(
     combined); pass loan_type=loan/extradana/aku_cicil to scope to a single product."""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["repayment-risk"])
         repayment_risk_summary = crud.get_repayment_risk_summary(
             db,
             employer_filter=employer,
@@ -886,7 +939,7 @@ async def get_repayment_risk_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_repayment_risk_summary
+            "monthly_data": label_periods(monthly_repayment_risk_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -920,6 +973,7 @@ async def get_bad_debt_recovery(
     Use loan_type=all to combine kasbon, extradana, and aku_cicil."""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["bad-debt-recovery"])
         bad_debt_recovery_summary = crud.get_bad_debt_recovery_summary(
             db,
             employer_filter=employer,
@@ -994,7 +1048,7 @@ async def get_bad_debt_recovery_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_bad_debt_recovery_summary
+            "monthly_data": label_periods(monthly_bad_debt_recovery_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -1025,6 +1079,7 @@ async def get_disbursement_expected_return(
     elsewhere in /loan. Use loan_type=all to combine kasbon, extradana, and aku_cicil."""
 
     try:
+        start_date, end_date = default_window(start_date, end_date, ENDPOINT_WINDOW_MONTHS["disbursement-expected-return"])
         summary = crud.get_disbursement_expected_return_summary(
             db,
             employer_filter=employer,
@@ -1094,7 +1149,7 @@ async def get_disbursement_expected_return_monthly(
 
         return {
             "status": "success",
-            "monthly_data": monthly_summary
+            "monthly_data": label_periods(monthly_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -1211,7 +1266,7 @@ async def get_coverage_utilization_monthly(
         # Return structured response
         return {
             "status": "success",
-            "monthly_data": monthly_coverage_utilization_summary
+            "monthly_data": label_periods(monthly_coverage_utilization_summary)
         }
     except Exception as e:
         # Return error response with status
@@ -0,0 +1,211 @@
+"""
+Composite indexes backing the data_record_eligible snapshot queries.
+
+The eligible / coverage / active builders in crud.py (_eligible_snapshot_filters)
+emit a plain equality per filter that is actually set, plus the allowed-employer
+IN list and the snapshot_date range. Each index below leads with the column a
+filtered request pins and follows with snapshot_date, so MySQL can seek straight
+to (value, date range) instead of range-scanning every day's full headcount.
+Unfiltered requests use the (is_loan_eligible, snapshot_date, employer,
+id_karyawan) index, which covers COUNT(DISTINCT id_karyawan) on its own.
+
+    python -m src.loan.snapshot_indexes --create          # add any missing index
+    python -m src.loan.snapshot_indexes --explain         # EXPLAIN + time each filter shape
+
+To check index choice without production data, point DB_NAME at a scratch
+database and seed a synthetic snapshot first (refuses if the table exists):
+
+    python -m src.loan.snapshot_indexes --seed-synthetic 20000 --days 60 --create --explain
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+SNAPSHOT_TABLE = "data_record_eligible"
+
+DATA_RECORD_ELIGIBLE_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "idx_dre_eligible_date": ("is_loan_eligible", "snapshot_date", "employer", "id_karyawan"),
+    "idx_dre_employer_date": ("employer", "snapshot_date", "id_karyawan"),
+    "idx_dre_project_date": ("project", "snapshot_date", "id_karyawan"),
+    "idx_dre_sourced_to_date": ("sourced_to", "snapshot_date"),
+    "idx_dre_branch_date": ("branch", "snapshot_date"),
+    "idx_dre_segment_date": ("client_segment", "snapshot_date"),
+    "idx_dre_product_date": ("product_type", "snapshot_date"),
+}
+
+_SYNTHETIC_TABLE_SQL = f"""
+CREATE TABLE {SNAPSHOT_TABLE} (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    snapshot_date DATE NOT NULL,
+    id_karyawan INT NOT NULL,
+    company VARCHAR(64),
+    employer VARCHAR(64),
+    sourced_to VARCHAR(64),
+    project VARCHAR(64),
+    branch VARCHAR(64),
+    client_segment VARCHAR(64),
+    product_type VARCHAR(64),
+    is_loan_eligible TINYINT NOT NULL DEFAULT 0,
+    is_kasbon_eligible TINYINT NOT NULL DEFAULT 0,
+    is_aku_cicil_eligible TINYINT NOT NULL DEFAULT 0,
+    is_extradana_eligible TINYINT NOT NULL DEFAULT 0
+)
+"""
+
+
+def existing_indexes(db: Session) -> set:
+    rows = db.execute(
+        text(
+            "SELECT DISTINCT index_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :table"
+        ),
+        {"table": SNAPSHOT_TABLE},
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def ensure_snapshot_indexes(db: Session) -> List[str]:
+    """Create any missing index from DATA_RECORD_ELIGIBLE_INDEXES; returns the ones added."""
+    present = existing_indexes(db)
+    created = []
+    for name, columns in DATA_RECORD_ELIGIBLE_INDEXES.items():
+        if name in present:
+            continue
+        db.execute(text(f"CREATE INDEX {name} ON {SNAPSHOT_TABLE} ({', '.join(columns)})"))
+        created.append(name)
+    db.commit()
+    return created
+
+
+def seed_synthetic_snapshot(db: Session, employees: int, days: int, seed: int = 7) -> int:
+    """Create and fill a synthetic data_record_eligible in a scratch database."""
+    exists = db.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = :table"
+        ),
+        {"table": SNAPSHOT_TABLE},
+    ).scalar()
+    if exists:
+        raise SystemExit(f"{SNAPSHOT_TABLE} already exists; seed only into a scratch database")
+    db.execute(text(_SYNTHETIC_TABLE_SQL))
+
+    rng = random.Random(seed)
+    people = [
+        {
+            "id_karyawan": index + 1,
+            "employer": str(rng.choice([101, 102, 103, 104])),
+            "sourced_to": str(rng.randint(200, 260)),
+            "project": str(rng.randint(1000, 1400)),
+            "branch": str(rng.randint(1, 40)),
+            "client_segment": str(rng.randint(1, 8)),
+            "product_type": rng.choice(["kasbon", "extradana", "aku_cicil"]),
+            "eligible": rng.random() < 0.8,
+        }
+        for index in range(employees)
+    ]
+    insert = text(
+        f"INSERT INTO {SNAPSHOT_TABLE} (snapshot_date, id_karyawan, company, employer, "
+        "sourced_to, project, branch, client_segment, product_type, is_loan_eligible, "
+        "is_kasbon_eligible, is_aku_cicil_eligible, is_extradana_eligible) VALUES "
+        "(:snapshot_date, :id_karyawan, '1', :employer, :sourced_to, :project, :branch, "
+        ":client_segment, :product_type, :eligible, :eligible, 0, 0)"
+    )
+    first_day = date.today() - timedelta(days=days)
+    rows = 0
+    for offset in range(days):
+        snapshot_date = first_day + timedelta(days=offset)
+        batch = [dict(person, snapshot_date=snapshot_date) for person in people]
+        for start in range(0, len(batch), 5000):
+            db.execute(insert, batch[start:start + 5000])
+        rows += len(batch)
+        db.commit()
+    db.execute(text(f"ANALYZE TABLE {SNAPSHOT_TABLE}"))
+    return rows
+
+
+def _sample_value(db: Session, column: str) -> Optional[str]:
+    return db.execute(
+        text(f"SELECT {column} FROM {SNAPSHOT_TABLE} WHERE {column} IS NOT NULL LIMIT 1")
+    ).scalar()
+
+
+def explain_snapshot_queries(db: Session, days: int = 30) -> None:
+    """
+    EXPLAIN and time the eligible count for each filter shape, in the form
+    _eligible_snapshot_filters emits (allowed-employer IN list + set filters only).
+    """
+    range_end = db.execute(text(f"SELECT MAX(snapshot_date) FROM {SNAPSHOT_TABLE}")).scalar()
+    if range_end is None:
+        raise SystemExit(f"{SNAPSHOT_TABLE} is empty")
+    range_start = range_end - timedelta(days=days - 1)
+    employers = [
+        row[0]
+        for row in db.execute(
+            text(f"SELECT DISTINCT employer FROM {SNAPSHOT_TABLE} WHERE employer IS NOT NULL LIMIT 4")
+        ).fetchall()
+    ]
+
+    shapes = [("unfiltered", None)] + [
+        (column, column)
+        for column in ("employer", "project", "sourced_to", "branch", "client_segment", "product_type")
+    ]
+    print(f"{'shape':<16}{'key':<26}{'rows':>10}{'ms':>10}{'count':>10}")
+    for label, column in shapes:
+        params = {"start_date": range_start, "end_date": range_end}
+        placeholders = []
+        for index, code in enumerate(employers):
+            params[f"allowed_employer_{index}"] = code
+            placeholders.append(f":allowed_employer_{index}")
+        predicates = [f"de.employer IN ({', '.join(placeholders)})"]
+        if column:
+            params["f_value"] = _sample_value(db, column)
+            predicates.append(f"de.{column} = :f_value")
+        query = (
+            f"SELECT COUNT(DISTINCT de.id_karyawan) FROM {SNAPSHOT_TABLE} de "
+            "WHERE de.snapshot_date BETWEEN :start_date AND :end_date "
+            f"AND de.is_loan_eligible = 1 AND {' AND '.join(predicates)}"
+        )
+        plan = db.execute(text("EXPLAIN " + query), params).mappings().first()
+        started = time.perf_counter()
+        count = db.execute(text(query), params).scalar()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{label:<16}{str(plan.get('key')):<26}{plan.get('rows') or 0:>10}{elapsed_ms:>10.1f}{count:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage data_record_eligible snapshot indexes.")
+    parser.add_argument("--seed-synthetic", type=int, metavar="EMPLOYEES",
+                        help="Create a synthetic snapshot table (scratch databases only)")
+    parser.add_argument("--days", type=int, default=60, help="Days of synthetic snapshots")
+    parser.add_argument("--create", action="store_true", help="Create missing indexes")
+    parser.add_argument("--explain", action="store_true", help="EXPLAIN and time each filter shape")
+    args = parser.parse_args(argv)
+
+    try:
+        from ..db import get_session_local
+    except ImportError:
+        from db import get_session_local
+
+    db = get_session_local()()
+    try:
+        if args.seed_synthetic:
+            rows = seed_synthetic_snapshot(db, args.seed_synthetic, args.days)
+            print(f"Seeded {rows} synthetic snapshot rows")
+        if args.create:
+            created = ensure_snapshot_indexes(db)
+            print(f"Created indexes: {', '.join(created) or 'none (all present)'}")
+        if args.explain:
+            explain_snapshot_queries(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
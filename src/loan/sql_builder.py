@@ -0,0 +1,155 @@
+"""
+Small composable SQL layer for the loan analytics queries.
+
+Queries are assembled from relations (a base table plus joins keyed by alias),
+WHERE fragments and date-column strategies instead of splicing text into finished
+SQL. Filter values are always bound parameters, so the SQL text identifies the
+query shape: statement() caches the parsed TextClause per shape and hot endpoints
+stop re-parsing multi-kilobyte SQL on every request.
+"""
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+try:
+    from .date_filters import bind_date_range, range_predicate
+except ImportError:
+    from loan.date_filters import bind_date_range, range_predicate
+
+STATEMENT_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def statement(sql: str) -> TextClause:
+    """text(sql), parsed once per distinct query shape."""
+    return text(sql)
+
+
+@dataclass(frozen=True)
+class Join:
+    alias: str
+    sql: str
+
+
+@dataclass(frozen=True)
+class Relation:
+    """FROM clause: a base table and its joins, addressable by alias."""
+
+    base: str
+    joins: Tuple[Join, ...] = ()
+
+    def has(self, alias: str) -> bool:
+        return self.base.split()[-1] == alias or any(join.alias == alias for join in self.joins)
+
+    def with_join(self, join: Join, after: Optional[str] = None) -> "Relation":
+        """Add `join` (after the join aliased `after`, else last); no-op if the alias exists."""
+        if self.has(join.alias):
+            return self
+        joins = list(self.joins)
+        if after is None:
+            joins.append(join)
+        else:
+            position = next(index for index, item in enumerate(joins) if item.alias == after)
+            joins.insert(position + 1, join)
+        return replace(self, joins=tuple(joins))
+
+    def sql(self) -> str:
+        return "\n    ".join([f"FROM {self.base}", *(join.sql for join in self.joins)])
+
+
+@dataclass(frozen=True)
+class Select:
+    columns: Tuple[str, ...]
+    relation: Relation
+    where: Tuple[str, ...] = ()
+
+    def with_columns_first(self, *columns: str) -> "Select":
+        return replace(self, columns=tuple(columns) + self.columns)
+
+    def and_where(self, *predicates: str) -> "Select":
+        return replace(self, where=self.where + tuple(p for p in predicates if p))
+
+    def join(self, join: Join, after: Optional[str] = None) -> "Select":
+        return replace(self, relation=self.relation.with_join(join, after))
+
+    def sql(self) -> str:
+        """SELECT ... FROM ... WHERE ...; always ends in the WHERE clause so callers can
+        keep appending `AND ...` filters and GROUP BY."""
+        where = "\n      AND ".join(self.where or ("1=1",))
+        return (
+            f"\n    SELECT {', '.join(self.columns)}\n    {self.relation.sql()}\n"
+            f"    WHERE {where}\n"
+        )
+
+
+def gmc_join(alias: str, on_column: str, group_gmc: str, kind: str = "LEFT") -> Join:
+    return Join(
+        alias,
+        f"""{kind} JOIN tbl_gmc {alias}
+        ON {on_column} = {alias}.kode_gmc
+        AND {alias}.group_gmc = '{group_gmc}'
+        AND {alias}.aktif = 'Yes'
+        AND {alias}.keterangan3 = 1""",
+    )
+
+
+def org_joins(employer_kind: str = "LEFT") -> Tuple[Join, ...]:
+    """emp / src / prj lookups for td_karyawan tk."""
+    return (
+        gmc_join("emp", "tk.valdo_inc", "sub_client", employer_kind),
+        gmc_join("src", "tk.placement", "placement_client"),
+        gmc_join("prj", "tk.project", "client_project"),
+    )
+
+
+def karyawan_join(loan_alias: str = "l", kind: str = "LEFT") -> Join:
+    return Join("tk", f"{kind} JOIN td_karyawan tk ON {loan_alias}.id_karyawan = tk.id_karyawan")
+
+
+def loan_relation(loan_alias: str = "l", *, karyawan_kind: str = "LEFT", employer_kind: str = "LEFT") -> Relation:
+    """td_loan with its employee and org lookups."""
+    return Relation(
+        f"td_loan {loan_alias}",
+        (karyawan_join(loan_alias, karyawan_kind),) + org_joins(employer_kind),
+    )
+
+
+def loan_history_relation(loan_alias: str = "tl", loan_kind: str = "INNER") -> Relation:
+    """td_loan_history tlh joined to its loan (aliased `loan_alias`) and org lookups."""
+    return Relation(
+        "td_loan_history tlh",
+        (
+            Join(loan_alias, f"{loan_kind} JOIN td_loan {loan_alias} ON tlh.loan_form_id = {loan_alias}.id"),
+            karyawan_join(loan_alias),
+        )
+        + org_joins(),
+    )
+
+
+def project_management_join(required: bool = True) -> Join:
+    join_type = "INNER" if required else "LEFT"
+    return Join(
+        "tpm",
+        f"""{join_type} JOIN (
+            SELECT DISTINCT gmc_id, client_segment, product_type
+            FROM tbl_project_management
+        ) tpm ON tpm.gmc_id = prj.id""",
+    )
+
+
+@dataclass(frozen=True)
+class DateColumn:
+    """Inclusive day-range strategy on a DATE/DATETIME column, emitted as a half-open
+    range on the bare column so it stays index- and partition-prunable."""
+
+    column: str
+
+    def predicate(self, params: dict, start_date: str = None, end_date: str = None) -> Optional[str]:
+        if not (start_date and end_date):
+            return None
+        bind_date_range(params, start_date, end_date)
+        return range_predicate(self.column)
@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class MediaServer:
+    """
+    A local file server whose misbehaviour each test sets up: drop the first
+    response after `cut_after` bytes, ignore Range headers, or omit Content-Length.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.cut_after: Optional[int] = None
+        self.honour_range = True
+        self.send_length = True
+        self.ranges: List[Optional[str]] = []
+        self.port = 0
+
+    def url(self, path: str = "/media/interview.mp4") -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+
+def _handler(media: MediaServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requested = self.headers.get("Range")
+            media.ranges.append(requested)
+            start = 0
+            if requested and media.honour_range:
+                start = int(requested.split("=", 1)[1].rstrip("-"))
+            body = media.body[start:]
+
+            self.send_response(206 if start else 200)
+            if start:
+                self.send_header("Content-Range", f"bytes {start}-{len(media.body) - 1}/{len(media.body)}")
+            if media.send_length:
+                self.send_header("Content-Length", str(len(body)))
+            else:
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+
+            if media.cut_after is not None and len(media.ranges) == 1:
+                self.wfile.write(body[:media.cut_after])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture
+def media_server():
+    def start(body: bytes) -> MediaServer:
+        media = MediaServer(body)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(media))
+        media.port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return media
+
+    servers: List[ThreadingHTTPServer] = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,23 @@
+from src.loan.eligible_rollup import RollupTotals, decode_ids, encode_ids
+
+
+def test_ids_round_trip():
+    ids = [2_000_000_000, 7, 42, 7, 1]
+
+    assert list(decode_ids(encode_ids(ids))) == [1, 7, 42, 2_000_000_000]
+
+
+def test_merged_months_count_each_employee_once():
+    january, february = RollupTotals(), RollupTotals()
+    january.add_cell("P1", 3, encode_ids([1, 2, 3]))
+    # Moved project mid-month: in both of January's cells.
+    january.add_cell("P2", 2, encode_ids([3, 4]))
+    february.add_cell("P1", 2, encode_ids([1, 5]))
+
+    merged = RollupTotals()
+    merged.merge(january)
+    merged.merge(february)
+
+    assert january.employees == 4
+    assert merged.employees == 5
+    assert merged.project_count == 2
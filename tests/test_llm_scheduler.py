@@ -0,0 +1,63 @@
+import asyncio
+
+import openai
+import pytest
+
+from src.ai.llm_scheduler import LLMScheduler
+
+TOKENS_PER_MINUTE = 6000
+ESTIMATE = 2000
+
+
+def scheduler() -> LLMScheduler:
+    return LLMScheduler(
+        requests_per_minute=60,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        max_concurrent=1,
+        retry_base_delay=0.01,
+        retry_max_delay=0.01,
+    )
+
+
+def test_cancelled_waiter_leaves_the_rate_budget_alone():
+    llm = scheduler()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            await release.wait()
+            return "done"
+
+        holder = asyncio.ensure_future(llm.call("holder", hold, estimated_tokens=ESTIMATE))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(llm.call("waiter", hold, estimated_tokens=ESTIMATE))
+        await asyncio.sleep(0.01)
+        assert llm.metrics()["waiting"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        return await holder
+
+    assert asyncio.run(run()) == "done"
+    # Only the holder's call was charged (the buckets refill slightly meanwhile).
+    assert TOKENS_PER_MINUTE - ESTIMATE <= llm._tokens.available < TOKENS_PER_MINUTE - ESTIMATE + 50
+    assert 59 <= llm._requests.available < 60
+    assert llm.metrics()["waiting"] == 0
+
+
+def test_rejected_attempt_refunds_its_token_estimate():
+    llm = scheduler()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise openai.APITimeoutError(request=None)
+        return "done"
+
+    assert asyncio.run(llm.call("flaky", flaky, estimated_tokens=ESTIMATE)) == "done"
+    assert len(attempts) == 2
+    assert TOKENS_PER_MINUTE - ESTIMATE <= llm._tokens.available < TOKENS_PER_MINUTE - ESTIMATE + 50
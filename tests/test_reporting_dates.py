@@ -0,0 +1,85 @@
+import re
+import sqlite3
+from datetime import date
+
+import pytest
+
+from src.loan import reporting_dates
+
+# Just enough of the loan schema to plan the materialized reads.
+LOAN_TABLES = """
+CREATE TABLE td_loan (id INTEGER PRIMARY KEY, payment_date DATE, repayment_date DATE);
+CREATE TABLE td_loan_history (id INTEGER PRIMARY KEY, loan_form_id INT, due_date DATE, payment_date DATE);
+CREATE INDEX idx_tlh_loan_form ON td_loan_history (loan_form_id);
+CREATE TABLE td_loan_payment (id INTEGER PRIMARY KEY, loan_id INT);
+"""
+
+
+def _sqlite_ddl(mysql_ddl: str) -> str:
+    """CREATE TABLE with inline MySQL KEYs -> the table plus CREATE INDEX statements."""
+    table = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", mysql_ddl)[1]
+    keys = re.findall(r",\s*KEY (\w+) \(([^)]*)\)", mysql_ddl)
+    statements = [re.sub(r",\s*KEY \w+ \([^)]*\)", "", mysql_ddl)]
+    statements += [f"CREATE INDEX {name} ON {table} ({columns})" for name, columns in keys]
+    return ";\n".join(statements)
+
+
+@pytest.fixture
+def db():
+    connection = sqlite3.connect(":memory:")
+    connection.create_function("DATE_FORMAT", 2, lambda value, _format: value)
+    connection.create_function("PERIOD_DIFF", 2, lambda later, earlier: 0)
+    connection.executescript(LOAN_TABLES)
+    connection.executescript(_sqlite_ddl(reporting_dates._CREATE_TABLE_SQL))
+    connection.executescript(_sqlite_ddl(reporting_dates._CREATE_STATE_TABLE_SQL))
+    yield connection
+    connection.close()
+
+
+def _plan(db, basis: reporting_dates.ReportingBasis, base: str) -> str:
+    query = f"""
+    SELECT COUNT(*) FROM {base}
+    {basis.join}
+    WHERE {basis.bad_debt}
+      AND {basis.reporting_date} >= :range_start AND {basis.reporting_date} < :range_end
+    """
+    params = {"range_start": date(2026, 1, 1).isoformat(), "range_end": date(2026, 2, 1).isoformat()}
+    return "\n".join(row[-1] for row in db.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+
+@pytest.mark.parametrize("installment, base", [(False, "td_loan l"), (True, "td_loan_history tlh")])
+def test_ranged_read_uses_reporting_date_index(db, installment, base):
+    source = reporting_dates._SOURCES[int(installment)]
+    basis = reporting_dates._materialized_basis(*source, ranged=True, bad_debt_only=False)
+
+    plan = _plan(db, basis, base)
+
+    assert (
+        "SEARCH rd USING COVERING INDEX idx_lrd_reporting "
+        "(source=? AND reporting_date>? AND reporting_date<?)" in plan
+    ), plan
+
+
+@pytest.mark.parametrize("installment, base", [(False, "td_loan l"), (True, "td_loan_history tlh")])
+def test_bad_debt_read_uses_bad_debt_index(db, installment, base):
+    source = reporting_dates._SOURCES[int(installment)]
+    basis = reporting_dates._materialized_basis(*source, ranged=True, bad_debt_only=True)
+
+    plan = _plan(db, basis, base)
+
+    assert (
+        "SEARCH rd USING COVERING INDEX idx_lrd_bad_debt "
+        "(source=? AND is_bad_debt=? AND reporting_date>? AND reporting_date<?)" in plan
+    ), plan
+
+
+def test_inline_rows_are_found_through_the_watermarks(db):
+    source = reporting_dates._SOURCES[1]
+    basis = reporting_dates._materialized_basis(*source, ranged=True, bad_debt_only=False)
+
+    plan = _plan(db, basis, "td_loan_history tlh")
+
+    # New rows by primary-key range, re-paid ones through their loan: no full scan.
+    assert "SCAN tlh" not in plan, plan
+    assert "SEARCH tlh USING INTEGER PRIMARY KEY (rowid>?)" in plan, plan
+    assert "idx_tlh_loan_form" in plan, plan
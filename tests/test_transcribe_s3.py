@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+
+import boto3
+import pytest
+from boto3.s3.transfer import TransferConfig
+
+from src.ai import transcribe
+
+moto_server = pytest.importorskip("moto.server")
+
+BUCKET = "transcribe-media"
+MB = 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """A local S3-compatible server (moto), reached over HTTP like a real endpoint."""
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3(s3_endpoint, monkeypatch):
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+    }.items():
+        monkeypatch.setenv(name, value)
+    client = boto3.client("s3", region_name="us-east-1", endpoint_url=s3_endpoint)
+    client.create_bucket(Bucket=BUCKET)
+    monkeypatch.setattr(transcribe, "s3_client", client)
+    monkeypatch.setattr(transcribe, "S3_BUCKET", BUCKET)
+    monkeypatch.setattr(transcribe, "_lifecycle_checked", False)
+    yield client
+    for item in client.list_objects_v2(Bucket=BUCKET).get("Contents", []):
+        client.delete_object(Bucket=BUCKET, Key=item["Key"])
+    client.delete_bucket(Bucket=BUCKET)
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    def write(size: int, name: str = "interview.mp4") -> str:
+        path = tmp_path / name
+        path.write_bytes(os.urandom(size))
+        return str(path)
+
+    return write
+
+
+def test_identical_media_is_uploaded_once(s3, media_file):
+    path = media_file(1024)
+    key = transcribe.media_s3_key(transcribe.file_sha256(path), "mp4")
+
+    assert transcribe.upload_to_s3(path, key) == f"s3://{BUCKET}/{key}"
+    first = s3.head_object(Bucket=BUCKET, Key=key)
+
+    # The object is found by key, so the (now missing) file is never read again.
+    os.unlink(path)
+    assert transcribe.upload_to_s3(path, key) == f"s3://{BUCKET}/{key}"
+    assert s3.head_object(Bucket=BUCKET, Key=key)["LastModified"] == first["LastModified"]
+
+
+def test_stream_is_not_opened_when_object_exists(s3, media_file):
+    path = media_file(2048)
+    key = transcribe.media_s3_key(transcribe.file_sha256(path), "mp4")
+    opened = []
+
+    def open_stream():
+        opened.append(True)
+        return open(path, "rb")
+
+    transcribe.upload_fileobj_to_s3(open_stream, key)
+    transcribe.upload_fileobj_to_s3(open_stream, key)
+
+    assert len(opened) == 1
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    assert hashlib.sha256(body).hexdigest() == transcribe.file_sha256(path)
+
+
+def test_large_media_uses_multipart_upload(s3, media_file, monkeypatch):
+    monkeypatch.setattr(
+        transcribe,
+        "TRANSFER_CONFIG",
+        TransferConfig(multipart_threshold=5 * MB, multipart_chunksize=5 * MB, max_concurrency=2),
+    )
+    path = media_file(11 * MB)
+    key = transcribe.media_s3_key(transcribe.file_sha256(path), "mp4")
+
+    transcribe.upload_to_s3(path, key)
+
+    head = s3.head_object(Bucket=BUCKET, Key=key)
+    assert head["ContentLength"] == 11 * MB
+    # Multipart ETags end in "-<part count>".
+    assert head["ETag"].strip('"').endswith("-3")
+
+
+def test_lifecycle_rule_is_added_once_and_keeps_other_rules(s3):
+    other = {
+        "ID": "keep-me",
+        "Filter": {"Prefix": "other/"},
+        "Status": "Enabled",
+        "Expiration": {"Days": 30},
+    }
+    s3.put_bucket_lifecycle_configuration(Bucket=BUCKET, LifecycleConfiguration={"Rules": [other]})
+
+    transcribe.ensure_media_lifecycle_rule(7)
+    transcribe.ensure_media_lifecycle_rule(7)
+
+    rules = {rule["ID"]: rule for rule in s3.get_bucket_lifecycle_configuration(Bucket=BUCKET)["Rules"]}
+    assert set(rules) == {"keep-me", transcribe.S3_LIFECYCLE_RULE_ID}
+    media_rule = rules[transcribe.S3_LIFECYCLE_RULE_ID]
+    assert media_rule["Filter"] == {"Prefix": transcribe.S3_MEDIA_PREFIX}
+    assert media_rule["Expiration"] == {"Days": 7}
+
+
+def test_lifecycle_failure_is_logged(s3, monkeypatch, caplog):
+    monkeypatch.setattr(transcribe, "S3_MEDIA_EXPIRE_DAYS", 7)
+    monkeypatch.setattr(transcribe, "S3_BUCKET", "missing-bucket")
+
+    with caplog.at_level(logging.WARNING, logger=transcribe.__name__):
+        transcribe._ensure_lifecycle_once()
+
+    assert "Could not set S3 lifecycle rule on missing-bucket" in caplog.text
+
+
+def test_shared_media_stays_in_s3_after_transcription(s3, media_file, monkeypatch):
+    path = media_file(4096)
+    sha256 = transcribe.file_sha256(path)
+    key = transcribe.media_s3_key(sha256, "mp4")
+    monkeypatch.setattr(transcribe, "start_transcription_job", lambda *args, **kwargs: {})
+    monkeypatch.setattr(
+        transcribe,
+        "wait_for_job_completion",
+        lambda job_name: {"TranscriptionJob": {"Transcript": {"TranscriptFileUri": "memory://"}}},
+    )
+    monkeypatch.setattr(transcribe, "get_transcription_result", lambda uri: "hello")
+
+    result = transcribe._transcribe_media(
+        lambda s3_key: transcribe.upload_to_s3(path, s3_key), "interview.mp4", "mp4", "en-US", sha256
+    )
+
+    assert result["transcription"] == "hello"
+    # Another job for the same media may still be reading this key.
+    assert transcribe.s3_object_exists(key)
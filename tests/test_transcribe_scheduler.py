@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import os
+import threading
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from src.ai import interview_zip, transcribe_scheduler, transcript_cache
+from src.ai.transcribe_scheduler import SharedTempFile, schedule_cached_transcription
+
+MEDIA = b"interview audio" * 1000
+SHA256 = hashlib.sha256(MEDIA).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def scheduler(monkeypatch, tmp_path):
+    monkeypatch.setattr(transcript_cache, "TRANSCRIPT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(transcribe_scheduler, "_scheduler", transcribe_scheduler.TranscriptionScheduler(2))
+    monkeypatch.setattr(transcribe_scheduler, "_inflight", {})
+
+
+@pytest.fixture
+def gate():
+    """Blocks every fake transcription until set, so callers overlap."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def write(path, data: bytes = MEDIA) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+
+async def wait_until(predicate) -> None:
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_joined_caller_outlives_the_request_that_started_the_job(tmp_path, gate):
+    first_path = write(tmp_path / "first.mp4")
+    second_path = write(tmp_path / "second.mp4")
+
+    def transcribe(path):
+        gate.wait(5)
+        with open(path, "rb") as media:
+            return {"transcription": hashlib.sha256(media.read()).hexdigest()}
+
+    async def request(path):
+        # Same handling as /ai/transcribe: hand the temp file over, then release it.
+        media_file = SharedTempFile(path)
+        try:
+            return await schedule_cached_transcription(
+                SHA256, "en-US", transcribe, path, input_file=media_file
+            )
+        finally:
+            media_file.release()
+
+    async def run():
+        first = asyncio.ensure_future(request(first_path))
+        await wait_until(lambda: transcribe_scheduler._inflight)
+        second = asyncio.ensure_future(request(second_path))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # The joined caller's own upload is no longer needed; the job's input is.
+        assert os.path.exists(first_path)
+
+        gate.set()
+        result = await second
+        await wait_until(lambda: not os.path.exists(first_path))
+        return result
+
+    result = asyncio.run(run())
+
+    assert result == {"transcription": SHA256}
+    assert not os.path.exists(second_path)
+
+
+def test_zip_member_job_outlives_the_request_that_started_it(tmp_path, gate, monkeypatch):
+    def make_zip(name):
+        path = tmp_path / name
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("questions_list.txt", "1. Tell us about yourself")
+            archive.writestr("Question1_intro.mp4", MEDIA)
+        return str(path)
+
+    def transcribe_stream(open_stream, filename, language_code, sha256):
+        gate.wait(5)
+        with open_stream() as member:
+            return {"transcription": hashlib.sha256(member.read()).hexdigest()}
+
+    monkeypatch.setattr(interview_zip, "transcribe_stream", transcribe_stream)
+    first_zip = SharedTempFile(make_zip("first.zip"))
+    second_zip = SharedTempFile(make_zip("second.zip"))
+
+    async def request(zip_file):
+        # Same handling as /ai/process-interview-zip.
+        try:
+            return await interview_zip.process_interview_zip(zip_file)
+        finally:
+            zip_file.release()
+
+    async def run():
+        first = asyncio.ensure_future(request(first_zip))
+        await wait_until(lambda: transcribe_scheduler._inflight)
+        second = asyncio.ensure_future(request(second_zip))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert os.path.exists(first_zip.path)
+
+        gate.set()
+        qa_pairs = await second
+        await wait_until(lambda: not os.path.exists(first_zip.path))
+        return qa_pairs
+
+    qa_pairs = asyncio.run(run())
+
+    assert qa_pairs == [
+        {"question_number": 1, "question": "Tell us about yourself", "answer": SHA256}
+    ]
+    assert not os.path.exists(second_zip.path)
+
+
+def test_throttled_job_gives_up_its_slot_during_backoff():
+    single = transcribe_scheduler.TranscriptionScheduler(1, retry_base_delay=0.2, retry_max_delay=0.2)
+    order = []
+
+    def throttled_once():
+        order.append("throttled")
+        if order.count("throttled") == 1:
+            raise HTTPException(status_code=429, detail="slow down")
+        return "throttled done"
+
+    def other():
+        order.append("other")
+        return "other done"
+
+    async def run():
+        throttled = asyncio.ensure_future(single.run("zip", throttled_once))
+        await wait_until(lambda: order)
+        # Queued behind the throttled job's first attempt; runs during its backoff.
+        return await asyncio.gather(throttled, single.run("upload", other))
+
+    assert asyncio.run(run()) == ["throttled done", "other done"]
+    assert order == ["throttled", "other", "throttled"]
+    assert single.metrics()["active"] == 0
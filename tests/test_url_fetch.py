@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from src.ai import http_client, url_fetch
+
+BODY = os.urandom(3 * 1024 * 1024 + 123)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch, tmp_path):
+    monkeypatch.setattr(url_fetch, "DOWNLOAD_RETRY_DELAY", 0)
+    monkeypatch.setattr(url_fetch.tempfile, "tempdir", str(tmp_path))
+
+
+def download(url: str) -> url_fetch.DownloadedFile:
+    async def run():
+        try:
+            return await url_fetch.download_url(url)
+        finally:
+            await http_client.close_http_clients()
+
+    return asyncio.run(run())
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def test_download_streams_body_and_hash(media_server):
+    media = media_server(BODY)
+
+    downloaded = download(media.url("/media/my interview.mp4"))
+
+    assert downloaded.filename == "my interview.mp4"
+    assert downloaded.size == len(BODY)
+    assert downloaded.sha256 == hashlib.sha256(BODY).hexdigest()
+    assert read(downloaded.path) == BODY
+    assert media.ranges == [None]
+
+
+def test_cut_connection_resumes_with_range(media_server):
+    media = media_server(BODY)
+    media.cut_after = 2 * 1024 * 1024 + 500
+
+    downloaded = download(media.url())
+
+    assert read(downloaded.path) == BODY
+    assert downloaded.sha256 == hashlib.sha256(BODY).hexdigest()
+    assert len(media.ranges) == 2
+    offset = int(media.ranges[1].split("=", 1)[1].rstrip("-"))
+    assert 0 < offset <= media.cut_after
+
+
+def test_server_ignoring_range_restarts_from_scratch(media_server):
+    media = media_server(BODY)
+    media.cut_after = 2 * 1024 * 1024 + 500
+    media.honour_range = False
+
+    downloaded = download(media.url())
+
+    assert media.ranges[1] is not None
+    assert downloaded.size == len(BODY)
+    assert read(downloaded.path) == BODY
+    assert downloaded.sha256 == hashlib.sha256(BODY).hexdigest()
+
+
+def test_content_length_over_cap_is_rejected(media_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(url_fetch, "MAX_DOWNLOAD_BYTES", len(BODY) - 1)
+    media = media_server(BODY)
+
+    with pytest.raises(HTTPException) as exc_info:
+        download(media.url())
+
+    assert exc_info.value.status_code == 400
+    assert "maximum download size" in exc_info.value.detail
+    assert os.listdir(tmp_path) == []
+
+
+def test_streamed_body_over_cap_is_rejected(media_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(url_fetch, "MAX_DOWNLOAD_BYTES", len(BODY) - 1)
+    media = media_server(BODY)
+    media.send_length = False
+
+    with pytest.raises(HTTPException) as exc_info:
+        download(media.url())
+
+    assert exc_info.value.status_code == 400
+    assert "maximum download size" in exc_info.value.detail
+    assert os.listdir(tmp_path) == []